@@ -0,0 +1,34 @@
+"""add per-stage timings to answer_analysis
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-16 12:00:00.000000
+
+Deep analysis pipeline выполняется как DAG стадий (analyze, save_analysis,
+extract_personality, update_personality, vectorize). Время каждой стадии
+пишется рядом с background_task_duration_ms.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """{stage: duration_ms} для каждого background analysis"""
+    op.execute("""
+        ALTER TABLE selfology.answer_analysis
+        ADD COLUMN IF NOT EXISTS background_stage_timings JSONB
+    """)
+
+
+def downgrade():
+    op.execute("""
+        ALTER TABLE selfology.answer_analysis
+        DROP COLUMN IF EXISTS background_stage_timings
+    """)
@@ -0,0 +1,52 @@
+"""notify outbox relay on event_outbox insert
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-16 14:00:00.000000
+
+OutboxRelay слушает канал event_outbox и просыпается сразу после commit
+транзакции с новым событием, вместо опроса таблицы раз в polling_interval.
+Триггер statement-level: один NOTIFY на INSERT, сколько бы строк он ни вставил.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """pg_notify('event_outbox') после каждого INSERT в outbox"""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION selfology.notify_event_outbox()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM pg_notify('event_outbox', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        DROP TRIGGER IF EXISTS trg_event_outbox_notify ON selfology.event_outbox
+    """)
+
+    op.execute("""
+        CREATE TRIGGER trg_event_outbox_notify
+        AFTER INSERT ON selfology.event_outbox
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION selfology.notify_event_outbox()
+    """)
+
+
+def downgrade():
+    op.execute("""
+        DROP TRIGGER IF EXISTS trg_event_outbox_notify ON selfology.event_outbox
+    """)
+    op.execute("""
+        DROP FUNCTION IF EXISTS selfology.notify_event_outbox()
+    """)
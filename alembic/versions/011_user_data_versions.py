@@ -0,0 +1,120 @@
+"""user data versions for dossier invalidation
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-16 16:00:00.000000
+
+UserDossierService проверял актуальность досье двумя запросами на каждое
+обращение (COUNT(*) ответов + updated_at личности). Теперь триггеры ведут
+монотонные версии в selfology.user_data_versions и шлют их в канал
+user_data_version - сервис держит версии в Redis рядом с досье.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Таблица версий + триггеры на ответы и digital_personality"""
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS selfology.user_data_versions (
+            user_id BIGINT PRIMARY KEY,
+            answers_count BIGINT NOT NULL DEFAULT 0,
+            personality_version BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION selfology.bump_user_data_version()
+        RETURNS TRIGGER AS $$
+        DECLARE
+            v_row selfology.user_data_versions;
+        BEGIN
+            INSERT INTO selfology.user_data_versions AS v (
+                user_id, answers_count, personality_version
+            )
+            VALUES (
+                NEW.user_id,
+                CASE WHEN TG_ARGV[0] = 'answers' THEN 1 ELSE 0 END,
+                CASE WHEN TG_ARGV[0] = 'personality' THEN 1 ELSE 0 END
+            )
+            ON CONFLICT (user_id) DO UPDATE SET
+                answers_count = v.answers_count + EXCLUDED.answers_count,
+                personality_version = v.personality_version + EXCLUDED.personality_version,
+                updated_at = NOW()
+            RETURNING * INTO v_row;
+
+            -- Абсолютные значения: слушатели в любом числе процессов пишут одно и то же
+            PERFORM pg_notify('user_data_version', json_build_object(
+                'user_id', v_row.user_id,
+                'answers', v_row.answers_count,
+                'personality', v_row.personality_version
+            )::text);
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        DROP TRIGGER IF EXISTS trg_digital_personality_version ON selfology.digital_personality
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_digital_personality_version
+        AFTER INSERT OR UPDATE ON selfology.digital_personality
+        FOR EACH ROW
+        EXECUTE FUNCTION selfology.bump_user_data_version('personality')
+    """)
+
+    # user_answers_v2 создается вне alembic (onboarding v2) - триггер только если таблица есть
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('selfology.user_answers_v2') IS NOT NULL THEN
+                DROP TRIGGER IF EXISTS trg_user_answers_v2_version ON selfology.user_answers_v2;
+                CREATE TRIGGER trg_user_answers_v2_version
+                AFTER INSERT ON selfology.user_answers_v2
+                FOR EACH ROW
+                EXECUTE FUNCTION selfology.bump_user_data_version('answers');
+
+                INSERT INTO selfology.user_data_versions (user_id, answers_count)
+                SELECT user_id, COUNT(*) FROM selfology.user_answers_v2 GROUP BY user_id
+                ON CONFLICT (user_id) DO UPDATE SET answers_count = EXCLUDED.answers_count;
+            END IF;
+        END
+        $$
+    """)
+
+    op.execute("""
+        INSERT INTO selfology.user_data_versions (user_id, personality_version)
+        SELECT user_id, 1 FROM selfology.digital_personality
+        ON CONFLICT (user_id) DO UPDATE SET personality_version = 1
+    """)
+
+
+def downgrade():
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('selfology.user_answers_v2') IS NOT NULL THEN
+                DROP TRIGGER IF EXISTS trg_user_answers_v2_version ON selfology.user_answers_v2;
+            END IF;
+        END
+        $$
+    """)
+    op.execute("""
+        DROP TRIGGER IF EXISTS trg_digital_personality_version ON selfology.digital_personality
+    """)
+    op.execute("""
+        DROP FUNCTION IF EXISTS selfology.bump_user_data_version()
+    """)
+    op.execute("""
+        DROP TABLE IF EXISTS selfology.user_data_versions
+    """)
@@ -102,7 +102,8 @@ class Config:
             "chat_coach": {
                 "context_window": 10,  # Last 10 messages
                 "personality_weight": 0.7,  # How much personality influences responses
-                "memory_retention_days": 30
+                "memory_retention_days": 30,
+                "context_cache_ttl": 30  # Seconds; onboarding answers/stories cached until invalidated
             },
             "statistics": {
                 "cache_ttl": 300,  # 5 minutes
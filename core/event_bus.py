@@ -9,6 +9,7 @@ Features:
 - Priority queues (CRITICAL/HIGH/NORMAL/LOW)
 - Dead Letter Queue (DLQ)
 - Event compression для больших payload
+- Согласуемые кодеки payload (json / msgpack / msgpack+zstd со словарем)
 - Integration с Outbox Pattern
 - Distributed tracing (Trace ID)
 - Metrics и monitoring
@@ -47,10 +48,12 @@ Usage:
 import asyncio
 import json
 import logging
-import zlib
+import time
+from collections import defaultdict, deque
 from datetime import datetime
-from typing import Dict, Any, Optional, List, Callable, Awaitable
-from dataclasses import dataclass
+from functools import partial
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Set, Iterator, Tuple
+from dataclasses import dataclass, field
 
 import redis.asyncio as redis
 
@@ -60,6 +63,16 @@ from core.domain_events import (
     EventRegistry,
     serialize_event
 )
+from core.event_codec import (
+    CODEC_JSON,
+    CODEC_JSON_ZLIB,
+    CODEC_MSGPACK,
+    CODEC_MSGPACK_ZSTD,
+    EventCodecs,
+    MissingDictionaryError,
+    entry_codec,
+    negotiate_codec
+)
 
 logger = logging.getLogger(__name__)
 
@@ -75,9 +88,21 @@ class EventBusConfig:
     stream_prefix: str = "selfology:events"
     max_stream_length: int = 10000  # Максимум событий в stream (MAXLEN)
     compression_threshold: int = 1024  # Сжимать если payload > 1KB
+    codec: str = CODEC_JSON  # Лучший допустимый кодек: json | msgpack | msgpack+zstd
+    codec_refresh_s: int = 60  # Период пересогласования кодека с consumer groups
     dlq_stream: str = "selfology:events:dlq"
     consumer_block_ms: int = 5000  # Timeout для blocking read
     batch_size: int = 100  # Количество событий в batch
+    ack_flush_ms: int = 100  # Max задержка XACK пока есть события в обработке
+    priority_mode: str = "strict"  # fifo | strict | weighted (см. PriorityReadScheduler)
+    priority_weights: Dict[str, int] = field(default_factory=lambda: {
+        "critical": 8, "high": 4, "normal": 2, "low": 1
+    })
+    starvation_ms: int = 1000  # strict: stream без чтения дольше - получает min_share
+    reclaim_interval_ms: int = 30000  # Период XAUTOCLAIM зависших событий (0 = выключен)
+    claim_idle_ms: int = 60000  # Событие в PEL дольше - забирается другим consumer
+    max_deliveries: int = 5  # После N доставок событие уходит в DLQ
+    reclaim_batch: int = 100  # COUNT для XAUTOCLAIM
 
 
 # ============================================================================
@@ -117,12 +142,23 @@ class EventBus:
             EventPriority.LOW: f"{self.config.stream_prefix}:low",
         }
 
+        # Кодеки payload: согласуются с зарегистрированными consumer groups
+        self.codecs = EventCodecs(self.config.compression_threshold)
+        self.codec = CODEC_JSON
+        self._codec_negotiated_at: Optional[float] = None
+        self.codecs_key = f"{self.config.stream_prefix}:codecs"
+        self.dictionaries_key = f"{self.config.stream_prefix}:codec:dicts"
+        self.active_dictionary_key = f"{self.config.stream_prefix}:codec:active_dict"
+
         # Metrics
         self.stats = {
             "events_published": 0,
             "events_compressed": 0,
             "total_payload_bytes": 0,
-            "errors": 0
+            "encoded_payload_bytes": 0,
+            "errors": 0,
+            "events_dead_lettered": 0,
+            "events_replayed": 0
         }
 
     async def connect(self):
@@ -168,37 +204,10 @@ class EventBus:
             )
         """
         try:
-            # Валидация события через EventRegistry
-            try:
-                EventRegistry.validate_event(event_type, payload)
-            except ValueError as e:
-                logger.warning(f"Event validation failed: {e}. Publishing anyway.")
-
-            # Сериализация payload
-            serialized = json.dumps(payload).encode('utf-8')
-            payload_size = len(serialized)
-
-            # Compression если нужно
-            compressed = False
-            if payload_size > self.config.compression_threshold:
-                serialized = zlib.compress(serialized)
-                compressed = True
-                self.stats["events_compressed"] += 1
-
-            # Подготовка данных для Redis Stream
-            stream_data = {
-                b"event_type": event_type.encode('utf-8'),
-                b"payload": serialized,
-                b"compressed": b"1" if compressed else b"0",
-                b"priority": priority.value.encode('utf-8'),
-                b"timestamp": datetime.now().isoformat().encode('utf-8'),
-            }
-
-            if trace_id:
-                stream_data[b"trace_id"] = trace_id.encode('utf-8')
-
-            # Выбираем stream по приоритету
-            stream_name = self.streams[priority]
+            await self._maybe_negotiate_codec()
+            stream_name, stream_data, payload_size, compressed = self._encode_event(
+                event_type, payload, priority, trace_id
+            )
 
             # XADD с MAXLEN для ограничения размера
             event_id = await self.redis.xadd(
@@ -211,6 +220,7 @@ class EventBus:
             # Metrics
             self.stats["events_published"] += 1
             self.stats["total_payload_bytes"] += payload_size
+            self.stats["encoded_payload_bytes"] += len(stream_data[b"payload"])
 
             logger.debug(
                 f"Event published: {event_type} "
@@ -225,6 +235,173 @@ class EventBus:
             logger.error(f"Failed to publish event {event_type}: {e}", exc_info=True)
             raise
 
+    async def publish_many(
+        self,
+        events: List[Dict[str, Any]]
+    ) -> List[Any]:
+        """
+        Публикует несколько событий одним pipeline (один round trip в Redis)
+
+        Args:
+            events: Список dict с ключами event_type, payload
+                    и опционально priority, trace_id
+
+        Returns:
+            Список той же длины: Event ID (str) или Exception для события,
+            которое не удалось закодировать или записать
+
+        Example:
+            results = await event_bus.publish_many([
+                {"event_type": "user.answer.submitted", "payload": {...}},
+                {"event_type": "profile.updated", "payload": {...}, "trace_id": "req_abc"},
+            ])
+        """
+        results: List[Any] = [None] * len(events)
+        queued: List[tuple] = []  # (index, payload_size, encoded_size)
+
+        await self._maybe_negotiate_codec()
+        pipe = self.redis.pipeline(transaction=False)
+        for index, event in enumerate(events):
+            try:
+                stream_name, stream_data, payload_size, _ = self._encode_event(
+                    event["event_type"],
+                    event["payload"],
+                    event.get("priority") or EventPriority.NORMAL,
+                    event.get("trace_id")
+                )
+            except Exception as e:
+                results[index] = e
+                continue
+
+            pipe.xadd(
+                stream_name,
+                stream_data,
+                maxlen=self.config.max_stream_length,
+                approximate=True
+            )
+            queued.append((index, payload_size, len(stream_data[b"payload"])))
+
+        if queued:
+            try:
+                replies = await pipe.execute(raise_on_error=False)
+            except Exception as e:
+                # Соединение упало - ни одно событие не считаем опубликованным
+                replies = [e] * len(queued)
+
+            for (index, payload_size, encoded_size), reply in zip(queued, replies):
+                if isinstance(reply, Exception):
+                    results[index] = reply
+                else:
+                    results[index] = reply.decode() if isinstance(reply, bytes) else reply
+                    self.stats["events_published"] += 1
+                    self.stats["total_payload_bytes"] += payload_size
+                    self.stats["encoded_payload_bytes"] += encoded_size
+
+        failed = sum(1 for result in results if isinstance(result, Exception))
+        if failed:
+            self.stats["errors"] += failed
+            logger.error(f"Failed to publish {failed}/{len(events)} events in batch")
+
+        return results
+
+    def _encode_event(
+        self,
+        event_type: str,
+        payload: Dict[str, Any],
+        priority: EventPriority,
+        trace_id: Optional[str]
+    ) -> tuple:
+        """Валидация, сериализация и сжатие события → (stream, data, size, compressed)"""
+        # Валидация события через EventRegistry
+        try:
+            EventRegistry.validate_event(event_type, payload)
+        except ValueError as e:
+            logger.warning(f"Event validation failed: {e}. Publishing anyway.")
+
+        # Сериализация (+ compression выше порога / со словарем) согласованным кодеком
+        serialized, codec_tag, payload_size = self.codecs.encode(payload, self.codec)
+        compressed = codec_tag not in (CODEC_JSON, CODEC_MSGPACK)
+        if compressed:
+            self.stats["events_compressed"] += 1
+
+        # Подготовка данных для Redis Stream
+        stream_data = {
+            b"event_type": event_type.encode('utf-8'),
+            b"payload": serialized,
+            b"codec": codec_tag.encode('utf-8'),
+            # Для consumer без поддержки codec (понимают только json/zlib)
+            b"compressed": b"1" if codec_tag == CODEC_JSON_ZLIB else b"0",
+            b"priority": priority.value.encode('utf-8'),
+            b"timestamp": datetime.now().isoformat().encode('utf-8'),
+        }
+
+        if trace_id:
+            stream_data[b"trace_id"] = trace_id.encode('utf-8')
+
+        # Выбираем stream по приоритету
+        return self.streams[priority], stream_data, payload_size, compressed
+
+    async def _maybe_negotiate_codec(self):
+        """Пересогласует кодек раз в codec_refresh_s (для json - без обращений к Redis)"""
+        if self.config.codec == CODEC_JSON:
+            return
+        if (
+            self._codec_negotiated_at is not None
+            and time.monotonic() - self._codec_negotiated_at < self.config.codec_refresh_s
+        ):
+            return
+
+        try:
+            await self.negotiate_codec()
+        except Exception as e:
+            # Остаемся на текущем кодеке, повторим через codec_refresh_s
+            self._codec_negotiated_at = time.monotonic()
+            logger.warning(f"Codec negotiation failed, keeping {self.codec}: {e}")
+
+    async def negotiate_codec(self) -> str:
+        """
+        Выбирает лучший кодек не выше config.codec, который понимают все
+        зарегистрированные consumer groups (иначе json)
+        """
+        registered = await self.redis.hgetall(self.codecs_key)
+        remote = [
+            (value.decode() if isinstance(value, bytes) else value).split(",")
+            for value in registered.values()
+        ]
+        codec = negotiate_codec(self.config.codec, self.codecs.supported(), remote)
+
+        if codec == CODEC_MSGPACK_ZSTD:
+            active = await self.redis.get(self.active_dictionary_key)
+            dict_id = int(active) if active else None
+            if dict_id is not None and (dict_id in self.codecs.dictionaries or await self.load_dictionary(dict_id)):
+                self.codecs.active_dict_id = dict_id
+
+        if codec != self.codec:
+            logger.info(f"Event payload codec: {self.codec} → {codec} ({len(remote)} consumer groups)")
+        self.codec = codec
+        self._codec_negotiated_at = time.monotonic()
+        return codec
+
+    async def register_codecs(self, consumer_group: str):
+        """Объявляет кодеки, которые умеет декодировать consumer group"""
+        await self.redis.hset(self.codecs_key, consumer_group, ",".join(self.codecs.supported()))
+
+    async def load_dictionary(self, dict_id: int) -> bool:
+        """Загружает zstd словарь из Redis по dict_id"""
+        raw = await self.redis.hget(self.dictionaries_key, str(dict_id))
+        if not raw:
+            return False
+        self.codecs.add_dictionary(raw)
+        return True
+
+    async def store_dictionary(self, raw: bytes, activate: bool = True) -> int:
+        """Сохраняет обученный словарь в Redis (и делает активным для producer)"""
+        dict_id = self.codecs.add_dictionary(raw, activate=activate)
+        await self.redis.hset(self.dictionaries_key, str(dict_id), raw)
+        if activate:
+            await self.redis.set(self.active_dictionary_key, str(dict_id))
+        return dict_id
+
     async def publish_event(
         self,
         event: BaseDomainEvent
@@ -286,6 +463,122 @@ class EventBus:
             f"(retry_count={retry_count}, error={error})"
         )
 
+    async def move_to_dlq(
+        self,
+        stream_name: str,
+        message_id: str,
+        data: Dict[bytes, bytes],
+        consumer_group: str,
+        error: str,
+        deliveries: int
+    ):
+        """
+        Переносит сообщение stream в DLQ и снимает его с PEL группы
+
+        Оригинальные поля сохраняются как есть (payload может быть сжат),
+        метаданные добавляются полями dlq_*. XADD и XACK идут одной
+        транзакцией - сообщение не теряется и не остается в PEL.
+        """
+        dlq_data = dict(data)
+        dlq_data.update({
+            b"dlq_original_stream": stream_name.encode('utf-8'),
+            b"dlq_original_id": message_id.encode('utf-8'),
+            b"dlq_consumer_group": consumer_group.encode('utf-8'),
+            b"dlq_error": error[:1000].encode('utf-8'),
+            b"dlq_deliveries": str(deliveries).encode('utf-8'),
+            b"dlq_failed_at": datetime.now().isoformat().encode('utf-8'),
+        })
+
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.xadd(
+            self.config.dlq_stream,
+            dlq_data,
+            maxlen=self.config.max_stream_length,
+            approximate=True
+        )
+        pipe.xack(stream_name, consumer_group, message_id)
+        await pipe.execute()
+
+        self.stats["events_dead_lettered"] += 1
+        logger.error(
+            f"Event moved to DLQ: {message_id} from {stream_name} "
+            f"(group={consumer_group}, deliveries={deliveries}, error={error})"
+        )
+
+    async def read_dlq(
+        self,
+        count: int = 100,
+        start_id: str = "-"
+    ) -> List[Tuple[str, Dict[bytes, bytes]]]:
+        """Читает сообщения DLQ (от старых к новым)"""
+        entries = await self.redis.xrange(self.config.dlq_stream, min=start_id, max="+", count=count)
+        return [
+            (message_id.decode() if isinstance(message_id, bytes) else message_id, data)
+            for message_id, data in entries
+        ]
+
+    async def replay_dlq(
+        self,
+        message_ids: Optional[List[str]] = None,
+        event_type: Optional[str] = None,
+        limit: int = 100,
+        dry_run: bool = False
+    ) -> Dict[str, int]:
+        """
+        Возвращает сообщения из DLQ в исходные streams
+
+        Args:
+            message_ids: Только эти ID DLQ (None = первые limit сообщений)
+            event_type: Только события этого типа
+            limit: Максимум сообщений за вызов
+            dry_run: Только посчитать, ничего не менять
+
+        Returns:
+            {"replayed": N, "skipped": M}
+
+        Сообщение добавляется в исходный stream как новое (новый ID,
+        счетчик доставок с нуля) и удаляется из DLQ одной транзакцией.
+        Записи старого формата publish_to_dlq (без dlq_original_stream)
+        пропускаются.
+        """
+        if message_ids:
+            entries = []
+            for message_id in message_ids[:limit]:
+                entries.extend(await self.read_dlq(count=1, start_id=message_id))
+            entries = [entry for entry in entries if entry[0] in message_ids]
+        else:
+            entries = await self.read_dlq(count=limit)
+
+        result = {"replayed": 0, "skipped": 0}
+        for message_id, data in entries:
+            original_stream = data.get(b"dlq_original_stream")
+            if not original_stream or (
+                event_type and data.get(b"event_type", b"").decode('utf-8') != event_type
+            ):
+                result["skipped"] += 1
+                continue
+
+            if not dry_run:
+                fields = {key: value for key, value in data.items() if not key.startswith(b"dlq_")}
+                pipe = self.redis.pipeline(transaction=True)
+                pipe.xadd(
+                    original_stream.decode('utf-8'),
+                    fields,
+                    maxlen=self.config.max_stream_length,
+                    approximate=True
+                )
+                pipe.xdel(self.config.dlq_stream, message_id)
+                await pipe.execute()
+                self.stats["events_replayed"] += 1
+
+            result["replayed"] += 1
+
+        logger.info(
+            f"DLQ replay{' (dry run)' if dry_run else ''}: "
+            f"{result['replayed']} replayed, {result['skipped']} skipped"
+        )
+        return result
+
     def get_stats(self) -> Dict[str, Any]:
         """Возвращает статистику Event Bus"""
         return {
@@ -297,6 +590,101 @@ class EventBus:
         }
 
 
+# ============================================================================
+# PRIORITY SCHEDULING
+# ============================================================================
+
+PRIORITY_ORDER = [EventPriority.CRITICAL, EventPriority.HIGH, EventPriority.NORMAL, EventPriority.LOW]
+
+
+class PriorityReadScheduler:
+    """
+    Порядок и объем чтения priority streams на один цикл consumer
+
+    Режимы:
+    - fifo: один XREADGROUP по всем streams (приоритеты не учитываются)
+    - strict: streams читаются от CRITICAL к LOW, пока не исчерпан бюджет;
+      stream, который не опрашивался дольше starvation_ms, в начале цикла
+      получает min_share событий
+    - weighted: deficit round robin по весам; бюджет, не использованный
+      опустевшими streams, отдается остальным по приоритету
+    """
+
+    MODES = ("fifo", "strict", "weighted")
+
+    def __init__(
+        self,
+        streams: List[Tuple[EventPriority, str]],
+        mode: str = "strict",
+        weights: Optional[Dict[str, int]] = None,
+        starvation_ms: int = 1000,
+        min_share: int = 1
+    ):
+        """
+        Args:
+            streams: Пары (priority, stream_name)
+            mode: fifo | strict | weighted
+            weights: Веса по priority.value (для weighted)
+            starvation_ms: Порог голодания stream (для strict)
+            min_share: Сколько событий читать из голодающего stream
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown priority mode: {mode} (expected one of {self.MODES})")
+
+        self.mode = mode
+        ordered = sorted(streams, key=lambda item: PRIORITY_ORDER.index(item[0]))
+        self.streams = [name for _, name in ordered]
+        weights = weights or {}
+        self.weights = {name: max(1, weights.get(priority.value, 1)) for priority, name in ordered}
+        self.starvation = starvation_ms / 1000
+        self.min_share = max(1, min_share)
+
+        now = time.monotonic()
+        self.deficits: Dict[str, float] = {name: 0.0 for name in self.streams}
+        self.last_polled: Dict[str, float] = {name: now for name in self.streams}
+        self._drained: Set[str] = set()
+
+    def plan(self, budget: int) -> Iterator[Tuple[str, int]]:
+        """
+        Чтения цикла: (stream, count)
+
+        Генератор ленивый - учитывает record() уже выполненных чтений.
+        Вызывающий ограничивает count остатком бюджета и прекращает
+        итерацию, когда бюджет исчерпан.
+        """
+        self._drained = set()
+
+        if self.mode == "strict":
+            now = time.monotonic()
+            for name in self.streams:
+                if now - self.last_polled[name] >= self.starvation:
+                    yield name, self.min_share
+
+        elif self.mode == "weighted":
+            total_weight = sum(self.weights.values())
+            for name in self.streams:
+                self.deficits[name] += budget * self.weights[name] / total_weight
+                quota = int(self.deficits[name])
+                if quota > 0:
+                    yield name, quota
+
+        # Остаток бюджета - строго по приоритету (work-conserving)
+        for name in self.streams:
+            if name not in self._drained:
+                yield name, budget
+
+    def record(self, stream_name: str, requested: int, received: int):
+        """Результат чтения из stream"""
+        self.last_polled[stream_name] = time.monotonic()
+        drained = received < requested
+        if drained:
+            self._drained.add(stream_name)
+
+        if self.mode == "weighted":
+            # Опустевший stream не копит кредит (иначе потом вытеснит остальных)
+            self.deficits[stream_name] = 0.0 if drained else max(0.0, self.deficits[stream_name] - received)
+
+
 # ============================================================================
 # EVENT CONSUMER
 # ============================================================================
@@ -308,9 +696,22 @@ class EventConsumer:
     Features:
     - Consumer Groups (distributed processing)
     - Batch processing
-    - Automatic retry
-    - ACK/NACK
+    - Concurrent handlers (max_in_flight) с порядком внутри ключа
+    - Automatic retry (XAUTOCLAIM событий, зависших в PEL)
+    - Dead Letter Queue после max_deliveries доставок
+    - ACK/NACK (один pipelined XACK на пачку)
     - Health monitoring
+
+    Упавшее событие не подтверждается и остается в PEL. Фоновый reclaimer
+    раз в reclaim_interval_ms забирает через XAUTOCLAIM события, которые
+    простаивают дольше claim_idle_ms (упавшие здесь или у остановившегося
+    consumer), и обрабатывает их снова; после max_deliveries доставок
+    событие переносится в DLQ.
+
+    Чтение не ждет медленные обработчики: события раздаются в задачи,
+    пока в работе меньше max_pending. События с одинаковым ordering_key
+    (по умолчанию payload["user_id"]) выполняются строго по порядку,
+    события без ключа - независимо.
     """
 
     def __init__(
@@ -320,7 +721,11 @@ class EventConsumer:
         consumer_name: str,
         event_types: Optional[List[str]] = None,
         priorities: Optional[List[EventPriority]] = None,
-        handler: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None
+        handler: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None,
+        max_in_flight: int = 1,
+        ordering_key: Optional[str] = "user_id",
+        max_pending: Optional[int] = None,
+        priority_mode: Optional[str] = None
     ):
         """
         Args:
@@ -330,6 +735,11 @@ class EventConsumer:
             event_types: Фильтр по типам событий (None = все)
             priorities: Фильтр по приоритетам (None = все)
             handler: Async функция обработки события
+            max_in_flight: Максимум одновременно выполняемых handler
+            ordering_key: Поле payload для порядка внутри ключа (None = без порядка)
+            max_pending: Максимум прочитанных, но не обработанных событий
+                         (по умолчанию batch_size)
+            priority_mode: fifo | strict | weighted (None = из EventBusConfig)
         """
         self.event_bus = event_bus
         self.consumer_group = consumer_group
@@ -337,9 +747,26 @@ class EventConsumer:
         self.event_types = set(event_types) if event_types else None
         self.priorities = priorities or list(EventPriority)
         self.handler = handler
+        self.max_in_flight = max(1, max_in_flight)
+        self.ordering_key = ordering_key
+        self.max_pending = max_pending or max(self.event_bus.config.batch_size, self.max_in_flight)
 
         self._running = False
         self._task: Optional[asyncio.Task] = None
+        self._reclaim_task: Optional[asyncio.Task] = None
+
+        # Диспетчеризация: задачи событий, хвосты цепочек по ключу, буфер ACK
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._tasks: Set[asyncio.Task] = set()
+        self._key_tails: Dict[Any, asyncio.Task] = {}
+        self._acks: Dict[str, List[str]] = defaultdict(list)
+        self._capacity = asyncio.Event()
+        self._in_flight = 0
+        self._latencies: deque = deque(maxlen=1000)
+        self._queue_waits: deque = deque(maxlen=1000)
+        self._dispatched: Set[str] = set()  # ID событий в обработке
+        self._last_errors: Dict[str, str] = {}  # message_id → последняя ошибка
+        self._pending_entries: Dict[str, int] = {}  # Размер PEL группы по stream
 
         # Streams для подписки
         self.streams_to_read = [
@@ -347,12 +774,28 @@ class EventConsumer:
             for priority in self.priorities
         ]
 
+        config = self.event_bus.config
+        self.scheduler = PriorityReadScheduler(
+            [(priority, self.event_bus.streams[priority]) for priority in self.priorities],
+            mode=priority_mode or config.priority_mode,
+            weights=config.priority_weights,
+            starvation_ms=config.starvation_ms,
+            min_share=max(1, config.batch_size // 10)
+        )
+
         # Metrics
         self.stats = {
             "events_processed": 0,
             "events_failed": 0,
             "events_filtered": 0,
-            "processing_time_total": 0.0
+            "processing_time_total": 0.0,
+            "events_acked": 0,
+            "ack_batches": 0,
+            "ack_errors": 0,
+            "events_reclaimed": 0,
+            "events_dead_lettered": 0,
+            "reclaim_runs": 0,
+            "reclaim_errors": 0
         }
 
     async def start(self):
@@ -363,9 +806,12 @@ class EventConsumer:
 
         # Создаем consumer groups если не существуют
         await self._create_consumer_groups()
+        await self.event_bus.register_codecs(self.consumer_group)
 
         self._running = True
         self._task = asyncio.create_task(self._consume_loop())
+        if self.event_bus.config.reclaim_interval_ms > 0:
+            self._reclaim_task = asyncio.create_task(self._reclaim_loop())
 
         logger.info(
             f"Consumer started: {self.consumer_name} "
@@ -378,6 +824,9 @@ class EventConsumer:
             return
 
         self._running = False
+        if self._reclaim_task:
+            self._reclaim_task.cancel()
+            await asyncio.gather(self._reclaim_task, return_exceptions=True)
         if self._task:
             await self._task
 
@@ -409,26 +858,41 @@ class EventConsumer:
             stream_name: '>'
             for stream_name in self.streams_to_read
         }
+        config = self.event_bus.config
 
         while self._running:
             try:
+                await self._flush_acks()
+                await self._wait_for_capacity()
+
+                count = min(config.batch_size, self.max_pending - len(self._tasks))
+                if self.scheduler.mode != "fifo":
+                    if await self._read_prioritized(count):
+                        continue
+                    # Все streams пусты - блокируемся до первого события в любом,
+                    # забираем минимум и возвращаемся к чтению по приоритетам
+                    count = 1
+
+                # Пока события в обработке - короткий block, чтобы ACK не копились
+                block_ms = config.ack_flush_ms if self._tasks else config.consumer_block_ms
+
                 # XREADGROUP - blocking read из нескольких streams
                 results = await self.event_bus.redis.xreadgroup(
                     groupname=self.consumer_group,
                     consumername=self.consumer_name,
                     streams=streams_dict,
-                    count=self.event_bus.config.batch_size,
-                    block=self.event_bus.config.consumer_block_ms
+                    count=count,
+                    block=block_ms
                 )
 
                 if not results:
                     # Timeout - нет новых событий
                     continue
 
-                # Обрабатываем события из всех streams
+                # Раздаем события из всех streams обработчикам
                 for stream_name, messages in results:
                     for message_id, data in messages:
-                        await self._process_event(
+                        self._dispatch(
                             stream_name.decode(),
                             message_id.decode(),
                             data
@@ -440,50 +904,180 @@ class EventConsumer:
                 logger.error(f"Consumer loop error: {e}", exc_info=True)
                 await asyncio.sleep(5)  # Backoff при ошибке
 
-    async def _process_event(
+        await self._drain()
+
+    async def _read_prioritized(self, budget: int) -> int:
+        """Неблокирующие чтения по streams в порядке планировщика → число событий"""
+        read = 0
+        for stream_name, quota in self.scheduler.plan(budget):
+            count = min(quota, budget - read)
+            if count <= 0:
+                break
+
+            results = await self.event_bus.redis.xreadgroup(
+                groupname=self.consumer_group,
+                consumername=self.consumer_name,
+                streams={stream_name: '>'},
+                count=count
+            )
+            messages = results[0][1] if results else []
+            self.scheduler.record(stream_name, count, len(messages))
+
+            for message_id, data in messages:
+                self._dispatch(stream_name, message_id.decode(), data)
+            read += len(messages)
+
+        return read
+
+    async def _wait_for_capacity(self):
+        """Ждет, пока число необработанных событий опустится ниже max_pending"""
+        while len(self._tasks) >= self.max_pending:
+            self._capacity.clear()
+            await self._capacity.wait()
+
+    async def _drain(self):
+        """Дожидается событий в обработке и отправляет оставшиеся ACK"""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        try:
+            await self._flush_acks()
+        except Exception as e:
+            logger.error(f"Failed to flush ACKs on shutdown: {e}")
+
+    def _decode_event(self, data: Dict[bytes, bytes]) -> tuple:
+        """Десериализация события → (event_type, payload)"""
+        event_type = data[b"event_type"].decode('utf-8')
+
+        return event_type, self.event_bus.codecs.decode(data[b"payload"], entry_codec(data))
+
+    def _dispatch(
         self,
         stream_name: str,
         message_id: str,
         data: Dict[bytes, bytes]
     ):
-        """Обрабатывает одно событие"""
-        start_time = datetime.now()
+        """Ставит событие в обработку (в хвост цепочки своего ключа)"""
+        try:
+            event_type, payload = self._decode_event(data)
+        except MissingDictionaryError as e:
+            self._track(asyncio.create_task(
+                self._dispatch_after_dictionary(stream_name, message_id, data, e.dict_id)
+            ))
+            return
+        except Exception as e:
+            # Повторы не помогут - сразу в DLQ
+            self.stats["events_failed"] += 1
+            logger.error(f"Failed to decode event {message_id}: {e}", exc_info=True)
+            self._track(
+                asyncio.create_task(self._dead_letter(stream_name, message_id, data, f"decode error: {e}", 1)),
+                message_id
+            )
+            return
 
+        # Фильтрация по event_type
+        if self.event_types and event_type not in self.event_types:
+            self.stats["events_filtered"] += 1
+            # ACK - событие не для нас
+            self._acks[stream_name].append(message_id)
+            return
+
+        key = None
+        if self.ordering_key and isinstance(payload, dict):
+            key = payload.get(self.ordering_key)
+
+        previous = self._key_tails.get(key) if key is not None else None
+        task = asyncio.create_task(self._run_event(
+            stream_name, message_id, event_type, payload, previous, time.monotonic()
+        ))
+        self._track(task, message_id, key)
+
+    def _track(self, task: asyncio.Task, message_id: Optional[str] = None, key: Any = None):
+        self._tasks.add(task)
+        if message_id is not None:
+            self._dispatched.add(message_id)
+        if key is not None:
+            self._key_tails[key] = task
+        task.add_done_callback(partial(self._on_event_done, message_id, key))
+
+    def _on_event_done(self, message_id: Optional[str], key: Any, task: asyncio.Task):
+        self._tasks.discard(task)
+        if message_id is not None:
+            self._dispatched.discard(message_id)
+        if key is not None and self._key_tails.get(key) is task:
+            del self._key_tails[key]
+        self._capacity.set()
+
+    async def _dispatch_after_dictionary(
+        self,
+        stream_name: str,
+        message_id: str,
+        data: Dict[bytes, bytes],
+        dict_id: int
+    ):
+        """Загружает zstd словарь события и повторяет диспетчеризацию"""
         try:
-            # Десериализация
-            event_type = data[b"event_type"].decode('utf-8')
-            compressed = data.get(b"compressed", b"0") == b"1"
-            payload_bytes = data[b"payload"]
+            loaded = await self.event_bus.load_dictionary(dict_id)
+        except Exception as e:
+            logger.error(f"Failed to load zstd dictionary {dict_id}: {e}")
+            loaded = False
 
-            # Decompression если нужно
-            if compressed:
-                payload_bytes = zlib.decompress(payload_bytes)
+        if loaded:
+            self._dispatch(stream_name, message_id, data)
+        else:
+            # Остается в PEL: reclaimer повторит, после max_deliveries - DLQ
+            self.stats["events_failed"] += 1
+            logger.error(f"zstd dictionary {dict_id} not found, event {message_id} left pending")
 
-            payload = json.loads(payload_bytes.decode('utf-8'))
+    async def _run_event(
+        self,
+        stream_name: str,
+        message_id: str,
+        event_type: str,
+        payload: Dict[str, Any],
+        previous: Optional[asyncio.Task],
+        dispatched_at: float
+    ):
+        """Выполняет событие после предыдущего события того же ключа"""
+        if previous is not None:
+            # Исход предыдущего не важен, важен только порядок
+            await asyncio.wait([previous])
+
+        async with self._slots:
+            self._queue_waits.append(time.monotonic() - dispatched_at)
+            self._in_flight += 1
+            try:
+                if await self._process_event(stream_name, message_id, event_type, payload):
+                    self._acks[stream_name].append(message_id)
+            finally:
+                self._in_flight -= 1
 
-            # Фильтрация по event_type
-            if self.event_types and event_type not in self.event_types:
-                self.stats["events_filtered"] += 1
-                # ACK - событие не для нас
-                await self._ack_event(stream_name, message_id)
-                return
+    async def _process_event(
+        self,
+        stream_name: str,
+        message_id: str,
+        event_type: str,
+        payload: Dict[str, Any]
+    ) -> bool:
+        """Обрабатывает одно событие, True - событие можно подтвердить"""
+        start_time = time.monotonic()
 
+        try:
             # Обработка события
             if self.handler:
                 await self.handler(event_type, payload)
 
-            # ACK - успешно обработано
-            await self._ack_event(stream_name, message_id)
-
             # Metrics
             self.stats["events_processed"] += 1
-            elapsed = (datetime.now() - start_time).total_seconds()
+            elapsed = time.monotonic() - start_time
             self.stats["processing_time_total"] += elapsed
+            self._latencies.append(elapsed)
 
             logger.debug(
                 f"Event processed: {event_type} "
                 f"(id={message_id}, time={elapsed:.3f}s)"
             )
+            self._last_errors.pop(message_id, None)
+            return True
 
         except Exception as e:
             self.stats["events_failed"] += 1
@@ -492,16 +1086,151 @@ class EventConsumer:
                 exc_info=True
             )
 
-            # Можно отправить в DLQ
-            # await self.event_bus.publish_to_dlq(...)
+            # Остается в PEL - reclaimer повторит или перенесет в DLQ
+            self._last_errors[message_id] = f"{type(e).__name__}: {e}"
+            if len(self._last_errors) > 10000:
+                del self._last_errors[next(iter(self._last_errors))]
+            return False
 
-    async def _ack_event(self, stream_name: str, message_id: str):
-        """ACK события (удаление из pending)"""
-        await self.event_bus.redis.xack(
-            stream_name,
-            self.consumer_group,
-            message_id
-        )
+    async def _dead_letter(
+        self,
+        stream_name: str,
+        message_id: str,
+        data: Dict[bytes, bytes],
+        error: str,
+        deliveries: int
+    ):
+        """Перенос в DLQ (если не удался - событие остается в PEL и будет забрано снова)"""
+        try:
+            await self.event_bus.move_to_dlq(
+                stream_name, message_id, data, self.consumer_group, error, deliveries
+            )
+            self.stats["events_dead_lettered"] += 1
+            self._last_errors.pop(message_id, None)
+        except Exception as e:
+            logger.error(f"Failed to move event {message_id} to DLQ: {e}", exc_info=True)
+
+    async def _reclaim_loop(self):
+        """Периодический XAUTOCLAIM зависших событий всех streams"""
+        interval = self.event_bus.config.reclaim_interval_ms / 1000
+
+        while self._running:
+            try:
+                await asyncio.sleep(interval)
+                for stream_name in self.streams_to_read:
+                    await self._reclaim_stream(stream_name)
+                self.stats["reclaim_runs"] += 1
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.stats["reclaim_errors"] += 1
+                logger.error(f"Reclaim loop error: {e}", exc_info=True)
+
+    async def _reclaim_stream(self, stream_name: str) -> int:
+        """Забирает события, простаивающие в PEL дольше claim_idle_ms → число забранных"""
+        config = self.event_bus.config
+        redis_client = self.event_bus.redis
+        start_id = "0-0"
+        claimed = 0
+
+        while self._running:
+            await self._wait_for_capacity()
+
+            reply = await redis_client.xautoclaim(
+                stream_name,
+                self.consumer_group,
+                self.consumer_name,
+                min_idle_time=config.claim_idle_ms,
+                start_id=start_id,
+                count=config.reclaim_batch
+            )
+            next_id, messages = reply[0], reply[1]
+            if messages:
+                claimed += len(messages)
+                await self._handle_claimed(stream_name, messages)
+
+            start_id = next_id.decode() if isinstance(next_id, bytes) else next_id
+            if start_id == "0-0":
+                break
+
+        summary = await redis_client.xpending(stream_name, self.consumer_group)
+        self._pending_entries[stream_name] = summary["pending"] if summary else 0
+        return claimed
+
+    async def _handle_claimed(self, stream_name: str, messages: List[tuple]):
+        """Повторная обработка забранных событий или перенос в DLQ по числу доставок"""
+        config = self.event_bus.config
+        ids = [
+            message_id.decode() if isinstance(message_id, bytes) else message_id
+            for message_id, _ in messages
+        ]
+
+        to_check = []
+        for message_id, (_, data) in zip(ids, messages):
+            if not data:
+                # Сообщение удалено из stream (MAXLEN), в PEL остался только ID
+                self._acks[stream_name].append(message_id)
+            elif message_id not in self._dispatched:
+                # Иначе еще обрабатывается здесь (handler дольше claim_idle_ms)
+                to_check.append((message_id, data))
+
+        if not to_check:
+            return
+
+        # Счетчики доставок: XPENDING по каждому забранному ID, один pipeline.
+        # Диапазон min..max с count=len(ids) мог вернуть другие ID из PEL
+        # этого consumer и не вернуть часть забранных
+        pipe = self.event_bus.redis.pipeline(transaction=False)
+        for message_id, _ in to_check:
+            pipe.xpending_range(stream_name, self.consumer_group, min=message_id, max=message_id, count=1)
+        pending = await pipe.execute()
+
+        for (message_id, data), entries in zip(to_check, pending):
+            if not entries:
+                # ACK успел пройти между XAUTOCLAIM и XPENDING - событие уже обработано
+                logger.warning(f"Claimed event {message_id} is no longer pending in {stream_name}, skipping")
+                continue
+
+            times_delivered = entries[0]["times_delivered"]
+            if times_delivered > config.max_deliveries:
+                error = self._last_errors.get(message_id, "unknown (failed in another consumer)")
+                await self._dead_letter(
+                    stream_name, message_id, data,
+                    f"max deliveries exceeded ({times_delivered}): {error}", times_delivered
+                )
+                continue
+
+            self.stats["events_reclaimed"] += 1
+            self._dispatch(stream_name, message_id, data)
+
+    async def _flush_acks(self):
+        """ACK накопленных событий: один XACK с пачкой ID на stream, один round trip"""
+        if not self._acks:
+            return
+
+        acks, self._acks = self._acks, defaultdict(list)
+        pipe = self.event_bus.redis.pipeline(transaction=False)
+        for stream_name, message_ids in acks.items():
+            pipe.xack(stream_name, self.consumer_group, *message_ids)
+
+        try:
+            await pipe.execute()
+        except Exception:
+            # Вернем ID в буфер - повторим на следующем flush
+            self.stats["ack_errors"] += 1
+            for stream_name, message_ids in acks.items():
+                self._acks[stream_name][:0] = message_ids
+            raise
+
+        self.stats["events_acked"] += sum(len(ids) for ids in acks.values())
+        self.stats["ack_batches"] += 1
+
+    @staticmethod
+    def _percentile(values: deque, fraction: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
 
     def get_stats(self) -> Dict[str, Any]:
         """Возвращает статистику consumer"""
@@ -512,11 +1241,24 @@ class EventConsumer:
                 self.stats["events_processed"]
             )
 
+        avg_queue_wait = 0.0
+        if self._queue_waits:
+            avg_queue_wait = sum(self._queue_waits) / len(self._queue_waits)
+
         return {
             "consumer_group": self.consumer_group,
             "consumer_name": self.consumer_name,
             "is_running": self._running,
             "avg_processing_time": round(avg_processing_time, 3),
+            "p50_processing_time": round(self._percentile(self._latencies, 0.5), 3),
+            "p95_processing_time": round(self._percentile(self._latencies, 0.95), 3),
+            "avg_queue_wait": round(avg_queue_wait, 3),
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._tasks) - self._in_flight,
+            "pending_acks": sum(len(ids) for ids in self._acks.values()),
+            "priority_mode": self.scheduler.mode,
+            "pending_entries": sum(self._pending_entries.values()),
             **self.stats
         }
 
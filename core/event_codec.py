@@ -0,0 +1,213 @@
+"""
+Event Payload Codecs
+
+Кодирование payload событий Event Bus. Кодек записывается в поле
+b"codec" записи stream, consumer декодирует по нему; записи без поля
+(старые producer) читаются как json / json+zlib по флагу b"compressed".
+
+Кодеки:
+    json           - json.dumps (совместим со старыми consumer)
+    json+zlib      - json + zlib выше compression_threshold
+    msgpack        - msgpack (pip install msgpack)
+    msgpack+zstd   - msgpack + zstd (pip install zstandard); с обученным
+                     словарем тег msgpack+zstd:<dict_id>, словарь нужен
+                     и producer, и consumer
+
+Словарь обучается на типичных domain events (повторяющиеся ключи и
+значения вроде названий черт), хранится в Redis и загружается consumer
+по dict_id.
+"""
+
+import json
+import logging
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+CODEC_JSON = "json"
+CODEC_JSON_ZLIB = "json+zlib"
+CODEC_MSGPACK = "msgpack"
+CODEC_MSGPACK_ZSTD = "msgpack+zstd"
+
+# От лучшего к худшему - порядок выбора при согласовании
+CODEC_PREFERENCE = [CODEC_MSGPACK_ZSTD, CODEC_MSGPACK, CODEC_JSON]
+
+
+class CodecError(ValueError):
+    """Payload не может быть декодирован (неизвестный кодек или битые данные)"""
+
+
+class MissingDictionaryError(CodecError):
+    """Для декодирования нужен zstd словарь, которого нет локально"""
+
+    def __init__(self, dict_id: int):
+        super().__init__(f"zstd dictionary {dict_id} is not loaded")
+        self.dict_id = dict_id
+
+
+class EventCodecs:
+    """
+    Набор кодеков payload с общими zstd словарями
+
+    Компрессоры/декомпрессоры создаются один раз на словарь и
+    переиспользуются (zstd контексты дорого создавать на каждое событие).
+    """
+
+    def __init__(self, compression_threshold: int = 1024, zstd_level: int = 3):
+        """
+        Args:
+            compression_threshold: json сжимается zlib, msgpack без словаря - zstd,
+                                   если payload больше порога (байт)
+            zstd_level: Уровень сжатия zstd
+        """
+        self.compression_threshold = compression_threshold
+        self.zstd_level = zstd_level
+
+        self.dictionaries: Dict[int, Any] = {}
+        self.active_dict_id: Optional[int] = None
+        self._compressors: Dict[Optional[int], Any] = {}
+        self._decompressors: Dict[Optional[int], Any] = {}
+
+    def supported(self) -> List[str]:
+        """Кодеки, доступные в этом процессе (от лучшего к худшему)"""
+        codecs = []
+        if MSGPACK_AVAILABLE and ZSTD_AVAILABLE:
+            codecs.append(CODEC_MSGPACK_ZSTD)
+        if MSGPACK_AVAILABLE:
+            codecs.append(CODEC_MSGPACK)
+        codecs.extend([CODEC_JSON_ZLIB, CODEC_JSON])
+        return codecs
+
+    # ------------------------------------------------------------------
+    # Dictionaries
+    # ------------------------------------------------------------------
+
+    def add_dictionary(self, raw: bytes, activate: bool = False) -> int:
+        """Регистрирует обученный словарь → dict_id"""
+        dictionary = zstandard.ZstdCompressionDict(raw)
+        dict_id = dictionary.dict_id()
+        self.dictionaries[dict_id] = dictionary
+        self._compressors.pop(dict_id, None)
+        self._decompressors.pop(dict_id, None)
+        if activate:
+            self.active_dict_id = dict_id
+        return dict_id
+
+    def train_dictionary(self, samples: Iterable[Any], dict_size: int = 16384) -> bytes:
+        """Обучает zstd словарь на msgpack-представлении примеров payload"""
+        packed = [msgpack.packb(sample, use_bin_type=True) for sample in samples]
+        return zstandard.train_dictionary(dict_size, packed).as_bytes()
+
+    def _compressor(self, dict_id: Optional[int]):
+        compressor = self._compressors.get(dict_id)
+        if compressor is None:
+            dictionary = self.dictionaries[dict_id] if dict_id is not None else None
+            compressor = self._compressors[dict_id] = zstandard.ZstdCompressor(
+                level=self.zstd_level, dict_data=dictionary, write_content_size=True
+            )
+        return compressor
+
+    def _decompressor(self, dict_id: Optional[int]):
+        decompressor = self._decompressors.get(dict_id)
+        if decompressor is None:
+            if dict_id is not None and dict_id not in self.dictionaries:
+                raise MissingDictionaryError(dict_id)
+            dictionary = self.dictionaries[dict_id] if dict_id is not None else None
+            decompressor = self._decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=dictionary)
+        return decompressor
+
+    # ------------------------------------------------------------------
+    # Encode / decode
+    # ------------------------------------------------------------------
+
+    def encode(self, payload: Any, codec: str = CODEC_JSON) -> Tuple[bytes, str, int]:
+        """
+        Кодирует payload
+
+        Returns:
+            (data, codec_tag, serialized_size) - тег пишется в поле b"codec",
+            serialized_size - размер до сжатия
+        """
+        if codec in (CODEC_MSGPACK, CODEC_MSGPACK_ZSTD) and MSGPACK_AVAILABLE:
+            serialized = msgpack.packb(payload, use_bin_type=True)
+
+            if codec == CODEC_MSGPACK_ZSTD and ZSTD_AVAILABLE:
+                dict_id = self.active_dict_id
+                # Словарь выигрывает и на маленьких payload, без него - только выше порога
+                if dict_id is not None or len(serialized) > self.compression_threshold:
+                    data = self._compressor(dict_id).compress(serialized)
+                    tag = f"{CODEC_MSGPACK_ZSTD}:{dict_id}" if dict_id is not None else CODEC_MSGPACK_ZSTD
+                    return data, tag, len(serialized)
+
+            return serialized, CODEC_MSGPACK, len(serialized)
+
+        serialized = json.dumps(payload).encode('utf-8')
+        if len(serialized) > self.compression_threshold:
+            return zlib.compress(serialized), CODEC_JSON_ZLIB, len(serialized)
+        return serialized, CODEC_JSON, len(serialized)
+
+    def decode(self, data: bytes, codec_tag: str) -> Any:
+        """Декодирует payload по тегу кодека"""
+        codec, _, dict_part = codec_tag.partition(":")
+
+        try:
+            if codec == CODEC_JSON:
+                return json.loads(data.decode('utf-8'))
+
+            if codec == CODEC_JSON_ZLIB:
+                return json.loads(zlib.decompress(data).decode('utf-8'))
+
+            if codec in (CODEC_MSGPACK, CODEC_MSGPACK_ZSTD):
+                if not MSGPACK_AVAILABLE or (codec == CODEC_MSGPACK_ZSTD and not ZSTD_AVAILABLE):
+                    raise CodecError(f"Codec {codec} is not installed")
+                if codec == CODEC_MSGPACK_ZSTD:
+                    data = self._decompressor(int(dict_part) if dict_part else None).decompress(data)
+                return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(f"Failed to decode {codec_tag} payload: {e}") from e
+
+        raise CodecError(f"Unknown codec: {codec_tag}")
+
+
+def entry_codec(data: Dict[bytes, bytes]) -> str:
+    """Тег кодека записи stream (записи без поля codec - json, zlib по флагу compressed)"""
+    codec_tag = data.get(b"codec")
+    if codec_tag is None:
+        return CODEC_JSON_ZLIB if data.get(b"compressed", b"0") == b"1" else CODEC_JSON
+    return codec_tag.decode('utf-8')
+
+
+def negotiate_codec(preferred: str, local: List[str], remote: Iterable[List[str]]) -> str:
+    """
+    Лучший кодек не выше preferred, который понимают все consumer groups
+
+    Args:
+        preferred: Максимальный кодек из конфигурации
+        local: Кодеки этого producer
+        remote: Списки кодеков зарегистрированных consumer groups
+    """
+    start = CODEC_PREFERENCE.index(preferred) if preferred in CODEC_PREFERENCE else len(CODEC_PREFERENCE) - 1
+    remote_sets = [set(codecs) for codecs in remote]
+
+    for codec in CODEC_PREFERENCE[start:]:
+        if codec in local and all(codec in codecs for codecs in remote_sets):
+            return codec
+
+    return CODEC_JSON
@@ -7,18 +7,19 @@ import asyncio
 import json
 import re
 import time
-from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Any, Optional, Pattern, Callable, Iterator
+from datetime import date, datetime, timezone, timedelta
+from typing import Dict, List, Any, Optional, Pattern, Callable, Iterator, Sequence, Tuple
 from pathlib import Path
 import logging
 from dataclasses import dataclass, field
 from collections import defaultdict, deque, Counter
 from enum import Enum
+from itertools import islice
 import gzip
 import sqlite3
 from concurrent.futures import ThreadPoolExecutor
 import threading
-from queue import Queue, Empty
+from queue import Queue, Empty, Full
 
 from .enhanced_logging import EnhancedLoggerMixin, EventType, LogLevel
 from .monitoring_api import get_monitoring_api
@@ -243,38 +244,111 @@ class LogParser(EnhancedLoggerMixin):
         return detected_patterns
 
 
+MINUTE_BUCKET = '%Y-%m-%dT%H:%M'
+HOUR_BUCKET = '%Y-%m-%dT%H'
+ERROR_LEVELS = ('ERROR', 'CRITICAL')
+
+
+def _utc_naive(timestamp: datetime) -> datetime:
+    """Naive UTC datetime used for partition and rollup bucket keys"""
+    if timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
 class LogStorage(EnhancedLoggerMixin):
-    """Storage backend for log aggregation"""
+    """
+    Storage backend for log aggregation
+
+    Entries are partitioned by UTC day into log_entries_YYYYMMDD tables, so
+    retention drops whole partitions instead of deleting rows. Each batch also
+    updates per-minute and per-hour rollups in the same transaction; analysis
+    and aggregation read rollup rows, whose number depends on the time range
+    and the number of distinct levels/services/loggers, not on log volume.
+
+    All writes go through one persistent connection in WAL mode, serialized
+    by a lock; readers open their own short-lived connections and are not
+    blocked by the writer.
+    """
+    
+    PARTITION_PREFIX = 'log_entries_'
+    ROLLUP_PERIODS = (('minute', MINUTE_BUCKET), ('hour', HOUR_BUCKET))
+    ROLLUP_TABLES = ('log_rollups', 'log_rollup_users', 'log_rollup_traces')
+    LEGACY_MIGRATION_BATCH = 10000
+    
+    LOG_COLUMNS = '''
+        timestamp, level, logger, message, service, user_id,
+        trace_id, span_id, error_code, event_type, context,
+        tags, metrics, raw_line
+    '''
+    
+    INSERT_LOG_SQL = '''
+        INSERT INTO {table} (
+            timestamp, level, logger, message, service, user_id,
+            trace_id, span_id, error_code, event_type, context,
+            tags, metrics, raw_line
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    UPSERT_ROLLUP_SQL = '''
+        INSERT INTO log_rollups (
+            period, bucket, level, service, logger, error_code, event_type,
+            count, response_time_sum, response_time_count
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (period, bucket, level, service, logger, error_code, event_type) DO UPDATE SET
+            count = count + excluded.count,
+            response_time_sum = response_time_sum + excluded.response_time_sum,
+            response_time_count = response_time_count + excluded.response_time_count
+    '''
+    
+    UPSERT_USERS_SQL = '''
+        INSERT INTO log_rollup_users (period, bucket, user_id, count) VALUES (?, ?, ?, ?)
+        ON CONFLICT (period, bucket, user_id) DO UPDATE SET count = count + excluded.count
+    '''
+    
+    UPSERT_TRACES_SQL = '''
+        INSERT INTO log_rollup_traces (period, bucket, trace_id, first_ts, last_ts, spans)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (period, bucket, trace_id) DO UPDATE SET
+            first_ts = min(first_ts, excluded.first_ts),
+            last_ts = max(last_ts, excluded.last_ts),
+            spans = spans + excluded.spans
+    '''
     
     def __init__(self, db_path: str = "logs/aggregation.db"):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._write_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._partitions: set = set()
+        self.stats = {
+            'entries_written': 0,
+            'batches_written': 0,
+            'write_errors': 0,
+            'entries_failed': 0
+        }
         self._init_database()
+        self._migrate_legacy_entries()
+    
+    def _writer(self) -> sqlite3.Connection:
+        """Persistent write connection (statements stay prepared in its cache)"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        return self._conn
+    
+    def close(self):
+        """Close the write connection"""
+        with self._write_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
     
     def _init_database(self):
         """Initialize SQLite database for log storage"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS log_entries (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL,
-                    level TEXT NOT NULL,
-                    logger TEXT NOT NULL,
-                    message TEXT NOT NULL,
-                    service TEXT,
-                    user_id INTEGER,
-                    trace_id TEXT,
-                    span_id TEXT,
-                    error_code TEXT,
-                    event_type TEXT,
-                    context TEXT,
-                    tags TEXT,
-                    metrics TEXT,
-                    raw_line TEXT,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
+        with self._write_lock:
+            conn = self._writer()
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS log_aggregations (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -292,74 +366,338 @@ class LogStorage(EnhancedLoggerMixin):
                 )
             ''')
             
+            # Rollups: one row per (period, bucket, dimensions), updated at ingest
             conn.execute('''
-                CREATE INDEX IF NOT EXISTS idx_log_timestamp ON log_entries(timestamp)
+                CREATE TABLE IF NOT EXISTS log_rollups (
+                    period TEXT NOT NULL,
+                    bucket TEXT NOT NULL,
+                    level TEXT NOT NULL,
+                    service TEXT NOT NULL,
+                    logger TEXT NOT NULL,
+                    error_code TEXT NOT NULL,
+                    event_type TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    response_time_sum REAL NOT NULL DEFAULT 0,
+                    response_time_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (period, bucket, level, service, logger, error_code, event_type)
+                ) WITHOUT ROWID
             ''')
+            
             conn.execute('''
-                CREATE INDEX IF NOT EXISTS idx_log_level ON log_entries(level)
+                CREATE TABLE IF NOT EXISTS log_rollup_users (
+                    period TEXT NOT NULL,
+                    bucket TEXT NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (period, bucket, user_id)
+                ) WITHOUT ROWID
             ''')
+            
             conn.execute('''
-                CREATE INDEX IF NOT EXISTS idx_log_trace ON log_entries(trace_id)
+                CREATE TABLE IF NOT EXISTS log_rollup_traces (
+                    period TEXT NOT NULL,
+                    bucket TEXT NOT NULL,
+                    trace_id TEXT NOT NULL,
+                    first_ts TEXT NOT NULL,
+                    last_ts TEXT NOT NULL,
+                    spans INTEGER NOT NULL,
+                    PRIMARY KEY (period, bucket, trace_id)
+                ) WITHOUT ROWID
             ''')
             
             conn.commit()
     
+    def _partition_table(self, timestamp: datetime) -> str:
+        return f"{self.PARTITION_PREFIX}{_utc_naive(timestamp):%Y%m%d}"
+    
+    def _ensure_partition(self, conn: sqlite3.Connection, table: str):
+        """Create a day partition on first write to it"""
+        if table in self._partitions:
+            return
+        
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                level TEXT NOT NULL,
+                logger TEXT NOT NULL,
+                message TEXT NOT NULL,
+                service TEXT,
+                user_id INTEGER,
+                trace_id TEXT,
+                span_id TEXT,
+                error_code TEXT,
+                event_type TEXT,
+                context TEXT,
+                tags TEXT,
+                metrics TEXT,
+                raw_line TEXT
+            )
+        ''')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_timestamp ON {table}(timestamp)')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_level ON {table}(level, timestamp)')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_trace ON {table}(trace_id)')
+        self._partitions.add(table)
+    
+    def list_partitions(
+        self,
+        start_day: Optional[date] = None,
+        end_day: Optional[date] = None
+    ) -> List[Tuple[date, str]]:
+        """Existing day partitions (oldest first), optionally limited to a day range"""
+        with sqlite3.connect(self.db_path) as conn:
+            names = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?",
+                (self.PARTITION_PREFIX + '%',)
+            )]
+        
+        partitions = []
+        for name in names:
+            try:
+                day = datetime.strptime(name[len(self.PARTITION_PREFIX):], '%Y%m%d').date()
+            except ValueError:
+                continue
+            if (start_day is None or day >= start_day) and (end_day is None or day <= end_day):
+                partitions.append((day, name))
+        
+        return sorted(partitions)
+    
+    @staticmethod
+    def _entry_row(log_entry: LogEntry) -> tuple:
+        return (
+            log_entry.timestamp.isoformat(),
+            log_entry.level,
+            log_entry.logger,
+            log_entry.message,
+            log_entry.service,
+            log_entry.user_id,
+            log_entry.trace_id,
+            log_entry.span_id,
+            log_entry.error_code,
+            log_entry.event_type,
+            json.dumps(log_entry.context),
+            json.dumps(log_entry.tags),
+            json.dumps(log_entry.metrics),
+            log_entry.raw_line
+        )
+    
+    @staticmethod
+    def _row_entry(row: tuple) -> LogEntry:
+        return LogEntry(
+            timestamp=datetime.fromisoformat(row[0]),
+            level=row[1],
+            logger=row[2],
+            message=row[3],
+            service=row[4],
+            user_id=row[5],
+            trace_id=row[6],
+            span_id=row[7],
+            error_code=row[8],
+            event_type=row[9],
+            context=json.loads(row[10]) if row[10] else {},
+            tags=json.loads(row[11]) if row[11] else {},
+            metrics=json.loads(row[12]) if row[12] else {},
+            raw_line=row[13]
+        )
+    
+    def _rollup_rows(self, log_entries: List[LogEntry]) -> Tuple[list, list, list]:
+        """Fold a batch into rollup deltas (one upsert per bucket and dimension set)"""
+        counts: Dict[tuple, list] = {}
+        users: Counter = Counter()
+        traces: Dict[tuple, list] = {}
+        
+        for entry in log_entries:
+            timestamp = _utc_naive(entry.timestamp)
+            metrics = entry.metrics if isinstance(entry.metrics, dict) else {}
+            response_time = metrics.get('response_time')
+            has_response_time = isinstance(response_time, (int, float)) and not isinstance(response_time, bool)
+            
+            for period, bucket_format in self.ROLLUP_PERIODS:
+                bucket = timestamp.strftime(bucket_format)
+                key = (
+                    period, bucket, entry.level, entry.service or '', entry.logger,
+                    entry.error_code or '', entry.event_type or ''
+                )
+                totals = counts.get(key)
+                if totals is None:
+                    totals = counts[key] = [0, 0.0, 0]
+                totals[0] += 1
+                if has_response_time:
+                    totals[1] += response_time
+                    totals[2] += 1
+                
+                if entry.user_id:
+                    users[(period, bucket, entry.user_id)] += 1
+                
+                if entry.trace_id:
+                    seen_at = timestamp.isoformat(timespec='microseconds')
+                    span = traces.get((period, bucket, entry.trace_id))
+                    if span is None:
+                        traces[(period, bucket, entry.trace_id)] = [seen_at, seen_at, 1]
+                    else:
+                        span[0] = min(span[0], seen_at)
+                        span[1] = max(span[1], seen_at)
+                        span[2] += 1
+        
+        return (
+            [key + tuple(totals) for key, totals in counts.items()],
+            [key + (count,) for key, count in users.items()],
+            [key + tuple(span) for key, span in traces.items()]
+        )
+    
+    def _write_entries(self, conn: sqlite3.Connection, log_entries: List[LogEntry]):
+        """Insert entries into their day partitions and update rollups (caller holds the lock and transaction)"""
+        partitions: Dict[str, list] = defaultdict(list)
+        for entry in log_entries:
+            partitions[self._partition_table(entry.timestamp)].append(self._entry_row(entry))
+        rollups, users, traces = self._rollup_rows(log_entries)
+        
+        try:
+            for table, rows in partitions.items():
+                self._ensure_partition(conn, table)
+                conn.executemany(self.INSERT_LOG_SQL.format(table=table), rows)
+            conn.executemany(self.UPSERT_ROLLUP_SQL, rollups)
+            conn.executemany(self.UPSERT_USERS_SQL, users)
+            conn.executemany(self.UPSERT_TRACES_SQL, traces)
+        except Exception:
+            # sqlite3 runs the DDL in autocommit before the batch opens its transaction,
+            # so a partition may outlive the rollback half-built; re-check it next time
+            self._partitions.clear()
+            raise
+    
+    def store_log_entries(self, log_entries: List[LogEntry]) -> int:
+        """Store a batch of log entries and their rollups in one transaction"""
+        if not log_entries:
+            return 0
+        
+        try:
+            with self._write_lock:
+                conn = self._writer()
+                with conn:
+                    self._write_entries(conn, log_entries)
+                self.stats['entries_written'] += len(log_entries)
+                self.stats['batches_written'] += 1
+            return len(log_entries)
+        except Exception as e:
+            self.stats['write_errors'] += 1
+            self.stats['entries_failed'] += len(log_entries)
+            self.log_error("LOG_STORAGE_ERROR", f"Failed to store {len(log_entries)} log entries: {e}")
+            return 0
+    
     def store_log_entry(self, log_entry: LogEntry):
         """Store log entry in database"""
+        self.store_log_entries([log_entry])
+    
+    def _migrate_legacy_entries(self):
+        """Move rows of the pre-partitioning log_entries table into day partitions"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute('''
-                    INSERT INTO log_entries (
-                        timestamp, level, logger, message, service, user_id,
-                        trace_id, span_id, error_code, event_type, context,
-                        tags, metrics, raw_line
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    log_entry.timestamp.isoformat(),
-                    log_entry.level,
-                    log_entry.logger,
-                    log_entry.message,
-                    log_entry.service,
-                    log_entry.user_id,
-                    log_entry.trace_id,
-                    log_entry.span_id,
-                    log_entry.error_code,
-                    log_entry.event_type,
-                    json.dumps(log_entry.context),
-                    json.dumps(log_entry.tags),
-                    json.dumps(log_entry.metrics),
-                    log_entry.raw_line
-                ))
-                conn.commit()
+            with self._write_lock:
+                conn = self._writer()
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'log_entries'"
+                ).fetchone()
+                if not exists:
+                    return
+                
+                moved = 0
+                while True:
+                    rows = conn.execute(
+                        f'SELECT id, {self.LOG_COLUMNS} FROM log_entries ORDER BY id LIMIT ?',
+                        (self.LEGACY_MIGRATION_BATCH,)
+                    ).fetchall()
+                    if not rows:
+                        break
+                    
+                    # Each chunk is moved atomically, an interrupted migration resumes where it stopped
+                    with conn:
+                        self._write_entries(conn, [self._row_entry(row[1:]) for row in rows])
+                        conn.execute('DELETE FROM log_entries WHERE id <= ?', (rows[-1][0],))
+                    moved += len(rows)
+                
+                with conn:
+                    conn.execute('DROP TABLE log_entries')
+            
+            self.log_with_trace('info', f"Migrated {moved} log entries into day partitions")
         except Exception as e:
-            self.log_error("LOG_STORAGE_ERROR", f"Failed to store log entry: {e}")
+            self.log_error("LOG_MIGRATION_ERROR", f"Failed to migrate legacy log entries: {e}")
     
     def store_aggregation(self, aggregation: LogAggregation):
         """Store log aggregation"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute('''
-                    INSERT INTO log_aggregations (
-                        period, timestamp, count_by_level, count_by_service,
-                        count_by_logger, error_patterns, unique_users,
-                        unique_traces, avg_response_time, total_events
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    aggregation.period.value,
-                    aggregation.timestamp.isoformat(),
-                    json.dumps(aggregation.count_by_level),
-                    json.dumps(aggregation.count_by_service),
-                    json.dumps(aggregation.count_by_logger),
-                    json.dumps(aggregation.error_patterns),
-                    aggregation.unique_users,
-                    aggregation.unique_traces,
-                    aggregation.avg_response_time,
-                    aggregation.total_events
-                ))
-                conn.commit()
+            with self._write_lock:
+                conn = self._writer()
+                with conn:
+                    conn.execute('''
+                        INSERT INTO log_aggregations (
+                            period, timestamp, count_by_level, count_by_service,
+                            count_by_logger, error_patterns, unique_users,
+                            unique_traces, avg_response_time, total_events
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        aggregation.period.value,
+                        aggregation.timestamp.isoformat(),
+                        json.dumps(aggregation.count_by_level),
+                        json.dumps(aggregation.count_by_service),
+                        json.dumps(aggregation.count_by_logger),
+                        json.dumps(aggregation.error_patterns),
+                        aggregation.unique_users,
+                        aggregation.unique_traces,
+                        aggregation.avg_response_time,
+                        aggregation.total_events
+                    ))
         except Exception as e:
             self.log_error("AGGREGATION_STORAGE_ERROR", f"Failed to store aggregation: {e}")
     
+    def iter_rows(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        columns: Optional[str] = None,
+        levels: Optional[Sequence[str]] = None,
+        service: Optional[str] = None,
+        newest_first: bool = True
+    ) -> Iterator[tuple]:
+        """Stream raw rows partition by partition, touching only the days in range"""
+        partitions = self.list_partitions(_utc_naive(start_time).date(), _utc_naive(end_time).date())
+        if newest_first:
+            partitions.reverse()
+        
+        where = 'timestamp BETWEEN ? AND ?'
+        params: List[Any] = [start_time.isoformat(), end_time.isoformat()]
+        
+        if levels:
+            where += f" AND level IN ({', '.join('?' * len(levels))})"
+            params.extend(levels)
+        
+        if service:
+            where += ' AND service = ?'
+            params.append(service)
+        
+        order = 'DESC' if newest_first else 'ASC'
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for _, table in partitions:
+                cursor = conn.execute(
+                    f'SELECT {columns or self.LOG_COLUMNS} FROM {table} WHERE {where} ORDER BY timestamp {order}',
+                    params
+                )
+                yield from cursor
+        finally:
+            conn.close()
+    
+    def iter_logs(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        level: Optional[str] = None,
+        service: Optional[str] = None,
+        newest_first: bool = True
+    ) -> Iterator[LogEntry]:
+        """Stream log entries (JSON fields are decoded only for rows actually consumed)"""
+        levels = [level] if level else None
+        for row in self.iter_rows(start_time, end_time, levels=levels, service=service, newest_first=newest_first):
+            yield self._row_entry(row)
+    
     def query_logs(
         self, 
         start_time: datetime, 
@@ -369,66 +707,103 @@ class LogStorage(EnhancedLoggerMixin):
         limit: int = 1000
     ) -> List[LogEntry]:
         """Query log entries"""
-        query = '''
-            SELECT timestamp, level, logger, message, service, user_id,
-                   trace_id, span_id, error_code, event_type, context,
-                   tags, metrics, raw_line
-            FROM log_entries
-            WHERE timestamp BETWEEN ? AND ?
-        '''
-        params = [start_time.isoformat(), end_time.isoformat()]
-        
-        if level:
-            query += ' AND level = ?'
-            params.append(level)
-        
-        if service:
-            query += ' AND service = ?'
-            params.append(service)
-        
-        query += ' ORDER BY timestamp DESC LIMIT ?'
-        params.append(limit)
-        
         results = []
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute(query, params)
-                for row in cursor.fetchall():
-                    results.append(LogEntry(
-                        timestamp=datetime.fromisoformat(row[0]),
-                        level=row[1],
-                        logger=row[2],
-                        message=row[3],
-                        service=row[4],
-                        user_id=row[5],
-                        trace_id=row[6],
-                        span_id=row[7],
-                        error_code=row[8],
-                        event_type=row[9],
-                        context=json.loads(row[10]) if row[10] else {},
-                        tags=json.loads(row[11]) if row[11] else {},
-                        metrics=json.loads(row[12]) if row[12] else {},
-                        raw_line=row[13]
-                    ))
+            results.extend(islice(self.iter_logs(start_time, end_time, level, service), limit))
         except Exception as e:
             self.log_error("LOG_QUERY_ERROR", f"Failed to query logs: {e}")
         
         return results
     
-    def cleanup_old_logs(self, retention_days: int = 30):
-        """Clean up old log entries"""
-        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    @staticmethod
+    def _rollup_range(
+        start_time: datetime,
+        end_time: datetime,
+        period: Optional[str] = None
+    ) -> Tuple[str, List[Any]]:
+        """
+        WHERE clause over rollup buckets covering [start_time, end_time]
+
+        With a period, all buckets of that period touching the range are
+        selected. Without one, whole hours come from hour rollups and the
+        partial hours at the edges from minute rollups, so every entry is
+        counted exactly once (at minute resolution).
+        """
+        start = _utc_naive(start_time).replace(second=0, microsecond=0)
+        end = _utc_naive(end_time).replace(second=0, microsecond=0)
+        
+        if period is not None:
+            bucket_format = HOUR_BUCKET if period == 'hour' else MINUTE_BUCKET
+            return 'period = ? AND bucket BETWEEN ? AND ?', [
+                period, start.strftime(bucket_format), end.strftime(bucket_format)
+            ]
+        
+        first_hour = start.replace(minute=0)
+        if first_hour < start:
+            first_hour += timedelta(hours=1)
+        last_hour = end.replace(minute=0)
+        
+        if first_hour >= last_hour:
+            return "period = 'minute' AND bucket BETWEEN ? AND ?", [
+                start.strftime(MINUTE_BUCKET), end.strftime(MINUTE_BUCKET)
+            ]
+        
+        return (
+            "((period = 'hour' AND bucket >= ? AND bucket < ?)"
+            " OR (period = 'minute' AND ((bucket >= ? AND bucket < ?) OR (bucket >= ? AND bucket <= ?))))",
+            [
+                first_hour.strftime(HOUR_BUCKET), last_hour.strftime(HOUR_BUCKET),
+                start.strftime(MINUTE_BUCKET), first_hour.strftime(MINUTE_BUCKET),
+                last_hour.strftime(MINUTE_BUCKET), end.strftime(MINUTE_BUCKET)
+            ]
+        )
+    
+    def query_rollups(
+        self,
+        select: str,
+        start_time: datetime,
+        end_time: datetime,
+        table: str = 'log_rollups',
+        where: Optional[str] = None,
+        params: Sequence[Any] = (),
+        group_by: Optional[str] = None,
+        period: Optional[str] = None
+    ) -> List[tuple]:
+        """Select from a rollup table over a time range"""
+        clause, query_params = self._rollup_range(start_time, end_time, period)
+        query = f'SELECT {select} FROM {table} WHERE {clause}'
+        if where:
+            query += f' AND {where}'
+            query_params.extend(params)
+        if group_by:
+            query += f' GROUP BY {group_by}'
         
         try:
             with sqlite3.connect(self.db_path) as conn:
-                result = conn.execute(
-                    'DELETE FROM log_entries WHERE timestamp < ?',
-                    (cutoff.isoformat(),)
-                )
-                deleted_count = result.rowcount
-                conn.commit()
-                
-                self.log_with_trace('info', f"Cleaned up {deleted_count} old log entries")
+                return conn.execute(query, query_params).fetchall()
+        except Exception as e:
+            self.log_error("LOG_QUERY_ERROR", f"Failed to query rollups: {e}")
+            return []
+    
+    def cleanup_old_logs(self, retention_days: int = 30):
+        """Drop day partitions and rollups older than the retention period"""
+        cutoff = _utc_naive(datetime.now(timezone.utc) - timedelta(days=retention_days)).date()
+        
+        try:
+            expired = [table for day, table in self.list_partitions() if day < cutoff]
+            with self._write_lock:
+                conn = self._writer()
+                with conn:
+                    for table in expired:
+                        conn.execute(f'DROP TABLE IF EXISTS {table}')
+                    for table in self.ROLLUP_TABLES:
+                        conn.execute(
+                            f"DELETE FROM {table} WHERE period IN ('minute', 'hour') AND bucket < ?",
+                            (cutoff.isoformat(),)
+                        )
+                self._partitions.difference_update(expired)
+            
+            self.log_with_trace('info', f"Dropped {len(expired)} log partitions older than {cutoff}")
         except Exception as e:
             self.log_error("LOG_CLEANUP_ERROR", f"Failed to cleanup logs: {e}")
 
@@ -436,6 +811,8 @@ class LogStorage(EnhancedLoggerMixin):
 class LogAnalyzer(EnhancedLoggerMixin):
     """Analyze log patterns and generate insights"""
     
+    DIGITS = re.compile(r'\d+')
+    
     def __init__(self, storage: LogStorage):
         self.storage = storage
         self.pattern_counters = defaultdict(lambda: defaultdict(int))
@@ -470,33 +847,52 @@ class LogAnalyzer(EnhancedLoggerMixin):
         start_time: datetime, 
         end_time: datetime
     ) -> Dict[str, Any]:
-        """Analyze logs for patterns and anomalies"""
-        logs = self.storage.query_logs(start_time, end_time, limit=10000)
+        """Analyze logs for patterns and anomalies (from rollups, raw rows only for error messages)"""
+        level_counts = dict(self.storage.query_rollups(
+            'level, SUM(count)', start_time, end_time, group_by='level'
+        ))
+        total = sum(level_counts.values())
         
-        if not logs:
+        if not total:
             return {'message': 'No logs found in time range'}
         
+        level_distribution = self._analyze_level_distribution(level_counts)
+        message_patterns, top_errors = self._scan_error_messages(
+            start_time, end_time, level_distribution['total_errors']
+        )
+        security_rows = self.storage.query_rollups(
+            'SUM(count)', start_time, end_time,
+            where='event_type = ?', params=[EventType.SECURITY_EVENT.value]
+        )
+        security_events = (security_rows[0][0] if security_rows else 0) or 0
+        
         analysis = {
             'time_range': {
                 'start': start_time.isoformat(),
                 'end': end_time.isoformat()
             },
-            'total_entries': len(logs),
-            'level_distribution': self._analyze_level_distribution(logs),
-            'service_distribution': self._analyze_service_distribution(logs),
-            'error_analysis': self._analyze_errors(logs),
-            'user_activity': self._analyze_user_activity(logs),
-            'trace_analysis': self._analyze_traces(logs),
-            'time_patterns': self._analyze_time_patterns(logs),
-            'anomalies': self._detect_anomalies(logs)
+            'total_entries': total,
+            'level_distribution': level_distribution,
+            'service_distribution': self._analyze_service_distribution(start_time, end_time),
+            'error_analysis': self._analyze_errors(
+                start_time, end_time, level_distribution['total_errors'], message_patterns
+            ),
+            'user_activity': self._analyze_user_activity(start_time, end_time),
+            'trace_analysis': self._analyze_traces(start_time, end_time),
+            'time_patterns': self._analyze_time_patterns(start_time, end_time),
+            'anomalies': self._detect_anomalies({
+                'total_logs': total,
+                'error_rate': level_distribution['error_rate'],
+                'security_events': security_events,
+                'top_errors': top_errors
+            })
         }
         
         return analysis
     
-    def _analyze_level_distribution(self, logs: List[LogEntry]) -> Dict[str, Any]:
+    def _analyze_level_distribution(self, level_counts: Dict[str, int]) -> Dict[str, Any]:
         """Analyze distribution of log levels"""
-        level_counts = Counter(log.level for log in logs)
-        total = len(logs)
+        total = sum(level_counts.values())
         
         distribution = {}
         for level, count in level_counts.items():
@@ -507,7 +903,7 @@ class LogAnalyzer(EnhancedLoggerMixin):
         
         # Calculate error rate
         error_logs = sum(count for level, count in level_counts.items() 
-                        if level in ['ERROR', 'CRITICAL'])
+                        if level in ERROR_LEVELS)
         error_rate = (error_logs / total) * 100 if total > 0 else 0
         
         return {
@@ -516,126 +912,141 @@ class LogAnalyzer(EnhancedLoggerMixin):
             'total_errors': error_logs
         }
     
-    def _analyze_service_distribution(self, logs: List[LogEntry]) -> Dict[str, Any]:
+    def _analyze_service_distribution(self, start_time: datetime, end_time: datetime) -> Dict[str, Any]:
         """Analyze distribution across services"""
-        service_counts = Counter(log.service or 'unknown' for log in logs)
+        service_counts = Counter()
+        for service, count in self.storage.query_rollups(
+            'service, SUM(count)', start_time, end_time, group_by='service'
+        ):
+            service_counts[service or 'unknown'] += count
         
         return {
             'distribution': dict(service_counts),
             'unique_services': len(service_counts)
         }
     
-    def _analyze_errors(self, logs: List[LogEntry]) -> Dict[str, Any]:
-        """Analyze error patterns"""
-        error_logs = [log for log in logs if log.level in ['ERROR', 'CRITICAL']]
+    def _scan_error_messages(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        total_errors: int
+    ) -> Tuple[Counter, List[str]]:
+        """Stream error messages once: message patterns and the latest messages"""
+        message_patterns = Counter()
+        top_errors = []
+        if not total_errors:
+            return message_patterns, top_errors
+        
+        for (message,) in self.storage.iter_rows(start_time, end_time, 'message', levels=ERROR_LEVELS):
+            if len(top_errors) < 10:
+                top_errors.append(message)
+            # Simplify error messages for pattern detection
+            message_patterns[self.DIGITS.sub('N', message)[:100]] += 1
         
-        if not error_logs:
+        return message_patterns, top_errors
+    
+    def _analyze_errors(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        total_errors: int,
+        message_patterns: Counter
+    ) -> Dict[str, Any]:
+        """Analyze error patterns"""
+        if not total_errors:
             return {'message': 'No errors found'}
         
-        # Group by error code
-        error_codes = Counter(log.error_code for log in error_logs if log.error_code)
+        levels_clause = f"level IN ({', '.join('?' * len(ERROR_LEVELS))})"
         
-        # Group by message patterns
-        message_patterns = defaultdict(int)
-        for log in error_logs:
-            # Simplify error messages for pattern detection
-            pattern = re.sub(r'\d+', 'N', log.message)[:100]
-            message_patterns[pattern] += 1
-        
-        # Top error patterns
-        top_patterns = sorted(message_patterns.items(), key=lambda x: x[1], reverse=True)[:10]
+        # Group by error code
+        error_codes = Counter(dict(self.storage.query_rollups(
+            'error_code, SUM(count)', start_time, end_time,
+            where=f"{levels_clause} AND error_code != ''", params=ERROR_LEVELS, group_by='error_code'
+        )))
+        services = self.storage.query_rollups(
+            'service', start_time, end_time,
+            where=f"{levels_clause} AND service != ''", params=ERROR_LEVELS, group_by='service'
+        )
         
         return {
-            'total_errors': len(error_logs),
+            'total_errors': total_errors,
             'error_codes': dict(error_codes.most_common(10)),
-            'top_patterns': [{'pattern': p, 'count': c} for p, c in top_patterns],
-            'services_with_errors': list(set(log.service for log in error_logs if log.service))
+            'top_patterns': [{'pattern': p, 'count': c} for p, c in message_patterns.most_common(10)],
+            'services_with_errors': [row[0] for row in services]
         }
     
-    def _analyze_user_activity(self, logs: List[LogEntry]) -> Dict[str, Any]:
+    def _analyze_user_activity(self, start_time: datetime, end_time: datetime) -> Dict[str, Any]:
         """Analyze user activity patterns"""
-        user_logs = [log for log in logs if log.user_id]
+        user_activity = Counter(dict(self.storage.query_rollups(
+            'user_id, SUM(count)', start_time, end_time, table='log_rollup_users', group_by='user_id'
+        )))
         
-        if not user_logs:
+        if not user_activity:
             return {'message': 'No user activity found'}
         
-        unique_users = set(log.user_id for log in user_logs)
-        user_activity = Counter(log.user_id for log in user_logs)
+        total_user_events = sum(user_activity.values())
         
         return {
-            'unique_users': len(unique_users),
-            'total_user_events': len(user_logs),
-            'avg_events_per_user': len(user_logs) / len(unique_users) if unique_users else 0,
+            'unique_users': len(user_activity),
+            'total_user_events': total_user_events,
+            'avg_events_per_user': total_user_events / len(user_activity),
             'top_active_users': dict(user_activity.most_common(10))
         }
     
-    def _analyze_traces(self, logs: List[LogEntry]) -> Dict[str, Any]:
+    def _analyze_traces(self, start_time: datetime, end_time: datetime) -> Dict[str, Any]:
         """Analyze distributed traces"""
-        trace_logs = [log for log in logs if log.trace_id]
+        traces = self.storage.query_rollups(
+            'trace_id, MIN(first_ts), MAX(last_ts), SUM(spans)', start_time, end_time,
+            table='log_rollup_traces', group_by='trace_id'
+        )
         
-        if not trace_logs:
+        if not traces:
             return {'message': 'No traces found'}
         
-        unique_traces = set(log.trace_id for log in trace_logs)
-        trace_spans = defaultdict(list)
-        
-        for log in trace_logs:
-            trace_spans[log.trace_id].append(log)
-        
-        # Calculate trace durations
+        total_spans = 0
         trace_durations = []
-        for trace_id, spans in trace_spans.items():
-            if len(spans) > 1:
-                spans.sort(key=lambda x: x.timestamp)
-                duration = (spans[-1].timestamp - spans[0].timestamp).total_seconds()
-                trace_durations.append(duration)
+        for _, first_ts, last_ts, spans in traces:
+            total_spans += spans
+            if spans > 1:
+                duration = datetime.fromisoformat(last_ts) - datetime.fromisoformat(first_ts)
+                trace_durations.append(duration.total_seconds())
         
         avg_duration = sum(trace_durations) / len(trace_durations) if trace_durations else 0
         
         return {
-            'unique_traces': len(unique_traces),
-            'total_spans': len(trace_logs),
-            'avg_spans_per_trace': len(trace_logs) / len(unique_traces) if unique_traces else 0,
+            'unique_traces': len(traces),
+            'total_spans': total_spans,
+            'avg_spans_per_trace': total_spans / len(traces),
             'avg_trace_duration': avg_duration,
             'longest_traces': sorted(trace_durations, reverse=True)[:5]
         }
     
-    def _analyze_time_patterns(self, logs: List[LogEntry]) -> Dict[str, Any]:
+    def _analyze_time_patterns(self, start_time: datetime, end_time: datetime) -> Dict[str, Any]:
         """Analyze temporal patterns in logs"""
-        if not logs:
-            return {}
-        
-        # Group by hour
         hourly_counts = defaultdict(int)
-        for log in logs:
-            hour = log.timestamp.hour
-            hourly_counts[hour] += 1
-        
-        # Group by day of week
         daily_counts = defaultdict(int)
-        for log in logs:
-            day = log.timestamp.strftime('%A')
-            daily_counts[day] += 1
+        
+        for period, bucket, count in self.storage.query_rollups(
+            'period, bucket, SUM(count)', start_time, end_time, group_by='period, bucket'
+        ):
+            bucket_time = datetime.strptime(bucket, HOUR_BUCKET if period == 'hour' else MINUTE_BUCKET)
+            hourly_counts[bucket_time.hour] += count
+            daily_counts[bucket_time.strftime('%A')] += count
+        
+        if not hourly_counts:
+            return {}
         
         return {
             'hourly_distribution': dict(hourly_counts),
             'daily_distribution': dict(daily_counts),
-            'peak_hour': max(hourly_counts.items(), key=lambda x: x[1])[0] if hourly_counts else None,
-            'peak_day': max(daily_counts.items(), key=lambda x: x[1])[0] if daily_counts else None
+            'peak_hour': max(hourly_counts.items(), key=lambda x: x[1])[0],
+            'peak_day': max(daily_counts.items(), key=lambda x: x[1])[0]
         }
     
-    def _detect_anomalies(self, logs: List[LogEntry]) -> List[Dict[str, Any]]:
-        """Detect anomalies in log patterns"""
+    def _detect_anomalies(self, stats: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Detect anomalies in log statistics"""
         anomalies = []
         
-        # Calculate statistics for anomaly detection
-        stats = {
-            'total_logs': len(logs),
-            'error_rate': len([l for l in logs if l.level in ['ERROR', 'CRITICAL']]) / len(logs) * 100 if logs else 0,
-            'security_events': len([l for l in logs if l.event_type == EventType.SECURITY_EVENT.value]),
-            'top_errors': [log.message for log in logs if log.level in ['ERROR', 'CRITICAL']][:10]
-        }
-        
         # Check each anomaly detector
         for detector in self.anomaly_detectors:
             try:
@@ -654,7 +1065,7 @@ class LogAnalyzer(EnhancedLoggerMixin):
 
 
 class LogAggregator(EnhancedLoggerMixin):
-    """Aggregate logs into time-series data"""
+    """Aggregate logs into time-series data (from ingest-time rollups)"""
     
     def __init__(self, storage: LogStorage):
         self.storage = storage
@@ -666,26 +1077,69 @@ class LogAggregator(EnhancedLoggerMixin):
         period: AggregationPeriod
     ) -> List[LogAggregation]:
         """Aggregate logs for time period"""
-        logs = self.storage.query_logs(start_time, end_time, limit=100000)
-        
-        if not logs:
-            return []
+        # Day and week buckets are folded from hour rollups
+        rollup_period = 'minute' if period == AggregationPeriod.MINUTE else 'hour'
+        bucket_format = MINUTE_BUCKET if rollup_period == 'minute' else HOUR_BUCKET
+        
+        period_keys: Dict[str, datetime] = {}
+        
+        def period_key(bucket: str) -> datetime:
+            key = period_keys.get(bucket)
+            if key is None:
+                bucket_time = datetime.strptime(bucket, bucket_format).replace(tzinfo=timezone.utc)
+                key = period_keys[bucket] = self._get_period_key(bucket_time, period)
+            return key
+        
+        aggregations: Dict[datetime, LogAggregation] = {}
+        response_times: Dict[datetime, List[float]] = defaultdict(lambda: [0.0, 0])
+        
+        rows = self.storage.query_rollups(
+            'bucket, level, service, logger, error_code, '
+            'SUM(count), SUM(response_time_sum), SUM(response_time_count)',
+            start_time, end_time, period=rollup_period,
+            group_by='bucket, level, service, logger, error_code'
+        )
         
-        # Group logs by time periods
-        time_groups = defaultdict(list)
+        for bucket, level, service, logger_name, error_code, count, rt_sum, rt_count in rows:
+            key = period_key(bucket)
+            aggregation = aggregations.get(key)
+            if aggregation is None:
+                aggregation = aggregations[key] = LogAggregation(period=period, timestamp=key)
+            
+            service = service or 'unknown'
+            aggregation.count_by_level[level] = aggregation.count_by_level.get(level, 0) + count
+            aggregation.count_by_service[service] = aggregation.count_by_service.get(service, 0) + count
+            aggregation.count_by_logger[logger_name] = aggregation.count_by_logger.get(logger_name, 0) + count
+            if error_code and level in ERROR_LEVELS:
+                aggregation.error_patterns[error_code] = aggregation.error_patterns.get(error_code, 0) + count
+            aggregation.total_events += count
+            
+            response_times[key][0] += rt_sum
+            response_times[key][1] += rt_count
         
-        for log in logs:
-            period_key = self._get_period_key(log.timestamp, period)
-            time_groups[period_key].append(log)
+        if not aggregations:
+            return []
         
-        # Create aggregations
-        aggregations = []
-        for period_key, period_logs in time_groups.items():
-            aggregation = self._create_aggregation(period_key, period_logs, period)
-            aggregations.append(aggregation)
+        # Unique counts (distinct across the buckets folded into one period)
+        for table, column, attribute in (
+            ('log_rollup_users', 'user_id', 'unique_users'),
+            ('log_rollup_traces', 'trace_id', 'unique_traces')
+        ):
+            distinct = defaultdict(set)
+            for bucket, value in self.storage.query_rollups(
+                f'bucket, {column}', start_time, end_time, table=table, period=rollup_period
+            ):
+                distinct[period_key(bucket)].add(value)
+            for key, values in distinct.items():
+                if key in aggregations:
+                    setattr(aggregations[key], attribute, len(values))
+        
+        for key, aggregation in aggregations.items():
+            rt_sum, rt_count = response_times[key]
+            aggregation.avg_response_time = rt_sum / rt_count if rt_count else 0.0
             self.storage.store_aggregation(aggregation)
         
-        return sorted(aggregations, key=lambda x: x.timestamp)
+        return sorted(aggregations.values(), key=lambda x: x.timestamp)
     
     def _get_period_key(self, timestamp: datetime, period: AggregationPeriod) -> datetime:
         """Get period key for timestamp"""
@@ -699,81 +1153,67 @@ class LogAggregator(EnhancedLoggerMixin):
             days_since_monday = timestamp.weekday()
             week_start = timestamp - timedelta(days=days_since_monday)
             return week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    def _create_aggregation(
-        self, 
-        period_key: datetime, 
-        logs: List[LogEntry], 
-        period: AggregationPeriod
-    ) -> LogAggregation:
-        """Create aggregation from logs"""
-        count_by_level = Counter(log.level for log in logs)
-        count_by_service = Counter(log.service or 'unknown' for log in logs)
-        count_by_logger = Counter(log.logger for log in logs)
-        
-        # Error pattern analysis
-        error_logs = [log for log in logs if log.level in ['ERROR', 'CRITICAL']]
-        error_patterns = Counter(log.error_code for log in error_logs if log.error_code)
-        
-        # Unique counts
-        unique_users = len(set(log.user_id for log in logs if log.user_id))
-        unique_traces = len(set(log.trace_id for log in logs if log.trace_id))
-        
-        # Calculate average response time from metrics
-        response_times = []
-        for log in logs:
-            if 'response_time' in log.metrics:
-                response_times.append(log.metrics['response_time'])
-        
-        avg_response_time = sum(response_times) / len(response_times) if response_times else 0.0
-        
-        return LogAggregation(
-            period=period,
-            timestamp=period_key,
-            count_by_level=dict(count_by_level),
-            count_by_service=dict(count_by_service),
-            count_by_logger=dict(count_by_logger),
-            error_patterns=dict(error_patterns),
-            unique_users=unique_users,
-            unique_traces=unique_traces,
-            avg_response_time=avg_response_time,
-            total_events=len(logs)
-        )
 
 
 class LogCollector(EnhancedLoggerMixin):
-    """Collect logs from various sources"""
+    """
+    Collect logs from various sources
+    
+    File tailers enqueue raw lines; a single writer thread drains the queue
+    in batches (bounded by batch_size and max_batch_delay), parses them and
+    stores each batch in one transaction. When the queue is full, tailers
+    wait instead of dropping lines.
+    """
     
-    def __init__(self, parser: LogParser, storage: LogStorage):
+    def __init__(
+        self,
+        parser: LogParser,
+        storage: LogStorage,
+        batch_size: int = 1000,
+        max_batch_delay: float = 0.5,
+        queue_size: int = 10000
+    ):
         self.parser = parser
         self.storage = storage
+        self.batch_size = batch_size
+        self.max_batch_delay = max_batch_delay
         self.file_watchers = {}
-        self.processing_queue = Queue(maxsize=10000)
+        # (enqueued_at monotonic, line)
+        self.processing_queue = Queue(maxsize=queue_size)
         self.running = False
-        self.worker_threads = []
+        self.writer_thread: Optional[threading.Thread] = None
+        self.stats = {
+            'lines_received': 0,
+            'lines_processed': 0,
+            'batches': 0,
+            'queue_full_waits': 0,
+            'last_batch_size': 0,
+            'last_queue_lag': 0.0,
+            'max_queue_lag': 0.0
+        }
     
-    def start_collection(self, num_workers: int = 4):
-        """Start log collection with worker threads"""
+    def start_collection(self):
+        """Start log collection with a single writer thread"""
         if self.running:
             return
         
         self.running = True
         
-        # Start worker threads
-        for i in range(num_workers):
-            worker = threading.Thread(target=self._process_logs_worker, daemon=True)
-            worker.start()
-            self.worker_threads.append(worker)
+        self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.writer_thread.start()
         
-        self.log_with_trace('info', f"Started log collection with {num_workers} workers")
+        self.log_with_trace(
+            'info',
+            f"Started log collection (batch_size={self.batch_size}, max_batch_delay={self.max_batch_delay}s)"
+        )
     
     def stop_collection(self):
-        """Stop log collection"""
+        """Stop log collection (the writer flushes what is already queued)"""
         self.running = False
         
-        # Wait for workers to finish
-        for worker in self.worker_threads:
-            worker.join(timeout=5)
+        if self.writer_thread is not None:
+            self.writer_thread.join(timeout=5)
+            self.writer_thread = None
         
         self.log_with_trace('info', "Stopped log collection")
     
@@ -795,6 +1235,18 @@ class LogCollector(EnhancedLoggerMixin):
         else:
             self.log_error("LOG_DIR_NOT_FOUND", f"Log directory not found: {directory_path}")
     
+    def enqueue_line(self, line: str) -> bool:
+        """Queue a raw log line, waiting while the queue is full"""
+        item = (time.monotonic(), line)
+        while self.running:
+            try:
+                self.processing_queue.put(item, timeout=1)
+                self.stats['lines_received'] += 1
+                return True
+            except Full:
+                self.stats['queue_full_waits'] += 1
+        return False
+    
     def _tail_file(self, file_path: Path):
         """Tail a log file for new entries"""
         def tail_worker():
@@ -806,10 +1258,7 @@ class LogCollector(EnhancedLoggerMixin):
                     while self.running:
                         line = f.readline()
                         if line:
-                            try:
-                                self.processing_queue.put(line.strip(), timeout=1)
-                            except:
-                                pass  # Queue full, skip line
+                            self.enqueue_line(line.strip())
                         else:
                             time.sleep(0.1)
             except Exception as e:
@@ -819,27 +1268,79 @@ class LogCollector(EnhancedLoggerMixin):
         thread.start()
         self.file_watchers[str(file_path)] = thread
     
-    def _process_logs_worker(self):
-        """Worker thread to process log lines"""
-        while self.running:
+    def _drain_batch(self) -> List[tuple]:
+        """Take up to batch_size queued lines, waiting at most max_batch_delay after the first"""
+        try:
+            batch = [self.processing_queue.get(timeout=1)]
+        except Empty:
+            return []
+        
+        deadline = time.monotonic() + self.max_batch_delay
+        while len(batch) < self.batch_size:
             try:
-                line = self.processing_queue.get(timeout=1)
-                if line:
-                    log_entry = self.parser.parse_log_line(line)
-                    if log_entry:
-                        self.storage.store_log_entry(log_entry)
-                        
-                        # Check for patterns
-                        patterns = self.parser.detect_patterns(log_entry)
-                        if patterns:
-                            self._handle_pattern_detection(log_entry, patterns)
-                
-                self.processing_queue.task_done()
-                
+                batch.append(self.processing_queue.get_nowait())
+                continue
             except Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.processing_queue.get(timeout=remaining))
+            except Empty:
+                break
+        
+        return batch
+    
+    def _writer_loop(self):
+        """Single writer: parse and store queued lines batch by batch"""
+        while self.running or not self.processing_queue.empty():
+            batch = self._drain_batch()
+            if not batch:
                 continue
+            
+            try:
+                self._process_batch(batch)
             except Exception as e:
-                self.log_error("LOG_PROCESSING_ERROR", f"Error processing log: {e}")
+                self.log_error("LOG_PROCESSING_ERROR", f"Error processing log batch: {e}")
+            finally:
+                for _ in batch:
+                    self.processing_queue.task_done()
+    
+    def _process_batch(self, batch: List[tuple]):
+        lag = time.monotonic() - batch[0][0]
+        
+        entries = []
+        for _, line in batch:
+            if line:
+                log_entry = self.parser.parse_log_line(line)
+                if log_entry:
+                    entries.append(log_entry)
+        
+        self.storage.store_log_entries(entries)
+        
+        self.stats['lines_processed'] += len(batch)
+        self.stats['batches'] += 1
+        self.stats['last_batch_size'] = len(batch)
+        self.stats['last_queue_lag'] = lag
+        self.stats['max_queue_lag'] = max(self.stats['max_queue_lag'], lag)
+        
+        # Check for patterns
+        for log_entry in entries:
+            patterns = self.parser.detect_patterns(log_entry)
+            if patterns:
+                try:
+                    self._handle_pattern_detection(log_entry, patterns)
+                except Exception as e:
+                    self.log_error("LOG_PATTERN_ERROR", f"Error handling detected pattern: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Ingest metrics: throughput counters, batch size and queue lag"""
+        return {
+            **self.stats,
+            'queue_depth': self.processing_queue.qsize(),
+            'storage': dict(self.storage.stats)
+        }
     
     def _handle_pattern_detection(self, log_entry: LogEntry, patterns: List[LogPattern]):
         """Handle detected patterns"""
@@ -902,6 +1403,7 @@ class CentralizedLoggingService(EnhancedLoggerMixin):
         
         # Stop collector
         self.collector.stop_collection()
+        self.storage.close()
         
         # Cancel cleanup task
         if self.cleanup_task:
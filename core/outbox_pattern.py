@@ -15,8 +15,8 @@ Usage:
         user_id = await save_user(conn, user_data)
         await outbox.publish(conn, "user.created", {"user_id": user_id})
 
-    # Фоновый worker
-    relay = OutboxRelay(db, event_bus)
+    # Фоновый worker (можно запускать несколько - SKIP LOCKED)
+    relay = OutboxRelay(db, event_bus, workers=4)
     await relay.start()  # Работает постоянно
 """
 
@@ -127,37 +127,54 @@ class OutboxPublisher:
     async def publish_batch(
         self,
         conn: asyncpg.Connection,
-        events: List[tuple[str, Dict[str, Any]]]
+        events: List[tuple]
     ) -> List[int]:
         """
-        Сохраняет несколько событий одной операцией (оптимизация)
+        Сохраняет несколько событий одним INSERT (один round trip к БД)
+
+        Строки передаются массивами и разворачиваются через unnest, поэтому
+        время удержания блокировок транзакции не растет с числом событий,
+        а statement-level триггер NOTIFY срабатывает один раз на batch.
+        Как и publish, работает в транзакции вызывающего: при откате
+        не сохранится ни одно событие.
 
         Args:
-            conn: Активное соединение с БД
-            events: Список кортежей (event_type, payload)
+            conn: Активное соединение с БД (в транзакции)
+            events: Список кортежей (event_type, payload) или (event_type, payload, trace_id)
 
         Returns:
-            Список ID созданных событий
+            Список ID созданных событий в порядке events
         """
         if not events:
             return []
 
+        event_types: List[str] = []
+        payloads: List[str] = []
+        trace_ids: List[Optional[str]] = []
+        for event in events:
+            event_types.append(event[0])
+            payloads.append(json.dumps(event[1]))
+            trace_ids.append(event[2] if len(event) > 2 else None)
+
+        # ORDER BY ordinality: id из sequence выдаются в порядке events
         query = f"""
             INSERT INTO {self.table_name}
-            (event_type, payload, status, retry_count, created_at)
-            VALUES ($1, $2, $3, 0, NOW())
+            (event_type, payload, status, retry_count, created_at, trace_id)
+            SELECT batch.event_type, batch.payload::jsonb, $4, 0, NOW(), batch.trace_id
+            FROM unnest($1::text[], $2::text[], $3::text[])
+                WITH ORDINALITY AS batch(event_type, payload, trace_id, position)
+            ORDER BY batch.position
             RETURNING id
         """
 
-        event_ids = []
-        for event_type, payload in events:
-            event_id = await conn.fetchval(
-                query,
-                event_type,
-                json.dumps(payload),
-                OutboxStatus.PENDING.value
-            )
-            event_ids.append(event_id)
+        rows = await conn.fetch(
+            query,
+            event_types,
+            payloads,
+            trace_ids,
+            OutboxStatus.PENDING.value
+        )
+        event_ids = sorted(row["id"] for row in rows)
 
         logger.debug(f"Outbox batch saved: {len(events)} events")
 
@@ -169,12 +186,23 @@ class OutboxRelay:
     Фоновый worker, который читает pending события из outbox и публикует в Event Bus
 
     Features:
+    - Горизонтальное масштабирование: batch захватывается FOR UPDATE SKIP LOCKED,
+      несколько relay (в одном или разных процессах) не публикуют одно событие дважды
+    - Весь batch уходит в Redis одним pipeline (EventBus.publish_many)
+    - Статусы batch обновляются bulk UPDATE ... WHERE id = ANY($1)
+    - Пробуждение по LISTEN/NOTIFY (триггер на INSERT), polling только как fallback
+      (LISTEN соединение переоткрывается после обрыва)
     - Автоматический retry с exponential backoff
     - Dead Letter Queue (события после max_retries помечаются как FAILED)
     - Graceful shutdown
     - Мониторинг производительности
+
+    При нескольких workers события разных batch публикуются параллельно -
+    глобальный порядок по created_at не гарантируется.
     """
 
+    NOTIFY_CHANNEL = "event_outbox"
+
     def __init__(
         self,
         db_pool: asyncpg.Pool,
@@ -183,7 +211,9 @@ class OutboxRelay:
         batch_size: int = 100,
         polling_interval: float = 1.0,
         max_retries: int = 5,
-        retry_delay_base: float = 2.0
+        retry_delay_base: float = 2.0,
+        workers: int = 1,
+        listen: bool = True
     ):
         """
         Args:
@@ -191,9 +221,11 @@ class OutboxRelay:
             event_bus: Instance Event Bus для публикации событий
             schema: Схема БД с outbox таблицей
             batch_size: Количество событий обрабатываемых за раз
-            polling_interval: Интервал опроса таблицы (секунды)
+            polling_interval: Максимальный интервал опроса без NOTIFY (секунды)
             max_retries: Максимум попыток перед отправкой в DLQ
             retry_delay_base: База для exponential backoff (секунды)
+            workers: Количество параллельных relay loops в процессе
+            listen: Просыпаться по NOTIFY на канале event_outbox
         """
         self.db_pool = db_pool
         self.event_bus = event_bus
@@ -203,184 +235,307 @@ class OutboxRelay:
         self.polling_interval = polling_interval
         self.max_retries = max_retries
         self.retry_delay_base = retry_delay_base
+        self.workers = workers
+        self.listen = listen
 
         self._running = False
-        self._task: Optional[asyncio.Task] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._listen_conn: Optional[asyncpg.Connection] = None
+        self._listen_lock = asyncio.Lock()
 
         # Метрики
         self.stats = {
             "events_processed": 0,
             "events_failed": 0,
             "total_retries": 0,
+            "batches_processed": 0,
+            "notifications": 0,
+            "listener_lost": 0,
             "last_batch_time": None
         }
 
     async def start(self):
-        """Запускает фоновый worker"""
+        """Запускает фоновые workers"""
         if self._running:
             logger.warning("OutboxRelay already running")
             return
 
         self._running = True
-        self._task = asyncio.create_task(self._relay_loop())
-        logger.info("OutboxRelay started")
+
+        if self.listen:
+            await self._ensure_listener()
+
+        self._tasks = [
+            asyncio.create_task(self._relay_loop(), name=f"outbox_relay_{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"OutboxRelay started ({self.workers} workers, listen={self._is_listening()})")
 
     async def stop(self):
-        """Graceful shutdown worker"""
+        """Graceful shutdown workers"""
         if not self._running:
             return
 
         self._running = False
-        if self._task:
-            await self._task
+        self._wakeup.set()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+
+        await self._stop_listener()
 
         logger.info("OutboxRelay stopped")
 
+    # === LISTEN/NOTIFY ===
+
+    async def _ensure_listener(self):
+        """Держит одно соединение из пула с LISTEN на время работы relay (переоткрывает после обрыва)"""
+        async with self._listen_lock:
+            if self._listen_conn is not None:
+                if not self._listen_conn.is_closed():
+                    return
+                await self._stop_listener()
+
+            try:
+                self._listen_conn = await self.db_pool.acquire()
+                await self._listen_conn.add_listener(self.NOTIFY_CHANNEL, self._on_notify)
+                self._listen_conn.add_termination_listener(self._on_listener_lost)
+            except Exception as e:
+                logger.warning(f"OutboxRelay LISTEN unavailable, polling every {self.polling_interval}s: {e}")
+                await self._stop_listener()
+
+    async def _stop_listener(self):
+        conn, self._listen_conn = self._listen_conn, None
+        if conn is None:
+            return
+        if not conn.is_closed():
+            try:
+                await conn.remove_listener(self.NOTIFY_CHANNEL, self._on_notify)
+            except Exception:
+                pass
+        # Закрытое соединение тоже возвращаем: пул заменит его новым
+        try:
+            await self.db_pool.release(conn)
+        except Exception as e:
+            logger.warning(f"OutboxRelay LISTEN connection release failed: {e}")
+
+    def _is_listening(self) -> bool:
+        return self._listen_conn is not None and not self._listen_conn.is_closed()
+
+    def _on_listener_lost(self, connection):
+        # NOTIFY за время обрыва потеряны: будим workers, чтобы выбрать outbox
+        # и переоткрыть LISTEN, не дожидаясь polling_interval
+        logger.warning("⚠️ OutboxRelay LISTEN connection lost, reconnecting")
+        self.stats["listener_lost"] += 1
+        self._wakeup.set()
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str):
+        self.stats["notifications"] += 1
+        self._wakeup.set()
+
+    async def _wait_for_events(self):
+        """Ждать NOTIFY (или polling_interval для retry с backoff)"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.polling_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    # === ОБРАБОТКА ===
+
     async def _relay_loop(self):
         """Основной цикл обработки событий"""
         while self._running:
             try:
-                batch_start = datetime.now()
+                if self.listen:
+                    await self._ensure_listener()
 
-                # Получаем pending события
-                events = await self._fetch_pending_events()
+                batch_start = datetime.now()
 
-                if events:
-                    await self._process_batch(events)
+                processed = await self._relay_batch()
 
+                if processed:
                     batch_time = (datetime.now() - batch_start).total_seconds()
                     self.stats["last_batch_time"] = batch_time
+                    self.stats["batches_processed"] += 1
 
                     logger.info(
-                        f"Outbox batch processed: {len(events)} events in {batch_time:.2f}s"
+                        f"Outbox batch processed: {processed} events in {batch_time:.2f}s"
                     )
-                else:
-                    # Нет событий - ждём
-                    await asyncio.sleep(self.polling_interval)
+
+                if processed < self.batch_size:
+                    # Очередь выбрана - ждем новых событий
+                    await self._wait_for_events()
 
             except Exception as e:
                 logger.error(f"OutboxRelay error: {e}", exc_info=True)
                 await asyncio.sleep(5)  # Backoff при ошибке
 
-    async def _fetch_pending_events(self) -> List[Dict[str, Any]]:
-        """Получает pending события из outbox"""
-        async with self.db_pool.acquire() as conn:
-            # Выбираем события ready для обработки:
-            # 1. Status = PENDING
-            # 2. Retry_count < max_retries
-            # 3. Для событий с retry_count > 0 проверяем exponential backoff
-            query = f"""
-                SELECT id, event_type, payload, retry_count, created_at, trace_id
-                FROM {self.table_name}
-                WHERE status = $1
-                  AND retry_count < $2
-                  AND (
-                    retry_count = 0
-                    OR created_at + (INTERVAL '1 second' * POW($3, retry_count)) < NOW()
-                  )
-                ORDER BY created_at
-                LIMIT $4
-            """
-
-            rows = await conn.fetch(
-                query,
-                OutboxStatus.PENDING.value,
-                self.max_retries,
-                self.retry_delay_base,
-                self.batch_size
-            )
+    async def _relay_batch(self) -> int:
+        """
+        Захват batch, публикация и обновление статусов в одной транзакции
 
-            return [dict(row) for row in rows]
+        Строки остаются заблокированными до commit: другие relay пропускают их
+        (SKIP LOCKED), а при падении relay транзакция откатывается и события
+        снова становятся pending (at-least-once).
+        """
+        async with self.db_pool.acquire() as conn:
+            async with conn.transaction():
+                events = await self._claim_pending_events(conn)
+                if not events:
+                    return 0
+
+                await self._process_batch(conn, events)
+                return len(events)
+
+    async def _claim_pending_events(self, conn: asyncpg.Connection) -> List[Dict[str, Any]]:
+        """Захватывает pending события, которые не заблокированы другими relay"""
+        # Выбираем события ready для обработки:
+        # 1. Status = PENDING
+        # 2. Retry_count < max_retries
+        # 3. Для событий с retry_count > 0 проверяем exponential backoff
+        query = f"""
+            SELECT id, event_type, payload, retry_count, created_at, trace_id
+            FROM {self.table_name}
+            WHERE status = $1
+              AND retry_count < $2
+              AND (
+                retry_count = 0
+                OR created_at + (INTERVAL '1 second' * POW($3, retry_count)) < NOW()
+              )
+            ORDER BY created_at
+            LIMIT $4
+            FOR UPDATE SKIP LOCKED
+        """
 
-    async def _process_batch(self, events: List[Dict[str, Any]]):
-        """Обрабатывает batch событий"""
-        for event in events:
-            await self._process_event(event)
+        rows = await conn.fetch(
+            query,
+            OutboxStatus.PENDING.value,
+            self.max_retries,
+            self.retry_delay_base,
+            self.batch_size
+        )
 
-    async def _process_event(self, event: Dict[str, Any]):
-        """Публикует одно событие в Event Bus"""
-        event_id = event["id"]
-        event_type = event["event_type"]
-        payload = event["payload"]
-        retry_count = event["retry_count"]
-        trace_id = event.get("trace_id")
+        return [dict(row) for row in rows]
 
-        try:
-            # Публикуем в Event Bus
-            await self.event_bus.publish(
-                event_type=event_type,
-                payload=payload if isinstance(payload, dict) else json.loads(payload),
-                trace_id=trace_id
-            )
+    async def _process_batch(self, conn: asyncpg.Connection, events: List[Dict[str, Any]]):
+        """Публикует batch и bulk-обновляет статусы"""
+        results = await self._publish_events(events)
 
-            # Помечаем как published
-            await self._mark_published(event_id)
+        published_ids: List[int] = []
+        retry_ids: List[int] = []
+        retry_errors: List[str] = []
+        failed_ids: List[int] = []
+        failed_errors: List[str] = []
 
-            self.stats["events_processed"] += 1
+        for event, result in zip(events, results):
+            event_id = event["id"]
+            event_type = event["event_type"]
 
-            logger.debug(
-                f"Outbox event published: {event_type} "
-                f"(id={event_id}, retries={retry_count}, trace_id={trace_id})"
-            )
+            if not isinstance(result, Exception):
+                published_ids.append(event_id)
+                logger.debug(
+                    f"Outbox event published: {event_type} "
+                    f"(id={event_id}, retries={event['retry_count']}, trace_id={event.get('trace_id')})"
+                )
+                continue
 
-        except Exception as e:
             # Публикация не удалась
-            new_retry_count = retry_count + 1
+            new_retry_count = event["retry_count"] + 1
+            error = str(result)[:500]
 
             if new_retry_count >= self.max_retries:
                 # Достигнут лимит - отправляем в DLQ
-                await self._mark_failed(event_id, str(e))
-                self.stats["events_failed"] += 1
-
+                failed_ids.append(event_id)
+                failed_errors.append(error)
                 logger.error(
                     f"Outbox event moved to DLQ: {event_type} "
-                    f"(id={event_id}, retries={new_retry_count}). Error: {e}"
+                    f"(id={event_id}, retries={new_retry_count}). Error: {result}"
                 )
             else:
-                # Увеличиваем retry_count
-                await self._increment_retry(event_id, str(e))
-                self.stats["total_retries"] += 1
-
+                retry_ids.append(event_id)
+                retry_errors.append(error)
                 logger.warning(
                     f"Outbox event retry scheduled: {event_type} "
-                    f"(id={event_id}, retry={new_retry_count}/{self.max_retries}). Error: {e}"
+                    f"(id={event_id}, retry={new_retry_count}/{self.max_retries}). Error: {result}"
                 )
 
-    async def _mark_published(self, event_id: int):
-        """Помечает событие как опубликованное"""
-        async with self.db_pool.acquire() as conn:
-            query = f"""
-                UPDATE {self.table_name}
-                SET status = $1, published_at = NOW()
-                WHERE id = $2
-            """
-            await conn.execute(query, OutboxStatus.PUBLISHED.value, event_id)
+        if published_ids:
+            await self._mark_published(conn, published_ids)
+            self.stats["events_processed"] += len(published_ids)
+        if retry_ids:
+            await self._increment_retry(conn, retry_ids, retry_errors)
+            self.stats["total_retries"] += len(retry_ids)
+        if failed_ids:
+            await self._mark_failed(conn, failed_ids, failed_errors)
+            self.stats["events_failed"] += len(failed_ids)
+
+    async def _publish_events(self, events: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Публикует batch в Event Bus
 
-    async def _mark_failed(self, event_id: int, error: str):
-        """Помечает событие как failed (DLQ)"""
-        async with self.db_pool.acquire() as conn:
-            query = f"""
-                UPDATE {self.table_name}
-                SET status = $1, last_error = $2
-                WHERE id = $3
-            """
-            await conn.execute(query, OutboxStatus.FAILED.value, error[:500], event_id)
+        Returns:
+            Для каждого события - результат publish или Exception
+        """
+        batch = [
+            {
+                "event_type": event["event_type"],
+                "payload": event["payload"] if isinstance(event["payload"], dict) else json.loads(event["payload"]),
+                "trace_id": event.get("trace_id")
+            }
+            for event in events
+        ]
+
+        # EventBus: один pipeline на весь batch
+        if hasattr(self.event_bus, "publish_many"):
+            try:
+                return await self.event_bus.publish_many(batch)
+            except Exception as e:
+                return [e] * len(batch)
+
+        # Event bus без batch API - параллельные publish
+        return await asyncio.gather(
+            *[self.event_bus.publish(**event) for event in batch],
+            return_exceptions=True
+        )
 
-    async def _increment_retry(self, event_id: int, error: str):
+    async def _mark_published(self, conn: asyncpg.Connection, event_ids: List[int]):
+        """Помечает события как опубликованные"""
+        query = f"""
+            UPDATE {self.table_name}
+            SET status = $1, published_at = NOW()
+            WHERE id = ANY($2::bigint[])
+        """
+        await conn.execute(query, OutboxStatus.PUBLISHED.value, event_ids)
+
+    async def _mark_failed(self, conn: asyncpg.Connection, event_ids: List[int], errors: List[str]):
+        """Помечает события как failed (DLQ)"""
+        query = f"""
+            UPDATE {self.table_name} AS outbox
+            SET status = $1, retry_count = outbox.retry_count + 1, last_error = batch.error
+            FROM unnest($2::bigint[], $3::text[]) AS batch(id, error)
+            WHERE outbox.id = batch.id
+        """
+        await conn.execute(query, OutboxStatus.FAILED.value, event_ids, errors)
+
+    async def _increment_retry(self, conn: asyncpg.Connection, event_ids: List[int], errors: List[str]):
         """Увеличивает счетчик retry"""
-        async with self.db_pool.acquire() as conn:
-            query = f"""
-                UPDATE {self.table_name}
-                SET retry_count = retry_count + 1, last_error = $1
-                WHERE id = $2
-            """
-            await conn.execute(query, error[:500], event_id)
+        query = f"""
+            UPDATE {self.table_name} AS outbox
+            SET retry_count = outbox.retry_count + 1, last_error = batch.error
+            FROM unnest($1::bigint[], $2::text[]) AS batch(id, error)
+            WHERE outbox.id = batch.id
+        """
+        await conn.execute(query, event_ids, errors)
 
     def get_stats(self) -> Dict[str, Any]:
         """Возвращает статистику работы"""
         return {
             **self.stats,
-            "is_running": self._running
+            "is_running": self._running,
+            "workers": self.workers,
+            "listening": self._is_listening()
         }
 
 
@@ -7,11 +7,13 @@ Coach Vector DAO - Специализированные методы Qdrant дл
 - Similarity matching для персонализации ответов
 """
 from typing import Dict, List, Any, Optional
-from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from datetime import datetime
 import logging
 
+from selfology_bot.database.vector_store import VectorStoreGateway
+from data_access.trajectory_store import TrajectoryStore, TrajectorySeries
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,9 +28,15 @@ class CoachVectorDAO:
     """
 
     def __init__(self, qdrant_url: str = "http://localhost:6333"):
-        self.client = QdrantClient(url=qdrant_url)
+        self.store = VectorStoreGateway(url=qdrant_url)
+        self.client = self.store.client
+        self.trajectory_store = TrajectoryStore(self.client)
         logger.info(f"✅ CoachVectorDAO connected to Qdrant at {qdrant_url}")
 
+    async def close(self, timeout: Optional[float] = None) -> bool:
+        """Закрыть соединение с Qdrant"""
+        return await self.store.close(timeout)
+
     async def get_current_personality_vector(self, user_id: int) -> Optional[Dict[str, Any]]:
         """
         Получить ТЕКУЩИЙ вектор личности пользователя
@@ -37,7 +45,7 @@ class CoachVectorDAO:
         Скорость: < 10ms
         """
         try:
-            result = self.client.retrieve(
+            result = await self.client.retrieve(
                 collection_name="personality_profiles",
                 ids=[user_id],
                 with_payload=True,
@@ -87,7 +95,7 @@ class CoachVectorDAO:
         """
         try:
             # Поиск ТОЛЬКО среди векторов ЭТОГО пользователя
-            search_result = self.client.search(
+            search_result = await self.client.search(
                 collection_name="personality_evolution",
                 query_vector=current_message_vector,
                 query_filter=models.Filter(
@@ -136,43 +144,12 @@ class CoachVectorDAO:
         Использование: анализ трендов → "ваша открытость растет"
 
         Returns:
-            List векторов истории, отсортированных по времени
+            Последние limit векторов истории, отсортированные по времени
         """
         try:
-            # Загрузить ВСЕ векторы эволюции пользователя
-            scroll_result = self.client.scroll(
-                collection_name="personality_evolution",
-                scroll_filter=models.Filter(
-                    must=[
-                        models.FieldCondition(
-                            key="user_id",
-                            match=models.MatchValue(value=user_id)
-                        )
-                    ]
-                ),
-                limit=limit,
-                with_payload=True
-            )
-
-            trajectory = []
-            if scroll_result and len(scroll_result[0]) > 0:
-                for point in scroll_result[0]:
-                    payload = point.payload
-
-                    # Используем created_at или updated_at (что есть)
-                    timestamp = payload.get("created_at") or payload.get("updated_at")
-
-                    trajectory.append({
-                        "snapshot_id": payload.get("snapshot_id"),
-                        "created_at": timestamp,
-                        "big_five": payload.get("personality_snapshot", {}).get("big_five", {}) or payload.get("traits", {}).get("big_five", {}),
-                        "delta_magnitude": payload.get("delta_magnitude", 0),
-                        "is_milestone": payload.get("is_milestone", False)
-                    })
-
-            # Сортируем по времени (только те что имеют timestamp)
-            trajectory = [t for t in trajectory if t["created_at"]]
-            trajectory.sort(key=lambda x: x["created_at"])
+            # Qdrant отдает точки в порядке snapshot_id, дочитываются только новые
+            series = await self.trajectory_store.get_series(user_id)
+            trajectory = series.to_points(limit)
 
             logger.info(f"📈 Loaded {len(trajectory)} evolution points for user {user_id}")
             return trajectory
@@ -184,7 +161,8 @@ class CoachVectorDAO:
     async def analyze_personality_trajectory(
         self,
         user_id: int,
-        window: int = 20
+        window: int = 20,
+        trajectory: Optional[List[Dict[str, Any]]] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Анализ трендов личности на основе истории эволюции
@@ -192,6 +170,8 @@ class CoachVectorDAO:
         Args:
             user_id: ID пользователя
             window: Сколько последних точек анализировать
+            trajectory: Уже загруженная траектория (get_personality_trajectory) -
+                        анализ без повторного запроса в Qdrant
 
         Returns:
             Dict с трендами и инсайтами
@@ -211,33 +191,23 @@ class CoachVectorDAO:
             }
         """
         try:
-            # Загружаем траекторию
-            trajectory = await self.get_personality_trajectory(user_id, limit=window)
-
-            if len(trajectory) < 2:
-                logger.warning(f"⚠️ Not enough data for trajectory analysis (need 2+, got {len(trajectory)})")
+            # Серия снимков: из переданной траектории или из TrajectoryStore
+            if trajectory is not None:
+                series = TrajectorySeries.from_points(trajectory[-window:])
+            else:
+                series = await self.trajectory_store.get_series(user_id)
+
+            data_points = min(len(series), window)
+            if data_points < 2:
+                logger.warning(f"⚠️ Not enough data for trajectory analysis (need 2+, got {data_points})")
                 return None
 
-            # Анализируем каждую черту Big Five
-            traits = ["openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism"]
+            # Анализируем каждую черту Big Five по последним window точкам
             trends = {}
             insights = []
 
-            for trait in traits:
-                # Получаем значения во времени
-                values = [
-                    point["big_five"].get(trait, 0.5)
-                    for point in trajectory
-                    if point.get("big_five")
-                ]
-
-                if len(values) < 2:
-                    continue
-
-                # Вычисляем тренд
-                first_value = values[0]
-                last_value = values[-1]
-                change = last_value - first_value
+            for trait, stats in series.trends(window).items():
+                change = stats["change"]
 
                 # Определяем направление
                 if abs(change) < 0.05:
@@ -250,13 +220,13 @@ class CoachVectorDAO:
                 trends[trait] = {
                     "change": round(change, 2),
                     "direction": direction,
-                    "current_value": round(last_value, 2),
-                    "volatility": round(self._calculate_volatility(values), 2)
+                    "current_value": round(stats["current_value"], 2),
+                    "volatility": round(stats["volatility"], 2)
                 }
 
                 # Генерируем инсайты для значительных изменений
                 if abs(change) >= 0.10:
-                    insight = self._generate_trait_insight(trait, change, direction, last_value)
+                    insight = self._generate_trait_insight(trait, change, direction, stats["current_value"])
                     if insight:
                         insights.append(insight)
 
@@ -275,23 +245,14 @@ class CoachVectorDAO:
                 "insights": insights,
                 "momentum": momentum,
                 "volatility": volatility,
-                "data_points": len(trajectory),
-                "time_span": f"{trajectory[0]['created_at'][:10]} → {trajectory[-1]['created_at'][:10]}"
+                "data_points": data_points,
+                "time_span": series.time_span(window)
             }
 
         except Exception as e:
             logger.error(f"❌ Error analyzing trajectory for user {user_id}: {e}")
             return None
 
-    def _calculate_volatility(self, values: List[float]) -> float:
-        """Вычислить волатильность (стандартное отклонение)"""
-        if len(values) < 2:
-            return 0.0
-
-        mean = sum(values) / len(values)
-        variance = sum((x - mean) ** 2 for x in values) / len(values)
-        return variance ** 0.5
-
     def _generate_trait_insight(self, trait: str, change: float, direction: str, current_value: float) -> Optional[str]:
         """Сгенерировать человеческий инсайт о тренде черты"""
 
@@ -358,7 +319,7 @@ class CoachVectorDAO:
                 return []
 
             # Ищем похожих
-            search_result = self.client.search(
+            search_result = await self.client.search(
                 collection_name="personality_profiles",
                 query_vector=current_user["vector"],
                 limit=limit + 1,  # +1 чтобы исключить себя
@@ -410,13 +371,13 @@ class CoachVectorDAO:
     async def health_check(self) -> Dict[str, Any]:
         """Проверка подключения к Qdrant"""
         try:
-            collections = self.client.get_collections()
+            collections = await self.client.get_collections()
             collection_names = [c.name for c in collections.collections]
 
             stats = {}
             for name in ["personality_profiles", "personality_evolution", "quick_match"]:
                 if name in collection_names:
-                    info = self.client.get_collection(name)
+                    info = await self.client.get_collection(name)
                     stats[name] = {
                         "points_count": info.points_count,
                         "status": info.status
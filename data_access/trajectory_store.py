@@ -0,0 +1,276 @@
+"""
+Trajectory Store - Упорядоченная история эволюции личности из personality_evolution
+
+📇 ИНДЕКС: Payload index на user_id + snapshot_id (epoch ms момента снимка)
+↕️ ПОРЯДОК: Qdrant отдает точки уже отсортированными (scroll order_by snapshot_id)
+📈 СЕРИЯ: Per-user numpy time series Big Five + дельты, дочитывается инкрементально
+⚡ АНАЛИЗ: Тренды по последним window точкам - O(window), без полного scroll + sort
+"""
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import logging
+
+import numpy as np
+from qdrant_client.http import models
+
+try:
+    # Server-side сортировка scroll появилась в qdrant-client 1.8
+    from qdrant_client.http.models import OrderBy, Direction
+    ORDER_BY_AVAILABLE = True
+except ImportError:
+    ORDER_BY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EVOLUTION_COLLECTION = "personality_evolution"
+ORDER_KEY = "snapshot_id"  # Все writers пишут snapshot_id = int(timestamp * 1000)
+
+BIG_FIVE_TRAITS = ("openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism")
+
+_PAYLOAD_FIELDS = [
+    "snapshot_id", "created_at", "updated_at",
+    "personality_snapshot", "traits", "delta_magnitude", "is_milestone"
+]
+
+
+def _trait_score(value: Any, default: float = 0.5) -> float:
+    """Значение черты: float или {"score": ...}"""
+    if isinstance(value, dict):
+        value = value.get("score", default)
+    if isinstance(value, (int, float)):
+        return float(value)
+    return default
+
+
+class TrajectorySeries:
+    """
+    Time series снимков личности одного пользователя
+
+    Массивы растут удвоением capacity - append амортизированно O(1).
+    Строки без Big Five хранятся (для storytelling), но в трендах не участвуют.
+    """
+
+    def __init__(self, capacity: int = 32):
+        self._n = 0
+        self._ts = np.empty(capacity, dtype=np.int64)
+        self._traits = np.empty((capacity, len(BIG_FIVE_TRAITS)), dtype=np.float64)
+        self._deltas = np.empty((capacity, len(BIG_FIVE_TRAITS)), dtype=np.float64)
+        self._has_traits = np.empty(capacity, dtype=bool)
+        self._delta_magnitude = np.empty(capacity, dtype=np.float64)
+        self._milestone = np.empty(capacity, dtype=bool)
+        self._created_at: List[str] = []
+        self._last_traits: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_points(cls, points: List[Dict[str, Any]]) -> "TrajectorySeries":
+        """Серия из уже загруженных точек get_personality_trajectory (по времени)"""
+        series = cls(capacity=max(len(points), 1))
+        for point in points:
+            series.append(
+                snapshot_id=point.get("snapshot_id") or 0,
+                created_at=point.get("created_at"),
+                big_five=point.get("big_five"),
+                delta_magnitude=point.get("delta_magnitude", 0),
+                is_milestone=point.get("is_milestone", False)
+            )
+        return series
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def last_snapshot_id(self) -> Optional[int]:
+        return int(self._ts[self._n - 1]) if self._n else None
+
+    def _grow(self):
+        capacity = len(self._ts) * 2
+        for name in ("_ts", "_traits", "_deltas", "_has_traits", "_delta_magnitude", "_milestone"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+
+    def append(
+        self,
+        snapshot_id: int,
+        created_at: Optional[str],
+        big_five: Optional[Dict[str, Any]],
+        delta_magnitude: float = 0.0,
+        is_milestone: bool = False
+    ) -> bool:
+        """Добавить снимок в конец серии (снимки не новее последнего игнорируются)"""
+        if snapshot_id and self._n and snapshot_id <= self._ts[self._n - 1]:
+            return False
+        if self._n == len(self._ts):
+            self._grow()
+
+        i = self._n
+        self._ts[i] = snapshot_id
+        self._has_traits[i] = bool(big_five)
+        self._traits[i] = [_trait_score(big_five.get(trait)) for trait in BIG_FIVE_TRAITS] if big_five else 0.5
+        self._deltas[i] = (
+            self._traits[i] - self._last_traits
+            if big_five and self._last_traits is not None else 0.0
+        )
+        if big_five:
+            self._last_traits = self._traits[i].copy()
+        self._delta_magnitude[i] = float(delta_magnitude or 0)
+        self._milestone[i] = bool(is_milestone)
+        self._created_at.append(created_at)
+        self._n += 1
+        return True
+
+    def to_points(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Последние limit точек в формате get_personality_trajectory"""
+        start = 0 if limit is None else max(self._n - limit, 0)
+        return [
+            {
+                "snapshot_id": int(self._ts[i]),
+                "created_at": self._created_at[i],
+                "big_five": dict(zip(BIG_FIVE_TRAITS, self._traits[i].tolist())) if self._has_traits[i] else {},
+                "delta_magnitude": float(self._delta_magnitude[i]),
+                "is_milestone": bool(self._milestone[i])
+            }
+            for i in range(start, self._n)
+        ]
+
+    def deltas(self, window: int) -> np.ndarray:
+        """Изменения черт между соседними снимками (последние window строк)"""
+        start = max(self._n - window, 0)
+        return self._deltas[start:self._n][self._has_traits[start:self._n]]
+
+    def trends(self, window: int) -> Dict[str, Dict[str, float]]:
+        """
+        Изменение, текущее значение и волатильность (std) каждой черты
+        по последним window снимкам - O(window)
+        """
+        start = max(self._n - window, 0)
+        values = self._traits[start:self._n][self._has_traits[start:self._n]]
+        if len(values) < 2:
+            return {}
+
+        change = values[-1] - values[0]
+        volatility = values.std(axis=0)
+        return {
+            trait: {
+                "change": float(change[j]),
+                "current_value": float(values[-1, j]),
+                "volatility": float(volatility[j])
+            }
+            for j, trait in enumerate(BIG_FIVE_TRAITS)
+        }
+
+    def time_span(self, window: int) -> Optional[str]:
+        start = max(self._n - window, 0)
+        if self._n - start < 1 or not self._created_at[start] or not self._created_at[-1]:
+            return None
+        return f"{self._created_at[start][:10]} → {self._created_at[-1][:10]}"
+
+
+class TrajectoryStore:
+    """
+    Кэш TrajectorySeries по пользователям поверх personality_evolution
+
+    Первый запрос пользователя читает всю историю страницами в порядке
+    snapshot_id, следующие - только точки новее последней известной, поэтому
+    снимки от EmbeddingCreator (в любом процессе) видны без инвалидации.
+    """
+
+    def __init__(self, client, page_size: int = 256, max_users: int = 10_000):
+        self.client = client
+        self.page_size = page_size
+        self.max_users = max_users
+
+        self._series: "OrderedDict[int, TrajectorySeries]" = OrderedDict()
+        self._indexes_ready = False
+
+    async def ensure_indexes(self):
+        """Payload индексы для фильтра по user_id и сортировки по snapshot_id"""
+        if self._indexes_ready:
+            return
+        try:
+            for field in ("user_id", ORDER_KEY):
+                await self.client.create_payload_index(
+                    collection_name=EVOLUTION_COLLECTION,
+                    field_name=field,
+                    field_schema=models.PayloadSchemaType.INTEGER
+                )
+            self._indexes_ready = True
+            logger.info(f"📇 Payload indexes ready on {EVOLUTION_COLLECTION} (user_id, {ORDER_KEY})")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not create trajectory payload indexes: {e}")
+
+    async def get_series(self, user_id: int) -> TrajectorySeries:
+        """Серия пользователя, дочитанная до последнего снимка в Qdrant"""
+        series = self._series.get(user_id)
+        if series is None:
+            await self.ensure_indexes()
+            series = TrajectorySeries()
+            self._series[user_id] = series
+            while len(self._series) > self.max_users:
+                self._series.popitem(last=False)
+        else:
+            self._series.move_to_end(user_id)
+
+        added = 0
+        for point in await self._fetch_newer(user_id, series.last_snapshot_id):
+            payload = point.payload
+            added += series.append(
+                snapshot_id=payload[ORDER_KEY],
+                created_at=payload.get("created_at") or payload.get("updated_at"),
+                big_five=(
+                    payload.get("personality_snapshot", {}).get("big_five", {})
+                    or (payload.get("traits") or {}).get("big_five", {})
+                ),
+                delta_magnitude=payload.get("delta_magnitude", 0),
+                is_milestone=payload.get("is_milestone", False)
+            )
+
+        if added:
+            logger.debug(f"📈 Trajectory for user {user_id}: +{added} points ({len(series)} total)")
+        return series
+
+    def invalidate(self, user_id: int):
+        self._series.pop(user_id, None)
+
+    async def _fetch_newer(self, user_id: int, after: Optional[int]) -> List[Any]:
+        """Все точки пользователя со snapshot_id > after в порядке возрастания"""
+        must = [
+            models.FieldCondition(key="user_id", match=models.MatchValue(value=user_id)),
+        ]
+        if after is not None:
+            must.append(models.FieldCondition(key=ORDER_KEY, range=models.Range(gt=after)))
+        scroll_filter = models.Filter(must=must)
+
+        points: List[Any] = []
+        offset = None
+        while True:
+            kwargs = dict(
+                collection_name=EVOLUTION_COLLECTION,
+                scroll_filter=scroll_filter,
+                limit=self.page_size,
+                with_payload=_PAYLOAD_FIELDS,
+                with_vectors=False
+            )
+            if ORDER_BY_AVAILABLE:
+                # При order_by следующая страница - по start_from, offset не поддерживается
+                kwargs["order_by"] = OrderBy(
+                    key=ORDER_KEY,
+                    direction=Direction.ASC,
+                    start_from=points[-1].payload[ORDER_KEY] + 1 if points else None
+                )
+            else:
+                kwargs["offset"] = offset
+
+            page, offset = await self.client.scroll(**kwargs)
+            points.extend(point for point in page if point.payload.get(ORDER_KEY))
+
+            if ORDER_BY_AVAILABLE:
+                if len(page) < self.page_size:
+                    break
+            elif offset is None:
+                break
+
+        if not ORDER_BY_AVAILABLE:
+            points.sort(key=lambda point: point.payload[ORDER_KEY])
+        return points
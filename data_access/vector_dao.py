@@ -1,7 +1,7 @@
 """
 Vector Database Data Access Object - Clean operations for Qdrant vector database
 """
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models
 from typing import Dict, List, Any, Optional, Tuple
 import numpy as np
@@ -10,17 +10,21 @@ from datetime import datetime
 
 from core.config import get_config
 from core.logging import vector_logger
+from selfology_bot.database.vector_store import VectorStoreGateway
 
 
 class VectorDAO:
     """Data Access Object for vector database operations"""
     
-    def __init__(self, client: Optional[QdrantClient] = None):
+    def __init__(self, client: Optional[AsyncQdrantClient] = None):
         self.config = get_config()
-        self.client = client or QdrantClient(
-            host=self.config.vector.host,
-            port=self.config.vector.port
+        self.store = VectorStoreGateway(
+            client=client or AsyncQdrantClient(
+                host=self.config.vector.host,
+                port=self.config.vector.port
+            )
         )
+        self.client = self.store.client
         self.collection_name = self.config.vector.collection_name
         self.vector_size = self.config.vector.vector_size
         self.logger = vector_logger
@@ -30,12 +34,12 @@ class VectorDAO:
         
         try:
             # Check if collection exists
-            collections = self.client.get_collections()
+            collections = await self.client.get_collections()
             existing_names = [c.name for c in collections.collections]
             
             if self.collection_name not in existing_names:
                 # Create collection
-                self.client.create_collection(
+                await self.client.create_collection(
                     collection_name=self.collection_name,
                     vectors_config=models.VectorParams(
                         size=self.vector_size,
@@ -45,13 +49,13 @@ class VectorDAO:
                 self.logger.info(f"Created vector collection: {self.collection_name}")
             
             # Create index for faster search
-            self.client.create_payload_index(
+            await self.client.create_payload_index(
                 collection_name=self.collection_name,
                 field_name="user_id",
                 field_schema=models.PayloadSchemaType.KEYWORD
             )
             
-            self.client.create_payload_index(
+            await self.client.create_payload_index(
                 collection_name=self.collection_name,
                 field_name="personality_type",
                 field_schema=models.PayloadSchemaType.KEYWORD
@@ -89,9 +93,9 @@ class VectorDAO:
             }
             
             # Store vector
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=[
+            stored = await self.store.upsert(
+                self.collection_name,
+                [
                     models.PointStruct(
                         id=point_id,
                         vector=personality_vector,
@@ -99,6 +103,8 @@ class VectorDAO:
                     )
                 ]
             )
+            if not stored:
+                raise RuntimeError(f"Qdrant upsert failed for point {point_id}")
             
             self.logger.log_user_action("personality_vector_stored", user_id, point_id=point_id)
             return point_id
@@ -114,7 +120,7 @@ class VectorDAO:
         
         try:
             # Get current vector
-            current = self.client.retrieve(
+            current = await self.client.retrieve(
                 collection_name=self.collection_name,
                 ids=[point_id],
                 with_vectors=True
@@ -136,9 +142,9 @@ class VectorDAO:
             current_payload["update_confidence"] = confidence
             
             # Store updated vector
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=[
+            stored = await self.store.upsert(
+                self.collection_name,
+                [
                     models.PointStruct(
                         id=point_id,
                         vector=updated_vector,
@@ -146,6 +152,8 @@ class VectorDAO:
                     )
                 ]
             )
+            if not stored:
+                raise RuntimeError(f"Qdrant upsert failed for point {point_id}")
             
             self.logger.log_user_action("personality_vector_updated", user_id, 
                                        point_id=point_id, updates=dimension_updates)
@@ -166,7 +174,7 @@ class VectorDAO:
                 return []
             
             # Search for similar vectors
-            search_result = self.client.search(
+            search_result = await self.client.search(
                 collection_name=self.collection_name,
                 query_vector=user_vector["vector"],
                 limit=limit + 1,  # +1 to exclude self
@@ -199,7 +207,7 @@ class VectorDAO:
         
         try:
             # Search for user's latest vector
-            search_result = self.client.scroll(
+            search_result = await self.client.scroll(
                 collection_name=self.collection_name,
                 scroll_filter=models.Filter(
                     must=[
@@ -256,7 +264,7 @@ class VectorDAO:
                 )
             
             # Search with filters
-            search_result = self.client.scroll(
+            search_result = await self.client.scroll(
                 collection_name=self.collection_name,
                 scroll_filter=models.Filter(must=filters) if filters else None,
                 limit=limit,
@@ -287,7 +295,7 @@ class VectorDAO:
         
         try:
             # Find all user vectors
-            search_result = self.client.scroll(
+            search_result = await self.client.scroll(
                 collection_name=self.collection_name,
                 scroll_filter=models.Filter(
                     must=[
@@ -305,7 +313,7 @@ class VectorDAO:
                 point_ids = [point.id for point in search_result[0]]
                 
                 # Delete points
-                self.client.delete(
+                await self.client.delete(
                     collection_name=self.collection_name,
                     points_selector=models.PointIdsList(points=point_ids)
                 )
@@ -325,7 +333,7 @@ class VectorDAO:
         
         try:
             # Collection info
-            collection_info = self.client.get_collection(self.collection_name)
+            collection_info = await self.client.get_collection(self.collection_name)
             
             # Count by personality type
             personality_types = await self._count_by_field("personality_type")
@@ -345,6 +353,10 @@ class VectorDAO:
             self.logger.error(f"Failed to get collection statistics: {e}")
             return {}
     
+    async def close(self, timeout: Optional[float] = None) -> bool:
+        """Flush queued writes and close the Qdrant client"""
+        return await self.store.close(timeout)
+    
     def _classify_personality_type(self, personality_data: Dict[str, Any]) -> str:
         """Classify personality type based on Big Five scores"""
         
@@ -390,7 +402,7 @@ class VectorDAO:
             # In practice, you might need to scroll through all points and count manually
             # or use aggregation features if available in newer Qdrant versions
             
-            all_points = self.client.scroll(
+            all_points = await self.client.scroll(
                 collection_name=self.collection_name,
                 limit=1000,  # Adjust based on your dataset size
                 with_payload=True
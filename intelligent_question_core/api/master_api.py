@@ -2,17 +2,24 @@
 """
 MASTER API - API для работы с unified master базой вопросов.
 
-Читает из selfology_master.json и предоставляет:
+Читает из selfology_master.json (или его бинарного снимка, см. snapshot.py)
+и предоставляет:
 - Программную структуру (программы → кластеры → вопросы)
 - Поиск по метаданным
 - Совместимость со старым core_api
 """
 
-import json
 import os
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 
+try:
+    from .question_index import QuestionBitmapIndex
+    from .snapshot import MasterSnapshot, compile_snapshot, load_snapshot, read_master_data
+except ImportError:  # запуск как скрипта из api/
+    from question_index import QuestionBitmapIndex
+    from snapshot import MasterSnapshot, compile_snapshot, load_snapshot, read_master_data
+
 
 @dataclass
 class QuestionResult:
@@ -31,42 +38,42 @@ class QuestionResult:
 class SelfologyMasterAPI:
     """API для работы с unified master базой"""
 
-    def __init__(self, master_file: str = "selfology_master.json"):
+    def __init__(self, master_file: str = "selfology_master.json", use_snapshot: bool = True):
         # Находим файл
         if not os.path.sep in master_file:
             script_dir = os.path.dirname(os.path.abspath(__file__))
             master_file = os.path.join(script_dir, '..', 'data', master_file)
 
-        with open(master_file, 'r', encoding='utf-8') as f:
-            self.data = json.load(f)
+        # Бинарный снимок (mmap + готовые индексы), если он актуален
+        snapshot = load_snapshot(master_file) if use_snapshot else None
+
+        if snapshot:
+            self._load_snapshot(snapshot)
+        else:
+            self.data = read_master_data(master_file)
+
+            # Создаём индексы для быстрого поиска
+            self._build_indexes()
 
-        # Создаём индексы для быстрого поиска
-        self._build_indexes()
+            if use_snapshot:
+                self._write_snapshot(master_file)
 
         print(f"📚 Master загружен: {self.stats['programs']} программ, "
-              f"{self.stats['clusters']} кластеров, {self.stats['questions']} вопросов")
+              f"{self.stats['clusters']} кластеров, {self.stats['questions']} вопросов"
+              f"{' (snapshot)' if snapshot else ''}")
 
     def _build_indexes(self):
         """Строит индексы для быстрого поиска"""
         self.questions_by_id = {}
-        self.questions_by_program = {}
-        self.questions_by_cluster_type = {"Foundation": [], "Exploration": [], "Integration": []}
-        self.questions_by_domain = {}
-        self.questions_by_depth = {}
         self.programs_list = []
         self.clusters_by_program = {}
 
-        total_questions = 0
-        total_clusters = 0
-
         for prog in self.data["programs"]:
             prog_name = prog["name"]
             self.programs_list.append(prog_name)
-            self.questions_by_program[prog_name] = []
             self.clusters_by_program[prog_name] = []
 
             for block in prog["blocks"]:
-                total_clusters += 1
                 cluster_name = block["name"]
                 cluster_type = block.get("type", "Exploration")
                 self.clusters_by_program[prog_name].append({
@@ -77,11 +84,13 @@ class SelfologyMasterAPI:
                 })
 
                 for q in block["questions"]:
-                    total_questions += 1
-                    q_id = q["id"]
+                    q_id = q.get("id")
+                    if not q_id or q_id in self.questions_by_id:
+                        # Черновые вопросы без ID не попадают в индексы
+                        continue
 
                     # Полный объект с контекстом
-                    full_q = {
+                    self.questions_by_id[q_id] = {
                         **q,
                         "program": prog_name,
                         "cluster": cluster_name,
@@ -89,34 +98,32 @@ class SelfologyMasterAPI:
                         "cluster_description": block.get("description", "")
                     }
 
-                    self.questions_by_id[q_id] = full_q
-                    self.questions_by_program[prog_name].append(full_q)
-
-                    # По типу кластера
-                    if cluster_type in self.questions_by_cluster_type:
-                        self.questions_by_cluster_type[cluster_type].append(full_q)
-
-                    # По метаданным (если есть)
-                    if q.get("metadata"):
-                        meta = q["metadata"]
-                        domain = meta.get("classification", {}).get("domain")
-                        depth = meta.get("classification", {}).get("depth_level")
-
-                        if domain:
-                            if domain not in self.questions_by_domain:
-                                self.questions_by_domain[domain] = []
-                            self.questions_by_domain[domain].append(full_q)
-
-                        if depth:
-                            if depth not in self.questions_by_depth:
-                                self.questions_by_depth[depth] = []
-                            self.questions_by_depth[depth].append(full_q)
-
+        # Битовые индексы: программа, тип кластера, домен, глубина, энергия, safety
+        self.index = QuestionBitmapIndex(list(self.questions_by_id.values()))
+        self._update_stats()
+
+    def _load_snapshot(self, snapshot: MasterSnapshot):
+        """Индексы из скомпилированного снимка, вопросы декодируются лениво"""
+        self.data = snapshot.data
+        self.questions_by_id = snapshot.questions_by_id
+        self.programs_list = snapshot.programs_list
+        self.clusters_by_program = snapshot.clusters_by_program
+        self.index = snapshot.index
+        self._update_stats()
+
+    def _write_snapshot(self, master_file: str):
+        """Пересобирает снимок для следующих запусков (best effort)"""
+        try:
+            compile_snapshot(master_file)
+        except OSError as e:
+            print(f"⚠️  Snapshot не записан: {e}")
+
+    def _update_stats(self):
         self.stats = {
             "programs": len(self.programs_list),
-            "clusters": total_clusters,
-            "questions": total_questions,
-            "with_metadata": len([q for q in self.questions_by_id.values() if q.get("metadata")])
+            "clusters": sum(len(clusters) for clusters in self.clusters_by_program.values()),
+            "questions": len(self.questions_by_id),
+            "with_metadata": self.index.count(self.index.has_metadata_bits)
         }
 
     # === ОСНОВНЫЕ МЕТОДЫ ===
@@ -135,11 +142,11 @@ class SelfologyMasterAPI:
 
     def get_program_questions(self, program_name: str) -> List[Dict]:
         """Все вопросы программы"""
-        return self.questions_by_program.get(program_name, [])
+        return self.index.materialize(self.index.match("program", program_name))
 
     def get_questions_by_type(self, cluster_type: str) -> List[Dict]:
         """Вопросы по типу кластера (Foundation/Exploration/Integration)"""
-        return self.questions_by_cluster_type.get(cluster_type, [])
+        return self.index.materialize(self.index.match("cluster_type", cluster_type))
 
     def search_questions(self,
                         program: str = None,
@@ -147,38 +154,23 @@ class SelfologyMasterAPI:
                         domain: str = None,
                         depth_level: str = None,
                         min_safety: int = None,
-                        has_metadata: bool = None) -> List[Dict]:
-        """Универсальный поиск вопросов"""
-
-        # Начинаем со всех
-        results = list(self.questions_by_id.values())
-
-        # Фильтры
-        if program:
-            results = [q for q in results if q["program"] == program]
-
-        if cluster_type:
-            results = [q for q in results if q["cluster_type"] == cluster_type]
-
-        if domain:
-            results = [q for q in results
-                      if q.get("metadata", {}).get("classification", {}).get("domain") == domain]
-
-        if depth_level:
-            results = [q for q in results
-                      if q.get("metadata", {}).get("classification", {}).get("depth_level") == depth_level]
-
-        if min_safety:
-            results = [q for q in results
-                      if q.get("metadata", {}).get("psychology", {}).get("safety_level", 0) >= min_safety]
-
-        if has_metadata is not None:
-            if has_metadata:
-                results = [q for q in results if q.get("metadata")]
-            else:
-                results = [q for q in results if not q.get("metadata")]
+                        has_metadata: bool = None,
+                        energy: str = None) -> List[Dict]:
+        """Универсальный поиск вопросов (AND битовых масок)"""
+        bits = self.index.query(
+            program=program,
+            cluster_type=cluster_type,
+            domain=domain,
+            depth_level=depth_level,
+            energy=energy,
+            min_safety=min_safety,
+            has_metadata=has_metadata
+        )
+        return self.index.materialize(bits)
 
-        return results
+    def count_questions(self, **filters) -> int:
+        """Количество вопросов по фильтрам search_questions без материализации"""
+        return self.index.count(self.index.query(**filters))
 
     def get_safe_entry_questions(self, program: str = None) -> List[Dict]:
         """Безопасные вводные вопросы (Foundation, высокий safety)"""
@@ -190,18 +182,12 @@ class SelfologyMasterAPI:
 
     def get_deep_questions(self, program: str = None) -> List[Dict]:
         """Глубокие вопросы (Integration или SHADOW/CORE depth)"""
-        integration = self.search_questions(program=program, cluster_type="Integration")
-        shadow = self.search_questions(program=program, depth_level="SHADOW")
-        core = self.search_questions(program=program, depth_level="CORE")
-
-        # Объединяем без дубликатов
-        seen_ids = set()
-        result = []
-        for q in integration + shadow + core:
-            if q["id"] not in seen_ids:
-                seen_ids.add(q["id"])
-                result.append(q)
-        return result
+        index = self.index
+        deep = (index.match("cluster_type", "Integration")
+                | index.match_any("depth_level", ["SHADOW", "CORE"]))
+        if program:
+            deep &= index.match("program", program)
+        return index.materialize(deep)
 
     def get_processing_recommendation(self, question_id: str) -> Dict[str, Any]:
         """Рекомендует AI модель для обработки вопроса"""
@@ -249,8 +235,8 @@ class SelfologyMasterAPI:
             "version": self.data.get("version"),
             "unified_at": self.data.get("metadata", {}).get("unified_at"),
             "questions_improved": self.data.get("metadata", {}).get("questions_improved", 0),
-            "domains": list(self.questions_by_domain.keys()),
-            "depth_levels": list(self.questions_by_depth.keys())
+            "domains": self.index.values("domain"),
+            "depth_levels": self.index.values("depth_level")
         }
 
 
@@ -277,9 +263,8 @@ class SelfologyQuestionCore(SelfologyMasterAPI):
 
         # Берём вопросы из того же кластера
         same_cluster = [
-            q for q in self.questions_by_id.values()
-            if q["program"] == question["program"]
-            and q["cluster"] == question["cluster"]
+            q for q in self.get_program_questions(question["program"])
+            if q["cluster"] == question["cluster"]
             and q["id"] != question_id
         ]
 
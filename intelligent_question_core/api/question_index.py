@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+QUESTION INDEX - Битовые индексы для мгновенного поиска вопросов.
+
+При загрузке каждому вопросу присваивается плотный целочисленный номер,
+а для каждого значения фильтра (программа, тип кластера, домен, глубина,
+энергетика, порог безопасности) строится битовая маска.
+
+Поиск = AND/OR над масками (Python int), материализация объектов
+происходит только в конце и только для найденных номеров.
+"""
+
+from typing import Dict, List, Any, Optional, Iterator, Sequence
+
+
+# Фильтры по точному совпадению: имя параметра -> функция извлечения значения
+FIELD_EXTRACTORS = {
+    "program": lambda q: q.get("program"),
+    "cluster_type": lambda q: q.get("cluster_type"),
+    "domain": lambda q: (q.get("metadata") or {}).get("classification", {}).get("domain"),
+    "depth_level": lambda q: (q.get("metadata") or {}).get("classification", {}).get("depth_level"),
+    "energy_dynamic": lambda q: (q.get("metadata") or {}).get("classification", {}).get("energy_dynamic"),
+}
+
+MAX_SAFETY_LEVEL = 5
+
+
+def _safety_level(question: Dict) -> int:
+    """Уровень безопасности вопроса (в JSON бывает строкой)"""
+    raw = (question.get("metadata") or {}).get("psychology", {}).get("safety_level", 0)
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return 0
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Номера установленных битов в порядке возрастания"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class QuestionBitmapIndex:
+    """
+    Битовый индекс поверх упорядоченного списка вопросов.
+
+    Номер вопроса = его позиция в списке, поэтому результаты поиска
+    сохраняют исходный порядок master базы.
+    """
+
+    def __init__(self, questions: Sequence):
+        self.questions = questions
+        self.all_bits = (1 << len(questions)) - 1
+        self.bitmaps: Dict[str, Dict[str, int]] = {field: {} for field in FIELD_EXTRACTORS}
+        self.has_metadata_bits = 0
+
+        # safety_at_least[n] - вопросы с safety_level >= n
+        self.safety_at_least: List[int] = [0] * (MAX_SAFETY_LEVEL + 2)
+
+        self._build()
+
+    @classmethod
+    def from_bitmaps(cls,
+                     questions: Sequence,
+                     bitmaps: Dict[str, Dict[str, int]],
+                     has_metadata_bits: int,
+                     safety_at_least: List[int]) -> "QuestionBitmapIndex":
+        """Индекс из готовых масок (бинарный снимок) без прохода по вопросам"""
+        index = cls.__new__(cls)
+        index.questions = questions
+        index.all_bits = (1 << len(questions)) - 1
+        index.bitmaps = {field: dict(bitmaps.get(field, {})) for field in FIELD_EXTRACTORS}
+        index.has_metadata_bits = has_metadata_bits
+        index.safety_at_least = list(safety_at_least)
+        return index
+
+    def _build(self):
+        """Строит все маски за один проход"""
+        safety_exact = [0] * (MAX_SAFETY_LEVEL + 1)
+
+        for idx, q in enumerate(self.questions):
+            bit = 1 << idx
+
+            for field, extract in FIELD_EXTRACTORS.items():
+                value = extract(q)
+                if value:
+                    field_bitmaps = self.bitmaps[field]
+                    field_bitmaps[value] = field_bitmaps.get(value, 0) | bit
+
+            if q.get("metadata"):
+                self.has_metadata_bits |= bit
+
+            level = min(max(_safety_level(q), 0), MAX_SAFETY_LEVEL)
+            safety_exact[level] |= bit
+
+        # Накопительные пороги: OR всех уровней >= n
+        running = 0
+        for level in range(MAX_SAFETY_LEVEL, -1, -1):
+            running |= safety_exact[level]
+            self.safety_at_least[level] = running
+
+    # === ЗАПРОСЫ ===
+
+    def match(self, field: str, value: Optional[str]) -> int:
+        """Маска для одного значения поля (0 если значение неизвестно)"""
+        return self.bitmaps[field].get(value, 0)
+
+    def match_any(self, field: str, values: List[str]) -> int:
+        """OR масок для нескольких значений поля"""
+        bits = 0
+        for value in values:
+            bits |= self.match(field, value)
+        return bits
+
+    def min_safety(self, level: int) -> int:
+        """Маска вопросов с safety_level >= level"""
+        if level <= 0:
+            return self.all_bits
+        if level > MAX_SAFETY_LEVEL:
+            return 0
+        return self.safety_at_least[level]
+
+    def query(self,
+              program: str = None,
+              cluster_type: str = None,
+              domain: str = None,
+              depth_level: str = None,
+              energy: str = None,
+              min_safety: int = None,
+              has_metadata: bool = None) -> int:
+        """Пересечение масок по всем заданным фильтрам"""
+        bits = self.all_bits
+
+        for field, value in (("program", program),
+                             ("cluster_type", cluster_type),
+                             ("domain", domain),
+                             ("depth_level", depth_level),
+                             ("energy_dynamic", energy)):
+            if value:
+                bits &= self.match(field, value)
+                if not bits:
+                    return 0
+
+        if min_safety:
+            bits &= self.min_safety(min_safety)
+
+        if has_metadata is not None:
+            if has_metadata:
+                bits &= self.has_metadata_bits
+            else:
+                bits &= ~self.has_metadata_bits
+
+        return bits
+
+    # === МАТЕРИАЛИЗАЦИЯ ===
+
+    def iter_questions(self, bits: int) -> Iterator[Dict]:
+        """Ленивая материализация: вопросы по маске"""
+        questions = self.questions
+        for idx in iter_bits(bits):
+            yield questions[idx]
+
+    def materialize(self, bits: int) -> List[Dict]:
+        """Список вопросов по маске"""
+        return list(self.iter_questions(bits))
+
+    @staticmethod
+    def count(bits: int) -> int:
+        """Количество вопросов в маске без материализации"""
+        return bin(bits).count("1")
+
+    def values(self, field: str) -> List[str]:
+        """Известные значения поля"""
+        return list(self.bitmaps[field].keys())
+
+    def stats(self) -> Dict[str, Any]:
+        """Размеры индексов для диагностики"""
+        return {
+            "questions": len(self.questions),
+            "bitmaps": {field: len(values) for field, values in self.bitmaps.items()},
+            "with_metadata": self.count(self.has_metadata_bits),
+        }
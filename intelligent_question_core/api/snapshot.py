@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+MASTER SNAPSHOT - Скомпилированный бинарный снимок master базы вопросов.
+
+selfology_master*.json компилируется в файл *.snap рядом с исходником:
+- Таблица вопросов: compact JSON каждой строки + массив смещений (uint32)
+- Пул строк: программы, кластеры, типы и описания хранятся один раз
+- Готовые битовые индексы QuestionBitmapIndex
+
+Снимок читается через mmap, строки декодируются лениво при первом обращении.
+SHA-256 исходных файлов хранится в заголовке - при изменении JSON снимок
+считается устаревшим и пересобирается автоматически.
+
+Использование:
+    python snapshot.py              # собрать снимки для ru/en/es
+    python snapshot.py --check      # проверить актуальность
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .question_index import QuestionBitmapIndex
+except ImportError:  # запуск как скрипта из api/
+    from question_index import QuestionBitmapIndex
+
+
+MAGIC = b"SQSNAP\x00\x01"
+FORMAT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snap"
+
+# magic, format version, sha256 исходников, длина JSON-заголовка
+_PREAMBLE = struct.Struct("<8sI32sI")
+
+# Переводы (selfology_master_en.json) содержат только тексты и
+# совпадают с основной базой по позициям программ/блоков/вопросов
+_VARIANT_RE = re.compile(r"^(?P<base>selfology_master)_(?P<lang>[a-z]{2})\.json$")
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+DEFAULT_SOURCES = ["selfology_master.json", "selfology_master_en.json", "selfology_master_es.json"]
+
+
+# === ИСХОДНЫЕ ДАННЫЕ ===
+
+def resolve_base_file(master_file: str) -> Optional[str]:
+    """Основная база для файла перевода (None для самой основной базы)"""
+    match = _VARIANT_RE.match(os.path.basename(master_file))
+    if not match:
+        return None
+    return os.path.join(os.path.dirname(master_file), match.group("base") + ".json")
+
+
+def _overlay_translation(base: Dict, variant: Dict) -> Dict:
+    """Накладывает переведенные тексты на структуру и метаданные основной базы"""
+    programs = []
+    for base_prog, var_prog in zip(base["programs"], variant["programs"]):
+        blocks = []
+        for base_block, var_block in zip(base_prog["blocks"], var_prog["blocks"]):
+            questions = [
+                {**base_q, "text": var_q.get("text", base_q.get("text"))}
+                for base_q, var_q in zip(base_block["questions"], var_block["questions"])
+            ]
+            blocks.append({
+                **base_block,
+                "name": var_block.get("name", base_block["name"]),
+                "description": var_block.get("description", base_block.get("description", "")),
+                "questions": questions
+            })
+        programs.append({**base_prog, "name": var_prog.get("name", base_prog["name"]), "blocks": blocks})
+
+    return {**{k: v for k, v in variant.items() if k != "programs"}, "programs": programs}
+
+
+def _read_sources(master_file: str) -> Tuple[List[bytes], Optional[str]]:
+    """Сырые байты исходника (и основной базы для перевода)"""
+    base_file = resolve_base_file(master_file)
+    paths = [master_file] + ([base_file] if base_file else [])
+    sources = []
+    for path in paths:
+        with open(path, "rb") as f:
+            sources.append(f.read())
+    return sources, base_file
+
+
+def _content_hash(sources: List[bytes]) -> bytes:
+    digest = hashlib.sha256(str(FORMAT_VERSION).encode())
+    for raw in sources:
+        digest.update(hashlib.sha256(raw).digest())
+    return digest.digest()
+
+
+def read_master_data(master_file: str) -> Dict:
+    """Загружает master JSON (переводы - поверх основной базы)"""
+    sources, base_file = _read_sources(master_file)
+    data = json.loads(sources[0])
+    if base_file:
+        data = _overlay_translation(json.loads(sources[1]), data)
+    return data
+
+
+def snapshot_path(master_file: str) -> str:
+    return os.path.splitext(master_file)[0] + SNAPSHOT_SUFFIX
+
+
+# === КОМПИЛЯЦИЯ ===
+
+def _flatten(data: Dict):
+    """Вопросы с ID в порядке master базы + таблица кластеров + пул строк"""
+    strings: List[str] = []
+    string_ids: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+
+    clusters = []        # [program, name, type, description] -> индексы пула
+    rows = []            # (cluster_idx, question)
+    programs = []
+    clusters_by_program = {}
+    seen_ids = set()
+
+    for prog in data["programs"]:
+        prog_name = prog["name"]
+        programs.append(prog_name)
+        clusters_by_program[prog_name] = []
+
+        for block in prog["blocks"]:
+            cluster_type = block.get("type", "Exploration")
+            description = block.get("description", "")
+            clusters_by_program[prog_name].append({
+                "name": block["name"],
+                "description": description,
+                "type": cluster_type,
+                "question_count": len(block["questions"])
+            })
+            cluster_idx = len(clusters)
+            clusters.append([intern(prog_name), intern(block["name"]),
+                             intern(cluster_type), intern(description)])
+
+            for q in block["questions"]:
+                q_id = q.get("id")
+                if not q_id or q_id in seen_ids:
+                    continue
+                seen_ids.add(q_id)
+                rows.append((cluster_idx, q))
+
+    return programs, clusters_by_program, clusters, rows, strings
+
+
+def compile_snapshot(master_file: str, output_file: str = None) -> str:
+    """
+    Компилирует master JSON в бинарный снимок.
+
+    Запись атомарная (tmp + rename), поэтому параллельные процессы
+    никогда не увидят частично записанный файл.
+    """
+    sources, base_file = _read_sources(master_file)
+    data = json.loads(sources[0])
+    if base_file:
+        data = _overlay_translation(json.loads(sources[1]), data)
+
+    programs, clusters_by_program, clusters, rows, strings = _flatten(data)
+
+    # Индексы строятся по тем же объектам, что вернет ленивая таблица
+    index = QuestionBitmapIndex([_with_context(q, clusters[c], strings) for c, q in rows])
+
+    # Таблица строк вопросов
+    row_blob = bytearray()
+    row_offsets = array("I", [0])
+    for cluster_idx, q in rows:
+        row_blob += json.dumps([cluster_idx, q], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        row_offsets.append(len(row_blob))
+
+    # Пул строк
+    string_blob = bytearray()
+    string_offsets = array("I", [0])
+    for value in strings:
+        string_blob += value.encode("utf-8")
+        string_offsets.append(len(string_blob))
+
+    # Битовые маски: фиксированная ширина на маску
+    mask_bytes = (len(rows) + 7) // 8
+    bitmap_blob = bytearray()
+    bitmap_dir: Dict[str, Dict[str, int]] = {}
+
+    def put_mask(bits: int) -> int:
+        slot = len(bitmap_blob) // mask_bytes if mask_bytes else 0
+        bitmap_blob.extend(bits.to_bytes(mask_bytes, "little"))
+        return slot
+
+    for field, values in index.bitmaps.items():
+        bitmap_dir[field] = {value: put_mask(bits) for value, bits in values.items()}
+    has_metadata_slot = put_mask(index.has_metadata_bits)
+    safety_slots = [put_mask(bits) for bits in index.safety_at_least]
+
+    sections = {}
+    body = bytearray()
+    for name, blob in (("row_offsets", row_offsets.tobytes()),
+                       ("rows", bytes(row_blob)),
+                       ("string_offsets", string_offsets.tobytes()),
+                       ("strings", bytes(string_blob)),
+                       ("bitmaps", bytes(bitmap_blob))):
+        # Выравнивание по 4 байта для memoryview.cast("I")
+        body += b"\x00" * (-len(body) % 4)
+        sections[name] = [len(body), len(blob)]
+        body += blob
+
+    header = json.dumps({
+        "data": {k: v for k, v in data.items() if k != "programs"},
+        "programs": programs,
+        "clusters_by_program": clusters_by_program,
+        "clusters": clusters,
+        "ids": [q["id"] for _, q in rows],
+        "mask_bytes": mask_bytes,
+        "bitmap_dir": bitmap_dir,
+        "has_metadata_slot": has_metadata_slot,
+        "safety_slots": safety_slots,
+        "sections": sections
+    }, ensure_ascii=False).encode("utf-8")
+    header += b" " * (-(_PREAMBLE.size + len(header)) % 4)
+
+    output_file = output_file or snapshot_path(master_file)
+    tmp_file = f"{output_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, _content_hash(sources), len(header)))
+        f.write(header)
+        f.write(body)
+    os.replace(tmp_file, output_file)
+    return output_file
+
+
+def _with_context(q: Dict, cluster: List[int], strings: Sequence) -> Dict:
+    """Вопрос + контекст кластера (как в SelfologyMasterAPI._build_indexes)"""
+    prog_idx, name_idx, type_idx, desc_idx = cluster
+    return {
+        **q,
+        "program": strings[prog_idx],
+        "cluster": strings[name_idx],
+        "cluster_type": strings[type_idx],
+        "cluster_description": strings[desc_idx]
+    }
+
+
+# === ЗАГРУЗКА ===
+
+class _StringPool(Sequence):
+    """Пул строк поверх mmap, каждая строка декодируется один раз"""
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+        self._cache: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        value = self._cache.get(i)
+        if value is None:
+            value = sys.intern(bytes(self._blob[self._offsets[i]:self._offsets[i + 1]]).decode("utf-8"))
+            self._cache[i] = value
+        return value
+
+
+class SnapshotQuestionTable(Sequence):
+    """
+    Таблица вопросов снимка с ленивым декодированием.
+
+    Строка декодируется при первом обращении и кэшируется, поэтому
+    повторные поиски возвращают те же dict объекты, что и JSON-режим.
+    """
+
+    def __init__(self, snapshot: "MasterSnapshot"):
+        self._snapshot = snapshot
+        self._rows: List[Optional[Dict]] = [None] * len(snapshot.ids)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        row = self._rows[i]
+        if row is None:
+            row = self._snapshot.decode_row(i)
+            self._rows[i] = row
+        return row
+
+    @property
+    def decoded_count(self) -> int:
+        return sum(1 for row in self._rows if row is not None)
+
+
+class SnapshotQuestionsById(Mapping):
+    """questions_by_id поверх ленивой таблицы"""
+
+    def __init__(self, ids: List[str], table: SnapshotQuestionTable):
+        self._positions = {q_id: i for i, q_id in enumerate(ids)}
+        self._ids = ids
+        self._table = table
+
+    def __getitem__(self, q_id: str) -> Dict:
+        return self._table[self._positions[q_id]]
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, q_id) -> bool:
+        return q_id in self._positions
+
+
+class MasterSnapshot:
+    """Открытый через mmap снимок master базы"""
+
+    def __init__(self, path: str, header: Dict, buffer: mmap.mmap, body_offset: int):
+        self.path = path
+        self._mmap = buffer
+        self._view = memoryview(buffer)
+
+        self.data = header["data"]
+        self.programs_list: List[str] = header["programs"]
+        self.clusters_by_program: Dict[str, List[Dict]] = header["clusters_by_program"]
+        self.ids: List[str] = header["ids"]
+        self._clusters = header["clusters"]
+
+        sections = {name: self._view[body_offset + start:body_offset + start + size]
+                    for name, (start, size) in header["sections"].items()}
+        self._row_offsets = sections["row_offsets"].cast("I")
+        self._rows = sections["rows"]
+        self.strings = _StringPool(sections["string_offsets"].cast("I"), sections["strings"])
+
+        self.questions = SnapshotQuestionTable(self)
+        self.questions_by_id = SnapshotQuestionsById(self.ids, self.questions)
+        self.index = self._load_index(header, sections["bitmaps"])
+
+    def _load_index(self, header: Dict, bitmaps: memoryview) -> QuestionBitmapIndex:
+        mask_bytes = header["mask_bytes"]
+
+        def mask(slot: int) -> int:
+            return int.from_bytes(bitmaps[slot * mask_bytes:(slot + 1) * mask_bytes], "little")
+
+        return QuestionBitmapIndex.from_bitmaps(
+            self.questions,
+            bitmaps={field: {value: mask(slot) for value, slot in values.items()}
+                     for field, values in header["bitmap_dir"].items()},
+            has_metadata_bits=mask(header["has_metadata_slot"]),
+            safety_at_least=[mask(slot) for slot in header["safety_slots"]]
+        )
+
+    def decode_row(self, i: int) -> Dict:
+        raw = self._rows[self._row_offsets[i]:self._row_offsets[i + 1]]
+        cluster_idx, q = json.loads(bytes(raw))
+        return _with_context(q, self._clusters[cluster_idx], self.strings)
+
+
+def load_snapshot(master_file: str, path: str = None) -> Optional[MasterSnapshot]:
+    """
+    Открывает снимок, если он существует и совпадает по хэшу с исходниками.
+
+    Returns:
+        MasterSnapshot или None (нет файла, другой формат, устаревший хэш)
+    """
+    path = path or snapshot_path(master_file)
+    if not os.path.exists(path):
+        return None
+
+    sources, _ = _read_sources(master_file)
+    expected_hash = _content_hash(sources)
+
+    with open(path, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # пустой файл
+            return None
+
+    if len(buffer) < _PREAMBLE.size:
+        buffer.close()
+        return None
+
+    magic, version, source_hash, header_len = _PREAMBLE.unpack_from(buffer, 0)
+    if magic != MAGIC or version != FORMAT_VERSION or source_hash != expected_hash:
+        buffer.close()
+        return None
+
+    header = json.loads(buffer[_PREAMBLE.size:_PREAMBLE.size + header_len])
+    return MasterSnapshot(path, header, buffer, _PREAMBLE.size + header_len)
+
+
+def is_snapshot_fresh(master_file: str) -> bool:
+    snapshot = load_snapshot(master_file)
+    return snapshot is not None
+
+
+def main(argv: List[str] = None) -> int:
+    """CLI: компиляция снимков для всех языков"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Компиляция бинарных снимков master базы")
+    parser.add_argument("files", nargs="*", help="master JSON файлы (по умолчанию ru/en/es)")
+    parser.add_argument("--check", action="store_true", help="только проверить актуальность")
+    args = parser.parse_args(argv)
+
+    files = args.files or [os.path.join(DATA_DIR, name) for name in DEFAULT_SOURCES]
+    stale = 0
+    for master_file in files:
+        if args.check:
+            fresh = is_snapshot_fresh(master_file)
+            stale += not fresh
+            print(f"{'✅' if fresh else '⚠️ '} {os.path.basename(master_file)}: "
+                  f"{'актуален' if fresh else 'требует пересборки'}")
+        else:
+            output = compile_snapshot(master_file)
+            print(f"📦 {os.path.basename(master_file)} -> {os.path.basename(output)} "
+                  f"({os.path.getsize(output) // 1024} KB)")
+    return 1 if stale else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
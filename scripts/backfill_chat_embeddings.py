@@ -22,6 +22,9 @@ from openai import AsyncOpenAI
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 
+from selfology_bot.analysis.analysis_config import AnalysisConfig
+from selfology_bot.analysis.embedding_cache import create_embedding_cache
+
 
 async def backfill_embeddings(days: int = 30, batch_size: int = 100, dry_run: bool = False):
     """
@@ -58,6 +61,9 @@ async def backfill_embeddings(days: int = 30, batch_size: int = 100, dry_run: bo
 
     openai_client = AsyncOpenAI(api_key=openai_api_key)
 
+    # Shared embedding cache (same SQLite store as the bot and full_reanalysis.py)
+    embedding_cache = create_embedding_cache(AnalysisConfig.PERFORMANCE_SETTINGS["embedding_cache"])
+
     # Connect to Qdrant
     print("🔗 Connecting to Qdrant...")
     qdrant_url = os.getenv("QDRANT_URL", "http://localhost:6333")
@@ -117,18 +123,28 @@ async def backfill_embeddings(days: int = 30, batch_size: int = 100, dry_run: bo
         print(f"📦 Batch {batch_index}/{total_batches} ({len(batch)} messages)...")
 
         try:
-            # Create embeddings
+            # Create embeddings (only for texts missing from the cache)
             texts = [msg["message"] for msg in batch]
-            embeddings_response = await openai_client.embeddings.create(
-                model="text-embedding-3-small",
-                input=texts,
-                dimensions=1536
-            )
+            vectors = [
+                await embedding_cache.get(text, "text-embedding-3-small", 1536)
+                for text in texts
+            ]
+            missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+            if missing:
+                embeddings_response = await openai_client.embeddings.create(
+                    model="text-embedding-3-small",
+                    input=[texts[i] for i in missing],
+                    dimensions=1536
+                )
+                for i, emb in zip(missing, sorted(embeddings_response.data, key=lambda e: e.index)):
+                    vectors[i] = emb.embedding
+                    await embedding_cache.put(texts[i], "text-embedding-3-small", 1536, emb.embedding)
 
             # Calculate cost
             # text-embedding-3-small: $0.00002 per 1K tokens
             # Rough estimate: 1 token ≈ 4 characters
-            total_chars = sum(len(text) for text in texts)
+            total_chars = sum(len(texts[i]) for i in missing)
             estimated_tokens = total_chars // 4
             batch_cost = (estimated_tokens / 1000) * 0.00002
             total_cost += batch_cost
@@ -137,7 +153,7 @@ async def backfill_embeddings(days: int = 30, batch_size: int = 100, dry_run: bo
             points = [
                 models.PointStruct(
                     id=f"msg_{msg['id']}",
-                    vector=emb.embedding,
+                    vector=vector,
                     payload={
                         "user_id": msg["user_id"],
                         "message_id": msg["id"],
@@ -148,13 +164,14 @@ async def backfill_embeddings(days: int = 30, batch_size: int = 100, dry_run: bo
                         "backfilled_at": datetime.now().isoformat()
                     }
                 )
-                for msg, emb in zip(batch, embeddings_response.data)
+                for msg, vector in zip(batch, vectors)
             ]
 
             qdrant.upsert(collection_name="chat_messages", points=points)
 
             processed_count += len(batch)
-            print(f"   ✅ Processed {processed_count}/{total_messages} messages (cost: ${batch_cost:.6f})")
+            print(f"   ✅ Processed {processed_count}/{total_messages} messages "
+                  f"(cost: ${batch_cost:.6f}, cached: {len(batch) - len(missing)})")
 
             # Small delay to avoid rate limits
             await asyncio.sleep(0.5)
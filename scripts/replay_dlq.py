@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Просмотр и повторная отправка событий из Dead Letter Queue Event Bus
+
+Использование:
+    # Последние сообщения DLQ с причиной и числом доставок
+    python scripts/replay_dlq.py --list [--limit 20]
+
+    # Вернуть в исходные streams (сначала посмотреть, что уйдет)
+    python scripts/replay_dlq.py --replay --dry-run
+    python scripts/replay_dlq.py --replay --event-type user.answer.submitted --limit 500
+
+    # Конкретные сообщения
+    python scripts/replay_dlq.py --replay --ids 1700000000000-0 1700000000001-0
+"""
+
+import sys
+import os
+import asyncio
+import argparse
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.event_bus import EventBus, EventBusConfig
+
+
+def _field(data, name: str) -> str:
+    value = data.get(name.encode('utf-8'), b"")
+    return value.decode('utf-8', errors='replace')
+
+
+async def list_dlq(bus: EventBus, limit: int):
+    entries = await bus.read_dlq(count=limit)
+    if not entries:
+        print("✅ DLQ пуста")
+        return
+
+    print(f"📋 {len(entries)} сообщений в DLQ ({bus.config.dlq_stream}):")
+    for message_id, data in entries:
+        print(
+            f"  {message_id}  {_field(data, 'event_type'):<32} "
+            f"from={_field(data, 'dlq_original_stream') or '?'} "
+            f"deliveries={_field(data, 'dlq_deliveries') or '?'} "
+            f"failed_at={_field(data, 'dlq_failed_at') or '?'}"
+        )
+        error = _field(data, 'dlq_error')
+        if error:
+            print(f"      ❌ {error[:200]}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Inspect and replay Event Bus dead letters")
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", EventBusConfig.redis_url),
+                       help="Redis URL (default: $REDIS_URL or EventBusConfig.redis_url)")
+    parser.add_argument("--list", action="store_true", help="Show dead letters")
+    parser.add_argument("--replay", action="store_true", help="Move dead letters back to their streams")
+    parser.add_argument("--ids", nargs="+", help="Replay only these DLQ message IDs")
+    parser.add_argument("--event-type", help="Replay only this event type")
+    parser.add_argument("--limit", type=int, default=100, help="Max messages (default: 100)")
+    parser.add_argument("--dry-run", action="store_true", help="Count what would be replayed")
+
+    args = parser.parse_args()
+    if not args.list and not args.replay:
+        parser.print_help()
+        sys.exit(1)
+
+    bus = EventBus(config=EventBusConfig(redis_url=args.redis_url))
+    await bus.connect()
+    try:
+        if args.list:
+            await list_dlq(bus, args.limit)
+
+        if args.replay:
+            result = await bus.replay_dlq(
+                message_ids=args.ids,
+                event_type=args.event_type,
+                limit=args.limit,
+                dry_run=args.dry_run
+            )
+            prefix = "🔍 Dry run" if args.dry_run else "♻️ Replayed"
+            print(f"{prefix}: {result['replayed']} сообщений, пропущено {result['skipped']}")
+    finally:
+        await bus.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
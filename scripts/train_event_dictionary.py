@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Обучение zstd словаря для кодека msgpack+zstd Event Bus
+
+Берет последние события из priority streams, обучает словарь и сохраняет
+его в Redis активным: producer с codec="msgpack+zstd" начнут сжимать им
+после следующего согласования кодека (codec_refresh_s), consumer
+подгрузят словарь по dict_id из записи.
+
+Использование:
+    # Оценить выигрыш без сохранения
+    python scripts/train_event_dictionary.py --dry-run
+
+    # Обучить на 5000 событиях на stream и активировать
+    python scripts/train_event_dictionary.py --samples 5000 --dict-size 16384
+"""
+
+import sys
+import os
+import asyncio
+import argparse
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.event_bus import EventBus, EventBusConfig
+from core.event_codec import (
+    CODEC_MSGPACK_ZSTD, MSGPACK_AVAILABLE, ZSTD_AVAILABLE,
+    CodecError, EventCodecs, MissingDictionaryError, entry_codec
+)
+
+
+async def collect_samples(bus: EventBus, per_stream: int) -> list:
+    samples = []
+    for stream_name in bus.streams.values():
+        entries = await bus.redis.xrevrange(stream_name, count=per_stream)
+        for _, data in entries:
+            try:
+                samples.append(bus.codecs.decode(data[b"payload"], entry_codec(data)))
+            except MissingDictionaryError as e:
+                if await bus.load_dictionary(e.dict_id):
+                    samples.append(bus.codecs.decode(data[b"payload"], entry_codec(data)))
+            except (CodecError, KeyError):
+                continue
+    return samples
+
+
+def compressed_size(codecs: EventCodecs, samples: list) -> int:
+    return sum(len(codecs.encode(sample, CODEC_MSGPACK_ZSTD)[0]) for sample in samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Train zstd dictionary for Event Bus payloads")
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", EventBusConfig.redis_url),
+                       help="Redis URL (default: $REDIS_URL or EventBusConfig.redis_url)")
+    parser.add_argument("--samples", type=int, default=2000, help="Events per priority stream (default: 2000)")
+    parser.add_argument("--dict-size", type=int, default=16384, help="Dictionary size in bytes (default: 16384)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report the compression gain")
+
+    args = parser.parse_args()
+
+    if not (MSGPACK_AVAILABLE and ZSTD_AVAILABLE):
+        print("❌ Нужны msgpack и zstandard: pip install msgpack zstandard")
+        sys.exit(1)
+
+    bus = EventBus(config=EventBusConfig(redis_url=args.redis_url))
+    await bus.connect()
+    try:
+        samples = await collect_samples(bus, args.samples)
+        if len(samples) < 100:
+            print(f"⚠️ Слишком мало событий для обучения: {len(samples)}")
+            sys.exit(1)
+
+        # Половина выборки на обучение, вторая - на оценку
+        training, holdout = samples[::2], samples[1::2]
+        raw = bus.codecs.train_dictionary(training, dict_size=args.dict_size)
+
+        plain = EventCodecs(compression_threshold=0)
+        trained = EventCodecs()
+        dict_id = trained.add_dictionary(raw, activate=True)
+        before, after = compressed_size(plain, holdout), compressed_size(trained, holdout)
+
+        print(f"📊 {len(samples)} событий, словарь {dict_id}: {len(raw)} байт")
+        print(f"   msgpack+zstd без словаря: {before / len(holdout):.0f} байт/событие")
+        print(f"   со словарем:              {after / len(holdout):.0f} байт/событие ({after / before:.2f})")
+
+        if not args.dry_run:
+            await bus.store_dictionary(raw)
+            print(f"✅ Словарь {dict_id} сохранен и активирован")
+    finally:
+        await bus.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
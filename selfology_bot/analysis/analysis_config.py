@@ -211,6 +211,33 @@ class AnalysisConfig:
             "similar_answer_threshold": 0.85,  # Схожесть для переиспользования
             "cache_ttl_seconds": 3600,         # Время жизни кэша
             "max_cache_size": 1000
+        },
+
+        # Кэш embeddings: LRU в памяти + SQLite на диске (EMBEDDING_CACHE_PATH)
+        "embedding_cache": {
+            "max_entries": 20000,
+            "max_memory_mb": 128,              # float32: ~6 KB на 1536D вектор
+            "memory_ttl_hours": 24,
+            "persistent_ttl_days": 90,
+            "persistent_max_entries": 100000   # ~600 MB для 1536D
+        },
+
+        # Склейка embedding запросов в один list-input вызов OpenAI
+        "embedding_batching": {
+            "window_ms": 25,                   # Окно накопления батча
+            "max_batch_size": 64,              # Входов в одном вызове
+            "max_batch_chars": 120000          # ~30K токенов на вызов
+        },
+
+        # Очередь deep analysis в OnboardingOrchestrator
+        "analysis_scheduler": {
+            "max_concurrent": 8,               # Pipeline одновременно на процесс
+            "stage_limits": {
+                "llm": 4,                      # AnswerAnalyzer + PersonalityExtractor
+                "embedding": 6,                # EmbeddingCreator (OpenAI + Qdrant)
+                "db": 8                        # Запись в Postgres (пул asyncpg = 20)
+            },
+            "wait_samples": 500                # Окно для метрик времени ожидания
         }
     }
     
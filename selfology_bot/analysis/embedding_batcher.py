@@ -0,0 +1,150 @@
+"""
+Embedding Batcher - Склейка запросов embeddings в один API вызов
+
+⚡ ПРИНЦИП: Запросы от параллельных _deep_analysis_pipeline задач копятся
+   в коротком окне и уходят одним list-input вызовом OpenAI
+📦 ГРУППИРОВКА: Отдельные батчи по (model, dimensions)
+🎯 РЕЗУЛЬТАТ: Каждый ожидающий получает свой вектор через Future
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Any, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (texts, model, dimensions) -> векторы в том же порядке, что и texts
+SendBatch = Callable[[List[str], str, int], Awaitable[List[List[float]]]]
+
+BatchKey = Tuple[str, int]
+
+
+class EmbeddingBatcher:
+    """
+    Коалесцирующий батчер embedding запросов
+
+    Батч отправляется когда:
+    - истекло окно window_ms с момента первого запроса в группе
+    - набралось max_batch_size запросов
+    - суммарная длина текстов превысила max_batch_chars
+
+    Одинаковые тексты внутри батча отправляются один раз.
+    Ошибка API пробрасывается всем ожидающим батча - retry остается
+    на стороне вызывающего (повторный запрос снова попадет в батч).
+    """
+
+    def __init__(
+        self,
+        send_batch: SendBatch,
+        window_ms: float = 25,
+        max_batch_size: int = 64,
+        max_batch_chars: int = 120_000
+    ):
+        self._send_batch = send_batch
+        self.window_seconds = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_batch_chars = max_batch_chars
+
+        self._pending: Dict[BatchKey, List[Tuple[str, asyncio.Future]]] = {}
+        self._pending_chars: Dict[BatchKey, int] = {}
+        self._timers: Dict[BatchKey, asyncio.TimerHandle] = {}
+        self._inflight: Set[asyncio.Task] = set()
+
+        self.stats = {
+            "requests": 0,
+            "batches_sent": 0,
+            "inputs_sent": 0,
+            "deduplicated": 0,
+            "batches_failed": 0,
+            "max_batch_seen": 0
+        }
+
+    async def embed(self, text: str, model: str, dimensions: int) -> List[float]:
+        """Поставить текст в батч и дождаться его вектора"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (model, dimensions)
+
+        batch = self._pending.setdefault(key, [])
+        batch.append((text, future))
+        self._pending_chars[key] = self._pending_chars.get(key, 0) + len(text)
+        self.stats["requests"] += 1
+
+        if len(batch) >= self.max_batch_size or self._pending_chars[key] >= self.max_batch_chars:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.window_seconds, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: BatchKey):
+        """Забрать накопленный батч группы и отправить в фоне"""
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+
+        batch = self._pending.pop(key, None)
+        self._pending_chars.pop(key, None)
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._dispatch(key, batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, key: BatchKey, batch: List[Tuple[str, asyncio.Future]]):
+        """Один API вызов на батч + раздача результатов по Future"""
+        model, dimensions = key
+
+        # Дедупликация одинаковых текстов (порядок сохраняется)
+        positions: Dict[str, int] = {}
+        for text, _ in batch:
+            positions.setdefault(text, len(positions))
+        texts = list(positions)
+
+        self.stats["batches_sent"] += 1
+        self.stats["inputs_sent"] += len(texts)
+        self.stats["deduplicated"] += len(batch) - len(texts)
+        self.stats["max_batch_seen"] = max(self.stats["max_batch_seen"], len(texts))
+
+        start = time.perf_counter()
+        try:
+            vectors = await self._send_batch(texts, model, dimensions)
+            if len(vectors) != len(texts):
+                raise ValueError(f"Embedding batch size mismatch: sent {len(texts)}, got {len(vectors)}")
+        except BaseException as e:
+            self.stats["batches_failed"] += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return
+
+        logger.debug(
+            f"📦 Embedding batch {model}/{dimensions}D: {len(batch)} requests, "
+            f"{len(texts)} inputs, {(time.perf_counter() - start) * 1000:.0f}ms"
+        )
+
+        for text, future in batch:
+            if not future.done():
+                future.set_result(vectors[positions[text]])
+
+    async def flush(self):
+        """Немедленно отправить все накопленные батчи и дождаться их"""
+        for key in list(self._pending):
+            self._flush(key)
+        if self._inflight:
+            await asyncio.gather(*list(self._inflight), return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика батчинга"""
+        batches = max(1, self.stats["batches_sent"])
+        return {
+            **self.stats,
+            "avg_batch_size": self.stats["inputs_sent"] / batches,
+            "api_calls_saved": self.stats["requests"] - self.stats["batches_sent"],
+            "pending": sum(len(batch) for batch in self._pending.values()),
+            "inflight_batches": len(self._inflight)
+        }
@@ -0,0 +1,297 @@
+"""
+Embedding Cache - Двухуровневый кэш векторов для EmbeddingCreator
+
+💾 ПАМЯТЬ: LRU с лимитом по количеству и байтам, векторы как float32
+🗄️ ДИСК: SQLite (WAL) - общий для бота, воркеров и скриптов
+   (full_reanalysis.py, backfill_chat_embeddings.py)
+🔑 КЛЮЧ: sha256(text) + model + dimensions
+📊 МЕТРИКИ: hits/misses/evictions для embedding_stats
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DEFAULT_CACHE_PATH = PROJECT_ROOT / ".cache" / "embeddings.sqlite"
+
+CacheKey = Tuple[str, str, int]  # (text_hash, model, dimensions)
+
+
+def embedding_cache_key(text: str, model: str, dimensions: int) -> CacheKey:
+    """Ключ кэша: один текст дает разные векторы для разных model/dimensions"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest(), model, dimensions
+
+
+class LRUEmbeddingCache:
+    """
+    In-memory LRU кэш векторов
+
+    Вытесняет самые старые записи при превышении max_entries или max_bytes.
+    TTL проверяется при чтении.
+    """
+
+    def __init__(self, max_entries: int = 20000, max_bytes: int = 128 * 1024 * 1024, ttl_seconds: float = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: "OrderedDict[CacheKey, Tuple[np.ndarray, float]]" = OrderedDict()
+        self.bytes_used = 0
+        self.evictions = 0
+
+    def get(self, key: CacheKey) -> Optional[np.ndarray]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        vector, created_at = entry
+        if self.ttl_seconds and time.time() - created_at > self.ttl_seconds:
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return vector
+
+    def put(self, key: CacheKey, vector: np.ndarray, created_at: float = None):
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (vector, time.time() if created_at is None else created_at)
+        self.bytes_used += vector.nbytes
+
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes_used > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: CacheKey):
+        vector, _ = self._entries.pop(key)
+        self.bytes_used -= vector.nbytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteEmbeddingStore:
+    """
+    Персистентный кэш векторов в SQLite
+
+    WAL режим позволяет нескольким процессам читать параллельно с записью.
+    Векторы хранятся как float32 BLOB (4 байта на измерение).
+    Просроченные записи и самые старые сверх max_rows удаляются при открытии
+    и каждые prune_every записей.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = None,
+        max_rows: Optional[int] = None,
+        prune_every: int = 1000
+    ):
+        self.path = str(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self.evictions = 0
+        self._puts_since_prune = 0
+        self._prune_lock = threading.Lock()
+        self._local = threading.local()
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                text_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                dimensions INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (text_hash, model, dimensions)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_created_at ON embeddings (created_at)")
+        conn.commit()
+        self.prune()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Отдельное соединение на поток (get/put идут через asyncio.to_thread)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: CacheKey) -> Optional[Tuple[np.ndarray, float]]:
+        row = self._connection().execute(
+            "SELECT vector, created_at FROM embeddings WHERE text_hash = ? AND model = ? AND dimensions = ?",
+            key
+        ).fetchone()
+        if row is None:
+            return None
+
+        blob, created_at = row
+        if self.ttl_seconds and time.time() - created_at > self.ttl_seconds:
+            return None
+        return np.frombuffer(blob, dtype=np.float32), created_at
+
+    def put(self, key: CacheKey, vector: np.ndarray, created_at: float):
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO embeddings (text_hash, model, dimensions, vector, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (*key, vector.astype(np.float32).tobytes(), created_at)
+        )
+        conn.commit()
+
+        self._puts_since_prune += 1
+        if self._puts_since_prune >= self.prune_every:
+            self.prune()
+
+    def prune(self) -> int:
+        """Удаляет просроченные записи и самые старые сверх max_rows → число удаленных"""
+        if not self._prune_lock.acquire(blocking=False):
+            return 0  # Уже чистит другой поток
+
+        try:
+            self._puts_since_prune = 0
+            conn = self._connection()
+            removed = 0
+
+            if self.ttl_seconds:
+                removed += conn.execute(
+                    "DELETE FROM embeddings WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+                ).rowcount
+
+            if self.max_rows:
+                excess = self.count() - self.max_rows
+                if excess > 0:
+                    removed += conn.execute("""
+                        DELETE FROM embeddings WHERE (text_hash, model, dimensions) IN (
+                            SELECT text_hash, model, dimensions FROM embeddings
+                            ORDER BY created_at LIMIT ?
+                        )
+                    """, (excess,)).rowcount
+
+            conn.commit()
+            self.evictions += removed
+            if removed:
+                logger.info(f"🧹 Embedding disk cache pruned: {removed} rows")
+            return removed
+        finally:
+            self._prune_lock.release()
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class TieredEmbeddingCache:
+    """
+    LRU в памяти перед персистентным хранилищем
+
+    Промах в памяти проверяет диск, попадание с диска прогревает LRU.
+    Запись идет в оба уровня. Ошибки диска не ломают создание embeddings.
+    """
+
+    def __init__(self, memory: LRUEmbeddingCache, persistent: Optional[SQLiteEmbeddingStore] = None):
+        self.memory = memory
+        self.persistent = persistent
+
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "disk_errors": 0
+        }
+
+    async def get(self, text: str, model: str, dimensions: int) -> Optional[List[float]]:
+        key = embedding_cache_key(text, model, dimensions)
+
+        vector = self.memory.get(key)
+        if vector is not None:
+            self.stats["memory_hits"] += 1
+            return vector.tolist()
+
+        if self.persistent:
+            try:
+                stored = await asyncio.to_thread(self.persistent.get, key)
+            except sqlite3.Error as e:
+                self.stats["disk_errors"] += 1
+                logger.warning(f"⚠️ Embedding disk cache read failed: {e}")
+                stored = None
+
+            if stored is not None:
+                vector, created_at = stored
+                self.memory.put(key, vector, created_at)
+                self.stats["disk_hits"] += 1
+                return vector.tolist()
+
+        self.stats["misses"] += 1
+        return None
+
+    async def put(self, text: str, model: str, dimensions: int, embedding: Sequence[float]):
+        key = embedding_cache_key(text, model, dimensions)
+        vector = np.asarray(embedding, dtype=np.float32)
+        created_at = time.time()
+
+        self.memory.put(key, vector, created_at)
+
+        if self.persistent:
+            try:
+                await asyncio.to_thread(self.persistent.put, key, vector, created_at)
+            except sqlite3.Error as e:
+                self.stats["disk_errors"] += 1
+                logger.warning(f"⚠️ Embedding disk cache write failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "evictions": self.memory.evictions,
+            "persistent_evictions": self.persistent.evictions if self.persistent else 0,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.bytes_used,
+            "persistent_path": self.persistent.path if self.persistent else None
+        }
+
+
+def create_embedding_cache(settings: Dict[str, Any]) -> TieredEmbeddingCache:
+    """
+    Кэш по настройкам PERFORMANCE_SETTINGS["embedding_cache"]
+
+    EMBEDDING_CACHE_PATH переопределяет путь к SQLite; пустое значение
+    отключает дисковый уровень.
+    """
+    memory = LRUEmbeddingCache(
+        max_entries=settings["max_entries"],
+        max_bytes=settings["max_memory_mb"] * 1024 * 1024,
+        ttl_seconds=settings["memory_ttl_hours"] * 3600
+    )
+
+    path = os.getenv("EMBEDDING_CACHE_PATH", str(DEFAULT_CACHE_PATH))
+    persistent = None
+    if path:
+        try:
+            persistent = SQLiteEmbeddingStore(
+                path,
+                ttl_seconds=settings["persistent_ttl_days"] * 86400,
+                max_rows=settings.get("persistent_max_entries")
+            )
+            logger.info(f"🗄️ Persistent embedding cache at {path}")
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"⚠️ Persistent embedding cache disabled: {e}")
+
+    return TieredEmbeddingCache(memory, persistent)
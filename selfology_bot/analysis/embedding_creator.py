@@ -10,20 +10,24 @@ Embedding Creator - Создание векторов для Qdrant
 import logging
 import json
 import asyncio
-import hashlib
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import numpy as np
 
 # Для работы с Qdrant
 try:
-    from qdrant_client import QdrantClient
     from qdrant_client.http.models import Distance, VectorParams, PointStruct
     QDRANT_AVAILABLE = True
 except ImportError:
     logger.warning("⚠️ qdrant-client not installed, embeddings will be disabled")
     QDRANT_AVAILABLE = False
 
+# Кэш PersonalityService (чат) сбрасывается после записи векторов
+try:
+    from selfology_bot.services.personality_service import invalidate_personality_cache
+except ImportError:
+    invalidate_personality_cache = None
+
 # Для работы с OpenAI
 try:
     from openai import AsyncOpenAI
@@ -51,6 +55,13 @@ except ImportError:
 
 import os
 from .analysis_config import AnalysisConfig
+from .embedding_batcher import EmbeddingBatcher
+from .embedding_cache import create_embedding_cache
+
+try:
+    from ..database.vector_store import VectorStoreGateway
+except ImportError:  # analysis импортирован как top-level пакет (orchestrator)
+    from database.vector_store import VectorStoreGateway
 
 logger = logging.getLogger(__name__)
 
@@ -107,12 +118,21 @@ class EmbeddingCreator:
             "api_calls_failed": 0,
             "total_tokens_used": 0,
             "cache_hits": 0,
-            "cache_misses": 0
+            "cache_misses": 0,
+            "cache_disk_hits": 0,
+            "cache_evictions": 0
         }
 
-        # Semantic cache для идентичных текстов
-        self._embedding_cache = {}  # {text_hash: {"embedding": [...], "created_at": datetime}}
-        self._cache_ttl_hours = 24  # Cache TTL
+        # Кэш для идентичных текстов: bounded LRU (float32) + SQLite между процессами
+        self.embedding_cache = create_embedding_cache(
+            self.config.PERFORMANCE_SETTINGS["embedding_cache"]
+        )
+
+        # Батчер: запросы параллельных pipeline уходят одним вызовом на (model, dimensions)
+        self.embedding_batcher = EmbeddingBatcher(
+            self._call_openai_embeddings_batch,
+            **self.config.PERFORMANCE_SETTINGS["embedding_batching"]
+        )
 
         # OpenAI client
         self.openai_client = None
@@ -135,7 +155,8 @@ class EmbeddingCreator:
         else:
             logger.warning("⚠️ OpenAI client not available - embeddings will use mock")
 
-        # Коннекция к Qdrant
+        # Коннекция к Qdrant: AsyncQdrantClient + фоновая батчевая запись
+        self.vector_store = None
         self.qdrant_client = None
         if QDRANT_AVAILABLE:
             try:
@@ -147,10 +168,12 @@ class EmbeddingCreator:
                     qdrant_url = "http://localhost:6333"
                     logger.info(f"🔧 Adjusted Qdrant URL for local run: {qdrant_url}")
 
-                self.qdrant_client = QdrantClient(url=qdrant_url)
+                self.vector_store = VectorStoreGateway(url=qdrant_url)
+                self.qdrant_client = self.vector_store.client
                 logger.info(f"📈 Connected to Qdrant at {qdrant_url}")
             except Exception as e:
                 logger.error(f"❌ Failed to connect to Qdrant: {e}")
+                self.vector_store = None
                 self.qdrant_client = None
         else:
             logger.warning("⚠️ Qdrant client not available - embeddings disabled")
@@ -200,6 +223,10 @@ class EmbeddingCreator:
             else:
                 success = await self._create_new_vectors(user_id, embeddings, analysis_result)
 
+            # Даже при частичной записи кэш уже мог устареть
+            if invalidate_personality_cache:
+                invalidate_personality_cache(user_id)
+
             if success:
                 self.embedding_stats["vectors_created" if not is_update else "vectors_updated"] += 1
                 logger.info(f"✅ Personality vectors {'updated' if is_update else 'created'} for user {user_id}")
@@ -223,37 +250,36 @@ class EmbeddingCreator:
         """
 
         try:
-            embeddings = {}
+            # Уровни независимы - запускаем параллельно, батчер склеит их
+            # с запросами других пользователей той же (model, dimensions)
+            requests = {}
 
             # 1. Standard embedding для основного профиля (1536D)
             if "narrative" in summary_data:
-                standard_embedding = await self._create_openai_embedding(
+                requests["standard"] = self._create_openai_embedding(
                     summary_data["narrative"],
                     model="text-embedding-3-small",
                     dimensions=1536
                 )
-                if standard_embedding:
-                    embeddings["standard"] = standard_embedding
 
             # 2. Quick match embedding для быстрого поиска (512D)
             if "nano" in summary_data:
-                quick_embedding = await self._create_openai_embedding(
+                requests["quick"] = self._create_openai_embedding(
                     summary_data["embedding_prompt"] if "embedding_prompt" in summary_data else summary_data["nano"],
                     model="text-embedding-3-small",
                     dimensions=512  # Сжатый через параметры API
                 )
-                if quick_embedding:
-                    embeddings["quick"] = quick_embedding
 
             # 3. Full embedding для детального анализа (3072D) - только для важных моментов
             if self._should_create_full_embedding(user_id, summary_data):
-                full_embedding = await self._create_openai_embedding(
+                requests["full"] = self._create_openai_embedding(
                     summary_data["narrative"] + " " + summary_data.get("structured", ""),
                     model="text-embedding-3-large",
                     dimensions=3072
                 )
-                if full_embedding:
-                    embeddings["full"] = full_embedding
+
+            results = await asyncio.gather(*requests.values())
+            embeddings = {level: vector for level, vector in zip(requests, results) if vector}
 
             logger.info(f"📊 Created {len(embeddings)} embedding levels")
             return embeddings if embeddings else None
@@ -262,41 +288,27 @@ class EmbeddingCreator:
             logger.error(f"❌ Error creating multi-level embeddings: {e}")
             return None
 
-    def _get_cache_key(self, text: str, dimensions: int) -> str:
-        """Получить ключ кэша для текста и dimensions"""
-        # ВАЖНО: кэш должен учитывать dimensions, т.к. один текст может иметь разные векторы
-        combined = f"{text}_{dimensions}"
-        return hashlib.sha256(combined.encode('utf-8')).hexdigest()
-
-    def _get_cached_embedding(self, text: str, dimensions: int) -> Optional[List[float]]:
+    async def _get_cached_embedding(self, text: str, model: str, dimensions: int) -> Optional[List[float]]:
         """Получить embedding из кэша если есть"""
-        cache_key = self._get_cache_key(text, dimensions)
-
-        if cache_key in self._embedding_cache:
-            cached = self._embedding_cache[cache_key]
-            created_at = cached["created_at"]
-
-            # Проверяем TTL
-            hours_passed = (datetime.now() - created_at).total_seconds() / 3600
-            if hours_passed < self._cache_ttl_hours:
-                self.embedding_stats["cache_hits"] += 1
-                logger.debug(f"✅ Cache hit for text (dimensions={dimensions}, hash: {cache_key[:8]}...)")
-                return cached["embedding"]
-            else:
-                # Удаляем устаревший кэш
-                del self._embedding_cache[cache_key]
+        embedding = await self.embedding_cache.get(text, model, dimensions)
+
+        cache_stats = self.embedding_cache.stats
+        self.embedding_stats["cache_disk_hits"] = cache_stats["disk_hits"]
+        self.embedding_stats["cache_evictions"] = self.embedding_cache.memory.evictions
+
+        if embedding is not None:
+            self.embedding_stats["cache_hits"] += 1
+            logger.debug(f"✅ Cache hit for text (model={model}, dimensions={dimensions})")
+            return embedding
 
         self.embedding_stats["cache_misses"] += 1
         return None
 
-    def _cache_embedding(self, text: str, embedding: List[float], dimensions: int):
+    async def _cache_embedding(self, text: str, embedding: List[float], model: str, dimensions: int):
         """Сохранить embedding в кэш"""
-        cache_key = self._get_cache_key(text, dimensions)
-        self._embedding_cache[cache_key] = {
-            "embedding": embedding,
-            "created_at": datetime.now()
-        }
-        logger.debug(f"💾 Cached embedding (dimensions={dimensions}, hash: {cache_key[:8]}...)")
+        await self.embedding_cache.put(text, model, dimensions, embedding)
+        self.embedding_stats["cache_evictions"] = self.embedding_cache.memory.evictions
+        logger.debug(f"💾 Cached embedding (model={model}, dimensions={dimensions})")
 
     async def _create_openai_embedding(
         self,
@@ -326,8 +338,8 @@ class EmbeddingCreator:
             logger.warning(f"⚠️ Text too long ({len(text)} chars), truncating to 30000")
             text = text[:30000]
 
-        # Проверяем кэш (учитываем dimensions!)
-        cached = self._get_cached_embedding(text, dimensions)
+        # Проверяем кэш (учитываем model и dimensions!)
+        cached = await self._get_cached_embedding(text, model, dimensions)
         if cached:
             return cached
 
@@ -341,8 +353,8 @@ class EmbeddingCreator:
             embedding = await self._call_openai_api_with_retry(text, model, dimensions)
 
             if embedding:
-                # Кэшируем результат (с учетом dimensions!)
-                self._cache_embedding(text, embedding, dimensions)
+                # Кэшируем результат (с учетом model и dimensions!)
+                await self._cache_embedding(text, embedding, model, dimensions)
 
             return embedding
 
@@ -397,58 +409,14 @@ class EmbeddingCreator:
         dimensions: int
     ) -> Optional[List[float]]:
         """
-        Прямой вызов OpenAI Embeddings API
-        """
+        Вызов OpenAI Embeddings API через батчер
 
-        start_time = datetime.now()
+        Запрос ждет свой вектор из общего list-input вызова.
+        Ошибки API пробрасываются для retry.
+        """
 
         try:
-            logger.debug(f"🔄 Calling OpenAI API: model={model}, dimensions={dimensions}, text_length={len(text)}")
-
-            # Вызываем OpenAI API
-            response = await self.openai_client.embeddings.create(
-                model=model,
-                input=text,
-                dimensions=dimensions
-            )
-
-            # Извлекаем embedding
-            embedding = response.data[0].embedding
-
-            # Вычисляем метрики
-            elapsed_ms = (datetime.now() - start_time).total_seconds() * 1000
-
-            # Подсчет токенов (приблизительно: 1 token ≈ 4 characters)
-            estimated_tokens = len(text) // 4
-
-            # Подсчет стоимости
-            cost_config = self.embedding_configs.get("standard_personality")
-            if model == "text-embedding-3-large":
-                cost_config = self.embedding_configs.get("full_personality")
-
-            cost_per_1k = cost_config.get("cost_per_1k", 0.00002)
-            cost = (estimated_tokens / 1000) * cost_per_1k
-
-            # Обновляем статистику
-            self.embedding_stats["api_calls_success"] += 1
-            self.embedding_stats["total_cost"] += cost
-            self.embedding_stats["total_tokens_used"] += estimated_tokens
-
-            # Обновляем среднее время создания
-            total_calls = self.embedding_stats["api_calls_success"]
-            current_avg = self.embedding_stats["avg_creation_time_ms"]
-            self.embedding_stats["avg_creation_time_ms"] = (
-                (current_avg * (total_calls - 1) + elapsed_ms) / total_calls
-            )
-
-            logger.info(
-                f"✅ OpenAI embedding created: {dimensions}D, "
-                f"{elapsed_ms:.0f}ms, "
-                f"~{estimated_tokens} tokens, "
-                f"${cost:.6f}"
-            )
-
-            return embedding
+            return await self.embedding_batcher.embed(text, model, dimensions)
 
         except RateLimitError as e:
             logger.warning(f"⚠️ OpenAI Rate Limit hit: {e}")
@@ -471,6 +439,68 @@ class EmbeddingCreator:
             self.embedding_stats["api_calls_failed"] += 1
             return None
 
+    async def _call_openai_embeddings_batch(
+        self,
+        texts: List[str],
+        model: str,
+        dimensions: int
+    ) -> List[List[float]]:
+        """
+        Прямой вызов OpenAI Embeddings API для батча текстов
+
+        Returns:
+            Векторы в порядке texts
+        """
+
+        start_time = datetime.now()
+
+        logger.debug(f"🔄 Calling OpenAI API: model={model}, dimensions={dimensions}, inputs={len(texts)}")
+
+        # Вызываем OpenAI API одним list-input запросом
+        response = await self.openai_client.embeddings.create(
+            model=model,
+            input=texts,
+            dimensions=dimensions
+        )
+
+        # Извлекаем embeddings (порядок - по index из ответа)
+        embeddings = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+        # Вычисляем метрики
+        elapsed_ms = (datetime.now() - start_time).total_seconds() * 1000
+
+        # Подсчет токенов (приблизительно: 1 token ≈ 4 characters)
+        estimated_tokens = sum(len(text) for text in texts) // 4
+
+        # Подсчет стоимости
+        cost_config = self.embedding_configs.get("standard_personality")
+        if model == "text-embedding-3-large":
+            cost_config = self.embedding_configs.get("full_personality")
+
+        cost_per_1k = cost_config.get("cost_per_1k", 0.00002)
+        cost = (estimated_tokens / 1000) * cost_per_1k
+
+        # Обновляем статистику
+        self.embedding_stats["api_calls_success"] += 1
+        self.embedding_stats["total_cost"] += cost
+        self.embedding_stats["total_tokens_used"] += estimated_tokens
+
+        # Обновляем среднее время создания
+        total_calls = self.embedding_stats["api_calls_success"]
+        current_avg = self.embedding_stats["avg_creation_time_ms"]
+        self.embedding_stats["avg_creation_time_ms"] = (
+            (current_avg * (total_calls - 1) + elapsed_ms) / total_calls
+        )
+
+        logger.info(
+            f"✅ OpenAI embeddings created: {len(texts)} × {dimensions}D, "
+            f"{elapsed_ms:.0f}ms, "
+            f"~{estimated_tokens} tokens, "
+            f"${cost:.6f}"
+        )
+
+        return embeddings
+
     async def _create_mock_embedding(self, text: str, dimensions: int) -> List[float]:
         """
         FALLBACK: Создание mock embedding (только когда API недоступен)
@@ -887,17 +917,19 @@ class EmbeddingCreator:
     ) -> bool:
         """
         Сохранение вектора в Qdrant коллекции
+
+        Точка уходит в очередь VectorStoreGateway и пишется батчем
+        вместе с точками параллельных pipeline (без блокировки event loop)
         """
 
         try:
-            if not self.qdrant_client:
+            if not self.vector_store:
                 logger.error(f"❌ Qdrant client not available - cannot store vector")
                 return False
 
-            # Реальное сохранение в Qdrant
-            self.qdrant_client.upsert(
-                collection_name=collection,
-                points=[
+            success = await self.vector_store.upsert(
+                collection,
+                [
                     PointStruct(
                         id=point_id,
                         vector=vector,
@@ -906,6 +938,10 @@ class EmbeddingCreator:
                 ]
             )
 
+            if not success:
+                logger.error(f"❌ Vector not stored in {collection} (ID: {point_id})")
+                return False
+
             logger.info(f"💾 Vector stored in {collection} (ID: {point_id}, dims: {len(vector)})")
             return True
 
@@ -1024,7 +1060,7 @@ class EmbeddingCreator:
             for config in collections_config:
                 try:
                     # Проверяем существование коллекции
-                    existing_collections = self.qdrant_client.get_collections()
+                    existing_collections = await self.qdrant_client.get_collections()
                     collection_names = [c.name for c in existing_collections.collections]
 
                     if config["name"] in collection_names:
@@ -1033,7 +1069,7 @@ class EmbeddingCreator:
                         continue
 
                     # Создаем новую коллекцию
-                    self.qdrant_client.create_collection(
+                    await self.qdrant_client.create_collection(
                         collection_name=config["name"],
                         vectors_config=VectorParams(
                             size=config["size"],
@@ -1091,6 +1127,22 @@ class EmbeddingCreator:
 
         return "Развивающаяся Личность"
 
+    async def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Дописать очередь векторов и закрыть соединения (graceful shutdown)
+
+        Returns:
+            True если все векторы из очереди записаны до timeout
+        """
+        await self.embedding_batcher.flush()
+
+        if not self.vector_store:
+            return True
+
+        flushed = await self.vector_store.close(timeout)
+        logger.info(f"💾 Vector store closed (flushed: {flushed}, stats: {self.vector_store.get_stats()})")
+        return flushed
+
     async def get_embedding_stats(self) -> Dict[str, Any]:
         """Получить статистику создания векторов"""
 
@@ -1098,6 +1150,9 @@ class EmbeddingCreator:
 
         return {
             **self.embedding_stats,
+            "batching": self.embedding_batcher.get_stats(),
+            "cache": self.embedding_cache.get_stats(),
+            "vector_store": self.vector_store.get_stats() if self.vector_store else None,
             "collections_status": await self._get_collections_status(),
             "cost_per_vector": (
                 self.embedding_stats["total_cost"] / max(1, self.embedding_stats["vectors_created"])
@@ -216,6 +216,7 @@ class OnboardingHandlersMixin:
                 question_id=question_id,
                 answer_text=user_answer
             )
+            await self._invalidate_chat_context("user.answer.submitted", telegram_id)
 
             status = result.get('status')
 
@@ -339,6 +340,7 @@ class OnboardingHandlersMixin:
 
             # Завершаем через OnboardingOrchestrator
             completion_result = await self.onboarding_orchestrator.complete_onboarding(int(telegram_id))
+            await self._invalidate_chat_context("onboarding.completed", telegram_id)
 
             # Получаем количество ответов из результата
             questions_answered = completion_result.get('questions_answered', 0)
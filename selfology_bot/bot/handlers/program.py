@@ -361,6 +361,7 @@ class ProgramHandlersMixin:
                 question_id=current_question_id,
                 answer_text=user_answer
             )
+            await self._invalidate_chat_context("user.answer.submitted", telegram_id)
 
             # Получаем следующий вопрос
             next_result = await self.onboarding_orchestrator.get_next_program_question(
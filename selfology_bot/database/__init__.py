@@ -8,5 +8,7 @@ from .service import DatabaseService
 from .user_dao import UserDAO
 from .onboarding_dao import OnboardingDAO
 from .digital_personality_dao import DigitalPersonalityDAO
+from .vector_store import VectorStoreGateway
+from .flagged_questions import FlaggedQuestionCache
 
-__all__ = ['DatabaseService', 'UserDAO', 'OnboardingDAO', 'DigitalPersonalityDAO']
\ No newline at end of file
+__all__ = ['DatabaseService', 'UserDAO', 'OnboardingDAO', 'DigitalPersonalityDAO', 'VectorStoreGateway', 'FlaggedQuestionCache']
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""
+Flagged Questions Cache - Set помеченных вопросов в памяти процесса
+
+🚩 ЗАГРУЗКА: Один SELECT при первом обращении вместо запроса на каждый вопрос
+📡 ИНВАЛИДАЦИЯ: LISTEN на канале question_flags - flag/unflag шлют NOTIFY
+⏱️ FALLBACK: TTL перезагрузка на случай потерянных уведомлений или обрыва LISTEN
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Optional, Set
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+FLAGGED_QUESTIONS_CHANNEL = "question_flags"
+DEFAULT_TTL_SECONDS = 60
+
+
+def flag_notification(json_id: str, flagged: bool) -> str:
+    """Payload NOTIFY для изменения флага вопроса"""
+    return json.dumps({"json_id": json_id, "flagged": flagged})
+
+
+class FlaggedQuestionCache:
+    """
+    Кэш flagged json_id с инкрементальным обновлением через LISTEN/NOTIFY
+
+    Для LISTEN держится отдельное соединение (не из пула): соединение из пула
+    нельзя надолго занять, а уведомления приходят только пока оно открыто.
+    Если LISTEN недоступен, кэш работает только по TTL.
+    """
+
+    def __init__(
+        self,
+        db_service,
+        loader: Callable[[], Awaitable[Set[str]]],
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        channel: str = FLAGGED_QUESTIONS_CHANNEL
+    ):
+        self.db = db_service
+        self._loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.channel = channel
+
+        self._flagged: Set[str] = set()
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._listener: Optional[asyncpg.Connection] = None
+
+        self.stats = {
+            "hits": 0,
+            "reloads": 0,
+            "reload_errors": 0,
+            "notifications": 0
+        }
+
+    # === ЧТЕНИЕ ===
+
+    async def get(self) -> FrozenSet[str]:
+        """Текущий set flagged вопросов (перезагрузка только если устарел)"""
+        if self._is_fresh():
+            self.stats["hits"] += 1
+            return frozenset(self._flagged)
+
+        async with self._lock:
+            # Пока ждали lock, другой запрос мог уже перезагрузить
+            if not self._is_fresh():
+                await self._reload()
+                await self._ensure_listener()
+
+        return frozenset(self._flagged)
+
+    def _is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl_seconds
+
+    async def _reload(self):
+        try:
+            self._flagged = set(await self._loader())
+            self._loaded_at = time.monotonic()
+            self.stats["reloads"] += 1
+            logger.debug(f"🚩 Flagged questions cache loaded: {len(self._flagged)} ids")
+        except Exception as e:
+            # Оставляем прошлый set; следующий запрос попробует снова
+            self.stats["reload_errors"] += 1
+            logger.error(f"❌ Error loading flagged questions: {e}")
+
+    # === ИНВАЛИДАЦИЯ ===
+
+    def apply(self, json_id: str, flagged: bool):
+        """Инкрементальное обновление (NOTIFY или локальный flag/unflag)"""
+        if flagged:
+            self._flagged.add(json_id)
+        else:
+            self._flagged.discard(json_id)
+
+    def invalidate(self):
+        """Форсировать перезагрузку при следующем get()"""
+        self._loaded_at = None
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str):
+        try:
+            data = json.loads(payload)
+            self.apply(data["json_id"], bool(data["flagged"]))
+            self.stats["notifications"] += 1
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"⚠️ Bad {channel} payload, reloading flagged cache: {payload!r}")
+            self.invalidate()
+
+    def _on_listener_lost(self, connection):
+        logger.warning("⚠️ Flagged questions LISTEN connection lost - falling back to reload")
+        self._listener = None
+        self.invalidate()
+
+    async def _ensure_listener(self):
+        """Открыть LISTEN соединение (переоткрывается после обрыва при следующей перезагрузке)"""
+        if self._listener is not None and not self._listener.is_closed():
+            return
+        if not getattr(self.db, "pool", None):
+            return
+
+        try:
+            connection = await asyncpg.connect(
+                host=self.db.host,
+                port=self.db.port,
+                user=self.db.user,
+                password=self.db.password,
+                database=self.db.database
+            )
+            await connection.add_listener(self.channel, self._on_notification)
+            connection.add_termination_listener(self._on_listener_lost)
+            self._listener = connection
+            logger.info(f"📡 Listening for flagged question changes on '{self.channel}'")
+        except Exception as e:
+            logger.warning(f"⚠️ Flagged questions LISTEN unavailable, using TTL only: {e}")
+
+    async def close(self):
+        """Закрыть LISTEN соединение"""
+        listener, self._listener = self._listener, None
+        if listener is not None and not listener.is_closed():
+            try:
+                await listener.remove_listener(self.channel, self._on_notification)
+                await listener.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Error closing flagged questions listener: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "flagged": len(self._flagged),
+            "listening": self._listener is not None and not self._listener.is_closed(),
+            "age_seconds": (time.monotonic() - self._loaded_at) if self._loaded_at is not None else None
+        }
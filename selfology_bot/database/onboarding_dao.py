@@ -15,6 +15,7 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any
 
 from .service import DatabaseService
+from .flagged_questions import FlaggedQuestionCache, FLAGGED_QUESTIONS_CHANNEL, flag_notification
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +25,9 @@ class OnboardingDAO:
     def __init__(self, db_service: DatabaseService):
         self.db = db_service
 
+        # 🚩 Flagged вопросы в памяти: обновляются через LISTEN/NOTIFY + TTL
+        self.flagged_questions = FlaggedQuestionCache(db_service, loader=self._load_flagged_question_ids)
+
     async def create_onboarding_tables(self):
         """Создать чистые таблицы онбординга"""
 
@@ -364,17 +368,24 @@ class OnboardingDAO:
 
         try:
             async with self.db.get_connection() as conn:
-                await conn.execute("""
-                    INSERT INTO questions_metadata (json_id, domain, depth_level, energy, is_flagged, flagged_by_admin, flag_reason, flagged_at)
-                    SELECT $1, 'UNKNOWN', 'UNKNOWN', 'UNKNOWN', true, $2, $3, NOW()
-                    WHERE NOT EXISTS (SELECT 1 FROM questions_metadata WHERE json_id = $1)
+                # NOTIFY в той же транзакции - воркеры узнают только о закоммиченном флаге
+                async with conn.transaction():
+                    await conn.execute("""
+                        INSERT INTO questions_metadata (json_id, domain, depth_level, energy, is_flagged, flagged_by_admin, flag_reason, flagged_at)
+                        SELECT $1, 'UNKNOWN', 'UNKNOWN', 'UNKNOWN', true, $2, $3, NOW()
+                        WHERE NOT EXISTS (SELECT 1 FROM questions_metadata WHERE json_id = $1)
+
+                        UNION ALL
 
-                    UNION ALL
+                        UPDATE questions_metadata
+                        SET is_flagged = true, flagged_by_admin = $2, flag_reason = $3, flagged_at = NOW()
+                        WHERE json_id = $1
+                    """, json_id, admin_id, reason)
+                    await conn.execute(
+                        "SELECT pg_notify($1, $2)", FLAGGED_QUESTIONS_CHANNEL, flag_notification(json_id, True)
+                    )
 
-                    UPDATE questions_metadata
-                    SET is_flagged = true, flagged_by_admin = $2, flag_reason = $3, flagged_at = NOW()
-                    WHERE json_id = $1
-                """, json_id, admin_id, reason)
+                self.flagged_questions.apply(json_id, True)
 
                 logger.info(f"🚧 Question {json_id} flagged by admin {admin_id}")
 
@@ -408,24 +419,30 @@ class OnboardingDAO:
         """
         Получить set ID вопросов, помеченных флагом (для фильтрации)
 
+        Отдается из FlaggedQuestionCache - без запроса к БД на каждый вопрос.
+
         Returns:
             Set JSON IDs помеченных вопросов
         """
         try:
-            async with self.db.get_connection() as conn:
-                rows = await conn.fetch("""
-                    SELECT json_id FROM questions_metadata
-                    WHERE is_flagged = true
-                """)
-
-                flagged_ids = {row['json_id'] for row in rows}
-                logger.debug(f"🚩 Found {len(flagged_ids)} flagged questions")
-                return flagged_ids
+            return await self.flagged_questions.get()
 
         except Exception as e:
             logger.error(f"❌ Error getting flagged questions: {e}")
             return set()  # Fallback - пустой set
 
+    async def _load_flagged_question_ids(self) -> set:
+        """Полная загрузка flagged ID из БД (для FlaggedQuestionCache)"""
+        async with self.db.get_connection() as conn:
+            rows = await conn.fetch("""
+                SELECT json_id FROM questions_metadata
+                WHERE is_flagged = true
+            """)
+
+        flagged_ids = {row['json_id'] for row in rows}
+        logger.debug(f"🚩 Found {len(flagged_ids)} flagged questions")
+        return flagged_ids
+
     async def flag_question(self, question_id: str, reason: str, admin_id: int) -> bool:
         """
         Пометить вопрос на доработку (сохранить в БД)
@@ -440,17 +457,24 @@ class OnboardingDAO:
         """
         try:
             async with self.db.get_connection() as conn:
-                await conn.execute("""
-                    INSERT INTO questions_metadata
-                        (json_id, is_flagged, flag_reason, flagged_at, flagged_by_admin)
-                    VALUES ($1, true, $2, NOW(), $3)
-                    ON CONFLICT (json_id)
-                    DO UPDATE SET
-                        is_flagged = true,
-                        flag_reason = $2,
-                        flagged_at = NOW(),
-                        flagged_by_admin = $3
-                """, question_id, reason, str(admin_id))
+                # NOTIFY в той же транзакции - воркеры узнают только о закоммиченном флаге
+                async with conn.transaction():
+                    await conn.execute("""
+                        INSERT INTO questions_metadata
+                            (json_id, is_flagged, flag_reason, flagged_at, flagged_by_admin)
+                        VALUES ($1, true, $2, NOW(), $3)
+                        ON CONFLICT (json_id)
+                        DO UPDATE SET
+                            is_flagged = true,
+                            flag_reason = $2,
+                            flagged_at = NOW(),
+                            flagged_by_admin = $3
+                    """, question_id, reason, str(admin_id))
+                    await conn.execute(
+                        "SELECT pg_notify($1, $2)", FLAGGED_QUESTIONS_CHANNEL, flag_notification(question_id, True)
+                    )
+
+                self.flagged_questions.apply(question_id, True)
 
                 logger.info(f"✅ Flagged question {question_id} in database")
                 return True
@@ -471,14 +495,20 @@ class OnboardingDAO:
         """
         try:
             async with self.db.get_connection() as conn:
-                await conn.execute("""
-                    UPDATE questions_metadata
-                    SET is_flagged = false,
-                        flag_reason = NULL,
-                        flagged_at = NULL,
-                        flagged_by_admin = NULL
-                    WHERE json_id = $1
-                """, question_id)
+                async with conn.transaction():
+                    await conn.execute("""
+                        UPDATE questions_metadata
+                        SET is_flagged = false,
+                            flag_reason = NULL,
+                            flagged_at = NULL,
+                            flagged_by_admin = NULL
+                        WHERE json_id = $1
+                    """, question_id)
+                    await conn.execute(
+                        "SELECT pg_notify($1, $2)", FLAGGED_QUESTIONS_CHANNEL, flag_notification(question_id, False)
+                    )
+
+                self.flagged_questions.apply(question_id, False)
 
                 logger.info(f"✅ Unflagged question {question_id}")
                 return True
@@ -756,7 +786,8 @@ class OnboardingDAO:
         self,
         analysis_id: int,
         duration_ms: int,
-        success: bool = True
+        success: bool = True,
+        stage_timings: Optional[Dict[str, int]] = None
     ) -> None:
         """
         Пометить завершение background task для analysis
@@ -765,6 +796,7 @@ class OnboardingDAO:
             analysis_id: ID записи анализа
             duration_ms: Длительность выполнения в миллисекундах
             success: True если task завершился успешно
+            stage_timings: Длительность стадий pipeline в мс ({stage: ms})
         """
 
         try:
@@ -772,9 +804,11 @@ class OnboardingDAO:
                 await conn.execute("""
                     UPDATE answer_analysis
                     SET background_task_completed = $2,
-                        background_task_duration_ms = $3
+                        background_task_duration_ms = $3,
+                        background_stage_timings = COALESCE($4::jsonb, background_stage_timings)
                     WHERE id = $1
-                """, analysis_id, success, duration_ms)
+                """, analysis_id, success, duration_ms,
+                    json.dumps(stage_timings) if stage_timings is not None else None)
 
                 logger.debug(f"✅ Marked background task completed for analysis {analysis_id} ({duration_ms}ms)")
 
@@ -0,0 +1,245 @@
+"""
+Vector Store Gateway - Асинхронный доступ к Qdrant с батчевой записью
+
+ПРИНЦИП: Ни одного синхронного HTTP вызова в event loop бота
+- Чтение: AsyncQdrantClient (retrieve/scroll/search через self.client)
+- Запись: фоновая очередь, точки группируются по коллекциям в batched upsert
+- Flush по размеру батча или по времени, backpressure через bounded очередь
+- flush()/close() для graceful shutdown (OnboardingOrchestrator.shutdown)
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    from qdrant_client import AsyncQdrantClient
+    from qdrant_client.http.models import PointStruct
+    QDRANT_AVAILABLE = True
+except ImportError:
+    QDRANT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Маркер в очереди записи: flush() просит writer не ждать конца окна
+_FLUSH = object()
+
+
+class VectorStoreGateway:
+    """
+    Gateway к Qdrant поверх AsyncQdrantClient
+
+    upsert() кладет точки в очередь и (по умолчанию) ждет записи батча,
+    в который они попали - вызывающий получает честный результат записи,
+    а параллельные pipeline делят один HTTP запрос на коллекцию.
+    """
+
+    def __init__(
+        self,
+        url: str = "http://localhost:6333",
+        client: Optional["AsyncQdrantClient"] = None,
+        max_batch_size: int = 64,
+        flush_interval_ms: float = 50,
+        max_queue_size: int = 1000
+    ):
+        if client is None:
+            if not QDRANT_AVAILABLE:
+                raise RuntimeError("qdrant-client is not installed")
+            client = AsyncQdrantClient(url=url)
+
+        self.client = client
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval_ms / 1000
+
+        # Bounded очередь = backpressure: put() ждет, если Qdrant не успевает
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._writer_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self.stats = {
+            "points_queued": 0,
+            "points_written": 0,
+            "points_failed": 0,
+            "batches_written": 0,
+            "batches_failed": 0,
+            "max_batch_seen": 0,
+            "last_batch_ms": 0.0
+        }
+
+    # === ЗАПИСЬ ===
+
+    async def upsert(self, collection: str, points: List["PointStruct"], wait: bool = True) -> bool:
+        """
+        Поставить точки в очередь записи
+
+        Args:
+            collection: Имя коллекции
+            points: Точки для upsert
+            wait: True - дождаться записи батча и вернуть результат,
+                  False - fire-and-forget (результат виден в stats)
+
+        Returns:
+            True если все точки записаны (или поставлены в очередь при wait=False)
+        """
+        if self._closed:
+            raise RuntimeError("VectorStoreGateway is closed")
+
+        self._ensure_writer()
+        loop = asyncio.get_running_loop()
+
+        futures = []
+        for point in points:
+            future = loop.create_future()
+            await self._queue.put((collection, point, future))
+            self.stats["points_queued"] += 1
+            futures.append(future)
+
+        if not wait:
+            return True
+
+        results = await asyncio.gather(*futures)
+        return all(results)
+
+    def _ensure_writer(self):
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.create_task(self._writer_loop(), name="vector_store_writer")
+
+    async def _writer_loop(self):
+        """Собирает батч до max_batch_size или flush_interval и пишет его"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            item = await self._queue.get()
+            batch = [] if item is _FLUSH else [item]
+            received = 1
+            deadline = loop.time() + self.flush_interval
+
+            try:
+                # Маркер _FLUSH от flush() - писать накопленное без ожидания окна
+                while item is not _FLUSH and len(batch) < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    received += 1
+                    if item is not _FLUSH:
+                        batch.append(item)
+
+                if batch:
+                    await self._write_batch(batch)
+            except asyncio.CancelledError:
+                # close() после timeout flush - батч не записан, ожидающие upsert получают False
+                self._fail_items(batch)
+                raise
+            finally:
+                for _ in range(received):
+                    self._queue.task_done()
+
+    async def _write_batch(self, batch: List[Tuple[str, "PointStruct", asyncio.Future]]):
+        """Один upsert на коллекцию; повторные ID в батче - побеждает последний"""
+        by_collection: Dict[str, Dict[Any, PointStruct]] = {}
+        futures_by_collection: Dict[str, List[asyncio.Future]] = {}
+
+        for collection, point, future in batch:
+            by_collection.setdefault(collection, {})[point.id] = point
+            futures_by_collection.setdefault(collection, []).append(future)
+
+        for collection, points in by_collection.items():
+            start = time.perf_counter()
+            try:
+                await self.client.upsert(collection_name=collection, points=list(points.values()))
+                success = True
+                self.stats["batches_written"] += 1
+                self.stats["points_written"] += len(points)
+                self.stats["max_batch_seen"] = max(self.stats["max_batch_seen"], len(points))
+                logger.debug(f"💾 Batched upsert: {len(points)} points → {collection}")
+            except Exception as e:
+                success = False
+                self.stats["batches_failed"] += 1
+                self.stats["points_failed"] += len(points)
+                logger.error(f"❌ Batched upsert to {collection} failed ({len(points)} points): {e}")
+
+            self.stats["last_batch_ms"] = (time.perf_counter() - start) * 1000
+
+            for future in futures_by_collection[collection]:
+                if not future.done():
+                    future.set_result(success)
+
+    def _fail_items(self, items) -> int:
+        """Завершить futures незаписанных точек результатом False"""
+        failed = 0
+        for item in items:
+            if item is _FLUSH:
+                continue
+            future = item[2]
+            if not future.done():
+                future.set_result(False)
+                failed += 1
+        self.stats["points_failed"] += failed
+        return failed
+
+    # === LIFECYCLE ===
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Дождаться записи всего, что уже в очереди
+
+        Returns:
+            True если очередь опустела до timeout
+        """
+        if self._writer_task is None or self._writer_task.done():
+            return self._queue.empty()
+        try:
+            await asyncio.wait_for(self._drain(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱️ Vector store flush timeout: {self._queue.qsize()} points still queued")
+            return False
+
+    async def _drain(self):
+        await self._queue.put(_FLUSH)
+        await self._queue.join()
+
+    async def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Flush очереди, остановка writer и закрытие клиента
+
+        Если flush не уложился в timeout, незаписанные точки отбрасываются:
+        ожидающие upsert(wait=True) получают False.
+        """
+        self._closed = True
+        flushed = await self.flush(timeout)
+
+        if self._writer_task:
+            self._writer_task.cancel()
+            await asyncio.gather(self._writer_task, return_exceptions=True)
+            self._writer_task = None
+
+        # Точки, оставшиеся в очереди после timeout flush, уже не будут записаны
+        leftover = []
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+            self._queue.task_done()
+        dropped = self._fail_items(leftover)
+        if dropped:
+            logger.warning(f"⚠️ Vector store closed with {dropped} unwritten points")
+
+        close = getattr(self.client, "close", None)
+        if close:
+            try:
+                await close()
+            except Exception as e:
+                logger.warning(f"⚠️ Error closing Qdrant client: {e}")
+
+        return flushed
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "queue_depth": self._queue.qsize(),
+            "writer_running": self._writer_task is not None and not self._writer_task.done()
+        }
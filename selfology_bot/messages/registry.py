@@ -0,0 +1,177 @@
+"""
+Template Registry
+
+Скомпилированные Jinja2 шаблоны и клавиатуры из templates/<locale>/*.json.
+Шаблоны компилируются один раз при загрузке, перезагрузка собирает новый
+снимок и подменяет его одним присваиванием (читатели видят либо старый,
+либо новый набор целиком).
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from jinja2 import Environment, Template, TemplateSyntaxError
+
+logger = logging.getLogger(__name__)
+
+TemplateKey = Tuple[str, str, str]  # (locale, category, key)
+
+
+class CompiledTemplate:
+    """Шаблон сообщения: скомпилированный Template или ошибка компиляции"""
+
+    __slots__ = ('template', 'error', 'data')
+
+    def __init__(self, data: Dict[str, Any], template: Optional[Template] = None,
+                 error: Optional[TemplateSyntaxError] = None):
+        self.data = data
+        self.template = template
+        self.error = error
+
+
+class TemplateSnapshot:
+    """Неизменяемый после сборки набор шаблонов и клавиатур всех локалей"""
+
+    def __init__(self, env: Environment,
+                 messages: Dict[str, Dict[str, Dict[str, Any]]],
+                 keyboards: Dict[str, Dict[str, Dict[str, Any]]]):
+        self.messages = messages
+        self.keyboards = keyboards
+
+        self._templates: Dict[TemplateKey, CompiledTemplate] = {}
+        for locale, categories in messages.items():
+            for category, templates in categories.items():
+                for key, data in templates.items():
+                    self._templates[(locale, category, key)] = self._compile(env, data)
+
+        # Разрешенные fallback-и и собранные клавиатуры (заполняются по первому запросу)
+        self._resolved: Dict[TemplateKey, Optional[CompiledTemplate]] = {}
+        self._keyboard_markups: Dict[Tuple[str, str], Any] = {}
+
+    @staticmethod
+    def _compile(env: Environment, data: Any) -> CompiledTemplate:
+        if not isinstance(data, dict):
+            return CompiledTemplate({})
+
+        template_str = data.get('template', '')
+        if not template_str:
+            return CompiledTemplate(data)
+
+        try:
+            return CompiledTemplate(data, template=env.from_string(template_str))
+        except TemplateSyntaxError as e:
+            return CompiledTemplate(data, error=e)
+
+    def get_template(self, key: str, locale: str, category: str) -> Optional[CompiledTemplate]:
+        """Шаблон с fallback: локаль → ru → другие категории локали"""
+        lookup = (locale, category, key)
+        if lookup in self._resolved:
+            return self._resolved[lookup]
+
+        compiled = self._templates.get(lookup)
+
+        if compiled is None and locale != 'ru':
+            compiled = self._templates.get(('ru', category, key))
+            if compiled is not None:
+                logger.debug(f"Using fallback ru for {locale}.{category}.{key}")
+
+        if compiled is None:
+            for cat_name in self.messages.get(locale, {}):
+                compiled = self._templates.get((locale, cat_name, key))
+                if compiled is not None:
+                    logger.debug(f"Found {key} in category {cat_name} instead of {category}")
+                    break
+
+        self._resolved[lookup] = compiled
+        return compiled
+
+    def get_keyboard_data(self, keyboard_key: str, locale: str) -> Optional[Dict[str, Any]]:
+        """Данные клавиатуры с fallback на ru"""
+        for category_keyboards in self.keyboards.get(locale, {}).values():
+            if keyboard_key in category_keyboards:
+                return category_keyboards[keyboard_key]
+
+        if locale != 'ru':
+            for category_keyboards in self.keyboards.get('ru', {}).values():
+                if keyboard_key in category_keyboards:
+                    logger.debug(f"Using fallback ru keyboard for {locale}.{keyboard_key}")
+                    return category_keyboards[keyboard_key]
+
+        return None
+
+    def get_keyboard(self, keyboard_key: str, locale: str,
+                     build: Callable[[Dict[str, Any]], Any]) -> Optional[Any]:
+        """Собранная клавиатура (build вызывается один раз на снимок)"""
+        lookup = (locale, keyboard_key)
+        if lookup not in self._keyboard_markups:
+            keyboard_data = self.get_keyboard_data(keyboard_key, locale)
+            self._keyboard_markups[lookup] = build(keyboard_data) if keyboard_data else None
+        return self._keyboard_markups[lookup]
+
+
+class TemplateRegistry:
+    """Реестр шаблонов MessageService с атомарной перезагрузкой"""
+
+    def __init__(self, templates_dir: Union[str, Path], env: Environment,
+                 locales: Iterable[str]):
+        self.templates_dir = Path(templates_dir)
+        self.env = env
+        self.locales = list(locales)
+        self.snapshot = TemplateSnapshot(env, {}, {})
+
+    def load(self) -> TemplateSnapshot:
+        """Прочитать и скомпилировать все шаблоны, затем подменить снимок"""
+        messages: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        keyboards: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+        if not self.templates_dir.exists():
+            logger.warning(f"Templates directory not found: {self.templates_dir}")
+        else:
+            for locale_dir in sorted(self.templates_dir.iterdir()):
+                if locale_dir.is_dir() and locale_dir.name in self.locales:
+                    messages[locale_dir.name], keyboards[locale_dir.name] = self._load_locale(locale_dir)
+
+        self.snapshot = TemplateSnapshot(self.env, messages, keyboards)
+        return self.snapshot
+
+    def replace_locale(self, locale: str, messages: Optional[Dict[str, Any]] = None,
+                       keyboards: Optional[Dict[str, Any]] = None) -> TemplateSnapshot:
+        """Подменить данные одной локали (import_templates) новым снимком"""
+        current = self.snapshot
+        new_messages = dict(current.messages)
+        new_keyboards = dict(current.keyboards)
+        if messages is not None:
+            new_messages[locale] = messages
+        if keyboards is not None:
+            new_keyboards[locale] = keyboards
+
+        self.snapshot = TemplateSnapshot(self.env, new_messages, new_keyboards)
+        return self.snapshot
+
+    def _load_locale(self, locale_path: Path) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        messages: Dict[str, Any] = {}
+        keyboards: Dict[str, Any] = {}
+
+        for json_file in sorted(locale_path.glob("*.json")):
+            try:
+                with json_file.open('r', encoding='utf-8') as f:
+                    data = json.load(f)
+
+                category = json_file.stem
+
+                # Разделяем сообщения и клавиатуры
+                if 'keyboards' in data:
+                    keyboards[category] = data['keyboards']
+                    data = {k: v for k, v in data.items() if k != 'keyboards'}
+
+                if data:  # Если остались данные кроме keyboards
+                    messages[category] = data
+
+                logger.debug(f"Loaded templates for {locale_path.name}/{category}")
+
+            except (json.JSONDecodeError, IOError) as e:
+                logger.error(f"Failed to load {json_file}: {e}")
+
+        return messages, keyboards
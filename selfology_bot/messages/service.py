@@ -4,18 +4,17 @@ Message Service
 Core service for centralized message management with i18n support
 """
 
-import json
 import logging
 from pathlib import Path
 from typing import Dict, Optional, Any, List
-from functools import lru_cache
 
-from jinja2 import Environment, FileSystemLoader, Template, TemplateSyntaxError
+from jinja2 import Environment, FileSystemLoader
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
 from .validators import MessageValidator, ValidationResult
 from .formatters import TelegramFormatter, RichMessageBuilder
 from .constants import MessageConstants
+from .registry import TemplateRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -42,76 +41,51 @@ class MessageService:
             lstrip_blocks=True
         )
         
-        # Кэш загруженных шаблонов
-        self._templates_cache: Dict[str, Dict[str, Any]] = {}
-        self._keyboards_cache: Dict[str, Dict[str, Any]] = {}
+        # Реестр скомпилированных шаблонов и клавиатур
+        self.registry = TemplateRegistry(
+            self.templates_dir,
+            self.jinja_env,
+            self.constants.LOCALES['supported']
+        )
         
-        # Загрузка всех шаблонов при инициализации
+        # Загрузка и компиляция всех шаблонов при инициализации
         self._load_all_templates()
         
         logger.info(f"MessageService initialized with templates from {self.templates_dir}")
     
-    def _load_all_templates(self):
-        """Загрузка всех шаблонов из файлов"""
-        if not self.templates_dir.exists():
-            logger.warning(f"Templates directory not found: {self.templates_dir}")
-            return
-        
-        for locale_dir in self.templates_dir.iterdir():
-            if locale_dir.is_dir() and locale_dir.name in self.constants.LOCALES['supported']:
-                self._load_locale_templates(locale_dir.name)
+    @property
+    def _templates_cache(self) -> Dict[str, Dict[str, Any]]:
+        return self.registry.snapshot.messages
     
-    def _load_locale_templates(self, locale: str):
-        """Загрузка шаблонов для конкретной локали"""
-        locale_path = self.templates_dir / locale
-        
-        if not locale_path.exists():
-            logger.warning(f"Locale directory not found: {locale_path}")
-            return
-        
-        self._templates_cache[locale] = {}
-        self._keyboards_cache[locale] = {}
-        
-        # Загрузка JSON файлов
-        for json_file in locale_path.glob("*.json"):
-            try:
-                with json_file.open('r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                category = json_file.stem
-                
-                # Разделяем сообщения и клавиатуры
-                if 'keyboards' in data:
-                    self._keyboards_cache[locale][category] = data['keyboards']
-                    # Удаляем keyboards из основных данных
-                    data = {k: v for k, v in data.items() if k != 'keyboards'}
-                
-                if data:  # Если остались данные кроме keyboards
-                    self._templates_cache[locale][category] = data
-                    
-                logger.debug(f"Loaded templates for {locale}/{category}")
-                
-            except (json.JSONDecodeError, IOError) as e:
-                logger.error(f"Failed to load {json_file}: {e}")
+    @property
+    def _keyboards_cache(self) -> Dict[str, Dict[str, Any]]:
+        return self.registry.snapshot.keyboards
+    
+    def _load_all_templates(self):
+        """Загрузка и компиляция всех шаблонов из файлов"""
+        snapshot = self.registry.load()
+        for locale, categories in snapshot.messages.items():
+            logger.debug(f"Compiled {sum(len(c) for c in categories.values())} templates for {locale}")
     
-    @lru_cache(maxsize=1000)
     def get_message(self, key: str, locale: str = 'ru', 
                    category: str = 'general', **kwargs) -> str:
         """Получить сообщение с подстановкой переменных"""
         
-        # Получаем шаблон
-        template_data = self._get_template_data(key, locale, category)
-        if not template_data:
+        # Получаем скомпилированный шаблон
+        compiled = self.registry.snapshot.get_template(key, locale, category)
+        if compiled is None or not compiled.data:
             return f"[MISSING: {locale}.{category}.{key}]"
         
-        template_str = template_data.get('template', '')
-        if not template_str:
+        if compiled.error is not None:
+            logger.error(f"Template syntax error in {locale}.{category}.{key}: {compiled.error}")
+            return f"[TEMPLATE_ERROR: {compiled.error}]"
+        
+        if compiled.template is None:
             return f"[EMPTY_TEMPLATE: {locale}.{category}.{key}]"
         
         # Рендеринг шаблона
         try:
-            template = self.jinja_env.from_string(template_str)
-            rendered = template.render(**kwargs)
+            rendered = compiled.template.render(**kwargs)
             
             # Очистка и валидация результата
             cleaned = self.formatter.clean_telegram_text(rendered)
@@ -137,10 +111,6 @@ class MessageService:
             
             return cleaned
             
-        except TemplateSyntaxError as e:
-            logger.error(f"Template syntax error in {locale}.{category}.{key}: {e}")
-            return f"[TEMPLATE_ERROR: {e}]"
-        
         except Exception as e:
             logger.error(f"Error rendering template {locale}.{category}.{key}: {e}")
             return f"[RENDER_ERROR: {e}]"
@@ -150,17 +120,16 @@ class MessageService:
         return self.get_message(key, locale, 'buttons')
     
     def get_keyboard(self, keyboard_key: str, locale: str = 'ru') -> Optional[InlineKeyboardMarkup]:
-        """Получить готовую клавиатуру"""
-        keyboard_data = self._get_keyboard_data(keyboard_key, locale)
-        if not keyboard_data:
-            logger.warning(f"Keyboard not found: {locale}.{keyboard_key}")
-            return None
-        
+        """Получить готовую клавиатуру (собирается один раз до перезагрузки шаблонов)"""
         try:
-            return self._build_keyboard(keyboard_data)
+            keyboard = self.registry.snapshot.get_keyboard(keyboard_key, locale, self._build_keyboard)
         except Exception as e:
             logger.error(f"Error building keyboard {locale}.{keyboard_key}: {e}")
             return None
+        
+        if keyboard is None:
+            logger.warning(f"Keyboard not found: {locale}.{keyboard_key}")
+        return keyboard
     
     def get_rich_message_builder(self, locale: str = 'ru') -> RichMessageBuilder:
         """Получить построитель сообщений"""
@@ -181,10 +150,7 @@ class MessageService:
         return self.validator.validate_template(template_str, variables)
     
     def reload_templates(self):
-        """Перезагрузка всех шаблонов"""
-        self._templates_cache.clear()
-        self._keyboards_cache.clear()
-        self.get_message.cache_clear()  # Очистка кэша LRU
+        """Перезагрузка всех шаблонов (новый набор подменяется целиком)"""
         self._load_all_templates()
         logger.info("Templates reloaded")
     
@@ -203,51 +169,12 @@ class MessageService:
     
     def _get_template_data(self, key: str, locale: str, category: str) -> Optional[Dict[str, Any]]:
         """Получить данные шаблона с fallback"""
-        
-        # Попытка получить из указанной локали
-        template_data = (self._templates_cache
-                        .get(locale, {})
-                        .get(category, {})
-                        .get(key))
-        
-        if template_data:
-            return template_data
-        
-        # Fallback на русский язык
-        if locale != 'ru':
-            template_data = (self._templates_cache
-                           .get('ru', {})
-                           .get(category, {})
-                           .get(key))
-            
-            if template_data:
-                logger.debug(f"Using fallback ru for {locale}.{category}.{key}")
-                return template_data
-        
-        # Попытка найти в других категориях той же локали
-        for cat_name, cat_data in self._templates_cache.get(locale, {}).items():
-            if key in cat_data:
-                logger.debug(f"Found {key} in category {cat_name} instead of {category}")
-                return cat_data[key]
-        
-        return None
+        compiled = self.registry.snapshot.get_template(key, locale, category)
+        return compiled.data if compiled is not None and compiled.data else None
     
     def _get_keyboard_data(self, keyboard_key: str, locale: str) -> Optional[Dict[str, Any]]:
         """Получить данные клавиатуры с fallback"""
-        
-        # Поиск по всем категориям
-        for category_keyboards in self._keyboards_cache.get(locale, {}).values():
-            if keyboard_key in category_keyboards:
-                return category_keyboards[keyboard_key]
-        
-        # Fallback на русский
-        if locale != 'ru':
-            for category_keyboards in self._keyboards_cache.get('ru', {}).values():
-                if keyboard_key in category_keyboards:
-                    logger.debug(f"Using fallback ru keyboard for {locale}.{keyboard_key}")
-                    return category_keyboards[keyboard_key]
-        
-        return None
+        return self.registry.snapshot.get_keyboard_data(keyboard_key, locale)
     
     def _build_keyboard(self, keyboard_data: Dict[str, Any]) -> InlineKeyboardMarkup:
         """Построение клавиатуры из данных"""
@@ -297,11 +224,9 @@ class MessageService:
     
     def import_templates(self, data: Dict[str, Any], locale: str = 'ru'):
         """Импорт шаблонов"""
-        if 'messages' in data:
-            self._templates_cache[locale] = data['messages']
-        
-        if 'keyboards' in data:
-            self._keyboards_cache[locale] = data['keyboards']
-        
-        self.get_message.cache_clear()  # Очистка кэша
+        self.registry.replace_locale(
+            locale,
+            messages=data.get('messages'),
+            keyboards=data.get('keyboards')
+        )
         logger.info(f"Templates imported for locale: {locale}")
\ No newline at end of file
@@ -699,6 +699,16 @@ class ChatMVP:
             message="Сессия сброшена. Выбери программу для начала."
         )
 
+    async def close(self):
+        """
+        Освободить ресурсы досье при остановке бота
+
+        Вызывать до закрытия db_pool: DataVersionStore держит LISTEN соединение
+        из пула, и Pool.close() ждет его возврата.
+        """
+        await self.dossier_service.close()
+        logger.info("🤖 ChatMVP closed")
+
     def get_status(self, user_id: int) -> ChatResponse:
         """Получить статус текущей сессии"""
         summary = self.session_manager.get_session_summary(user_id)
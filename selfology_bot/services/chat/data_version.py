@@ -0,0 +1,222 @@
+"""
+DataVersionStore - Версии данных пользователя для инвалидации досье.
+
+Принцип: Вместо COUNT(*) по ответам и чтения digital_personality на каждом
+обращении к досье сравниваем два монотонных счетчика.
+
+- 🔢 ВЕРСИИ: selfology.user_data_versions (answers_count, personality_version),
+  увеличиваются триггерами на INSERT ответа и INSERT/UPDATE digital_personality
+- 📡 NOTIFY: триггер шлет абсолютные значения в канал user_data_version,
+  слушатель кладет их в Redis рядом с досье (идемпотентно для любого числа процессов)
+- ⬆️ МОНОТОННОСТЬ: set() только поднимает каждое поле - засев из БД, прочитанный
+  до NOTIFY, не откатит более новую версию, записанную уведомлением
+- ⏱️ TTL: Версии в Redis и в памяти живут VERSION_TTL - потерянное уведомление
+  исправляется одним PK-lookup при следующем обращении
+- 🔌 ОБРЫВ: LISTEN соединение переоткрывается при следующем PK-lookup
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_CHANNEL = "user_data_version"
+VERSION_TTL = 300  # 5 минут
+
+
+@dataclass(frozen=True)
+class DataVersion:
+    """Версия данных пользователя на момент чтения"""
+    answers: int = 0        # Количество ответов (user_answers_v2)
+    personality: int = 0    # Номер изменения digital_personality
+
+
+class DataVersionStore:
+    """
+    Хранилище версий данных пользователей.
+
+    Redis (ключ dossier_version:{user_id}) с in-memory fallback.
+    Без db_pool версии неизвестны (get возвращает None) - досье считается актуальным.
+    """
+
+    # Поднять каждое поле до max(текущее, новое) и продлить TTL атомарно
+    SET_MAX_SCRIPT = """
+for i, field in ipairs({'answers', 'personality'}) do
+    local current = tonumber(redis.call('hget', KEYS[1], field) or '-1')
+    if tonumber(ARGV[i]) > current then
+        redis.call('hset', KEYS[1], field, ARGV[i])
+    end
+end
+redis.call('expire', KEYS[1], ARGV[3])
+return 1
+"""
+
+    def __init__(self, db_pool=None, redis_client=None, ttl: int = VERSION_TTL):
+        self.db_pool = db_pool
+        self.redis_client = redis_client
+        self.ttl = ttl
+
+        # In-memory fallback (без Redis): user_id -> (версия, время записи)
+        self._versions: Dict[int, Tuple[DataVersion, float]] = {}
+
+        self._listen_conn = None
+        self._pending: Set[asyncio.Task] = set()
+
+        self.stats = {
+            "hits": 0,
+            "seeds": 0,
+            "notifications": 0,
+            "listener_lost": 0
+        }
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"dossier_version:{user_id}"
+
+    async def get(self, user_id: int) -> Optional[DataVersion]:
+        """Текущая версия данных (Redis → memory → selfology.user_data_versions)"""
+        version = await self._get_cached(user_id)
+        if version is not None:
+            self.stats["hits"] += 1
+            return version
+
+        version = await self._load(user_id)
+        if version is not None:
+            self.stats["seeds"] += 1
+            await self.set(user_id, version)
+        return version
+
+    async def set(self, user_id: int, version: DataVersion):
+        """
+        Записать версию, не опуская уже известные значения
+
+        Засев из БД в get() и запись из NOTIFY идут параллельно: значение,
+        прочитанное до коммита триггера, не должно перезаписать более новое.
+        """
+        if self.redis_client:
+            try:
+                await self.redis_client.eval(
+                    self.SET_MAX_SCRIPT, 1, self._key(user_id),
+                    version.answers, version.personality, self.ttl
+                )
+            except Exception as e:
+                logger.warning(f"Redis version set failed: {e}")
+
+        now = time.monotonic()
+        cached = self._versions.get(user_id)
+        if cached is not None and now - cached[1] < self.ttl:
+            current = cached[0]
+            version = DataVersion(
+                answers=max(current.answers, version.answers),
+                personality=max(current.personality, version.personality)
+            )
+        self._versions[user_id] = (version, now)
+
+    async def _get_cached(self, user_id: int) -> Optional[DataVersion]:
+        if self.redis_client:
+            try:
+                answers, personality = await self.redis_client.hmget(
+                    self._key(user_id), "answers", "personality"
+                )
+                if answers is not None and personality is not None:
+                    return DataVersion(answers=int(answers), personality=int(personality))
+                return None
+            except Exception as e:
+                logger.warning(f"Redis version get failed: {e}")
+
+        cached = self._versions.get(user_id)
+        if cached is None:
+            return None
+
+        version, stored_at = cached
+        if time.monotonic() - stored_at >= self.ttl:
+            del self._versions[user_id]
+            return None
+        return version
+
+    async def _load(self, user_id: int) -> Optional[DataVersion]:
+        """Версия из БД (при промахе кэша или истекшем TTL)"""
+        if not self.db_pool:
+            return None
+
+        await self._ensure_listener()
+        try:
+            async with self.db_pool.acquire() as conn:
+                row = await conn.fetchrow("""
+                    SELECT answers_count, personality_version
+                    FROM selfology.user_data_versions
+                    WHERE user_id = $1
+                """, user_id)
+        except Exception as e:
+            logger.warning(f"Data version load failed: {e}")
+            return None
+
+        if not row:
+            return DataVersion()
+        return DataVersion(answers=row['answers_count'], personality=row['personality_version'])
+
+    # =========================================================================
+    # LISTEN/NOTIFY
+    # =========================================================================
+
+    async def _ensure_listener(self):
+        """Держит одно соединение из пула с LISTEN user_data_version (переоткрывает после обрыва)"""
+        if self._listen_conn is not None:
+            if not self._listen_conn.is_closed():
+                return
+            await self.close()
+
+        try:
+            self._listen_conn = await self.db_pool.acquire()
+            await self._listen_conn.add_listener(DATA_VERSION_CHANNEL, self._on_notify)
+            self._listen_conn.add_termination_listener(self._on_listener_lost)
+            logger.info(f"📡 Listening for data versions on '{DATA_VERSION_CHANNEL}'")
+        except Exception as e:
+            logger.warning(f"Data version LISTEN unavailable, relying on TTL: {e}")
+            await self.close()
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str):
+        try:
+            data = json.loads(payload)
+            user_id = int(data["user_id"])
+            version = DataVersion(answers=int(data["answers"]), personality=int(data["personality"]))
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Bad {channel} payload: {payload!r}")
+            return
+
+        self.stats["notifications"] += 1
+        # asyncpg вызывает callback синхронно - запись в Redis отдельной задачей
+        task = asyncio.ensure_future(self.set(user_id, version))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _on_listener_lost(self, connection):
+        # Уведомления за время обрыва потеряны: версии в памяти больше не надежны,
+        # в Redis они истекут по TTL
+        logger.warning("⚠️ Data version LISTEN connection lost, reconnecting on next lookup")
+        self.stats["listener_lost"] += 1
+        self._versions.clear()
+
+    async def close(self):
+        """Вернуть LISTEN соединение в пул"""
+        conn, self._listen_conn = self._listen_conn, None
+        if conn is None:
+            return
+        try:
+            await conn.remove_listener(DATA_VERSION_CHANNEL, self._on_notify)
+        except Exception:
+            pass
+        try:
+            await self.db_pool.release(conn)
+        except Exception as e:
+            logger.warning(f"Data version LISTEN connection release failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "listening": self._listen_conn is not None and not self._listen_conn.is_closed()
+        }
@@ -8,15 +8,21 @@ UserDossierService - AI-генерация резюме личности пол
 - Досье: 500-1000 токенов вместо 10K+
 - Кэшируется в Redis (1 час TTL)
 - Обновляется после 5 новых ответов
+- Актуальность - сравнение версий данных (DataVersionStore), без запросов в БД
+- Перегенерация single-flight (future в процессе + Redis lock между воркерами),
+  пока она идет - отдаем устаревшее досье (не старше max_staleness)
 """
 
+import asyncio
 import logging
 import json
-import hashlib
+import uuid
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
 
+from .data_version import DataVersion, DataVersionStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,7 +56,8 @@ class UserDossier:
     # Метаданные
     generated_at: Optional[datetime] = None
     answers_count_at_generation: int = 0
-    raw_data_hash: str = ""                 # Хэш данных для инвалидации
+    personality_version: int = -1           # Версия digital_personality (-1 - неизвестна)
+    stale: bool = False                     # Инвалидировано, ждет фоновой перегенерации
 
     def to_prompt_context(self) -> str:
         """
@@ -104,9 +111,18 @@ class UserDossierService:
     1. Генерируем AI-резюме вместо загрузки всех данных
     2. Кэшируем в Redis (1 час)
     3. Обновляем после 5 новых ответов
-    4. Инвалидируем при изменении данных (по хэшу)
+    4. Инвалидируем при изменении личности (по версии данных)
+    5. Генерируем одно досье на пользователя за раз, чат не ждет перегенерации
     """
 
+    # Освобождение Redis lock только владельцем (compare-and-delete)
+    RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
     # Промпт для генерации досье
     DOSSIER_PROMPT = """Проанализируй данные о пользователе и создай психологическое досье.
 
@@ -168,12 +184,22 @@ HYPOTHESIS: [Психологическая динамика одним абза
 - Будь кратким и точным
 - Фокусируйся на психологически значимом"""
 
-    def __init__(self, db_pool=None, redis_client=None, ai_client=None):
+    def __init__(
+        self,
+        db_pool=None,
+        redis_client=None,
+        ai_client=None,
+        max_staleness: int = 3600,
+        lock_ttl: int = 120
+    ):
         """
         Args:
             db_pool: AsyncPG pool для загрузки данных
             redis_client: Redis для кэширования досье
             ai_client: AI клиент для генерации (Claude/GPT-4o)
+            max_staleness: Максимальный возраст (сек) устаревшего досье, которое
+                отдаем во время фоновой перегенерации
+            lock_ttl: TTL Redis lock генерации (сек) - дольше самой долгой генерации
         """
         self.db_pool = db_pool
         self.redis_client = redis_client
@@ -182,9 +208,27 @@ HYPOTHESIS: [Психологическая динамика одним абза
         # In-memory cache (fallback если нет Redis)
         self._cache: Dict[int, UserDossier] = {}
 
+        # Версии данных пользователей (хранятся в Redis рядом с досье)
+        self.versions = DataVersionStore(db_pool=db_pool, redis_client=redis_client)
+
         # Настройки
         self.cache_ttl = 3600  # 1 час
         self.update_threshold = 5  # Обновлять после 5 новых ответов
+        self.max_staleness = max_staleness
+        self.lock_ttl = lock_ttl
+        self.lock_poll_interval = 0.5
+
+        # Генерации в полете: user_id -> task (single-flight в процессе)
+        self._refreshing: Dict[int, asyncio.Task] = {}
+        self._closed = False
+
+        self.stats = {
+            "hits": 0,
+            "stale_served": 0,
+            "generations": 0,
+            "joined": 0,
+            "lock_busy": 0
+        }
 
         logger.info("📋 UserDossierService initialized")
 
@@ -192,9 +236,11 @@ HYPOTHESIS: [Психологическая динамика одним абза
         """
         Получить досье пользователя.
 
-        1. Проверяем кэш (Redis/memory)
-        2. Проверяем нужно ли обновить (по хэшу данных)
-        3. Генерируем если нужно
+        1. Проверяем кэш (Redis/memory) и версию данных
+        2. Проверяем нужно ли обновить (сравнение версий)
+        3. Устаревшее досье (не старше max_staleness) отдаем сразу,
+           перегенерация идет в фоне
+        4. Иначе ждем генерацию (одну на пользователя)
 
         Args:
             user_id: ID пользователя
@@ -203,39 +249,165 @@ HYPOTHESIS: [Психологическая динамика одним абза
         Returns:
             UserDossier с AI-резюме
         """
-        # 1. Пробуем из кэша
-        if not force_regenerate:
-            cached = await self._get_cached_dossier(user_id)
-            if cached:
-                # Проверяем актуальность
-                if await self._is_dossier_valid(user_id, cached):
-                    logger.debug(f"📋 Using cached dossier for user {user_id}")
-                    return cached
-                else:
-                    logger.info(f"📋 Dossier outdated for user {user_id}, regenerating...")
+        # 1. Пробуем из кэша (досье и версия читаются параллельно)
+        if force_regenerate:
+            version = await self.versions.get(user_id)
+            return await self._regenerate(user_id, version)
+
+        cached, version = await asyncio.gather(
+            self._get_cached_dossier(user_id),
+            self.versions.get(user_id)
+        )
+        if cached:
+            # Проверяем актуальность
+            if not cached.stale and self._is_dossier_valid(cached, version):
+                self.stats["hits"] += 1
+                logger.debug(f"📋 Using cached dossier for user {user_id}")
+                return cached
+
+            # 2. Stale-while-revalidate: отдаем старое, обновляем в фоне
+            if self._within_staleness(cached):
+                self.stats["stale_served"] += 1
+                logger.info(f"📋 Dossier outdated for user {user_id}, serving stale while refreshing")
+                if not self._closed:
+                    self._start_refresh(user_id, version)
+                return cached
+
+            logger.info(f"📋 Dossier outdated for user {user_id}, regenerating...")
+
+        # 3. Досье нет или слишком старое - ждем генерацию
+        return await self._regenerate(user_id, version)
 
-        # 2. Генерируем новое досье
-        dossier = await self._generate_dossier(user_id)
+    async def invalidate_dossier(self, user_id: int):
+        """
+        Инвалидировать досье (вызывать после новых ответов)
 
-        # 3. Кэшируем
-        await self._cache_dossier(user_id, dossier)
+        Досье помечается устаревшим, а не удаляется: следующий запрос получит
+        его сразу, а перегенерация пойдет в фоне.
+        """
+        cached = await self._get_cached_dossier(user_id)
+        if cached and not cached.stale:
+            cached.stale = True
+            await self._cache_dossier(user_id, cached)
 
-        return dossier
+        logger.info(f"📋 Invalidated dossier for user {user_id}")
 
-    async def invalidate_dossier(self, user_id: int):
-        """Инвалидировать кэш досье (вызывать после новых ответов)"""
-        cache_key = f"dossier:{user_id}"
+    async def close(self):
+        """
+        Остановить фоновые генерации и освободить LISTEN соединение версий данных
 
-        if self.redis_client:
-            try:
-                await self.redis_client.delete(cache_key)
-            except Exception as e:
-                logger.warning(f"Redis delete failed: {e}")
+        Вызывается владельцем при остановке (ChatMVP.close) до закрытия db_pool
+        и Redis: генерация в полете иначе переживет клиентов, которыми пользуется.
+        """
+        self._closed = True
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        await asyncio.gather(*self._refreshing.values(), return_exceptions=True)
+        await self.versions.close()
+
+    # =========================================================================
+    # SINGLE-FLIGHT ГЕНЕРАЦИЯ
+    # =========================================================================
+
+    def _within_staleness(self, dossier: UserDossier) -> bool:
+        if dossier.generated_at is None:
+            return False
+        return (datetime.now() - dossier.generated_at).total_seconds() <= self.max_staleness
+
+    def _start_refresh(self, user_id: int, version: Optional[DataVersion]) -> asyncio.Task:
+        """Генерация досье пользователя (новая или уже идущая)"""
+        if self._closed:
+            raise RuntimeError("UserDossierService is closed")
+
+        task = self._refreshing.get(user_id)
+        if task is not None:
+            self.stats["joined"] += 1
+            return task
+
+        task = asyncio.ensure_future(self._refresh(user_id, version))
+        self._refreshing[user_id] = task
+        task.add_done_callback(lambda t: self._on_refresh_done(user_id, t))
+        return task
+
+    def _on_refresh_done(self, user_id: int, task: asyncio.Task):
+        if self._refreshing.get(user_id) is task:
+            del self._refreshing[user_id]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"❌ Dossier refresh failed for user {user_id}: {task.exception()}")
+
+    async def _regenerate(self, user_id: int, version: Optional[DataVersion]) -> UserDossier:
+        """Дождаться генерации (отмена ожидающего не отменяет саму генерацию)"""
+        return await asyncio.shield(self._start_refresh(user_id, version))
+
+    async def _refresh(self, user_id: int, version: Optional[DataVersion]) -> UserDossier:
+        """Сгенерировать и закэшировать досье под Redis lock"""
+        started_at = datetime.now()
+        token = await self._acquire_lock(user_id)
+
+        if token is None:
+            # Генерирует другой воркер - ждем его результат в Redis
+            self.stats["lock_busy"] += 1
+            dossier = await self._wait_for_dossier(user_id, started_at)
+            if dossier is not None:
+                return dossier
+            logger.warning(f"⚠️ Dossier lock for user {user_id} expired without result, generating")
 
-        if user_id in self._cache:
-            del self._cache[user_id]
+        try:
+            self.stats["generations"] += 1
+            dossier = await self._generate_dossier(user_id, version)
+            await self._cache_dossier(user_id, dossier)
+            return dossier
+        finally:
+            if token:
+                await self._release_lock(user_id, token)
 
-        logger.info(f"📋 Invalidated dossier for user {user_id}")
+    async def _acquire_lock(self, user_id: int) -> Optional[str]:
+        """
+        Redis lock генерации досье
+
+        Returns:
+            Токен владельца, "" если Redis недоступен (генерируем без lock),
+            None если lock у другого воркера
+        """
+        if not self.redis_client:
+            return ""
+
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self.redis_client.set(
+                f"dossier_lock:{user_id}", token, nx=True, ex=self.lock_ttl
+            )
+        except Exception as e:
+            logger.warning(f"Redis lock failed: {e}")
+            return ""
+
+        return token if acquired else None
+
+    async def _release_lock(self, user_id: int, token: str):
+        try:
+            await self.redis_client.eval(self.RELEASE_LOCK_SCRIPT, 1, f"dossier_lock:{user_id}", token)
+        except Exception as e:
+            logger.warning(f"Redis unlock failed: {e}")
+
+    async def _wait_for_dossier(self, user_id: int, since: datetime) -> Optional[UserDossier]:
+        """Ждать досье, сгенерированное другим воркером после since (не дольше lock_ttl)"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_ttl
+
+        while loop.time() < deadline:
+            await asyncio.sleep(self.lock_poll_interval)
+            dossier = await self._get_cached_dossier(user_id)
+            if dossier and not dossier.stale and dossier.generated_at and dossier.generated_at >= since:
+                return dossier
+
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "refreshing": len(self._refreshing),
+            "versions": self.versions.get_stats()
+        }
 
     async def _get_cached_dossier(self, user_id: int) -> Optional[UserDossier]:
         """Получить досье из кэша"""
@@ -268,38 +440,19 @@ HYPOTHESIS: [Психологическая динамика одним абза
         # Memory fallback
         self._cache[user_id] = dossier
 
-    async def _is_dossier_valid(self, user_id: int, dossier: UserDossier) -> bool:
-        """Проверить актуальность досье"""
-        if not self.db_pool:
-            return True
-
-        try:
-            async with self.db_pool.acquire() as conn:
-                # Проверяем количество ответов
-                row = await conn.fetchrow("""
-                    SELECT COUNT(*) as count
-                    FROM selfology.user_answers_v2
-                    WHERE user_id = $1
-                """, user_id)
-
-                current_count = row['count'] if row else 0
+    def _is_dossier_valid(self, dossier: UserDossier, version: Optional[DataVersion]) -> bool:
+        """Проверить актуальность досье по версии данных"""
+        if version is None:
+            return True  # Версия неизвестна (нет БД) - безопасный fallback
 
-                # Если новых ответов >= threshold - нужно обновить
-                if current_count - dossier.answers_count_at_generation >= self.update_threshold:
-                    return False
+        # Личность изменилась - нужно обновить
+        if version.personality != dossier.personality_version:
+            return False
 
-                # Проверяем хэш данных
-                current_hash = await self._compute_data_hash(user_id)
-                if current_hash != dossier.raw_data_hash:
-                    return False
+        # Если новых ответов >= threshold - нужно обновить
+        return version.answers - dossier.answers_count_at_generation < self.update_threshold
 
-                return True
-
-        except Exception as e:
-            logger.warning(f"Validity check failed: {e}")
-            return True  # Безопасный fallback
-
-    async def _generate_dossier(self, user_id: int) -> UserDossier:
+    async def _generate_dossier(self, user_id: int, version: Optional[DataVersion] = None) -> UserDossier:
         """
         Сгенерировать досье через AI.
 
@@ -316,6 +469,8 @@ HYPOTHESIS: [Психологическая динамика одним абза
 
         if not raw_data or not any(raw_data.values()):
             logger.warning(f"No data for user {user_id}, returning empty dossier")
+            dossier.generated_at = datetime.now()
+            self._stamp_version(dossier, version)
             return dossier
 
         # Генерируем через AI
@@ -330,8 +485,7 @@ HYPOTHESIS: [Психологическая динамика одним абза
 
         # Добавляем метаданные
         dossier.generated_at = datetime.now()
-        dossier.answers_count_at_generation = raw_data.get('answers_count', 0)
-        dossier.raw_data_hash = await self._compute_data_hash(user_id)
+        self._stamp_version(dossier, version)
 
         # Добавляем style hints из Big Five
         big_five = raw_data.get('big_five', {})
@@ -639,24 +793,11 @@ HYPOTHESIS: [Психологическая динамика одним абза
 
         return hints
 
-    async def _compute_data_hash(self, user_id: int) -> str:
-        """Вычислить хэш данных для отслеживания изменений"""
-        if not self.db_pool:
-            return ""
-
-        try:
-            async with self.db_pool.acquire() as conn:
-                row = await conn.fetchrow("""
-                    SELECT updated_at FROM selfology.digital_personality
-                    WHERE user_id = $1
-                """, user_id)
-
-                if row and row['updated_at']:
-                    return hashlib.md5(str(row['updated_at']).encode()).hexdigest()[:8]
-        except:
-            pass
-
-        return ""
+    def _stamp_version(self, dossier: UserDossier, version: Optional[DataVersion]):
+        """Запомнить версию данных, из которых сгенерировано досье"""
+        if version is not None:
+            dossier.answers_count_at_generation = version.answers
+            dossier.personality_version = version.personality
 
     def _serialize_dossier(self, dossier: UserDossier) -> str:
         """Сериализовать досье для Redis"""
@@ -671,7 +812,8 @@ HYPOTHESIS: [Психологическая динамика одним абза
             'style_hints': dossier.style_hints,
             'generated_at': dossier.generated_at.isoformat() if dossier.generated_at else None,
             'answers_count_at_generation': dossier.answers_count_at_generation,
-            'raw_data_hash': dossier.raw_data_hash
+            'personality_version': dossier.personality_version,
+            'stale': dossier.stale
         })
 
     def _deserialize_dossier(self, data: str) -> Optional[UserDossier]:
@@ -688,7 +830,8 @@ HYPOTHESIS: [Психологическая динамика одним абза
                 hypothesis=d.get('hypothesis', ''),
                 style_hints=d.get('style_hints', {}),
                 answers_count_at_generation=d.get('answers_count_at_generation', 0),
-                raw_data_hash=d.get('raw_data_hash', '')
+                personality_version=d.get('personality_version', -1),
+                stale=d.get('stale', False)
             )
 
             if d.get('generated_at'):
@@ -0,0 +1,288 @@
+"""
+Analysis Scheduler - Очередь глубокого анализа ответов с приоритетами
+
+🚦 ЛИМИТ: Не больше max_concurrent pipeline одновременно (вместо task на каждый ответ)
+🔥 ПРИОРИТЕТ: crisis → breakthrough → обычные ответы → retry pending
+👤 ПОРЯДОК: Ответы одного пользователя анализируются строго последовательно
+🧱 СТАДИИ: Отдельные лимиты на LLM / embeddings / БД внутри pipeline
+📊 МЕТРИКИ: Глубина очереди и время ожидания для get_background_tasks_status
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisPriority(IntEnum):
+    """Меньше значение - раньше в очереди"""
+    CRISIS = 0
+    BREAKTHROUGH = 1
+    NORMAL = 2
+    RETRY = 3
+
+
+@dataclass
+class AnalysisJob:
+    """Задача анализа: корутина создается только при запуске"""
+    user_id: int
+    factory: Callable[[], Awaitable[Any]]
+    priority: AnalysisPriority
+    name: str
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class AnalysisScheduler:
+    """
+    Приоритетная очередь deep analysis с ограничением параллелизма
+
+    В куче лежит не каждая задача, а "голова" очереди пользователя: пока
+    задача пользователя выполняется, следующие его ответы ждут в его FIFO.
+    Приоритет головы - лучший приоритет среди ожидающих задач пользователя,
+    чтобы crisis ответ не застревал за обычными ответами того же пользователя.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        stage_limits: Optional[Dict[str, int]] = None,
+        wait_samples: int = 500
+    ):
+        self.max_concurrent = max_concurrent
+        self._stage_limits = dict(stage_limits or {})
+        self._stages: Dict[str, asyncio.Semaphore] = {}
+        self._stage_waiting: Dict[str, int] = {}
+        self._stage_in_use: Dict[str, int] = {}
+
+        self._heap: List[Tuple[int, int, int, int]] = []  # (priority, seq, user_id, version)
+        self._seq = 0
+        self._user_queues: Dict[int, Deque[AnalysisJob]] = {}
+        self._user_versions: Dict[int, int] = {}
+        self._busy_users: Set[int] = set()
+        self._running: Set[asyncio.Task] = set()
+        self._closed = False
+
+        self._wait_times: Deque[float] = deque(maxlen=wait_samples)
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "max_queue_depth": 0
+        }
+
+    # === ОЧЕРЕДЬ ===
+
+    def submit(
+        self,
+        user_id: int,
+        factory: Callable[[], Awaitable[Any]],
+        priority: AnalysisPriority = AnalysisPriority.NORMAL,
+        name: Optional[str] = None
+    ) -> asyncio.Future:
+        """
+        Поставить анализ в очередь
+
+        Args:
+            user_id: ID пользователя (задачи одного пользователя идут по очереди)
+            factory: Функция без аргументов, возвращающая корутину анализа
+            priority: Приоритет задачи
+            name: Имя задачи для observability
+
+        Returns:
+            Future с результатом корутины
+        """
+        if self._closed:
+            raise RuntimeError("AnalysisScheduler is shut down")
+
+        job = AnalysisJob(
+            user_id=user_id,
+            factory=factory,
+            priority=AnalysisPriority(priority),
+            name=name or f"analysis_{user_id}",
+            future=asyncio.get_running_loop().create_future()
+        )
+
+        queue = self._user_queues.setdefault(user_id, deque())
+        queue.append(job)
+        self.stats["submitted"] += 1
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self.queue_depth)
+
+        if user_id not in self._busy_users:
+            self._schedule_user(user_id)
+
+        self._dispatch()
+        return job.future
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._user_queues.values())
+
+    def _schedule_user(self, user_id: int):
+        """Положить голову очереди пользователя в кучу (старые записи устаревают)"""
+        queue = self._user_queues.get(user_id)
+        if not queue:
+            return
+
+        version = self._user_versions.get(user_id, 0) + 1
+        self._user_versions[user_id] = version
+        priority = min(job.priority for job in queue)
+        heapq.heappush(self._heap, (priority, self._seq, user_id, version))
+        self._seq += 1
+
+    def _dispatch(self):
+        """Запустить задачи, пока есть свободные слоты"""
+        while self._heap and len(self._running) < self.max_concurrent:
+            _, _, user_id, version = heapq.heappop(self._heap)
+            if version != self._user_versions.get(user_id) or user_id in self._busy_users:
+                continue  # Устаревшая запись
+
+            queue = self._user_queues.get(user_id)
+            if not queue:
+                continue
+
+            job = queue.popleft()
+            if not queue:
+                del self._user_queues[user_id]
+
+            self._busy_users.add(user_id)
+            self._wait_times.append(time.monotonic() - job.enqueued_at)
+
+            task = asyncio.create_task(self._run(job), name=job.name)
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, job: AnalysisJob):
+        try:
+            result = await job.factory()
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            if not job.future.done():
+                job.future.cancel()
+            raise
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error(f"❌ Analysis job '{job.name}' failed: {e}", exc_info=True)
+            if not job.future.done():
+                job.future.set_exception(e)
+            job.future.exception()  # Помечаем как полученное - ошибка уже залогирована
+        else:
+            self.stats["completed"] += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            # Освобождаем слот до _dispatch, иначе следующая задача ждала бы done callback
+            self._running.discard(asyncio.current_task())
+            self._busy_users.discard(job.user_id)
+            self._schedule_user(job.user_id)
+            self._dispatch()
+
+    # === СТАДИИ PIPELINE ===
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        """
+        Ограничить параллелизм стадии (llm / embedding / db)
+
+        Стадии без лимита в stage_limits проходят без ожидания.
+        """
+        limit = self._stage_limits.get(name)
+        if not limit:
+            yield
+            return
+
+        semaphore = self._stages.get(name)
+        if semaphore is None:
+            semaphore = self._stages[name] = asyncio.Semaphore(limit)
+
+        self._stage_waiting[name] = self._stage_waiting.get(name, 0) + 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._stage_waiting[name] -= 1
+
+        self._stage_in_use[name] = self._stage_in_use.get(name, 0) + 1
+        try:
+            yield
+        finally:
+            self._stage_in_use[name] -= 1
+            semaphore.release()
+
+    # === LIFECYCLE ===
+
+    async def shutdown(self, timeout: float) -> Dict[str, Any]:
+        """
+        Дождаться очереди и выполняющихся задач, по timeout отменить остаток
+
+        Задачи, которые так и не стартовали, отменяются без создания корутины.
+        """
+        self._closed = True
+        deadline = time.monotonic() + timeout
+
+        # Завершившиеся задачи сами запускают следующие из очереди
+        while self._running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.wait(list(self._running), timeout=remaining)
+
+        not_started = 0
+        for queue in self._user_queues.values():
+            for job in queue:
+                job.future.cancel()
+                not_started += 1
+        self._user_queues.clear()
+        self._heap.clear()
+
+        running = list(self._running)
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+        if not_started or running:
+            logger.warning(
+                f"⚠️ Analysis scheduler shutdown: {len(running)} running cancelled, "
+                f"{not_started} queued dropped"
+            )
+
+        return {
+            "analysis_cancelled": len(running),
+            "analysis_not_started": not_started
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Глубина очереди, ожидание и загрузка стадий"""
+        waits = sorted(self._wait_times)
+        by_priority = {priority.name.lower(): 0 for priority in AnalysisPriority}
+        for queue in self._user_queues.values():
+            for job in queue:
+                by_priority[job.priority.name.lower()] += 1
+
+        return {
+            **self.stats,
+            "max_concurrent": self.max_concurrent,
+            "running": len(self._running),
+            "queue_depth": self.queue_depth,
+            "queue_by_priority": by_priority,
+            "users_waiting": len(self._user_queues),
+            "avg_wait_ms": (sum(waits) / len(waits) * 1000) if waits else 0.0,
+            "p95_wait_ms": waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000 if waits else 0.0,
+            "max_wait_ms": waits[-1] * 1000 if waits else 0.0,
+            "stages": {
+                name: {
+                    "limit": limit,
+                    "in_use": self._stage_in_use.get(name, 0),
+                    "waiting": self._stage_waiting.get(name, 0)
+                }
+                for name, limit in self._stage_limits.items()
+            }
+        }
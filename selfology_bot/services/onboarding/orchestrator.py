@@ -21,7 +21,7 @@ import asyncio
 from pathlib import Path
 from typing import Dict, Optional, Any, List, Set
 from datetime import datetime
-from copy import deepcopy
+from functools import partial
 
 # Добавляем путь к Question Core
 sys.path.append(str(Path(__file__).parent.parent.parent.parent / "intelligent_question_core"))
@@ -30,10 +30,13 @@ from intelligent_question_core.api.core_api import SelfologyQuestionCore
 from .question_router import QuestionRouter
 from .program_router import ProgramRouter
 from .session_reporter import SessionReportGenerator
+from .analysis_scheduler import AnalysisScheduler, AnalysisPriority
+from .pipeline_dag import PipelineDAG
+from .session_state import AppendOnlyHistory, ensure_history, freeze_question, snapshot_session
 
 # Импортируем систему анализа (Phase 2)
 sys.path.append(str(Path(__file__).parent.parent.parent))
-from analysis import AnswerAnalyzer, EmbeddingCreator, PersonalityExtractor
+from analysis import AnswerAnalyzer, EmbeddingCreator, PersonalityExtractor, AnalysisConfig
 
 # Импортируем FatigueDetector (Phase 3)
 from .fatigue_detector import FatigueDetector
@@ -102,6 +105,11 @@ class OnboardingOrchestrator:
         self._background_tasks: Set[asyncio.Task] = set()
         self._shutdown_event = asyncio.Event()
 
+        # 🚦 Очередь deep analysis: лимит параллелизма, приоритеты, порядок per-user
+        self.analysis_scheduler = AnalysisScheduler(
+            **AnalysisConfig.PERFORMANCE_SETTINGS["analysis_scheduler"]
+        )
+
         logger.info("🎯 OnboardingOrchestrator initialized with Task Registry")
 
     async def start_onboarding(self, user_id: int) -> Dict[str, Any]:
@@ -175,9 +183,9 @@ class OnboardingOrchestrator:
                 "user_id": user_id,
                 "session_id": session_id,
                 "started_at": datetime.now(),
-                "question_history": [],
-                "answer_history": [],
-                "current_question": first_question,
+                "question_history": AppendOnlyHistory(),
+                "answer_history": AppendOnlyHistory(),
+                "current_question": freeze_question(first_question),
                 "router_events": []  # Для отслеживания работы роутера
             }
 
@@ -292,9 +300,9 @@ class OnboardingOrchestrator:
             session = {
                 "user_id": user_id,
                 "session_id": session_db['id'],
-                "current_question": current_question,
-                "answer_history": answer_history,  # ✅ Восстановлена из БД
-                "question_history": question_history,  # ✅ Восстановлена из БД
+                "current_question": freeze_question(current_question),
+                "answer_history": AppendOnlyHistory(answer_history),  # ✅ Восстановлена из БД
+                "question_history": AppendOnlyHistory(question_history),  # ✅ Восстановлена из БД
                 "router_events": []  # Для отслеживания работы роутера (начинается заново)
             }
 
@@ -373,7 +381,7 @@ class OnboardingOrchestrator:
             question = next_question
 
             # ✅ КРИТИЧНО: Обновляем current_question в сессии для правильного добавления в историю
-            session["current_question"] = next_question
+            session["current_question"] = freeze_question(next_question)
             logger.debug(f"📝 Updated session current_question to {next_question['id']}")
 
             # Получаем прогресс ТЕКУЩЕЙ сессии и общий прогресс
@@ -460,14 +468,9 @@ class OnboardingOrchestrator:
             # 1.2 Быстрое сохранение в сессии
             current_question = session.get("current_question")
             if current_question:
-                # Инициализация истории если не существует
-                if "question_history" not in session or session["question_history"] is None:
-                    session["question_history"] = []
-                if "answer_history" not in session or session["answer_history"] is None:
-                    session["answer_history"] = []
-
-                session["question_history"].append(current_question)
-                session["answer_history"].append({
+                # Append-only история (элементы замораживаются при добавлении)
+                ensure_history(session, "question_history").append(current_question)
+                ensure_history(session, "answer_history").append({
                     "answer": answer,
                     "question_id": question_id,
                     "answer_id": answer_id,  # Сохраняем для связи с анализом
@@ -492,14 +495,17 @@ class OnboardingOrchestrator:
                 "deep_analysis_status": "processing"
             }
 
-            # ✅ 1.5 Создаем immutable копию данных для background task
-            # Предотвращает race conditions с shared session state
-            immutable_session = deepcopy(session)
-            immutable_question = deepcopy(current_question)
-
-            # ✅ 1.6 Запускаем глубокий анализ через Task Registry
-            task = self._create_background_task(
-                self._deep_analysis_pipeline(
+            # ✅ 1.5 Создаем immutable снимок данных для background task
+            # Предотвращает race conditions с shared session state:
+            # история append-only, снимок фиксирует ее длину - O(1) без deepcopy
+            immutable_session = snapshot_session(session)
+            immutable_question = freeze_question(current_question)
+
+            # ✅ 1.6 Ставим глубокий анализ в очередь AnalysisScheduler
+            priority = self._get_analysis_priority(answer, immutable_question)
+            self.analysis_scheduler.submit(
+                user_id,
+                lambda: self._deep_analysis_pipeline(
                     user_id,
                     question_id,
                     answer,
@@ -508,10 +514,14 @@ class OnboardingOrchestrator:
                     answer_id,
                     is_context_story=is_context_story  # Передаем флаг типа ответа
                 ),
+                priority=priority,
                 name=f"deep_analysis_{user_id}_{question_id}"
             )
 
-            logger.info(f"🔬 Background analysis task created: {task.get_name()} (total active: {len(self._background_tasks)})")
+            logger.info(
+                f"🔬 Deep analysis queued: user={user_id}, question={question_id}, "
+                f"priority={priority.name} (queue depth: {self.analysis_scheduler.queue_depth})"
+            )
 
             return instant_response
 
@@ -706,17 +716,11 @@ class OnboardingOrchestrator:
             current_question = session.get("current_question")
 
             if current_question:
-                # Инициализация истории если не существует
-                if "question_history" not in session or session["question_history"] is None:
-                    session["question_history"] = []
-                if "answer_history" not in session or session["answer_history"] is None:
-                    session["answer_history"] = []
-
                 # Добавляем вопрос в историю
-                session["question_history"].append(current_question)
+                ensure_history(session, "question_history").append(current_question)
 
                 # Добавляем запись о пропуске (без answer_id, т.к. нет ответа)
-                session["answer_history"].append({
+                ensure_history(session, "answer_history").append({
                     "answer": None,  # Нет ответа
                     "question_id": question_id,
                     "answer_id": None,
@@ -776,6 +780,24 @@ class OnboardingOrchestrator:
         ADMIN_USER_ID = "98005572"  # Твой ID из логов
         return str(user_id) == ADMIN_USER_ID
 
+    def _get_analysis_priority(self, answer: str, question_data: Optional[Dict[str, Any]]) -> AnalysisPriority:
+        """
+        Приоритет deep analysis для ответа
+
+        - CRISIS: кризисные ключевые слова (SAFETY_RULES)
+        - BREAKTHROUGH: развернутый ответ на вопрос уровня SHADOW/CORE
+        - NORMAL: все остальное
+        """
+        answer_lower = (answer or "").lower()
+        if any(keyword in answer_lower for keyword in AnalysisConfig.SAFETY_RULES["crisis_keywords"]):
+            return AnalysisPriority.CRISIS
+
+        depth_level = ((question_data or {}).get("classification") or {}).get("depth_level")
+        if depth_level in ("SHADOW", "CORE") and len(answer_lower) >= 200:
+            return AnalysisPriority.BREAKTHROUGH
+
+        return AnalysisPriority.NORMAL
+
     def _get_quick_insight(self, answer: str) -> str:
         """Быстрый инсайт для мгновенного фидбека"""
 
@@ -814,6 +836,8 @@ class OnboardingOrchestrator:
         - Полное exception handling с логированием
         - Graceful handling если shutdown во время выполнения
         - ✅ ОТСЛЕЖИВАНИЕ СТАТУСОВ ОБРАБОТКИ (Oct 2025)
+        - Стадии выполняются как DAG (PipelineDAG): время ответа ~ самая
+          длинная цепочка стадий, а не их сумма; тайминги стадий пишутся в БД
         """
 
         analysis_id = None
@@ -835,108 +859,147 @@ class OnboardingOrchestrator:
 
             # 2.1 Подготавливаем контекст для анализа
             analysis_context = self._prepare_analysis_context(user_id, session, answer, answer_id)
+            answer_id = analysis_context.get("answer_id")
+            session_id = session.get("session_id")
+            answer_history = session.get("answer_history") or []
 
-            # 2.2 🧠 ГЛАВНЫЙ АНАЛИЗ через AnswerAnalyzer
-            analysis_result = await self.answer_analyzer.analyze_answer(
-                question_data=question_data,
-                user_answer=answer,
-                user_context=analysis_context
-            )
+            # 2.2 🕸️ СТАДИИ КАК DAG: независимые стадии выполняются параллельно
+            #
+            #   analyze ──┬── save_analysis
+            #             ├── vectorize
+            #             └──────────────┐
+            #   load_personality ── extract_personality ── update_personality
+            #
+            # Извлечение личности (LLM) не зависит от AnswerAnalyzer и идет
+            # параллельно с ним; запись личности ждет успешного анализа.
+
+            async def analyze(results):
+                # 🧠 ГЛАВНЫЙ АНАЛИЗ через AnswerAnalyzer
+                async with self.analysis_scheduler.stage("llm"):
+                    return await self.answer_analyzer.analyze_answer(
+                        question_data=question_data,
+                        user_answer=answer,
+                        user_context=analysis_context
+                    )
 
-            # 2.3 💾 Сохраняем анализ в БД (с начальными статусами pending)
-            session_id = session.get("session_id")
-            if session_id and self.onboarding_dao:
-                # Получаем answer_id из БД для связи с анализом
-                answer_id = analysis_context.get("answer_id")
-                if answer_id:
+            async def save_analysis(results):
+                # 💾 Сохраняем анализ в БД (с начальными статусами pending)
+                if not (session_id and self.onboarding_dao):
+                    logger.warning("⚠️ Database not available - analysis not saved")
+                    return None
+                if not answer_id:
+                    logger.warning("⚠️ No answer_id found - cannot save analysis")
+                    return None
+
+                async with self.analysis_scheduler.stage("db"):
                     if is_context_story:
                         # Контекстная история - сохраняем через save_context_story_analysis
-                        analysis_id = await self.onboarding_dao.save_context_story_analysis(answer_id, analysis_result)
-                        logger.info(f"💙 Context story analysis saved to DB with ID {analysis_id}")
+                        saved_id = await self.onboarding_dao.save_context_story_analysis(answer_id, results["analyze"])
+                        logger.info(f"💙 Context story analysis saved to DB with ID {saved_id}")
                     else:
                         # Обычный ответ - сохраняем через save_analysis_result
-                        analysis_id = await self.onboarding_dao.save_analysis_result(answer_id, analysis_result)
-                        logger.info(f"💾 Analysis saved to DB with ID {analysis_id}")
-                else:
-                    logger.warning("⚠️ No answer_id found - cannot save analysis")
-            else:
-                logger.warning("⚠️ Database not available - analysis not saved")
+                        saved_id = await self.onboarding_dao.save_analysis_result(answer_id, results["analyze"])
+                        logger.info(f"💾 Analysis saved to DB with ID {saved_id}")
+                return saved_id
+
+            async def load_personality(results):
+                # 🧬 Существующая цифровая личность
+                if not self.personality_dao:
+                    return None
+                async with self.analysis_scheduler.stage("db"):
+                    return await self.personality_dao.get_personality(user_id)
+
+            async def extract_personality(results):
+                # Извлекаем конкретную информацию из ответа
+                async with self.analysis_scheduler.stage("llm"):
+                    return await self.personality_extractor.extract_from_answer(
+                        question_text=question_data.get("text", ""),
+                        user_answer=answer,
+                        question_metadata=question_data.get("classification", {}),
+                        existing_personality=results["load_personality"]
+                    )
 
-            # 2.3.5 🧬 ИЗВЛЕЧЕНИЕ ЦИФРОВОЙ ЛИЧНОСТИ
-            try:
-                # Получаем существующую личность
-                existing_personality = None
-                if self.personality_dao:
-                    existing_personality = await self.personality_dao.get_personality(user_id)
+            async def update_personality(results):
+                existing_personality = results["load_personality"]
+                extracted_personality = results["extract_personality"]
 
-                # Извлекаем конкретную информацию из ответа
-                extracted_personality = await self.personality_extractor.extract_from_answer(
-                    question_text=question_data.get("text", ""),
-                    user_answer=answer,
-                    question_metadata=question_data.get("classification", {}),
-                    existing_personality=existing_personality
-                )
+                async with self.analysis_scheduler.stage("db"):
+                    if existing_personality:
+                        # Обновляем существующую
+                        merged = self.personality_extractor.merge_extractions(
+                            existing_personality,
+                            extracted_personality
+                        )
+                        await self.personality_dao.update_personality(user_id, merged, merge=True)
+                        logger.info(f"🧬 Updated digital personality for user {user_id}")
+                    else:
+                        # Создаём новую
+                        await self.personality_dao.create_personality(user_id, extracted_personality)
+                        logger.info(f"🧬 Created digital personality for user {user_id}")
+                return True
 
-                # Объединяем с существующей личностью
-                if existing_personality:
-                    # Обновляем существующую
-                    merged = self.personality_extractor.merge_extractions(
-                        existing_personality,
-                        extracted_personality
-                    )
-                    await self.personality_dao.update_personality(user_id, merged, merge=True)
-                    logger.info(f"🧬 Updated digital personality for user {user_id}")
-                else:
-                    # Создаём новую
-                    await self.personality_dao.create_personality(user_id, extracted_personality)
-                    logger.info(f"🧬 Created digital personality for user {user_id}")
-
-                # ✅ Отмечаем успех обновления DP
-                dp_update_success = True
-                if analysis_id and self.onboarding_dao:
-                    await self.onboarding_dao.update_dp_update_status(analysis_id, "success")
-
-            except Exception as e:
-                logger.error(f"❌ Failed to extract/update personality for user {user_id}: {e}")
-                # ✅ Отмечаем ошибку обновления DP
-                if analysis_id and self.onboarding_dao:
-                    await self.onboarding_dao.update_dp_update_status(
-                        analysis_id,
-                        "failed",
-                        str(e)[:500]  # Ограничиваем длину ошибки
+            async def vectorize(results):
+                # 📈 Создаем/обновляем векторы в Qdrant
+                async with self.analysis_scheduler.stage("embedding"):
+                    return await self.embedding_creator.create_personality_vector(
+                        user_id=user_id,
+                        analysis_result=results["analyze"],
+                        is_update=(len(answer_history) > 1)  # Обновление если не первый ответ
                     )
 
-            # 2.4 📈 Создаем/обновляем векторы в Qdrant
-            try:
-                answer_history = session.get("answer_history") or []
-                vector_success = await self.embedding_creator.create_personality_vector(
-                    user_id=user_id,
-                    analysis_result=analysis_result,
-                    is_update=(len(answer_history) > 1)  # Обновление если не первый ответ
-                )
+            dag = PipelineDAG()
+            dag.add("analyze", analyze)
+            dag.add("load_personality", load_personality)
+            dag.add("save_analysis", save_analysis, depends_on=["analyze"])
+            dag.add("extract_personality", extract_personality, depends_on=["load_personality"])
+            dag.add("update_personality", update_personality, depends_on=["analyze", "extract_personality"])
+            dag.add("vectorize", vectorize, depends_on=["analyze"])
+
+            run = await dag.run()
+
+            # Без результата анализа pipeline провален целиком
+            if not run.ok("analyze"):
+                raise run.error("analyze")
+
+            analysis_result = run.results["analyze"]
+            if run.error("save_analysis"):
+                logger.error(f"❌ Failed to save analysis for user {user_id}: {run.error('save_analysis')}")
+            analysis_id = run.results.get("save_analysis")
+
+            # 2.3 ✅ Статусы DP и векторизации
+            dp_update_success = run.ok("update_personality")
+            dp_error = None
+            if not dp_update_success:
+                dp_error = run.error("update_personality") or run.error("extract_personality") or run.error("load_personality")
+                logger.error(f"❌ Failed to extract/update personality for user {user_id}: {dp_error}")
+
+            vectorization_success = bool(run.results.get("vectorize"))
+            vector_error = None
+            if not vectorization_success:
+                vector_error = run.error("vectorize") or "create_personality_vector returned False"
+                if run.error("vectorize"):
+                    logger.error(f"❌ Failed to create vectors for user {user_id}: {vector_error}")
 
-                # ✅ Отмечаем успех/неудачу векторизации
-                if analysis_id and self.onboarding_dao:
-                    if vector_success:
-                        vectorization_success = True
+            if analysis_id and self.onboarding_dao:
+                async with self.analysis_scheduler.stage("db"):
+                    if dp_update_success:
+                        await self.onboarding_dao.update_dp_update_status(analysis_id, "success")
+                    else:
+                        await self.onboarding_dao.update_dp_update_status(
+                            analysis_id,
+                            "failed",
+                            str(dp_error)[:500]  # Ограничиваем длину ошибки
+                        )
+
+                    if vectorization_success:
                         await self.onboarding_dao.update_vectorization_status(analysis_id, "success")
                     else:
                         await self.onboarding_dao.update_vectorization_status(
                             analysis_id,
                             "failed",
-                            "create_personality_vector returned False"
+                            str(vector_error)[:500]
                         )
 
-            except Exception as e:
-                logger.error(f"❌ Failed to create vectors for user {user_id}: {e}")
-                # ✅ Отмечаем ошибку векторизации
-                if analysis_id and self.onboarding_dao:
-                    await self.onboarding_dao.update_vectorization_status(
-                        analysis_id,
-                        "failed",
-                        str(e)[:500]  # Ограничиваем длину ошибки
-                    )
-
             # 2.5 Обновляем сессию рекомендациями для роутера
             # ВАЖНО: НЕ обновляем shared session напрямую (это immutable копия)
             # Реальное обновление произойдет через БД или при следующем get_session
@@ -944,19 +1007,21 @@ class OnboardingOrchestrator:
 
             # 2.6 Логирование результатов
             deep_time = (datetime.now() - deep_start).total_seconds() * 1000
+            stage_summary = ", ".join(f"{name}={ms}ms" for name, ms in run.timings_ms.items())
             logger.info(
                 f"✅ Deep analysis completed for user {user_id} in {deep_time:.0f}ms "
                 f"(model: {analysis_result.get('processing_metadata', {}).get('model_used', 'unknown')}, "
                 f"vectors: {'✅' if vectorization_success else '❌'}, "
-                f"DP: {'✅' if dp_update_success else '❌'})"
+                f"DP: {'✅' if dp_update_success else '❌'}; stages: {stage_summary})"
             )
 
-            # ✅ 2.7 Отмечаем завершение background task
+            # ✅ 2.7 Отмечаем завершение background task (+ тайминги стадий)
             if analysis_id and self.onboarding_dao:
                 await self.onboarding_dao.mark_background_task_completed(
                     analysis_id,
                     int(deep_time),
-                    success=(vectorization_success and dp_update_success)
+                    success=(vectorization_success and dp_update_success),
+                    stage_timings=run.timings_ms
                 )
 
             # 2.8 Уведомление пользователя (если онлайн)
@@ -1152,52 +1217,59 @@ class OnboardingOrchestrator:
 
             logger.info(f"🔄 Found {len(pending_answers)} pending answers to retry for user {user_id}")
 
-            # Повторная обработка каждого ответа
+            # Повторная обработка через очередь с низшим приоритетом -
+            # retry не должен задерживать первый вопрос и свежие ответы
+            queued = 0
             for answer in pending_answers:
-                answer_id = answer['id']
                 question_id = answer['question_json_id']
-                raw_answer = answer['raw_answer']
-                retry_count = answer['retry_count']
+                question = self.question_core.get_question_by_id(question_id)
 
-                logger.info(f"🔄 Retrying analysis for answer {answer_id} (attempt {retry_count + 1}/3)")
+                if not question:
+                    logger.warning(f"⚠️ Question {question_id} not found, skipping")
+                    continue
 
-                try:
-                    # Получаем вопрос из core
-                    question = self.question_core.get_question_by_id(question_id)
-
-                    if not question:
-                        logger.warning(f"⚠️ Question {question_id} not found, skipping")
-                        continue
-
-                    # Запускаем deep analysis заново
-                    await self._run_deep_analysis_pipeline(
-                        user_id,
-                        answer_id,
-                        question['text'],
-                        raw_answer,
-                        question.get('classification', {})
-                    )
+                self.analysis_scheduler.submit(
+                    user_id,
+                    partial(self._retry_answer_analysis, user_id, answer, question),
+                    priority=AnalysisPriority.RETRY,
+                    name=f"retry_analysis_{user_id}_{answer['id']}"
+                )
+                queued += 1
 
-                    # Инкрементируем retry_count
-                    update_query = """
-                        UPDATE selfology.user_answers_new
-                        SET retry_count = retry_count + 1
-                        WHERE id = $1
-                    """
-                    async with self.db_service.get_connection() as conn:
-                        await conn.execute(update_query, answer_id)
+            logger.info(f"✅ Queued retry for {queued}/{len(pending_answers)} pending answers")
 
-                    logger.info(f"✅ Successfully retried analysis for answer {answer_id}")
+        except Exception as e:
+            logger.error(f"❌ Error in _retry_pending_answers: {e}")
 
-                except Exception as e:
-                    logger.error(f"❌ Error retrying answer {answer_id}: {e}")
-                    # Продолжаем со следующим ответом
-                    continue
+    async def _retry_answer_analysis(self, user_id: int, answer, question: Dict[str, Any]):
+        """Повторный deep analysis одного pending ответа + инкремент retry_count"""
+        answer_id = answer['id']
+        logger.info(f"🔄 Retrying analysis for answer {answer_id} (attempt {answer['retry_count'] + 1}/3)")
 
-            logger.info(f"✅ Completed retry for {len(pending_answers)} pending answers")
+        try:
+            await self._deep_analysis_pipeline(
+                user_id,
+                answer['question_json_id'],
+                answer['raw_answer'],
+                question,
+                {"session_id": answer['session_id'], "answer_history": []},
+                answer_id
+            )
+
+            # Инкрементируем retry_count
+            update_query = """
+                UPDATE selfology.user_answers_new
+                SET retry_count = retry_count + 1
+                WHERE id = $1
+            """
+            async with self.analysis_scheduler.stage("db"):
+                async with self.db_service.get_connection() as conn:
+                    await conn.execute(update_query, answer_id)
+
+            logger.info(f"✅ Successfully retried analysis for answer {answer_id}")
 
         except Exception as e:
-            logger.error(f"❌ Error in _retry_pending_answers: {e}")
+            logger.error(f"❌ Error retrying answer {answer_id}: {e}")
 
     async def _setup_vector_storage(self):
         """Настройка Qdrant коллекций для векторного хранения"""
@@ -1257,9 +1329,11 @@ class OnboardingOrchestrator:
         Graceful shutdown orchestrator с ожиданием завершения background tasks
 
         АРХИТЕКТУРНОЕ РЕШЕНИЕ:
+        - Дожидается очереди deep analysis (AnalysisScheduler)
         - Сигнализирует всем tasks о shutdown через event
         - Ждет завершения всех tasks с timeout
         - Отменяет незавершенные tasks после timeout
+        - Дописывает очередь векторов Qdrant (VectorStoreGateway)
         - Возвращает статистику shutdown для мониторинга
 
         Args:
@@ -1268,6 +1342,22 @@ class OnboardingOrchestrator:
         Returns:
             Dict со статистикой shutdown
         """
+        shutdown_start = datetime.now()
+        scheduler_result = await self.analysis_scheduler.shutdown(timeout)
+
+        remaining = max(0.0, timeout - (datetime.now() - shutdown_start).total_seconds())
+        result = await self._drain_background_tasks(remaining)
+        result.update(scheduler_result)
+
+        # Векторы, поставленные в очередь последними tasks, должны дойти до Qdrant
+        result["vectors_flushed"] = await self.embedding_creator.close(timeout=timeout)
+
+        if self.onboarding_dao:
+            await self.onboarding_dao.flagged_questions.close()
+        return result
+
+    async def _drain_background_tasks(self, timeout: float) -> Dict[str, Any]:
+        """Ждет (или отменяет по timeout) background tasks"""
         logger.info(f"🛑 Starting graceful shutdown of OnboardingOrchestrator (timeout: {timeout}s)")
 
         # Устанавливаем shutdown event для сигнализации tasks
@@ -1380,6 +1470,7 @@ class OnboardingOrchestrator:
                 if t.done() and not t.cancelled() and t.exception()
             ),
             "tasks": tasks_info,
+            "analysis_queue": self.analysis_scheduler.get_stats(),
             "shutdown_initiated": self._shutdown_event.is_set()
         }
 
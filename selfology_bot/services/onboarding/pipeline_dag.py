@@ -0,0 +1,127 @@
+"""
+Pipeline DAG - Исполнитель стадий deep analysis по графу зависимостей
+
+🕸️ ГРАФ: Каждая стадия объявляет, от каких стадий зависит
+⚡ ПАРАЛЛЕЛЬНО: Независимые стадии стартуют одновременно
+⛔ ОШИБКИ: Упавшая стадия пропускает только зависящие от нее стадии
+⏱️ ТАЙМИНГИ: Время каждой стадии для answer_analysis.background_stage_timings
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Стадия получает результаты уже завершенных стадий (по именам)
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class StageSkipped(Exception):
+    """Стадия не запускалась: упала одна из ее зависимостей"""
+
+    def __init__(self, stage: str, dependency: str):
+        super().__init__(f"Stage '{stage}' skipped: dependency '{dependency}' failed")
+        self.stage = stage
+        self.dependency = dependency
+
+
+@dataclass
+class PipelineStage:
+    name: str
+    func: StageFunc
+    depends_on: Sequence[str] = ()
+
+
+@dataclass
+class PipelineRun:
+    """Результат прогона: значения, ошибки и тайминги по стадиям"""
+    results: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, BaseException] = field(default_factory=dict)
+    timings_ms: Dict[str, int] = field(default_factory=dict)
+    total_ms: int = 0
+
+    def ok(self, stage: str) -> bool:
+        return stage in self.results
+
+    def error(self, stage: str) -> Optional[BaseException]:
+        return self.errors.get(stage)
+
+
+class PipelineDAG:
+    """
+    Маленький DAG executor для одной задачи анализа
+
+    Пример:
+        dag = PipelineDAG()
+        dag.add("analyze", analyze)
+        dag.add("extract", extract)
+        dag.add("vectorize", vectorize, depends_on=["analyze"])
+        run = await dag.run()
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, PipelineStage] = {}
+
+    def add(self, name: str, func: StageFunc, depends_on: Sequence[str] = ()) -> "PipelineDAG":
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' already defined")
+        for dependency in depends_on:
+            if dependency not in self._stages:
+                # Зависимости объявляются раньше - так граф всегда ацикличен
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'")
+
+        self._stages[name] = PipelineStage(name, func, tuple(depends_on))
+        return self
+
+    @property
+    def stages(self) -> List[str]:
+        return list(self._stages)
+
+    async def run(self) -> PipelineRun:
+        """
+        Выполнить все стадии
+
+        Исключения стадий не пробрасываются, а собираются в PipelineRun.errors.
+        Отмена (shutdown) отменяет все стадии и пробрасывается дальше.
+        """
+        run = PipelineRun()
+        start = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        for stage in self._stages.values():
+            tasks[stage.name] = asyncio.create_task(
+                self._run_stage(stage, tasks, run),
+                name=f"stage_{stage.name}"
+            )
+
+        try:
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+        except asyncio.CancelledError:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        run.total_ms = int((time.perf_counter() - start) * 1000)
+        return run
+
+    async def _run_stage(self, stage: PipelineStage, tasks: Dict[str, asyncio.Task], run: PipelineRun):
+        for dependency in stage.depends_on:
+            await asyncio.wait([tasks[dependency]])
+            if not run.ok(dependency):
+                run.errors[stage.name] = StageSkipped(stage.name, dependency)
+                return
+
+        stage_start = time.perf_counter()
+        try:
+            run.results[stage.name] = await stage.func(run.results)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            run.errors[stage.name] = e
+            logger.debug(f"⚠️ Pipeline stage '{stage.name}' failed: {e}")
+        finally:
+            run.timings_ms[stage.name] = int((time.perf_counter() - stage_start) * 1000)
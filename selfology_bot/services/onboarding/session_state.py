@@ -0,0 +1,146 @@
+"""
+Session State - Неизменяемые снимки сессии онбординга без deepcopy
+
+📜 ИСТОРИЯ: question_history / answer_history - append-only, элементы read-only
+📸 СНИМОК: Фиксирует длину истории - O(1) вместо O(длина сессии)
+🧊 ВОПРОСЫ: Поверхностная read-only копия объекта question core
+
+Гарантия для background pipeline та же, что давал deepcopy: снимок не видит
+ответов, добавленных после него, и не может изменить общую сессию.
+"""
+
+from collections.abc import Sequence
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
+
+# Поля сессии, которые не нужны background pipeline и растут с каждым вопросом
+_SNAPSHOT_EXCLUDED = ("router_events",)
+
+HISTORY_FIELDS = ("question_history", "answer_history")
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict для записей истории и вопросов
+
+    Остается dict: потребители истории (QuestionRouter и др.) проверяют
+    isinstance(..., dict), json.dumps сериализует как обычный dict.
+    Заморожен только верхний уровень, вложенные объекты общие.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("FrozenDict is read-only")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+    def copy(self) -> Dict[str, Any]:
+        """Изменяемая копия"""
+        return dict(self)
+
+
+def freeze(item: Any) -> Any:
+    """Read-only копия верхнего уровня dict (вопрос core, запись ответа); остальное как есть"""
+    if isinstance(item, dict) and not isinstance(item, FrozenDict):
+        return FrozenDict(item)
+    return item
+
+
+def freeze_question(question: Optional[Dict[str, Any]]) -> Optional[Mapping[str, Any]]:
+    """
+    Замороженная ссылка на вопрос из question core
+
+    Объекты core загружаются один раз и не меняются, поэтому копируется
+    только верхний уровень (несколько полей), вложенные объекты общие.
+    """
+    return freeze(question)
+
+
+class HistoryView(Sequence):
+    """Неизменяемый снимок первых length элементов append-only истории"""
+
+    __slots__ = ("_items", "_length")
+
+    def __init__(self, items: List[Any], length: int):
+        self._items = items
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self._items[i] for i in range(*index.indices(self._length)))
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("history index out of range")
+        return self._items[index]
+
+    def __iter__(self) -> Iterator[Any]:
+        for i in range(self._length):
+            yield self._items[i]
+
+    def __repr__(self) -> str:
+        return f"HistoryView(len={self._length})"
+
+
+class AppendOnlyHistory(HistoryView):
+    """
+    История сессии: только append, элементы замораживаются при добавлении
+
+    Все снимки делят один список - это безопасно, пока элементы только
+    добавляются в конец.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, items: Iterable[Any] = ()):
+        frozen = [freeze(item) for item in items]
+        super().__init__(frozen, len(frozen))
+
+    def append(self, item: Any):
+        self._items.append(freeze(item))
+        self._length += 1
+
+    def snapshot(self) -> HistoryView:
+        return HistoryView(self._items, self._length)
+
+    def __repr__(self) -> str:
+        return f"AppendOnlyHistory(len={self._length})"
+
+
+def ensure_history(session: Dict[str, Any], field: str) -> AppendOnlyHistory:
+    """Вернуть append-only историю сессии (создать или сконвертировать list)"""
+    history = session.get(field)
+    if not isinstance(history, AppendOnlyHistory):
+        history = AppendOnlyHistory(history or ())
+        session[field] = history
+    return history
+
+
+def snapshot_session(session: Dict[str, Any]) -> Mapping[str, Any]:
+    """
+    Неизменяемый снимок сессии для background задач
+
+    Стоимость не зависит от длины сессии: истории фиксируются по длине,
+    прочие поля копируются поверхностно (списки - в tuple).
+    """
+    snapshot = {}
+    for key, value in session.items():
+        if key in _SNAPSHOT_EXCLUDED:
+            continue
+        if isinstance(value, AppendOnlyHistory):
+            value = value.snapshot()
+        elif isinstance(value, list):
+            value = tuple(value)
+        elif isinstance(value, dict):
+            value = freeze(value)
+        snapshot[key] = value
+    return MappingProxyType(snapshot)
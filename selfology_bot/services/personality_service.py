@@ -3,21 +3,39 @@ PersonalityService - Unified access to user personality data from Qdrant
 
 🎯 Single Source of Truth: Qdrant vector database
 📊 Multi-Resolution: Loads from 4 specialized collections
-⚡ Performance: Parallel queries + optional caching
+⚡ Performance: AsyncQdrantClient - all collection reads in flight at once,
+   bounded by a single timeout, merged result cached per user
 🔄 Clean Architecture: Eliminates PostgreSQL duplication
 """
 
 import logging
 import asyncio
-from typing import Dict, Any, Optional, List
+import time
+import weakref
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 from dataclasses import dataclass
 
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.models import FieldCondition, Filter, MatchValue
 
 logger = logging.getLogger(__name__)
 
+# Live instances in this process - invalidated after vectors are rewritten
+_services: "weakref.WeakSet[PersonalityService]" = weakref.WeakSet()
+
+
+def invalidate_personality_cache(user_id: Optional[int] = None):
+    """
+    Drop cached personality in every PersonalityService of this process
+
+    Called by writers of the personality collections (EmbeddingCreator)
+    right after a user's vectors are rewritten.
+    """
+    for service in list(_services):
+        service.invalidate(user_id)
+
 
 @dataclass
 class PersonalityData:
@@ -58,18 +76,44 @@ class PersonalityService:
     Unified service for accessing user personality data from Qdrant
 
     Architecture:
-    - Loads from 4 Qdrant collections in parallel
+    - Loads from 4 Qdrant collections + personality_evolution concurrently
+    - Whole load bounded by timeout_seconds (slow collections count as missing)
     - Merges data intelligently
+    - Merged result cached per (user, collections version) for cache_ttl_seconds,
+      LRU-bounded by max_cache_entries
     - No PostgreSQL duplication
     - Qdrant is the single source of truth
     """
 
-    def __init__(self, qdrant_host: str = "localhost", qdrant_port: int = 6333):
+    def __init__(
+        self,
+        qdrant_host: str = "localhost",
+        qdrant_port: int = 6333,
+        client: Optional[AsyncQdrantClient] = None,
+        timeout_seconds: float = 1.0,
+        cache_ttl_seconds: float = 60.0,
+        max_cache_entries: int = 1000
+    ):
         """Initialize PersonalityService with Qdrant connection"""
 
-        self.qdrant = QdrantClient(host=qdrant_host, port=qdrant_port)
+        self.qdrant = client or AsyncQdrantClient(host=qdrant_host, port=qdrant_port)
+        self.timeout_seconds = timeout_seconds
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.max_cache_entries = max_cache_entries
         logger.info(f"🧠 PersonalityService initialized (Qdrant: {qdrant_host}:{qdrant_port})")
 
+        # Merged personality cache: (user_id, collections_version, include_vectors, include_evolution)
+        self._cache: "OrderedDict[Tuple, Tuple[float, PersonalityData]]" = OrderedDict()
+        self._collections_version = 0
+
+        self.stats = {
+            "cache_hits": 0,
+            "loads": 0,
+            "timeouts": 0,
+            "cache_evictions": 0
+        }
+        _services.add(self)
+
         # Collection names
         self.collections = {
             "structured": "digital_personality_structured",  # 1536D - structured data
@@ -90,31 +134,47 @@ class PersonalityService:
         Args:
             user_id: User identifier
             include_vectors: Include raw vectors for semantic operations
+                             (False - vectors are not transferred at all)
             include_evolution: Include breakthrough moments from personality_evolution
 
         Returns:
             PersonalityData object with all personality information
         """
 
+        cache_key = (user_id, self._collections_version, include_vectors, include_evolution)
+        cached = self._cache.get(cache_key)
+        if cached:
+            if time.monotonic() - cached[0] < self.cache_ttl_seconds:
+                self._cache.move_to_end(cache_key)
+                self.stats["cache_hits"] += 1
+                return cached[1]
+            del self._cache[cache_key]
+
         try:
             logger.info(f"🔍 Loading full personality for user {user_id}")
             start_time = datetime.now()
+            self.stats["loads"] += 1
 
-            # Parallel queries to all 4 collections
-            results = await self._load_from_all_collections(user_id, include_vectors)
+            # All collections + evolution in flight at once
+            results, breakthrough_moments, complete = await self._load_from_all_collections(
+                user_id, include_vectors, include_evolution
+            )
 
             if not results or not any(results.values()):
                 logger.warning(f"⚠️ No personality data found for user {user_id}")
                 return None
 
-            # Load breakthrough moments if requested
-            breakthrough_moments = []
-            if include_evolution:
-                breakthrough_moments = await self._load_breakthrough_moments(user_id)
-
             # Merge data from all sources
             personality = self._merge_personality_data(user_id, results, breakthrough_moments)
 
+            # Partial result (timeout) is served but not cached - next call retries
+            if complete:
+                self._cache[cache_key] = (time.monotonic(), personality)
+                self._cache.move_to_end(cache_key)
+                while len(self._cache) > self.max_cache_entries:
+                    self._cache.popitem(last=False)
+                    self.stats["cache_evictions"] += 1
+
             elapsed = (datetime.now() - start_time).total_seconds()
             logger.info(f"✅ Personality loaded in {elapsed:.2f}s (completeness: {personality.completeness_score:.0%})")
 
@@ -124,45 +184,79 @@ class PersonalityService:
             logger.error(f"❌ Error loading personality for user {user_id}: {e}", exc_info=True)
             return None
 
+    def invalidate(self, user_id: Optional[int] = None):
+        """
+        Drop cached personality
+
+        Args:
+            user_id: Drop one user (after their vectors were rewritten);
+                     None - bump collections version (reindex / migration)
+        """
+        if user_id is None:
+            self._collections_version += 1
+            self._cache.clear()
+            return
+
+        for key in [key for key in self._cache if key[0] == user_id]:
+            del self._cache[key]
+
     async def _load_from_all_collections(
         self,
         user_id: int,
-        include_vectors: bool
-    ) -> Dict[str, Any]:
-        """Load data from all 4 personality collections in parallel"""
+        include_vectors: bool,
+        include_evolution: bool = True
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]], bool]:
+        """
+        Load data from all 4 personality collections (+ evolution) concurrently
 
-        try:
-            # Create parallel tasks for all collections
-            tasks = {
-                name: self._retrieve_from_collection(
-                    collection_name=collection,
-                    user_id=user_id,
-                    with_vectors=include_vectors
-                )
-                for name, collection in self.collections.items()
-            }
-
-            # Execute in parallel
-            results = await asyncio.gather(*tasks.values(), return_exceptions=True)
-
-            # Map results back to collection names
-            collection_data = {}
-            for (name, _), result in zip(tasks.items(), results):
-                if isinstance(result, Exception):
-                    logger.warning(f"⚠️ Failed to load from {name}: {result}")
-                    collection_data[name] = None
-                else:
-                    collection_data[name] = result
-
-            # Log what we loaded
-            loaded = [name for name, data in collection_data.items() if data]
-            logger.debug(f"📊 Loaded from collections: {', '.join(loaded)}")
-
-            return collection_data
+        Returns:
+            (collection_data, breakthrough_moments, complete) - complete is False
+            if some reads did not finish within timeout_seconds
+        """
 
-        except Exception as e:
-            logger.error(f"❌ Error loading from collections: {e}")
-            return {}
+        tasks = {
+            name: asyncio.create_task(self._retrieve_from_collection(
+                collection_name=collection,
+                user_id=user_id,
+                with_vectors=include_vectors
+            ))
+            for name, collection in self.collections.items()
+        }
+        if include_evolution:
+            tasks["evolution"] = asyncio.create_task(self._load_breakthrough_moments(user_id))
+
+        # One latency budget for the whole fan-out
+        done, pending = await asyncio.wait(tasks.values(), timeout=self.timeout_seconds)
+        for task in pending:
+            task.cancel()
+
+        if pending:
+            self.stats["timeouts"] += 1
+            slow = [name for name, task in tasks.items() if task in pending]
+            logger.warning(f"⏱️ Personality load timeout ({self.timeout_seconds}s): {', '.join(slow)}")
+
+        # Map results back to collection names
+        collection_data = {}
+        for name in self.collections:
+            task = tasks[name]
+            if task in pending:
+                collection_data[name] = None
+            elif task.exception() is not None:
+                logger.warning(f"⚠️ Failed to load from {name}: {task.exception()}")
+                collection_data[name] = None
+            else:
+                collection_data[name] = task.result()
+
+        breakthrough_moments = []
+        evolution = tasks.get("evolution")
+        if evolution is not None and evolution in done and evolution.exception() is None:
+            breakthrough_moments = evolution.result()
+
+        # Log what we loaded
+        loaded = [name for name, data in collection_data.items() if data]
+        logger.debug(f"📊 Loaded from collections: {', '.join(loaded)}")
+
+        return collection_data, breakthrough_moments, not pending
 
     async def _retrieve_from_collection(
         self,
@@ -173,7 +267,7 @@ class PersonalityService:
         """Retrieve personality data from a specific Qdrant collection"""
 
         try:
-            result = self.qdrant.retrieve(
+            result = await self.qdrant.retrieve(
                 collection_name=collection_name,
                 ids=[user_id],
                 with_vectors=with_vectors,
@@ -196,7 +290,7 @@ class PersonalityService:
         """Load breakthrough moments from personality_evolution collection"""
 
         try:
-            search_results = self.qdrant.scroll(
+            search_results = await self.qdrant.scroll(
                 collection_name="personality_evolution",
                 scroll_filter=Filter(
                     must=[
@@ -267,14 +361,12 @@ class PersonalityService:
             0.0
         )
 
-        # Build vectors dict if available
-        vectors = None
-        if any(collection_data.get(name, {}).get("vector") for name in ["structured", "narrative", "profile", "quick"]):
-            vectors = {
-                name: collection_data.get(name, {}).get("vector")
-                for name in ["structured", "narrative", "profile", "quick"]
-                if collection_data.get(name, {}).get("vector")
-            }
+        # Build vectors dict if available (missing collections are None)
+        vectors = {
+            name: (collection_data.get(name) or {}).get("vector")
+            for name in ["structured", "narrative", "profile", "quick"]
+            if (collection_data.get(name) or {}).get("vector")
+        } or None
 
         # Create PersonalityData object
         return PersonalityData(
@@ -311,6 +403,9 @@ class PersonalityService:
         """
         Optimized method specifically for chat context
 
+        One bounded-latency call (timeout_seconds), served from cache
+        while the user's personality is unchanged.
+
         Returns a dict ready to be injected into system prompt
         """
 
@@ -348,13 +443,13 @@ class PersonalityService:
             "breakthrough_moments": personality.breakthrough_moments
         }
 
-    def get_collection_stats(self) -> Dict[str, Any]:
+    async def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about Qdrant collections"""
 
         stats = {}
         for name, collection in self.collections.items():
             try:
-                info = self.qdrant.get_collection(collection)
+                info = await self.qdrant.get_collection(collection)
                 stats[name] = {
                     "points_count": info.points_count,
                     "vectors_count": info.vectors_count,
@@ -364,3 +459,7 @@ class PersonalityService:
                 stats[name] = {"error": str(e)}
 
         return stats
+
+    async def close(self):
+        """Close Qdrant connection"""
+        await self.qdrant.close()
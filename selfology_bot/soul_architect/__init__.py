@@ -8,6 +8,7 @@ Soul Architect - Многослойная система моделирован
 - PersonalityProfile - модель профиля
 - TraitAssessment - модель черты
 - EvolutionSummary - сводка эволюции
+- TraitStats - потоковая статистика изменений черты
 
 Примеры использования:
     >>> from selfology_bot.soul_architect import SoulArchitectService
@@ -45,6 +46,7 @@ from .models import (
     DomainAffinities,
     UniqueSignature,
     TraitHistory,
+    TraitStats,
     EvolutionSummary
 )
 
@@ -69,5 +71,6 @@ __all__ = [
 
     # Эволюция
     "TraitHistory",
+    "TraitStats",
     "EvolutionSummary",
 ]
@@ -5,7 +5,7 @@ Soul Architect Configuration
 Изолированная конфигурация, не зависит от других модулей.
 """
 
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from dataclasses import dataclass
 
 
@@ -86,6 +86,11 @@ class EvolutionConfig:
     INCREASING_THRESHOLD: float = 0.15
     DECREASING_THRESHOLD: float = -0.15
 
+    # Потоковая статистика (TraitStats)
+    VELOCITY_EWMA_ALPHA: float = 0.3  # Вес нового наблюдения в EWMA скорости
+    TREND_WINDOW_SIZE: int = 20       # Последних изменений для наклона тренда
+    MIN_VELOCITY_INTERVAL_DAYS: float = 1.0  # Изменения в пределах дня - как за день
+
 
 @dataclass
 class DomainMapping:
@@ -166,6 +171,36 @@ class AdaptiveTraitsMapping:
             }
 
 
+class TraitRegistry:
+    """
+    Фиксированный порядок всех черт профиля
+
+    Индекс черты - номер колонки в numpy массивах колоночного scoring
+    (trait_matrix). Порядок: категории из ProfileConfig, внутри - из маппингов.
+    """
+
+    def __init__(self, traits_by_category: Dict[str, List[str]]):
+        self.KEYS: Tuple[Tuple[str, str], ...] = tuple(
+            (category, trait)
+            for category, traits in traits_by_category.items()
+            for trait in traits
+        )
+        self.INDEX: Dict[Tuple[str, str], int] = {key: i for i, key in enumerate(self.KEYS)}
+        self.CATEGORY_SLICES: Dict[str, slice] = {}
+
+        start = 0
+        for category, traits in traits_by_category.items():
+            self.CATEGORY_SLICES[category] = slice(start, start + len(traits))
+            start += len(traits)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+    def index(self, category: str, trait: str) -> int:
+        """Колонка черты (KeyError для неизвестной)"""
+        return self.INDEX[(category, trait)]
+
+
 # ============================================================================
 # ГЛОБАЛЬНЫЕ НАСТРОЙКИ
 # ============================================================================
@@ -189,6 +224,10 @@ class SoulArchitectConfig:
         self.big_five = BigFiveMapping()
         self.core_dynamics = CoreDynamicsMapping()
         self.adaptive_traits = AdaptiveTraitsMapping()
+        self.traits = TraitRegistry({
+            category: self.get_all_traits_for_category(category)
+            for category in self.profile.TRAIT_CATEGORIES
+        })
 
     def get_trait_name_ru(self, category: str, trait: str) -> str:
         """
@@ -6,13 +6,17 @@ Evolution Tracker - Отслеживание эволюции личности
 - Анализ трендов развития
 - Вычисление сводок эволюции
 - Идентификацию значимых изменений
+- Потоковую статистику черт (TraitStats) - тренды и сводки без загрузки истории
 """
 
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
-from .models import TraitHistory, EvolutionSummary, PersonalityProfile, TraitAssessment
+from .models import (
+    TraitHistory, EvolutionSummary, PersonalityProfile, TraitAssessment,
+    TraitStats, DailyChanges
+)
 from .config import config
 
 logger = logging.getLogger(__name__)
@@ -277,6 +281,181 @@ class EvolutionTracker:
         else:
             return 0.0
 
+    # ========================================================================
+    # ПОТОКОВАЯ СТАТИСТИКА
+    # ========================================================================
+
+    def apply_change(
+        self,
+        stats: Dict[str, TraitStats],
+        record: TraitHistory
+    ) -> TraitStats:
+        """
+        Обновить статистику черты одной записью истории - O(1)
+
+        Args:
+            stats: Статистика профиля {"category.trait": TraitStats} (меняется на месте)
+            record: Новая запись истории
+
+        Returns:
+            Обновленная TraitStats черты
+        """
+        key = stats_key(record.trait_category, record.trait_name)
+        trait_stats = stats.get(key)
+        if trait_stats is None:
+            trait_stats = TraitStats(trait_category=record.trait_category, trait_name=record.trait_name)
+            stats[key] = trait_stats
+
+        value = record.new_value
+        timestamp = record.timestamp
+
+        # Welford
+        trait_stats.count += 1
+        delta = value - trait_stats.mean
+        trait_stats.mean += delta / trait_stats.count
+        trait_stats.m2 += delta * (value - trait_stats.mean)
+        trait_stats.min_value = value if trait_stats.min_value is None else min(trait_stats.min_value, value)
+        trait_stats.max_value = value if trait_stats.max_value is None else max(trait_stats.max_value, value)
+
+        if trait_stats.first_timestamp is None:
+            trait_stats.first_value = record.old_value if record.old_value is not None else value
+            trait_stats.first_timestamp = timestamp
+        else:
+            # EWMA скорости относительно предыдущего значения
+            previous = record.old_value if record.old_value is not None else trait_stats.last_value
+            days = max(
+                (timestamp - trait_stats.last_timestamp).total_seconds() / 86400,
+                self.config.MIN_VELOCITY_INTERVAL_DAYS
+            )
+            velocity = (value - previous) / days
+            alpha = self.config.VELOCITY_EWMA_ALPHA
+            trait_stats.ewma_velocity = alpha * velocity + (1 - alpha) * trait_stats.ewma_velocity
+
+        trait_stats.last_value = value
+        trait_stats.last_timestamp = timestamp
+
+        # Окно для наклона тренда
+        offset_days = (timestamp - trait_stats.first_timestamp).total_seconds() / 86400
+        trait_stats.window.append((offset_days, value))
+        if len(trait_stats.window) > self.config.TREND_WINDOW_SIZE:
+            del trait_stats.window[0]
+
+        # Дневной агрегат для сводок за период
+        day = timestamp.date().isoformat()
+        bucket = trait_stats.daily.get(day)
+        if bucket is None:
+            bucket = trait_stats.daily[day] = DailyChanges()
+            self._prune_daily(trait_stats, timestamp)
+        bucket.updates += 1
+        if record.old_value is not None:
+            change = value - record.old_value
+            bucket.changes += 1
+            bucket.sum_change += change
+            bucket.max_abs_change = max(bucket.max_abs_change, abs(change))
+            if self._is_significant_change(record.old_value, value):
+                bucket.significant += 1
+
+        return trait_stats
+
+    def rebuild_stats(self, history: List[TraitHistory]) -> Dict[str, TraitStats]:
+        """Построить статистику из полной истории (однократный backfill)"""
+        stats: Dict[str, TraitStats] = {}
+        for record in sorted(history, key=lambda x: x.timestamp):
+            self.apply_change(stats, record)
+        return stats
+
+    def trend_from_stats(self, trait_stats: Optional[TraitStats]) -> Dict[str, any]:
+        """
+        Тренд черты из статистики (без истории)
+
+        Те же ключи, что analyze_trait_trend за всю историю, плюс
+        ewma_velocity, slope (по окну), mean/std/min/max.
+        """
+        if trait_stats is None or trait_stats.count == 0:
+            return {
+                "direction": "stable",
+                "magnitude": 0.0,
+                "velocity": 0.0,
+                "data_points": 0
+            }
+
+        total_change = trait_stats.last_value - trait_stats.first_value
+        time_span = (trait_stats.last_timestamp - trait_stats.first_timestamp).days
+
+        return {
+            "direction": self._determine_direction(total_change),
+            "magnitude": abs(total_change),
+            "velocity": total_change / time_span if time_span > 0 else 0.0,
+            "data_points": trait_stats.count,
+            "first_value": trait_stats.first_value,
+            "last_value": trait_stats.last_value,
+            "time_span_days": time_span,
+            "ewma_velocity": trait_stats.ewma_velocity,
+            "slope": trait_stats.slope,
+            "mean": trait_stats.mean,
+            "std": trait_stats.std,
+            "min_value": trait_stats.min_value,
+            "max_value": trait_stats.max_value
+        }
+
+    def summary_from_stats(
+        self,
+        user_id: int,
+        stats: Dict[str, TraitStats],
+        period_days: int = 30
+    ) -> EvolutionSummary:
+        """
+        Сводка эволюции за период из дневных агрегатов статистики
+
+        Стоимость не зависит от длины истории: не больше LONG_PERIOD_DAYS
+        агрегатов на черту. Граница периода - по дням.
+        """
+        period_end = datetime.utcnow()
+        period_start = period_end - timedelta(days=period_days)
+        first_day = period_start.date().isoformat()
+
+        total_updates = 0
+        significant_changes = 0
+        trait_changes: Dict[str, float] = {}
+        category_changes: Dict[str, List[float]] = {}
+
+        for key, trait_stats in stats.items():
+            buckets = [bucket for day, bucket in trait_stats.daily.items() if day >= first_day]
+            if not buckets:
+                continue
+
+            total_updates += sum(bucket.updates for bucket in buckets)
+            significant_changes += sum(bucket.significant for bucket in buckets)
+
+            changes = sum(bucket.changes for bucket in buckets)
+            category = category_changes.setdefault(trait_stats.trait_category, [0.0, 0])
+            category[0] += sum(bucket.sum_change for bucket in buckets)
+            category[1] += changes
+            if changes:
+                trait_changes[key] = max(bucket.max_abs_change for bucket in buckets)
+
+        most_changed = dict(sorted(trait_changes.items(), key=lambda x: x[1], reverse=True)[:5])
+        overall_direction = {
+            category: self._determine_direction(total / count) if count else "stable"
+            for category, (total, count) in category_changes.items()
+        }
+
+        return EvolutionSummary(
+            user_id=user_id,
+            period_start=period_start,
+            period_end=period_end,
+            total_updates=total_updates,
+            significant_changes=significant_changes,
+            most_changed_traits=most_changed,
+            overall_direction=overall_direction
+        )
+
+    def _prune_daily(self, trait_stats: TraitStats, now: datetime):
+        """Удалить дневные агрегаты старше LONG_PERIOD_DAYS"""
+        cutoff = (now - timedelta(days=self.config.LONG_PERIOD_DAYS)).date().isoformat()
+        for day in [day for day in trait_stats.daily if day < cutoff]:
+            del trait_stats.daily[day]
+
     def _determine_direction(self, change: float) -> str:
         """Определить направление изменения"""
         if abs(change) < self.config.STABLE_CHANGE_THRESHOLD:
@@ -363,6 +542,11 @@ class EvolutionTracker:
 # HELPER FUNCTIONS
 # ============================================================================
 
+def stats_key(category: str, trait_name: str) -> str:
+    """Ключ TraitStats в PersonalityProfile.evolution_stats"""
+    return f"{category}.{trait_name}"
+
+
 def filter_history_by_period(
     history: List[TraitHistory],
     days: int
@@ -10,7 +10,7 @@ Pydantic модели для всех слоев психологическог
 """
 
 from datetime import datetime
-from typing import Dict, Optional, Literal
+from typing import Dict, List, Optional, Literal, Tuple
 from pydantic import BaseModel, Field, field_validator
 
 
@@ -317,6 +317,16 @@ class PersonalityProfile(BaseModel):
     total_samples: int = Field(default=0, description="Общее количество ответов")
     completeness: float = Field(default=0.0, ge=0.0, le=1.0, description="Полнота профиля")
 
+    # Потоковая статистика эволюции: "category.trait" -> TraitStats
+    evolution_stats: Dict[str, "TraitStats"] = Field(
+        default_factory=dict,
+        description="Статистика изменений черт без загрузки истории"
+    )
+    evolution_stats_complete: bool = Field(
+        default=False,
+        description="evolution_stats покрывает всю trait_history (False - профиль до статистики, нужен backfill)"
+    )
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -360,6 +370,74 @@ class TraitHistory(BaseModel):
         }
 
 
+# ============================================================================
+# TRAIT STATS - ПОТОКОВАЯ СТАТИСТИКА ИЗМЕНЕНИЙ
+# ============================================================================
+
+class DailyChanges(BaseModel):
+    """Агрегат изменений черты за один день (для сводок за период)"""
+    updates: int = 0
+    changes: int = Field(default=0, description="Изменения с известным old_value")
+    significant: int = 0
+    sum_change: float = 0.0
+    max_abs_change: float = 0.0
+
+
+class TraitStats(BaseModel):
+    """
+    Trait Stats - статистика изменений одной черты, обновляется за O(1)
+
+    Хранится в профиле, поэтому тренды и сводки не требуют загрузки
+    trait_history. Обновляет EvolutionTracker.apply_change().
+    """
+    trait_category: str
+    trait_name: str
+
+    # Welford: среднее и дисперсия значений
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+
+    first_value: Optional[float] = None
+    last_value: Optional[float] = None
+    first_timestamp: Optional[datetime] = None
+    last_timestamp: Optional[datetime] = None
+
+    # EWMA скорости изменения (в день)
+    ewma_velocity: float = 0.0
+
+    # Последние (дни от first_timestamp, значение) для наклона тренда
+    window: List[Tuple[float, float]] = Field(default_factory=list)
+
+    # "YYYY-MM-DD" -> агрегат дня (хранятся LONG_PERIOD_DAYS)
+    daily: Dict[str, DailyChanges] = Field(default_factory=dict)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return self.variance ** 0.5
+
+    @property
+    def slope(self) -> float:
+        """Наклон МНК по окну последних изменений (изменение в день)"""
+        n = len(self.window)
+        if n < 2:
+            return 0.0
+        sum_t = sum(t for t, _ in self.window)
+        sum_v = sum(v for _, v in self.window)
+        sum_tt = sum(t * t for t, _ in self.window)
+        sum_tv = sum(t * v for t, v in self.window)
+        denominator = n * sum_tt - sum_t * sum_t
+        if abs(denominator) < 1e-12:
+            return 0.0
+        return (n * sum_tv - sum_t * sum_v) / denominator
+
+
 # ============================================================================
 # EVOLUTION SUMMARY - СВОДКА ИЗМЕНЕНИЙ
 # ============================================================================
@@ -404,3 +482,6 @@ class EvolutionSummary(BaseModel):
                 }
             }
         }
+
+
+PersonalityProfile.model_rebuild()
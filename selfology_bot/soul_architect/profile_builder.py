@@ -6,11 +6,14 @@ Profile Builder - Построение многослойного профиля
 - Инициализацию всех слоев личности
 - Вычисление полноты профиля
 - Обновление профиля из черт
+- Batch построение профилей из ответов (колоночный scoring)
 """
 
 import logging
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Mapping, Optional
+
+import numpy as np
 
 from .models import (
     PersonalityProfile,
@@ -22,6 +25,7 @@ from .models import (
     TraitAssessment
 )
 from .trait_scorer import TraitScorer
+from .trait_matrix import TraitMatrix, TraitSamples, batch_score
 from .config import config
 
 logger = logging.getLogger(__name__)
@@ -179,34 +183,7 @@ class ProfileBuilder:
         Returns:
             Полнота от 0.0 до 1.0
         """
-        total_traits = 0
-        filled_traits = 0
-        total_confidence = 0.0
-
-        # Проверяем все категории
-        for category in self.config.TRAIT_CATEGORIES:
-            layer = getattr(profile, category)
-            traits = vars(layer)
-
-            for trait_name, trait in traits.items():
-                if isinstance(trait, TraitAssessment):
-                    total_traits += 1
-
-                    if trait.samples > 0:
-                        filled_traits += 1
-                        total_confidence += trait.confidence
-
-        if total_traits == 0:
-            return 0.0
-
-        # Вычисляем полноту
-        fill_ratio = filled_traits / total_traits
-        avg_confidence = total_confidence / filled_traits if filled_traits > 0 else 0.0
-
-        # Итоговая полнота (50% fill ratio, 50% confidence)
-        completeness = (fill_ratio * 0.5 + avg_confidence * 0.5)
-
-        return round(completeness, 2)
+        return round(float(TraitMatrix.from_profile(profile).completeness()), 2)
 
     def build_from_trait_dict(
         self,
@@ -232,40 +209,60 @@ class ProfileBuilder:
         """
         logger.info(f"Building profile from trait dict for user {user_id}")
 
-        # Создаем пустой профиль
-        profile = self.create_empty_profile(user_id)
-
-        # Заполняем черты из данных
+        # Заполняем колонки, pydantic профиль создается один раз в конце
+        matrix = TraitMatrix.empty()
         for category, traits in trait_data.items():
             if category not in self.config.TRAIT_CATEGORIES:
                 logger.warning(f"Unknown category: {category}")
                 continue
 
-            layer = getattr(profile, category)
-
             for trait_name, value in traits.items():
-                if not hasattr(layer, trait_name):
+                index = config.traits.INDEX.get((category, trait_name))
+                if index is None:
                     logger.warning(f"Unknown trait: {category}.{trait_name}")
                     continue
 
-                # Создаем TraitAssessment
-                trait = TraitAssessment(
-                    value=value,
-                    confidence=0.7,  # Средняя уверенность
-                    variance=0.0,
-                    samples=1,
-                    interpretation=self.scorer._get_interpretation(value)
-                )
+                matrix.value[index] = value
+                matrix.confidence[index] = 0.7  # Средняя уверенность
+                matrix.samples[index] = 1
 
-                setattr(layer, trait_name, trait)
-
-        # Пересчитываем метаданные
-        profile.completeness = self.calculate_completeness(profile)
-        profile.total_samples = self._count_total_samples(profile)
+        profile = matrix.to_profile(user_id)
 
         logger.info(f"Profile built with completeness {profile.completeness}")
         return profile
 
+    def build_from_samples(self, user_id: int, trait_samples: TraitSamples) -> PersonalityProfile:
+        """
+        Построить профиль из всех ответов пользователя
+
+        Args:
+            user_id: ID пользователя
+            trait_samples: Ответы {category: {trait_name: [values]}}
+
+        Returns:
+            Профиль, посчитанный одним векторным проходом
+        """
+        return self.scorer.calculate_traits(trait_samples).to_profile(user_id)
+
+    def build_profiles_batch(
+        self,
+        samples_by_user: Mapping[int, TraitSamples]
+    ) -> Dict[int, PersonalityProfile]:
+        """
+        Построить профили многих пользователей (backfill / пересчет)
+
+        Scoring всех пользователей - одна матрица (users × traits × samples),
+        pydantic объекты создаются только для результата.
+
+        Args:
+            samples_by_user: {user_id: {category: {trait_name: [values]}}}
+
+        Returns:
+            {user_id: PersonalityProfile}
+        """
+        user_ids, matrix = batch_score(samples_by_user)
+        return {user_id: matrix.row(i).to_profile(user_id) for i, user_id in enumerate(user_ids)}
+
     def merge_profiles(
         self,
         base_profile: PersonalityProfile,
@@ -287,33 +284,36 @@ class ProfileBuilder:
 
         merged = base_profile.model_copy(deep=True)
 
-        # Для каждой категории
-        for category in self.config.TRAIT_CATEGORIES:
-            base_layer = getattr(base_profile, category)
-            update_layer = getattr(update_profile, category)
-            merged_layer = getattr(merged, category)
-
-            traits = vars(base_layer)
-
-            for trait_name in traits.keys():
-                base_trait = getattr(base_layer, trait_name)
-                update_trait = getattr(update_layer, trait_name)
-
-                # Выбираем лучшую черту
-                if prefer_newer and update_trait.samples > 0:
-                    # Используем обновленную черту
-                    setattr(merged_layer, trait_name, update_trait)
-                elif base_trait.samples == 0 and update_trait.samples > 0:
-                    # Используем обновленную, если базовая пустая
-                    setattr(merged_layer, trait_name, update_trait)
-                elif update_trait.confidence > base_trait.confidence:
-                    # Используем более уверенную
-                    setattr(merged_layer, trait_name, update_trait)
-
-        # Обновляем метаданные
+        base = TraitMatrix.from_profile(base_profile)
+        update = TraitMatrix.from_profile(update_profile)
+
+        # Выбираем лучшую черту: более новую (если есть данные), заполненную вместо пустой
+        # или более уверенную
+        has_update = update.samples > 0
+        take_update = (
+            (has_update & prefer_newer)
+            | ((base.samples == 0) & has_update)
+            | (update.confidence > base.confidence)
+        )
+
+        for index in np.flatnonzero(take_update):
+            category, trait_name = config.traits.KEYS[index]
+            setattr(
+                getattr(merged, category),
+                trait_name,
+                getattr(getattr(update_profile, category), trait_name)
+            )
+
+        # Обновляем метаданные из уже извлеченных колонок
+        merged_matrix = TraitMatrix(
+            value=np.where(take_update, update.value, base.value),
+            confidence=np.where(take_update, update.confidence, base.confidence),
+            variance=np.where(take_update, update.variance, base.variance),
+            samples=np.where(take_update, update.samples, base.samples)
+        )
         merged.updated_at = datetime.utcnow()
-        merged.completeness = self.calculate_completeness(merged)
-        merged.total_samples = self._count_total_samples(merged)
+        merged.completeness = round(float(merged_matrix.completeness()), 2)
+        merged.total_samples = int(merged_matrix.total_samples())
 
         return merged
 
@@ -330,17 +330,7 @@ class ProfileBuilder:
 
     def _count_total_samples(self, profile: PersonalityProfile) -> int:
         """Подсчитать общее количество семплов в профиле"""
-        total = 0
-
-        for category in self.config.TRAIT_CATEGORIES:
-            layer = getattr(profile, category)
-            traits = vars(layer)
-
-            for trait in traits.values():
-                if isinstance(trait, TraitAssessment):
-                    total += trait.samples
-
-        return total
+        return int(TraitMatrix.from_profile(profile).total_samples())
 
 
 # ============================================================================
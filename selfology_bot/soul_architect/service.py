@@ -9,6 +9,7 @@ API:
 - get_profile(user_id) - получить профиль
 - update_trait(user_id, trait_name, value, confidence) - обновить черту
 - get_evolution(user_id, days) - получить историю изменений
+- get_trait_trend(user_id, category, trait_name) - тренд черты без загрузки истории
 """
 
 import json
@@ -20,7 +21,7 @@ from ..database.service import DatabaseService
 from .models import PersonalityProfile, TraitAssessment, TraitHistory, EvolutionSummary
 from .profile_builder import ProfileBuilder
 from .trait_scorer import TraitScorer
-from .evolution_tracker import EvolutionTracker
+from .evolution_tracker import EvolutionTracker, stats_key
 from .config import config
 
 logger = logging.getLogger(__name__)
@@ -114,6 +115,7 @@ class SoulArchitectService:
 
         # Создаем пустой профиль
         profile = self.builder.create_empty_profile(user_id)
+        profile.evolution_stats_complete = True  # Истории еще нет
 
         # Сохраняем в БД
         await self._save_profile_to_db(profile)
@@ -213,6 +215,7 @@ class SoulArchitectService:
 
         # Получаем текущий профиль
         profile = await self.get_profile(user_id)
+        await self._ensure_evolution_stats(profile)
 
         # Получаем текущую черту
         layer = getattr(profile, category)
@@ -227,9 +230,9 @@ class SoulArchitectService:
         # Обновляем confidence
         new_trait.confidence = confidence
 
-        # Записываем в историю
+        # Записываем в историю (+ статистика эволюции в профиле)
         await self._record_trait_change(
-            user_id=user_id,
+            profile=profile,
             category=category,
             trait_name=trait_name,
             old_value=current_trait.value,
@@ -281,6 +284,7 @@ class SoulArchitectService:
         logger.info(f"Batch updating {len(updates)} traits for user {user_id}")
 
         profile = await self.get_profile(user_id)
+        await self._ensure_evolution_stats(profile)
 
         for update in updates:
             category = update["category"]
@@ -296,9 +300,9 @@ class SoulArchitectService:
             new_trait = self.scorer.update_trait(current_trait, value)
             new_trait.confidence = confidence
 
-            # Записываем в историю
+            # Записываем в историю (+ статистика эволюции в профиле)
             await self._record_trait_change(
-                user_id=user_id,
+                profile=profile,
                 category=category,
                 trait_name=trait_name,
                 old_value=current_trait.value,
@@ -339,6 +343,13 @@ class SoulArchitectService:
         """
         logger.info(f"Getting evolution for user {user_id}, period {days} days")
 
+        # Статистика в профиле покрывает последние LONG_PERIOD_DAYS - история не нужна
+        profile = await self.get_profile(user_id, raise_if_not_found=False)
+        if profile and days <= config.evolution.LONG_PERIOD_DAYS:
+            if await self._ensure_evolution_stats(profile):
+                await self._save_profile_to_db(profile)
+            return self.evolution.summary_from_stats(user_id, profile.evolution_stats, days)
+
         # Загружаем историю из БД
         history = await self._load_history_from_db(user_id, days)
 
@@ -351,6 +362,53 @@ class SoulArchitectService:
 
         return summary
 
+    async def get_trait_trend(
+        self,
+        user_id: int,
+        category: str,
+        trait_name: str
+    ) -> Dict:
+        """
+        Получить тренд черты из статистики профиля (без загрузки истории)
+
+        Args:
+            user_id: ID пользователя
+            category: Категория черты
+            trait_name: Имя черты
+
+        Returns:
+            Словарь тренда (см. EvolutionTracker.trend_from_stats)
+        """
+        profile = await self.get_profile(user_id)
+        if await self._ensure_evolution_stats(profile):
+            await self._save_profile_to_db(profile)
+        return self.evolution.trend_from_stats(
+            profile.evolution_stats.get(stats_key(category, trait_name))
+        )
+
+    async def rebuild_evolution_stats(self, user_id: int) -> PersonalityProfile:
+        """
+        Пересчитать статистику эволюции из trait_history
+
+        Профили, созданные до появления evolution_stats, пересчитываются
+        автоматически при первом обращении (_ensure_evolution_stats).
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            Профиль с пересчитанной статистикой
+        """
+        profile = await self.get_profile(user_id)
+        history = await self._load_history_from_db(user_id)
+
+        profile.evolution_stats = self.evolution.rebuild_stats(history)
+        profile.evolution_stats_complete = True
+        await self._save_profile_to_db(profile)
+
+        logger.info(f"Evolution stats rebuilt for user {user_id} from {len(history)} records")
+        return profile
+
     async def get_trait_history(
         self,
         user_id: int,
@@ -413,7 +471,7 @@ class SoulArchitectService:
 
     async def _record_trait_change(
         self,
-        user_id: int,
+        profile: PersonalityProfile,
         category: str,
         trait_name: str,
         old_value: float,
@@ -421,7 +479,14 @@ class SoulArchitectService:
         confidence: float,
         trigger: Optional[str] = None
     ) -> None:
-        """Записать изменение черты в историю"""
+        """
+        Записать изменение черты в историю и обновить статистику профиля
+
+        Статистика сохраняется вместе с профилем (_save_profile_to_db).
+        Тренд по всей истории черты - get_trait_trend, direction самой
+        оценки остается направлением этого обновления (TraitScorer).
+        """
+        user_id = profile.user_id
         history_record = await self.evolution.record_change(
             user_id=user_id,
             trait_category=category,
@@ -439,6 +504,28 @@ class SoulArchitectService:
                 VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
             """, user_id, category, trait_name, old_value, new_value, confidence, trigger, history_record.timestamp)
 
+        self.evolution.apply_change(profile.evolution_stats, history_record)
+
+    async def _ensure_evolution_stats(self, profile: PersonalityProfile) -> bool:
+        """
+        Пересчитать статистику для профилей, созданных до evolution_stats
+
+        Иначе статистика накапливалась бы только с первого обновления после
+        деплоя и сводки теряли бы всю более раннюю историю.
+
+        Returns:
+            True если статистика пересчитана (профиль нужно сохранить)
+        """
+        if profile.evolution_stats_complete:
+            return False
+
+        history = await self._load_history_from_db(profile.user_id)
+        profile.evolution_stats = self.evolution.rebuild_stats(history)
+        profile.evolution_stats_complete = True
+
+        logger.info(f"Evolution stats backfilled for user {profile.user_id} from {len(history)} records")
+        return True
+
     async def _load_history_from_db(
         self,
         user_id: int,
@@ -0,0 +1,205 @@
+"""
+Unit tests for EvolutionTracker streaming stats (TraitStats)
+"""
+
+import json
+import statistics
+from datetime import datetime, timedelta
+
+import pytest
+from ..evolution_tracker import EvolutionTracker, stats_key
+from ..models import PersonalityProfile, TraitHistory
+
+
+def make_history(values, days_ago_start=10, trait_name="openness"):
+    """История изменений: одно изменение в день, последнее - сегодня"""
+    now = datetime.utcnow()
+    history = []
+    old_value = None
+    for i, value in enumerate(values):
+        history.append(TraitHistory(
+            user_id=1,
+            trait_category="big_five",
+            trait_name=trait_name,
+            old_value=old_value,
+            new_value=value,
+            confidence=0.8,
+            timestamp=now - timedelta(days=days_ago_start - i)
+        ))
+        old_value = value
+    return history
+
+
+class TestEvolutionStats:
+    """Тесты потоковой статистики эволюции"""
+
+    @pytest.fixture
+    def tracker(self):
+        return EvolutionTracker()
+
+    def test_welford_matches_full_recompute(self, tracker):
+        """Среднее/дисперсия/min/max совпадают с пересчетом по истории"""
+        values = [0.3, 0.35, 0.5, 0.45, 0.7, 0.8]
+        stats = tracker.rebuild_stats(make_history(values, days_ago_start=5))
+        trait_stats = stats[stats_key("big_five", "openness")]
+
+        assert trait_stats.count == len(values)
+        assert trait_stats.mean == pytest.approx(statistics.fmean(values))
+        assert trait_stats.variance == pytest.approx(statistics.pvariance(values))
+        assert trait_stats.min_value == 0.3
+        assert trait_stats.max_value == 0.8
+
+    def test_trend_matches_history_analysis(self, tracker):
+        """Тренд из статистики = analyze_trait_trend по всей истории"""
+        history = make_history([0.2, 0.3, 0.45, 0.6], days_ago_start=3)
+        stats = tracker.rebuild_stats(history)
+
+        from_stats = tracker.trend_from_stats(stats[stats_key("big_five", "openness")])
+        from_history = tracker.analyze_trait_trend(history)
+
+        assert from_stats["direction"] == from_history["direction"]
+        assert from_stats["data_points"] == from_history["data_points"]
+        for key in ("magnitude", "velocity", "first_value", "last_value"):
+            assert from_stats[key] == pytest.approx(from_history[key])
+        assert from_stats["slope"] == pytest.approx(0.135, abs=0.01)
+        assert from_stats["ewma_velocity"] > 0
+
+    def test_summary_matches_history_summary(self, tracker):
+        """Сводка за период из дневных агрегатов = сводке по истории"""
+        history = (
+            make_history([0.2, 0.5, 0.55], days_ago_start=40)
+            + make_history([0.6, 0.3, 0.35, 0.1], days_ago_start=5, trait_name="neuroticism")
+        )
+        stats = tracker.rebuild_stats(history)
+
+        from_stats = tracker.summary_from_stats(1, stats, period_days=30)
+        from_history = tracker.calculate_evolution_summary(1, history, period_days=30)
+
+        assert from_stats.total_updates == from_history.total_updates == 4
+        assert from_stats.significant_changes == from_history.significant_changes
+        assert from_stats.most_changed_traits == pytest.approx(from_history.most_changed_traits)
+        assert from_stats.overall_direction == from_history.overall_direction
+
+    def test_daily_buckets_are_bounded(self, tracker):
+        """Дневные агрегаты старше LONG_PERIOD_DAYS удаляются"""
+        values = [0.5 + (i % 2) * 0.1 for i in range(200)]
+        stats = tracker.rebuild_stats(make_history(values, days_ago_start=199))
+        trait_stats = stats[stats_key("big_five", "openness")]
+
+        assert len(trait_stats.daily) <= tracker.config.LONG_PERIOD_DAYS + 1
+        assert len(trait_stats.window) == tracker.config.TREND_WINDOW_SIZE
+        assert trait_stats.count == 200
+
+    def test_stats_persist_with_profile(self, tracker):
+        """Статистика переживает сериализацию профиля в JSON"""
+        from ..profile_builder import ProfileBuilder
+
+        profile = ProfileBuilder().create_empty_profile(1)
+        for record in make_history([0.4, 0.6]):
+            tracker.apply_change(profile.evolution_stats, record)
+
+        restored = PersonalityProfile.model_validate_json(profile.model_dump_json())
+        trait_stats = restored.evolution_stats[stats_key("big_five", "openness")]
+
+        assert trait_stats.count == 2
+        assert trait_stats.slope == pytest.approx(0.2)
+
+
+class FakeConnection:
+    """Соединение поверх in-memory таблиц personality_profiles и trait_history"""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def fetchrow(self, query, user_id):
+        profile_data = self.db.profiles.get(user_id)
+        return {"profile_data": profile_data} if profile_data else None
+
+    async def fetch(self, query, user_id, cutoff=None):
+        rows = [row for row in self.db.history if row["user_id"] == user_id]
+        if cutoff is not None:
+            rows = [row for row in rows if row["timestamp"] >= cutoff]
+        return sorted(rows, key=lambda row: row["timestamp"], reverse=True)
+
+    async def execute(self, query, *args):
+        if "trait_history" in query:
+            keys = ("user_id", "trait_category", "trait_name", "old_value",
+                    "new_value", "confidence", "trigger", "timestamp")
+            self.db.history.append(dict(zip(keys, args)))
+        else:
+            self.db.profiles[args[0]] = args[1]
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.profiles = {}
+        self.history = []
+
+    def get_connection(self):
+        db = self
+
+        class _Context:
+            async def __aenter__(self):
+                return FakeConnection(db)
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Context()
+
+
+class TestLegacyProfiles:
+    """Профили, созданные до появления evolution_stats"""
+
+    @pytest.fixture
+    def service(self):
+        from ..service import SoulArchitectService
+        return SoulArchitectService(FakeDatabase())
+
+    def store_legacy_profile(self, service, history):
+        from ..profile_builder import ProfileBuilder
+
+        profile_data = json.loads(ProfileBuilder().create_empty_profile(1).model_dump_json())
+        del profile_data["evolution_stats"], profile_data["evolution_stats_complete"]
+        service.db.profiles[1] = json.dumps(profile_data)
+        service.db.history.extend(record.model_dump() for record in history)
+
+    def test_legacy_profile_is_not_complete(self, service):
+        self.store_legacy_profile(service, [])
+        profile = PersonalityProfile(**json.loads(service.db.profiles[1]))
+
+        assert profile.evolution_stats == {}
+        assert profile.evolution_stats_complete is False
+
+    @pytest.mark.asyncio
+    async def test_first_update_backfills_history(self, service):
+        """Первое обновление после деплоя не теряет более раннюю историю"""
+        self.store_legacy_profile(service, make_history([0.3, 0.35, 0.4], days_ago_start=6))
+
+        await service.update_trait(1, "big_five", "openness", 0.45, 0.8)
+        summary = await service.get_evolution(1, days=30)
+        trend = await service.get_trait_trend(1, "big_five", "openness")
+
+        assert summary.total_updates == 4
+        assert trend["data_points"] == 4
+        assert PersonalityProfile(**json.loads(service.db.profiles[1])).evolution_stats_complete
+
+    @pytest.mark.asyncio
+    async def test_get_evolution_backfills_without_updates(self, service):
+        self.store_legacy_profile(service, make_history([0.3, 0.35, 0.4], days_ago_start=6))
+
+        summary = await service.get_evolution(1, days=30)
+
+        assert summary.total_updates == 3
+        assert PersonalityProfile(**json.loads(service.db.profiles[1])).evolution_stats_complete
+
+    @pytest.mark.asyncio
+    async def test_update_keeps_scorer_direction(self, service):
+        """direction оценки - направление обновления, а не тренд всей истории"""
+        self.store_legacy_profile(service, make_history([0.9, 0.8, 0.7, 0.6, 0.5, 0.4, 0.3, 0.2], days_ago_start=8))
+
+        profile = await service.update_trait(1, "big_five", "openness", 0.6, 0.8)
+        trend = await service.get_trait_trend(1, "big_five", "openness")
+
+        assert profile.big_five.openness.direction == "increasing"
+        assert trend["direction"] == "decreasing"
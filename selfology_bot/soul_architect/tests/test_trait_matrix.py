@@ -0,0 +1,128 @@
+"""
+Unit tests for TraitMatrix (колоночный scoring)
+"""
+
+import statistics
+
+import numpy as np
+import pytest
+
+from ..config import config
+from ..models import PersonalityProfile
+from ..profile_builder import ProfileBuilder
+from ..trait_matrix import TraitMatrix, batch_score, pack_samples
+from ..trait_scorer import TraitScorer
+
+
+def reference_trait(values, weights=None):
+    """Прежний расчет на statistics - эталон для векторного пути"""
+    if weights is None:
+        weights = [1 + (i * 0.1) for i in range(len(values))]
+    value = sum(v * w for v, w in zip(values, weights)) / sum(weights)
+    std_dev = statistics.stdev(values)
+    if len(values) < config.scoring.MIN_SAMPLES_FOR_CONFIDENCE:
+        confidence = 0.3
+    else:
+        confidence = max(
+            config.scoring.MIN_CONFIDENCE_THRESHOLD,
+            (1.0 - min(std_dev, 1.0)) * 0.7 + min(len(values) / 10, 1.0) * 0.3
+        )
+    return value, confidence, min(std_dev, 1.0)
+
+
+class TestTraitMatrix:
+    """Тесты для TraitMatrix"""
+
+    @pytest.fixture
+    def builder(self):
+        return ProfileBuilder()
+
+    def test_registry_matches_profile_layers(self, builder):
+        """Реестр черт покрывает все поля слоев профиля"""
+        profile = builder.create_empty_profile(user_id=1)
+
+        for category, trait_slice in config.traits.CATEGORY_SLICES.items():
+            names = [name for _, name in config.traits.KEYS[trait_slice]]
+            assert names == list(type(getattr(profile, category)).model_fields)
+
+    def test_score_matches_reference(self):
+        """Векторный проход совпадает с поэлементным расчетом"""
+        samples = {
+            "big_five": {"openness": [0.7, 0.8, 0.75, 0.9], "neuroticism": [0.2, 0.6]},
+            "core_dynamics": {"resilience": [0.1, 0.9, 0.5, 0.4, 0.3, 0.8]},
+            "domain_affinities": {"CAREER": [0.65]},
+        }
+        matrix = TraitScorer().calculate_traits(samples)
+
+        for category, traits in samples.items():
+            for name, values in traits.items():
+                i = config.traits.index(category, name)
+                assert matrix.samples[i] == len(values)
+                if len(values) == 1:
+                    assert matrix.value[i] == values[0]
+                    assert matrix.confidence[i] == 0.5
+                    continue
+                value, confidence, variance = reference_trait(values)
+                assert matrix.value[i] == pytest.approx(value)
+                assert matrix.confidence[i] == pytest.approx(confidence)
+                assert matrix.variance[i] == pytest.approx(variance)
+
+        empty = config.traits.index("adaptive_traits", "stress_level")
+        assert matrix.value[empty] == config.profile.DEFAULT_TRAIT_VALUE
+        assert matrix.samples[empty] == 0
+
+    def test_calculate_trait_with_weights(self):
+        """calculate_trait использует тот же путь, включая веса и их fallback"""
+        scorer = TraitScorer()
+        values = [0.2, 0.4, 0.9]
+
+        weighted = scorer.calculate_trait(values, weights=[3.0, 1.0, 1.0])
+        mismatched = scorer.calculate_trait(values, weights=[1.0])
+
+        assert weighted.value == pytest.approx(reference_trait(values, [3.0, 1.0, 1.0])[0])
+        assert mismatched.value == pytest.approx(sum(values) / 3)
+        assert weighted.interpretation == "low"
+
+    def test_batch_matches_single_profiles(self, builder):
+        """Batch scoring дает те же профили, что и построение по одному"""
+        samples_by_user = {
+            1: {"big_five": {"openness": [0.9, 0.8, 0.85]}},
+            2: {"adaptive_traits": {"current_energy": [0.1, 0.3]}, "big_five": {"extraversion": [0.5]}},
+            3: {},
+        }
+
+        profiles = builder.build_profiles_batch(samples_by_user)
+
+        assert list(profiles) == [1, 2, 3]
+        for user_id, samples in samples_by_user.items():
+            single = builder.build_from_samples(user_id, samples)
+            assert isinstance(profiles[user_id], PersonalityProfile)
+            assert profiles[user_id].completeness == single.completeness
+            assert profiles[user_id].total_samples == single.total_samples
+            assert profiles[user_id].big_five.openness.value == pytest.approx(single.big_five.openness.value)
+        assert profiles[3].completeness == 0.0
+        assert profiles[1].big_five.openness.interpretation == "very_high"
+
+    def test_profile_roundtrip_and_merge(self, builder):
+        """Колонки из профиля, полнота и merge совпадают с прежней логикой"""
+        base = builder.build_from_trait_dict(1, {"big_five": {"openness": 0.75, "extraversion": 0.6}})
+        update = builder.build_from_trait_dict(1, {"core_dynamics": {"resilience": 0.3}})
+
+        matrix = TraitMatrix.from_profile(base)
+        assert base.total_samples == 2
+        assert base.completeness == round(2 / len(config.traits) * 0.5 + 0.7 * 0.5, 2)
+        assert matrix.value[config.traits.index("big_five", "openness")] == 0.75
+
+        merged = builder.merge_profiles(base, update)
+        assert merged.big_five.openness.value == 0.75
+        assert merged.core_dynamics.resilience.value == 0.3
+        assert merged.total_samples == 3
+        assert merged.completeness == builder.calculate_completeness(merged)
+
+    def test_pack_samples_skips_unknown_traits(self):
+        values, weights = pack_samples({"big_five": {"unknown": [0.5]}, "nope": {"x": [0.1]}})
+
+        assert values.shape == (len(config.traits), 0)
+        assert np.isnan(values).all()
+        user_ids, matrix = batch_score({})
+        assert user_ids == [] and matrix.value.shape == (0, len(config.traits))
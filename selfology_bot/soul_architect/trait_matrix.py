@@ -0,0 +1,299 @@
+"""
+Trait Matrix - Колоночный scoring черт личности на numpy
+
+📐 КОЛОНКИ: value / confidence / variance / samples всех черт профиля - numpy массивы,
+   индекс колонки из config.traits (фиксированный реестр черт)
+⚡ ОДИН ПРОХОД: Взвешенное среднее, confidence и variance всех черт сразу
+👥 BATCH: Матрица (users × traits) для пересчета многих пользователей (backfill)
+🧱 ГРАНИЦА: Pydantic TraitAssessment создаются только в to_profile / to_trait
+"""
+
+import logging
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import (
+    PersonalityProfile,
+    BigFive,
+    CoreDynamics,
+    AdaptiveTraits,
+    DomainAffinities,
+    UniqueSignature,
+    TraitAssessment
+)
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+# {category: {trait_name: [values...]}} - ответы пользователя по чертам
+TraitSamples = Mapping[str, Mapping[str, Sequence[float]]]
+
+RECENCY_STEP = 0.1  # Вес i-го ответа: 1 + 0.1 * i (свежие важнее)
+SINGLE_VALUE_CONFIDENCE = 0.5
+
+INTERPRETATIONS = np.array(["very_low", "low", "medium", "high", "very_high"])
+
+LAYER_MODELS = {
+    "big_five": BigFive,
+    "core_dynamics": CoreDynamics,
+    "adaptive_traits": AdaptiveTraits,
+    "domain_affinities": DomainAffinities,
+}
+
+
+def interpret(values: np.ndarray) -> np.ndarray:
+    """Интерпретация значений (very_low ... very_high) для массива любой формы"""
+    thresholds = [
+        config.scoring.VERY_LOW_THRESHOLD,
+        config.scoring.LOW_THRESHOLD,
+        config.scoring.MEDIUM_THRESHOLD,
+        config.scoring.HIGH_THRESHOLD,
+    ]
+    return INTERPRETATIONS[np.searchsorted(thresholds, values, side="right")]
+
+
+class TraitMatrix:
+    """
+    Метрики черт в колоночном виде
+
+    Массивы формы (traits,) для одного профиля или (users, traits) для batch.
+    Черта без ответов (samples == 0) хранит значения по умолчанию из config.profile.
+    """
+
+    def __init__(
+        self,
+        value: np.ndarray,
+        confidence: np.ndarray,
+        variance: np.ndarray,
+        samples: np.ndarray
+    ):
+        self.value = value
+        self.confidence = confidence
+        self.variance = variance
+        self.samples = samples
+
+    # === ПОСТРОЕНИЕ ===
+
+    @classmethod
+    def empty(cls, users: Optional[int] = None) -> "TraitMatrix":
+        """Все черты со значениями по умолчанию"""
+        shape = (len(config.traits),) if users is None else (users, len(config.traits))
+        return cls(
+            value=np.full(shape, config.profile.DEFAULT_TRAIT_VALUE),
+            confidence=np.full(shape, config.profile.DEFAULT_CONFIDENCE),
+            variance=np.zeros(shape),
+            samples=np.zeros(shape, dtype=np.int64)
+        )
+
+    @classmethod
+    def from_profile(cls, profile: PersonalityProfile) -> "TraitMatrix":
+        """Колонки из pydantic профиля (одно чтение атрибутов на черту)"""
+        traits = [getattr(getattr(profile, category), name) for category, name in config.traits.KEYS]
+        return cls(
+            value=np.fromiter((t.value for t in traits), dtype=np.float64, count=len(traits)),
+            confidence=np.fromiter((t.confidence for t in traits), dtype=np.float64, count=len(traits)),
+            variance=np.fromiter((t.variance for t in traits), dtype=np.float64, count=len(traits)),
+            samples=np.fromiter((t.samples for t in traits), dtype=np.int64, count=len(traits))
+        )
+
+    @classmethod
+    def score(cls, values: np.ndarray, weights: Optional[np.ndarray] = None) -> "TraitMatrix":
+        """
+        Метрики всех черт за один векторный проход
+
+        Args:
+            values: (..., traits, samples) - ответы, выровненные влево, NaN = нет ответа
+            weights: Веса той же формы (None - recency веса 1 + 0.1 * i)
+
+        Returns:
+            TraitMatrix формы (..., traits)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        mask = ~np.isnan(values)
+        n = mask.sum(axis=-1)
+        v = np.where(mask, values, 0.0)
+
+        if weights is None:
+            weights = 1.0 + RECENCY_STEP * np.arange(values.shape[-1], dtype=np.float64)
+        w = np.where(mask, weights, 0.0)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weighted_mean = (v * w).sum(axis=-1) / w.sum(axis=-1)
+            mean = v.sum(axis=-1) / n
+            squares = np.where(mask, (v - mean[..., None]) ** 2, 0.0).sum(axis=-1)
+            std = np.sqrt(squares / (n - 1))
+
+        # Одно значение - как есть (веса не влияют), нет значений - по умолчанию
+        value = np.where(n == 1, v.sum(axis=-1), weighted_mean)
+        value = np.where(n == 0, config.profile.DEFAULT_TRAIT_VALUE, value)
+
+        bounded_std = np.minimum(np.nan_to_num(std), 1.0)
+        variance = np.where(n >= 2, bounded_std, 0.0)
+
+        consistency = 1.0 - bounded_std
+        sample_factor = np.minimum(n / 10, 1.0)
+        confidence = np.maximum(
+            config.scoring.MIN_CONFIDENCE_THRESHOLD,
+            consistency * 0.7 + sample_factor * 0.3
+        )
+        confidence = np.where(n < config.scoring.MIN_SAMPLES_FOR_CONFIDENCE, 0.3, confidence)
+        confidence = np.where(n == 1, SINGLE_VALUE_CONFIDENCE, confidence)
+        confidence = np.where(n == 0, config.profile.DEFAULT_CONFIDENCE, confidence)
+
+        return cls(value=value, confidence=confidence, variance=variance, samples=n.astype(np.int64))
+
+    @classmethod
+    def stack(cls, matrices: Sequence["TraitMatrix"]) -> "TraitMatrix":
+        """Объединить профили в batch (users, traits)"""
+        return cls(
+            value=np.stack([m.value for m in matrices]),
+            confidence=np.stack([m.confidence for m in matrices]),
+            variance=np.stack([m.variance for m in matrices]),
+            samples=np.stack([m.samples for m in matrices])
+        )
+
+    def row(self, i: int) -> "TraitMatrix":
+        """Профиль i из batch"""
+        return TraitMatrix(self.value[i], self.confidence[i], self.variance[i], self.samples[i])
+
+    # === АГРЕГАТЫ ===
+
+    def completeness(self) -> np.ndarray:
+        """Полнота профиля: 50% доля заполненных черт + 50% их средний confidence"""
+        filled = self.samples > 0
+        filled_count = filled.sum(axis=-1)
+        fill_ratio = filled_count / self.samples.shape[-1]
+        total_confidence = np.where(filled, self.confidence, 0.0).sum(axis=-1)
+        avg_confidence = np.divide(
+            total_confidence, filled_count,
+            out=np.zeros_like(total_confidence), where=filled_count > 0
+        )
+        return fill_ratio * 0.5 + avg_confidence * 0.5
+
+    def total_samples(self) -> np.ndarray:
+        return self.samples.sum(axis=-1)
+
+    def interpretations(self) -> np.ndarray:
+        return interpret(self.value)
+
+    # === ГРАНИЦА API (PYDANTIC) ===
+
+    def to_trait(self, index: int, percentile: Optional[int] = None) -> TraitAssessment:
+        """TraitAssessment одной колонки (для матрицы одного профиля)"""
+        return TraitAssessment(
+            value=float(self.value[index]),
+            confidence=float(self.confidence[index]),
+            variance=float(self.variance[index]),
+            samples=int(self.samples[index]),
+            percentile=percentile,
+            interpretation=str(interpret(self.value[index])),
+            direction="stable"
+        )
+
+    def to_profile(
+        self,
+        user_id: int,
+        unique_signature: Optional[UniqueSignature] = None
+    ) -> PersonalityProfile:
+        """Pydantic профиль из матрицы одного пользователя"""
+        values = self.value.tolist()
+        confidences = self.confidence.tolist()
+        variances = self.variance.tolist()
+        samples = self.samples.tolist()
+        labels = self.interpretations().tolist()
+
+        layers: Dict[str, Dict[str, TraitAssessment]] = {category: {} for category in LAYER_MODELS}
+        for i, (category, name) in enumerate(config.traits.KEYS):
+            layers[category][name] = TraitAssessment(
+                value=values[i],
+                confidence=confidences[i],
+                variance=variances[i],
+                samples=samples[i],
+                interpretation=labels[i],
+                direction="stable"
+            )
+
+        return PersonalityProfile(
+            user_id=user_id,
+            **{category: model(**layers[category]) for category, model in LAYER_MODELS.items()},
+            unique_signature=unique_signature or UniqueSignature(
+                thinking_style="unknown",
+                decision_pattern="unknown",
+                energy_rhythm="unknown",
+                learning_edge="unknown",
+                love_language="unknown",
+                stress_response="unknown"
+            ),
+            total_samples=int(self.total_samples()),
+            completeness=round(float(self.completeness()), 2)
+        )
+
+
+# ============================================================================
+# УПАКОВКА ОТВЕТОВ
+# ============================================================================
+
+def pack_samples(
+    trait_samples: TraitSamples,
+    trait_weights: Optional[TraitSamples] = None,
+    width: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ответы {category: {trait: [values]}} → матрицы (traits, samples)
+
+    Неизвестные категории и черты пропускаются с предупреждением.
+    Веса, не совпадающие по длине с ответами, заменяются единицами.
+
+    Returns:
+        (values с NaN паддингом, weights)
+    """
+    rows: Dict[int, Sequence[float]] = {}
+    for category, traits in trait_samples.items():
+        for name, values in traits.items():
+            index = config.traits.INDEX.get((category, name))
+            if index is None:
+                logger.warning(f"Unknown trait: {category}.{name}")
+                continue
+            rows[index] = values
+
+    if width is None:
+        width = max((len(values) for values in rows.values()), default=0)
+
+    values = np.full((len(config.traits), width), np.nan)
+    weights = np.broadcast_to(
+        1.0 + RECENCY_STEP * np.arange(width, dtype=np.float64), values.shape
+    ).copy()
+
+    for index, row in rows.items():
+        values[index, :len(row)] = row
+        if trait_weights is None:
+            continue
+        category, name = config.traits.KEYS[index]
+        row_weights = trait_weights.get(category, {}).get(name)
+        if row_weights is not None:
+            weights[index, :len(row)] = row_weights if len(row_weights) == len(row) else 1.0
+
+    return values, weights
+
+
+def batch_score(samples_by_user: Mapping[int, TraitSamples]) -> Tuple[List[int], TraitMatrix]:
+    """
+    Scoring многих пользователей одним проходом (backfill)
+
+    Returns:
+        (user_ids в порядке строк, TraitMatrix формы (users, traits))
+    """
+    user_ids = list(samples_by_user)
+    width = max(
+        (len(values) for samples in samples_by_user.values()
+         for traits in samples.values() for values in traits.values()),
+        default=0
+    )
+    values = np.full((len(user_ids), len(config.traits), width), np.nan)
+    for row, user_id in enumerate(user_ids):
+        values[row] = pack_samples(samples_by_user[user_id], width=width)[0]
+
+    matrix = TraitMatrix.score(values)
+    logger.info(f"📐 Batch scored {len(user_ids)} users × {len(config.traits)} traits")
+    return user_ids, matrix
@@ -2,18 +2,20 @@
 Trait Scorer - Гибридная система оценки психологических черт
 
 Отвечает за:
-- Вычисление значений черт из множества ответов
+- Вычисление значений черт из множества ответов (векторно через TraitMatrix)
 - Расчет confidence и variance
 - Интерпретацию значений
 - Обновление черт с учетом новых данных
 """
 
-import statistics
 from datetime import datetime
 from typing import List, Optional, Tuple
 import logging
 
+import numpy as np
+
 from .models import TraitAssessment
+from .trait_matrix import TraitMatrix, TraitSamples, pack_samples
 from .config import config
 
 logger = logging.getLogger(__name__)
@@ -56,30 +58,31 @@ class TraitScorer:
         if len(values) == 1:
             return self._create_single_value_trait(values[0], percentile)
 
-        # Вычисляем основное значение (взвешенное среднее)
-        value = self._calculate_weighted_mean(values, weights)
-
-        # Вычисляем confidence
-        confidence = self._calculate_confidence(values)
+        # Взвешенное среднее, confidence и variance - тот же векторный путь, что и для профиля
+        row_weights = None
+        if weights is not None:
+            row_weights = np.array([weights if len(weights) == len(values) else [1.0] * len(values)])
 
-        # Вычисляем variance (разброс)
-        variance = self._calculate_variance(values)
+        matrix = TraitMatrix.score(np.array([values], dtype=np.float64), row_weights)
+        return matrix.to_trait(0, percentile)
 
-        # Определяем интерпретацию
-        interpretation = self._get_interpretation(value)
+    def calculate_traits(
+        self,
+        trait_samples: TraitSamples,
+        trait_weights: Optional[TraitSamples] = None
+    ) -> TraitMatrix:
+        """
+        Вычислить все черты профиля за один векторный проход
 
-        # Определяем direction (нужна история, пока stable)
-        direction = "stable"
+        Args:
+            trait_samples: Ответы {category: {trait_name: [values]}}
+            trait_weights: Опциональные веса в той же структуре
 
-        return TraitAssessment(
-            value=value,
-            confidence=confidence,
-            variance=variance,
-            samples=len(values),
-            percentile=percentile,
-            direction=direction,
-            interpretation=interpretation
-        )
+        Returns:
+            TraitMatrix (pydantic объекты не создаются)
+        """
+        values, weights = pack_samples(trait_samples, trait_weights)
+        return TraitMatrix.score(values, weights)
 
     def update_trait(
         self,
@@ -156,52 +159,6 @@ class TraitScorer:
 
         return change, is_significant
 
-    def _calculate_weighted_mean(
-        self,
-        values: List[float],
-        weights: Optional[List[float]] = None
-    ) -> float:
-        """Вычислить взвешенное среднее"""
-        if weights is None:
-            # Даем больший вес более свежим значениям
-            weights = [1 + (i * 0.1) for i in range(len(values))]
-
-        if len(weights) != len(values):
-            weights = [1.0] * len(values)
-
-        weighted_sum = sum(v * w for v, w in zip(values, weights))
-        total_weight = sum(weights)
-
-        return weighted_sum / total_weight
-
-    def _calculate_confidence(self, values: List[float]) -> float:
-        """
-        Вычислить confidence из списка значений
-
-        Confidence зависит от:
-        - Количества семплов (больше = выше)
-        - Консистентности (меньше разброс = выше)
-        """
-        if len(values) < self.config.MIN_SAMPLES_FOR_CONFIDENCE:
-            return 0.3
-
-        # Вычисляем стандартное отклонение
-        if len(values) > 1:
-            std_dev = statistics.stdev(values)
-        else:
-            std_dev = 0.0
-
-        # Консистентность (низкое std_dev = высокая консистентность)
-        consistency = 1.0 - min(std_dev, 1.0)
-
-        # Sample factor (больше семплов = выше)
-        sample_factor = min(len(values) / 10, 1.0)
-
-        # Итоговый confidence
-        confidence = (consistency * 0.7 + sample_factor * 0.3)
-
-        return max(self.config.MIN_CONFIDENCE_THRESHOLD, confidence)
-
     def _calculate_confidence_from_samples(
         self,
         samples: int,
@@ -222,17 +179,6 @@ class TraitScorer:
 
         return max(self.config.MIN_CONFIDENCE_THRESHOLD, confidence)
 
-    def _calculate_variance(self, values: List[float]) -> float:
-        """Вычислить variance (разброс)"""
-        if len(values) < 2:
-            return 0.0
-
-        try:
-            std_dev = statistics.stdev(values)
-            return min(std_dev, 1.0)
-        except statistics.StatisticsError:
-            return 0.0
-
     def _get_interpretation(self, value: float) -> str:
         """Получить текстовую интерпретацию значения"""
         if value < self.config.VERY_LOW_THRESHOLD:
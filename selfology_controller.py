@@ -202,6 +202,17 @@ class SelfologyController(OnboardingHandlersMixin, ProgramHandlersMixin, MenuCha
             if i < len(parts) - 1:
                 await asyncio.sleep(0.3)
 
+    async def _invalidate_chat_context(self, event_type: str, telegram_id):
+        """
+        Сбросить кэш контекста ChatCoach по доменному событию этого процесса
+
+        Ответы онбординга и истории контекста кэшируются без TTL, а
+        EventConsumer в процессе бота не запущен - поэтому обработчики
+        ответов сообщают о событиях напрямую.
+        """
+        if self.chat_coach:
+            await self.chat_coach.context_loader.handle_event(event_type, {"user_id": telegram_id})
+
     async def _log_state_change(self, handler, event, data):
         """
         Middleware для логирования FSM state transitions
@@ -695,7 +706,9 @@ class SelfologyController(OnboardingHandlersMixin, ProgramHandlersMixin, MenuCha
             await self.bot.session.close()
             logger.info("✅ Bot session closed")
 
-            # 7. Закрываем database service
+            # 7. Закрываем LISTEN соединение кэша flagged вопросов и database service
+            if self.onboarding_dao:
+                await self.onboarding_dao.flagged_questions.close()
             if self.db_service:
                 await self.db_service.close()
                 logger.info("✅ Database connection closed")
@@ -863,6 +876,7 @@ class SelfologyController(OnboardingHandlersMixin, ProgramHandlersMixin, MenuCha
 • Завершено: {tasks_status['completed_tasks']}
 • Отменено: {tasks_status['cancelled_tasks']}
 • С ошибками: {tasks_status['failed_tasks']}
+• Очередь анализа: {tasks_status['analysis_queue']['queue_depth']} (выполняется: {tasks_status['analysis_queue']['running']}, p95 ожидания: {tasks_status['analysis_queue']['p95_wait_ms']:.0f}ms)
 • Shutdown: {'да' if tasks_status['shutdown_initiated'] else 'нет'}
 
 🔧 <b>Управление:</b>
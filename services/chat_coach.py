@@ -18,6 +18,7 @@ from data_access.user_dao import UserDAO
 from data_access.vector_dao import VectorDAO
 from data_access.coach_vector_dao import CoachVectorDAO
 from services.message_embedding_service import MessageEmbeddingService
+from services.chat_context import ChatContextLoader
 from core.config import get_config
 from core.logging import chat_logger, LoggerMixin
 
@@ -137,6 +138,14 @@ class ChatCoachService(LoggerMixin):
         self.personality_weight = self.chat_config.get("personality_weight", 0.7)
         self.memory_retention_days = self.chat_config.get("memory_retention_days", 30)
 
+        # ⚡ Параллельная загрузка контекста + per-user кэш
+        self.context_loader = ChatContextLoader(
+            self.user_dao,
+            self.coach_vector_dao,
+            context_window=self.context_window,
+            ttl_seconds=self.chat_config.get("context_cache_ttl", 30)
+        )
+
         # Response templates for different personality types
         self.response_templates = self._initialize_response_templates()
 
@@ -177,6 +186,9 @@ class ChatCoachService(LoggerMixin):
         self.logger.log_service_call("start_chat_session", user_id)
 
         try:
+            # New session - don't trust cached context (onboarding may have happened since)
+            self.context_loader.invalidate(user_id)
+
             # Load user context
             user_context = await self._load_user_context(user_id)
 
@@ -201,6 +213,7 @@ class ChatCoachService(LoggerMixin):
                 ai_model_used="personalized_template",
                 response_time=time.time() - start_time
             )
+            self.context_loader.invalidate(user_id, "recent_messages")
 
             processing_time = time.time() - start_time
             self.logger.log_service_result("start_chat_session", True, processing_time)
@@ -234,6 +247,7 @@ class ChatCoachService(LoggerMixin):
             user_msg_id = await self.user_dao.save_chat_message(
                 user_id, message, "user"
             )
+            self.context_loader.invalidate(user_id, "recent_messages")
 
             # Analyze message for insights
             insights_detected = await self._analyze_message_for_insights(message, user_context)
@@ -268,17 +282,16 @@ class ChatCoachService(LoggerMixin):
                 self.logger.warning(f"⚠️ Semantic search DISABLED (embedding space mismatch - personality narratives vs user messages)")
 
                 # 3. Analyze personality trajectory for storytelling (< 30ms)
+                # Full personality evolution history - one Qdrant scroll for analysis + storytelling
+                evolution_points = await self.context_loader.get_trajectory(user_id, limit=132)
                 trajectory_insights = await self.coach_vector_dao.analyze_personality_trajectory(
                     int(user_id),
-                    window=20
+                    window=20,
+                    trajectory=evolution_points
                 )
-                
+
                 if trajectory_insights:
                     # 🔥 TRACK 3: Add evolution points for storytelling
-                    evolution_points = await self.coach_vector_dao.get_personality_trajectory(
-                        int(user_id),
-                        limit=132  # Full personality evolution history
-                    )
                     trajectory_insights['evolution_points'] = evolution_points
                     
                     self.logger.info(
@@ -363,6 +376,7 @@ class ChatCoachService(LoggerMixin):
                         user_id, formatted_insight, insight["type"],
                         insight.get("domain"), confidence
                     )
+                self.context_loader.invalidate(user_id, "insights")
 
             # Update personality profile if significant markers detected
             personality_updates = await self._extract_personality_updates(message, user_context)
@@ -377,6 +391,7 @@ class ChatCoachService(LoggerMixin):
                 insights={"detected_insights": len(insights_detected), "deep_questions": len(deep_questions)},
                 response_time=time.time() - start_time
             )
+            self.context_loader.invalidate(user_id, "recent_messages")
 
             # Update conversation state
             if user_id in self.conversation_states:
@@ -446,34 +461,29 @@ class ChatCoachService(LoggerMixin):
         """Load comprehensive user context for personalization
 
         🔥 NEW: Uses Qdrant for fast semantic search (< 20ms)
+        ⚡ All reads (PostgreSQL + Qdrant) run concurrently via ChatContextLoader,
+        onboarding answers / context stories are cached until invalidated
         """
 
-        # Get user profile with personality data
-        user_profile = await self.user_dao.get_user_profile(user_id)
-
-        # Get recent conversation history
-        recent_messages = await self.user_dao.get_recent_chat_history(user_id, self.context_window)
-
-        # Get user insights
-        insights_history = await self.user_dao.get_user_insights(user_id, 10)
+        parts = await self.context_loader.load(user_id)
 
-        # ⚡ NEW: Get personality vector from QDRANT (< 10ms)
-        personality_vector = await self.coach_vector_dao.get_current_personality_vector(int(user_id))
+        user_profile = parts["profile"]
+        recent_messages = parts["recent_messages"]
+        insights_history = parts["insights"]
+        personality_vector = parts["personality_vector"]
+        onboarding_answers = parts["onboarding_answers"]
+        context_stories = parts["context_stories"]
 
         if personality_vector:
             self.logger.info(f"✅ Loaded personality vector from Qdrant for user {user_id}")
         else:
             self.logger.warning(f"⚠️ No personality vector in Qdrant for user {user_id}")
 
-        # 🔥 NEW: Get onboarding answers (work, goals, challenges, etc.)
-        onboarding_answers = await self.user_dao.get_onboarding_answers(user_id, limit=30)
         if onboarding_answers:
             self.logger.info(f"✅ Loaded {len(onboarding_answers)} onboarding answers for user {user_id}")
         else:
             self.logger.info(f"ℹ️ No onboarding answers found for user {user_id}")
 
-        # 🔥 NEW: Get context stories (специальные вопросы: дилеммы, цели, контекст)
-        context_stories = await self.user_dao.get_context_stories(user_id, limit=10)
         if context_stories:
             self.logger.info(f"✅ Loaded {len(context_stories)} context stories for user {user_id}")
         else:
@@ -0,0 +1,176 @@
+"""
+Chat Context Loader - Сборка контекста пользователя для ChatCoach
+
+⚡ ПАРАЛЛЕЛЬНО: Независимые чтения PostgreSQL + Qdrant через asyncio.gather
+🔁 ДЕДУПЛИКАЦИЯ: Одинаковые запросы (в т.ч. от параллельных сообщений) выполняются один раз
+🗄️ КЭШ: Короткий TTL для часто меняющихся частей, стабильные - до инвалидации
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 30.0
+DEFAULT_MAX_ENTRIES = 10_000
+
+# Части контекста, которые меняются редко: обновляются только по инвалидации
+STABLE_PARTS = ("onboarding_answers", "context_stories")
+
+# Доменные события → какие части контекста устарели
+INVALIDATION_EVENTS: Dict[str, Tuple[str, ...]] = {
+    "user.answer.submitted": STABLE_PARTS,
+    "onboarding.completed": STABLE_PARTS,
+    "analysis.completed": ("personality_vector", "trajectory"),
+    "profile.created": ("profile", "personality_vector", "trajectory"),
+    "profile.updated": ("profile", "personality_vector", "trajectory"),
+    "vector.updated": ("personality_vector", "trajectory"),
+    "insight.generated": ("insights",),
+}
+
+
+class _Entry:
+    __slots__ = ("future", "loaded_at")
+
+    def __init__(self):
+        self.future: Optional[asyncio.Future] = None
+        self.loaded_at: Optional[float] = None  # None пока запрос в полете
+
+
+class ChatContextLoader:
+    """
+    Per-user кэш частей контекста с single-flight загрузкой
+
+    Пока часть загружается, остальные запросы ждут тот же future, а не
+    повторяют чтение. Ошибка загрузки не кэшируется.
+    """
+
+    def __init__(
+        self,
+        user_dao,
+        coach_vector_dao,
+        context_window: int = 10,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        stable_parts: Iterable[str] = STABLE_PARTS,
+        max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        self.user_dao = user_dao
+        self.coach_vector_dao = coach_vector_dao
+        self.context_window = context_window
+        self.ttl_seconds = ttl_seconds
+        self.stable_parts = frozenset(stable_parts)
+        self.max_entries = max_entries
+
+        self._entries: Dict[Tuple[str, str], _Entry] = {}
+
+        self.stats = {
+            "hits": 0,
+            "loads": 0,
+            "joined": 0,
+            "errors": 0,
+            "invalidations": 0
+        }
+
+    # === ЗАГРУЗКА ===
+
+    def _fetchers(self, user_id: str) -> Dict[str, Callable[[], Awaitable[Any]]]:
+        return {
+            "profile": lambda: self.user_dao.get_user_profile(user_id),
+            "recent_messages": lambda: self.user_dao.get_recent_chat_history(user_id, self.context_window),
+            "insights": lambda: self.user_dao.get_user_insights(user_id, 10),
+            "personality_vector": lambda: self.coach_vector_dao.get_current_personality_vector(int(user_id)),
+            "onboarding_answers": lambda: self.user_dao.get_onboarding_answers(user_id, limit=30),
+            "context_stories": lambda: self.user_dao.get_context_stories(user_id, limit=10),
+        }
+
+    async def load(self, user_id: str) -> Dict[str, Any]:
+        """Все части контекста пользователя (из кэша или одним параллельным fan-in)"""
+        user_id = str(user_id)
+        fetchers = self._fetchers(user_id)
+        values = await asyncio.gather(*[
+            self._get(user_id, part, fetch) for part, fetch in fetchers.items()
+        ])
+        return dict(zip(fetchers, values))
+
+    async def get_trajectory(self, user_id: str, limit: int = 132) -> List[Dict[str, Any]]:
+        """Траектория эволюции личности (одна загрузка на TTL)"""
+        user_id = str(user_id)
+        return await self._get(
+            user_id,
+            "trajectory",
+            lambda: self.coach_vector_dao.get_personality_trajectory(int(user_id), limit=limit)
+        )
+
+    async def _get(self, user_id: str, part: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        key = (user_id, part)
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            if entry.loaded_at is None:
+                self.stats["joined"] += 1
+                return await asyncio.shield(entry.future)
+            if self._is_fresh(part, entry):
+                self.stats["hits"] += 1
+                return entry.future.result()
+
+        entry = _Entry()
+        entry.future = asyncio.ensure_future(self._fetch(key, entry, fetch))
+        self._entries.pop(key, None)
+        self._entries[key] = entry
+        self._evict()
+        self.stats["loads"] += 1
+        return await asyncio.shield(entry.future)
+
+    async def _fetch(self, key: Tuple[str, str], entry: _Entry, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await fetch()
+        except BaseException:
+            self.stats["errors"] += 1
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+            raise
+
+        entry.loaded_at = time.monotonic()
+        return value
+
+    def _evict(self):
+        """Ограничение памяти: выбрасываем самые давно загруженные части"""
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    def _is_fresh(self, part: str, entry: _Entry) -> bool:
+        if part in self.stable_parts:
+            return True
+        return time.monotonic() - entry.loaded_at < self.ttl_seconds
+
+    # === ИНВАЛИДАЦИЯ ===
+
+    def invalidate(self, user_id: str, *parts: str):
+        """Сбросить части контекста пользователя (без parts - все)"""
+        user_id = str(user_id)
+        keys = [key for key in self._entries if key[0] == user_id and (not parts or key[1] in parts)]
+        for key in keys:
+            # Запрос в полете может вернуть уже устаревшие данные - не кэшируем его
+            del self._entries[key]
+        self.stats["invalidations"] += 1
+
+    async def handle_event(self, event_type: str, payload: Dict[str, Any]):
+        """
+        Инвалидация по доменным событиям
+
+        В процессе бота вызывается напрямую обработчиками ответов
+        (SelfologyController._invalidate_chat_context); подходит и как
+        handler для EventConsumer, если события публикуются в Event Bus.
+        """
+        parts = INVALIDATION_EVENTS.get(event_type)
+        user_id = payload.get("telegram_id") or payload.get("user_id")
+        if parts and user_id is not None:
+            self.invalidate(user_id, *parts)
+            logger.debug(f"🗑️ Chat context invalidated by {event_type}: user {user_id} {parts}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "cached_entries": sum(1 for entry in self._entries.values() if entry.loaded_at is not None)
+        }
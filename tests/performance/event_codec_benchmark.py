@@ -0,0 +1,189 @@
+"""
+Benchmark: Event payload codecs (bytes and encode/decode time per event type)
+
+Генерирует payload в форме domain events (user.answer.submitted,
+analysis.completed, profile.updated, ...), обучает zstd словарь на
+отдельной выборке и для каждого типа события сравнивает кодеки:
+json / json+zlib (как сейчас), msgpack, msgpack+zstd и msgpack+zstd со
+словарем - средний размер payload в stream и время encode/decode.
+
+Run (без Redis, нужны msgpack и zstandard):
+    python tests/performance/event_codec_benchmark.py
+    python tests/performance/event_codec_benchmark.py --events 5000 --train-samples 2000 --dict-size 16384
+"""
+
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from core.event_codec import (
+    CODEC_JSON, CODEC_MSGPACK, CODEC_MSGPACK_ZSTD, MSGPACK_AVAILABLE, ZSTD_AVAILABLE, EventCodecs
+)
+
+
+TRAITS = ["openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism",
+          "resilience", "self_awareness", "empathy", "curiosity", "perfectionism",
+          "anxiety_level", "optimism"]
+DOMAINS = ["IDENTITY", "EMOTIONS", "RELATIONSHIPS", "WORK", "VALUES", "PAST", "FUTURE"]
+WORDS = ("я думаю что иногда мне трудно понять свои чувства но в последнее время стало "
+         "легче говорить о том что меня беспокоит работа семья друзья планы").split()
+
+
+def base(rng: random.Random, event_type: str) -> Dict[str, Any]:
+    timestamp = datetime(2026, 1, 1) + timedelta(seconds=rng.randint(0, 10 ** 7))
+    return {
+        "event_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "event_type": event_type,
+        "event_version": "v1",
+        "timestamp": timestamp.isoformat(),
+        "trace_id": f"req_{rng.getrandbits(48):x}",
+        "user_id": rng.randint(1, 10 ** 8),
+    }
+
+
+def text(rng: random.Random, low: int, high: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def answer_submitted(rng: random.Random) -> Dict[str, Any]:
+    answer = text(rng, 10, 80)
+    return {
+        **base(rng, "user.answer.submitted"),
+        "session_id": rng.randint(1, 10 ** 6),
+        "question_id": f"q_{rng.randint(1, 700):03d}",
+        "answer_text": answer,
+        "answer_length": len(answer),
+        "response_time_seconds": round(rng.uniform(5, 300), 1),
+    }
+
+
+def question_selected(rng: random.Random) -> Dict[str, Any]:
+    return {
+        **base(rng, "onboarding.question.selected"),
+        "session_id": rng.randint(1, 10 ** 6),
+        "question_id": f"q_{rng.randint(1, 700):03d}",
+        "question_text": text(rng, 6, 20) + "?",
+        "domain": rng.choice(DOMAINS),
+        "depth_level": rng.choice(["SURFACE", "CONSCIOUS", "EDGE", "SHADOW", "CORE"]),
+        "energy_type": rng.choice(["OPENING", "NEUTRAL", "PROCESSING", "HEAVY", "HEALING"]),
+    }
+
+
+def analysis_completed(rng: random.Random) -> Dict[str, Any]:
+    return {
+        **base(rng, "analysis.completed"),
+        "answer_id": rng.randint(1, 10 ** 6),
+        "analysis_id": rng.randint(1, 10 ** 6),
+        "extracted_traits": {trait: round(rng.random(), 3) for trait in rng.sample(TRAITS, 8)},
+        "confidence_scores": {trait: round(rng.random(), 3) for trait in rng.sample(TRAITS, 8)},
+        "analysis_duration_seconds": round(rng.uniform(0.5, 20), 2),
+        "ai_model_used": rng.choice(["gpt-4o", "gpt-4o-mini", "claude-3-5-sonnet"]),
+    }
+
+
+def profile_updated(rng: random.Random) -> Dict[str, Any]:
+    fields = rng.sample(TRAITS, rng.randint(2, 6))
+    return {
+        **base(rng, "profile.updated"),
+        "updated_traits": fields,
+        "old_values": {trait: round(rng.random(), 3) for trait in fields},
+        "new_values": {trait: round(rng.random(), 3) for trait in fields},
+        "change_magnitude": round(rng.random(), 3),
+    }
+
+
+def fatigue_detected(rng: random.Random) -> Dict[str, Any]:
+    return {
+        **base(rng, "onboarding.fatigue.detected"),
+        "session_id": rng.randint(1, 10 ** 6),
+        "fatigue_level": rng.choice(["MILD", "MODERATE", "SEVERE"]),
+        "answers_count": rng.randint(5, 40),
+        "session_duration_minutes": round(rng.uniform(5, 60), 1),
+        "indicators": rng.sample(["short_answers", "slow_responses", "skips", "repetition"], 2),
+    }
+
+
+GENERATORS: Dict[str, Callable[[random.Random], Dict[str, Any]]] = {
+    "user.answer.submitted": answer_submitted,
+    "onboarding.question.selected": question_selected,
+    "analysis.completed": analysis_completed,
+    "profile.updated": profile_updated,
+    "onboarding.fatigue.detected": fatigue_detected,
+}
+
+
+def generate(count: int, seed: int) -> Dict[str, List[Dict[str, Any]]]:
+    rng = random.Random(seed)
+    return {name: [gen(rng) for _ in range(count)] for name, gen in GENERATORS.items()}
+
+
+def measure(codecs: EventCodecs, codec: str, payloads: List[Dict[str, Any]]) -> Dict[str, float]:
+    start = time.perf_counter()
+    encoded = [codecs.encode(payload, codec) for payload in payloads]
+    encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for data, tag, _ in encoded:
+        codecs.decode(data, tag)
+    decode_time = time.perf_counter() - start
+
+    return {
+        "bytes": sum(len(data) for data, _, _ in encoded) / len(payloads),
+        "encode_us": encode_time / len(payloads) * 1e6,
+        "decode_us": decode_time / len(payloads) * 1e6,
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    if not (MSGPACK_AVAILABLE and ZSTD_AVAILABLE):
+        print("❌ Нужны msgpack и zstandard: pip install msgpack zstandard")
+        return
+
+    # Словарь обучается на другой выборке, чем измеряется
+    training = generate(args.train_samples // len(GENERATORS), seed=1)
+    measured = generate(args.events, seed=2)
+
+    plain = EventCodecs(compression_threshold=args.threshold)
+    with_dict = EventCodecs(compression_threshold=args.threshold)
+    raw = with_dict.train_dictionary(
+        [payload for payloads in training.values() for payload in payloads], dict_size=args.dict_size
+    )
+    with_dict.add_dictionary(raw, activate=True)
+
+    variants = [
+        ("json/zlib", plain, CODEC_JSON),
+        ("msgpack", plain, CODEC_MSGPACK),
+        ("msgpack+zstd", EventCodecs(compression_threshold=0), CODEC_MSGPACK_ZSTD),
+        ("zstd+dict", with_dict, CODEC_MSGPACK_ZSTD),
+    ]
+
+    print(f"events={args.events}/type train={args.train_samples} dict={len(raw)}B threshold={args.threshold}B")
+    print(f"{'event type':<30}{'codec':<14}{'bytes':>8}{'ratio':>8}{'enc µs':>9}{'dec µs':>9}")
+
+    totals = {name: 0.0 for name, _, _ in variants}
+    for event_type, payloads in measured.items():
+        baseline = None
+        for name, codecs, codec in variants:
+            result = measure(codecs, codec, payloads)
+            baseline = baseline or result["bytes"]
+            totals[name] += result["bytes"]
+            print(
+                f"{event_type:<30}{name:<14}{result['bytes']:>8.0f}{result['bytes'] / baseline:>8.2f}"
+                f"{result['encode_us']:>9.1f}{result['decode_us']:>9.1f}"
+            )
+
+    print()
+    for name, total in totals.items():
+        print(f"📊 {name:<14} {total / totals['json/zlib']:.2f} от json по байтам")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000, help="Payloads per event type")
+    parser.add_argument("--train-samples", type=int, default=2500)
+    parser.add_argument("--dict-size", type=int, default=16384)
+    parser.add_argument("--threshold", type=int, default=1024, help="compression_threshold (bytes)")
+    main(parser.parse_args())
@@ -0,0 +1,122 @@
+"""
+Benchmark: CRITICAL latency under a saturated LOW stream
+
+Заполняет LOW stream, запускает EventConsumer и публикует CRITICAL события
+с меткой времени; для каждого режима PriorityReadScheduler (fifo / strict /
+weighted) печатает задержку CRITICAL от публикации до handler и
+пропускную способность LOW.
+
+Run (нужен локальный Redis):
+    python tests/performance/event_priority_benchmark.py
+    python tests/performance/event_priority_benchmark.py --redis-url redis://localhost:6379 \\
+        --low-events 50000 --critical-events 200 --handler-ms 2 --max-in-flight 16
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+import uuid
+from typing import Dict, List
+
+import redis.asyncio as redis
+
+from core.domain_events import EventPriority
+from core.event_bus import EventBus, EventBusConfig, EventConsumer
+
+
+async def run_mode(client: redis.Redis, mode: str, args: argparse.Namespace) -> Dict[str, float]:
+    config = EventBusConfig(
+        stream_prefix=f"bench:priority:{mode}:{uuid.uuid4().hex[:8]}",
+        max_stream_length=args.low_events * 2,
+        batch_size=args.batch_size,
+        consumer_block_ms=100,
+        priority_mode=mode
+    )
+    bus = EventBus(redis_client=client, config=config)
+
+    # LOW flood до старта consumer
+    for offset in range(0, args.low_events, 1000):
+        await bus.publish_many([
+            {"event_type": "bench.low", "payload": {"n": i}, "priority": EventPriority.LOW}
+            for i in range(offset, min(offset + 1000, args.low_events))
+        ])
+
+    latencies: List[float] = []
+    low_done = 0
+    all_critical = asyncio.Event()
+
+    async def handler(event_type: str, payload: Dict) -> None:
+        nonlocal low_done
+        if event_type == "bench.critical":
+            latencies.append(time.time() - payload["sent_at"])
+            if len(latencies) >= args.critical_events:
+                all_critical.set()
+        else:
+            low_done += 1
+        await asyncio.sleep(args.handler_ms / 1000)
+
+    consumer = EventConsumer(
+        bus, "bench", "worker_1",
+        priorities=[EventPriority.CRITICAL, EventPriority.LOW],
+        handler=handler,
+        max_in_flight=args.max_in_flight,
+        ordering_key=None
+    )
+    await consumer.start()
+    started = time.monotonic()
+
+    for _ in range(args.critical_events):
+        await bus.publish("bench.critical", {"sent_at": time.time()}, priority=EventPriority.CRITICAL)
+        await asyncio.sleep(args.critical_interval_ms / 1000)
+
+    try:
+        await asyncio.wait_for(all_critical.wait(), timeout=args.timeout)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.monotonic() - started
+    await consumer.stop()
+    await client.delete(*bus.streams.values())
+
+    latencies.sort()
+    return {
+        "critical_received": len(latencies),
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else float("nan"),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else float("nan"),
+        "max_ms": latencies[-1] * 1000 if latencies else float("nan"),
+        "low_per_s": low_done / elapsed if elapsed else 0.0,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    logging.getLogger("core.event_bus").setLevel(logging.ERROR)
+    client = await redis.from_url(args.redis_url, decode_responses=False)
+    try:
+        print(
+            f"LOW={args.low_events} CRITICAL={args.critical_events} "
+            f"handler={args.handler_ms}ms in_flight={args.max_in_flight} batch={args.batch_size}"
+        )
+        print(f"{'mode':<10}{'received':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'LOW/s':>10}")
+        for mode in args.modes:
+            result = await run_mode(client, mode, args)
+            print(
+                f"{mode:<10}{result['critical_received']:>10}{result['p50_ms']:>10.1f}"
+                f"{result['p95_ms']:>10.1f}{result['max_ms']:>10.1f}{result['low_per_s']:>10.0f}"
+            )
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", default="redis://localhost:6379")
+    parser.add_argument("--modes", nargs="+", default=["fifo", "strict", "weighted"])
+    parser.add_argument("--low-events", type=int, default=20000)
+    parser.add_argument("--critical-events", type=int, default=100)
+    parser.add_argument("--critical-interval-ms", type=float, default=20)
+    parser.add_argument("--handler-ms", type=float, default=1)
+    parser.add_argument("--max-in-flight", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=120)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,157 @@
+"""
+Общие fixtures unit тестов
+
+fake_redis - in-memory Redis для Event Bus: streams, PEL одной consumer group,
+hash/string ключи и pipeline (команды выполняются при execute, пачки XACK
+записываются в ack_calls). XAUTOCLAIM забирает только записи PEL, простаивающие
+дольше min_idle_time.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+
+def id_key(message_id):
+    return tuple(int(part) for part in message_id.split("-"))
+
+
+def as_str(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    async def execute(self):
+        acks = [(args[0], args[2:]) for name, args, _ in self.commands if name == "xack"]
+        if acks:
+            self.redis.ack_calls.append(acks)
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    """Streams + PEL одной consumer group, hash и string ключи"""
+
+    def __init__(self):
+        self.streams = {}
+        self.cursors = {}
+        self.pel = {}
+        self.hashes = {}
+        self.values = {}
+        self.ack_calls = []
+        self.next_id = 1
+
+    def seed(self, streams):
+        """Добавить готовые записи [(message_id, fields)] в streams"""
+        for name, messages in streams.items():
+            for message_id, fields in messages:
+                message_id = as_str(message_id)
+                self.streams.setdefault(name, []).append((message_id, dict(fields)))
+                self.next_id = max(self.next_id, id_key(message_id)[0] + 1)
+
+    def acked(self):
+        return [message_id for call in self.ack_calls for _, ids in call for message_id in ids]
+
+    # Streams
+
+    async def xadd(self, name, fields, maxlen=None, approximate=True):
+        message_id = f"{self.next_id}-0"
+        self.next_id += 1
+        self.streams.setdefault(name, []).append((message_id, dict(fields)))
+        return message_id.encode()
+
+    async def xreadgroup(self, groupname, consumername, streams, count, block=None):
+        results = []
+        for name in streams:
+            entries = self.streams.get(name, [])
+            start = self.cursors.get(name, 0)
+            batch = entries[start:start + count]
+            self.cursors[name] = start + len(batch)
+            for message_id, _ in batch:
+                self.pel.setdefault(name, {})[message_id] = {
+                    "consumer": consumername, "deliveries": 1, "delivered_at": time.monotonic()
+                }
+            if batch:
+                results.append((name.encode(), [(mid.encode(), data) for mid, data in batch]))
+        if results or block is None:
+            return results
+        await asyncio.sleep(block / 1000)
+        return []
+
+    async def xautoclaim(self, name, groupname, consumername, min_idle_time, start_id="0-0", count=None):
+        entries = dict(self.streams.get(name, []))
+        claimed = []
+        for message_id in sorted(self.pel.get(name, {}), key=id_key):
+            info = self.pel[name][message_id]
+            idle_ms = (time.monotonic() - info["delivered_at"]) * 1000
+            if id_key(message_id) < id_key(start_id) or len(claimed) == count or idle_ms < min_idle_time:
+                continue
+            info["consumer"] = consumername
+            info["deliveries"] += 1
+            info["delivered_at"] = time.monotonic()
+            claimed.append((message_id.encode(), entries.get(message_id)))
+        return [b"0-0", claimed, []]
+
+    async def xpending_range(self, name, groupname, min, max, count, consumername=None):
+        return [
+            {"message_id": mid.encode(), "consumer": info["consumer"], "times_delivered": info["deliveries"]}
+            for mid, info in sorted(self.pel.get(name, {}).items(), key=lambda item: id_key(item[0]))
+            if id_key(min) <= id_key(mid) <= id_key(max)
+            and (consumername is None or info["consumer"] == consumername)
+        ][:count]
+
+    async def xpending(self, name, groupname):
+        return {"pending": len(self.pel.get(name, {}))}
+
+    async def xack(self, name, groupname, *ids):
+        return sum(self.pel.get(name, {}).pop(as_str(mid), None) is not None for mid in ids)
+
+    async def xrange(self, name, min="-", max="+", count=None):
+        entries = [
+            (mid.encode(), data) for mid, data in self.streams.get(name, [])
+            if min == "-" or id_key(mid) >= id_key(min)
+        ]
+        return entries[:count]
+
+    async def xdel(self, name, *ids):
+        self.streams[name] = [(mid, data) for mid, data in self.streams.get(name, []) if mid not in ids]
+
+    # Hash / string
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        stored = self.hashes.setdefault(key, {})
+        for name, item in items.items():
+            stored[name.encode() if isinstance(name, str) else name] = (
+                item if isinstance(item, bytes) else str(item).encode()
+            )
+        return len(items)
+
+    async def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field.encode())
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def set(self, key, value):
+        self.values[key] = value if isinstance(value, bytes) else str(value).encode()
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
@@ -0,0 +1,169 @@
+"""
+Unit Tests: Analysis Scheduler
+
+Тестирует очередь deep analysis:
+- Лимит параллельных pipeline
+- Приоритеты crisis → breakthrough → normal → retry
+- Последовательная обработка ответов одного пользователя
+- Лимиты стадий
+- Shutdown отменяет не стартовавшие задачи
+"""
+
+import asyncio
+
+import pytest
+
+from selfology_bot.services.onboarding.analysis_scheduler import AnalysisScheduler, AnalysisPriority
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+class Recorder:
+    """Фабрики задач, записывающие порядок и параллелизм"""
+
+    def __init__(self):
+        self.started = []
+        self.running = 0
+        self.max_running = 0
+        self.gate = asyncio.Event()
+
+    def job(self, label, wait_gate=False, delay=0.0):
+        async def run():
+            self.started.append(label)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            try:
+                if wait_gate:
+                    await self.gate.wait()
+                await asyncio.sleep(delay)
+                return label
+            finally:
+                self.running -= 1
+        return run
+
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded(recorder):
+    scheduler = AnalysisScheduler(max_concurrent=3)
+
+    futures = [scheduler.submit(user_id, recorder.job(user_id, delay=0.01)) for user_id in range(10)]
+    results = await asyncio.gather(*futures)
+
+    assert results == list(range(10))
+    assert recorder.max_running == 3
+    assert scheduler.get_stats()["completed"] == 10
+
+
+@pytest.mark.asyncio
+async def test_priority_order(recorder):
+    scheduler = AnalysisScheduler(max_concurrent=1)
+
+    blocker = scheduler.submit(0, recorder.job("blocker", wait_gate=True))
+    await asyncio.sleep(0)
+
+    futures = [
+        scheduler.submit(1, recorder.job("retry"), priority=AnalysisPriority.RETRY),
+        scheduler.submit(2, recorder.job("normal")),
+        scheduler.submit(3, recorder.job("breakthrough"), priority=AnalysisPriority.BREAKTHROUGH),
+        scheduler.submit(4, recorder.job("crisis"), priority=AnalysisPriority.CRISIS),
+    ]
+
+    assert scheduler.get_stats()["queue_by_priority"] == {"crisis": 1, "breakthrough": 1, "normal": 1, "retry": 1}
+
+    recorder.gate.set()
+    await asyncio.gather(blocker, *futures)
+
+    assert recorder.started == ["blocker", "crisis", "breakthrough", "normal", "retry"]
+
+
+@pytest.mark.asyncio
+async def test_one_user_is_processed_sequentially(recorder):
+    scheduler = AnalysisScheduler(max_concurrent=5)
+
+    futures = [scheduler.submit(42, recorder.job(n, delay=0.005)) for n in range(4)]
+    await asyncio.gather(*futures)
+
+    assert recorder.started == [0, 1, 2, 3]
+    assert recorder.max_running == 1
+
+
+@pytest.mark.asyncio
+async def test_user_crisis_answer_lifts_queued_user(recorder):
+    scheduler = AnalysisScheduler(max_concurrent=1)
+
+    blocker = scheduler.submit(0, recorder.job("blocker", wait_gate=True))
+    await asyncio.sleep(0)
+
+    other = scheduler.submit(1, recorder.job("other"))
+    first = scheduler.submit(2, recorder.job("user2_first"))
+    crisis = scheduler.submit(2, recorder.job("user2_crisis"), priority=AnalysisPriority.CRISIS)
+
+    recorder.gate.set()
+    await asyncio.gather(blocker, other, first, crisis)
+
+    # Порядок ответов пользователя сохраняется, но его очередь идет первой
+    assert recorder.started == ["blocker", "user2_first", "user2_crisis", "other"]
+
+
+@pytest.mark.asyncio
+async def test_failure_is_delivered_and_queue_continues(recorder):
+    scheduler = AnalysisScheduler(max_concurrent=1)
+
+    async def boom():
+        raise RuntimeError("llm down")
+
+    failed = scheduler.submit(1, boom)
+    ok = scheduler.submit(1, recorder.job("next"))
+
+    with pytest.raises(RuntimeError):
+        await failed
+    assert await ok == "next"
+    assert scheduler.get_stats()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stage_limit(recorder):
+    scheduler = AnalysisScheduler(max_concurrent=10, stage_limits={"llm": 2})
+    in_stage = 0
+    peak = 0
+
+    async def pipeline():
+        nonlocal in_stage, peak
+        async with scheduler.stage("llm"):
+            in_stage += 1
+            peak = max(peak, in_stage)
+            await asyncio.sleep(0.01)
+            in_stage -= 1
+
+    await asyncio.gather(*[scheduler.submit(user_id, pipeline) for user_id in range(6)])
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_shutdown_cancels_queued_jobs(recorder):
+    scheduler = AnalysisScheduler(max_concurrent=1)
+
+    running = scheduler.submit(1, recorder.job("running", wait_gate=True))
+    queued = scheduler.submit(2, recorder.job("queued"))
+    await asyncio.sleep(0)
+
+    result = await scheduler.shutdown(timeout=0.01)
+
+    assert result == {"analysis_cancelled": 1, "analysis_not_started": 1}
+    assert running.cancelled() and queued.cancelled()
+    assert recorder.started == ["running"]
+
+    with pytest.raises(RuntimeError):
+        scheduler.submit(3, recorder.job("late"))
@@ -0,0 +1,132 @@
+"""
+Unit Tests: Chat Context Loader
+
+Тестирует сборку контекста ChatCoach:
+- Независимые чтения выполняются параллельно
+- Параллельные запросы одного пользователя делят одну загрузку
+- TTL для изменчивых частей, стабильные - до инвалидации
+- Инвалидация по доменным событиям
+- Ошибка загрузки не кэшируется
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from services.chat_context import ChatContextLoader
+
+
+class FakeUserDAO:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = {}
+
+    async def _read(self, name, value):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        await asyncio.sleep(self.delay)
+        return value
+
+    async def get_user_profile(self, user_id):
+        return await self._read("profile", {"user_id": user_id})
+
+    async def get_recent_chat_history(self, user_id, limit):
+        return await self._read("recent_messages", [{"content": "hi"}])
+
+    async def get_user_insights(self, user_id, limit):
+        return await self._read("insights", [])
+
+    async def get_onboarding_answers(self, user_id, limit):
+        return await self._read("onboarding_answers", [{"answer": "work"}])
+
+    async def get_context_stories(self, user_id, limit):
+        return await self._read("context_stories", [])
+
+
+class FakeCoachVectorDAO:
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.trajectory_calls = 0
+
+    async def get_current_personality_vector(self, user_id):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("qdrant down")
+        return {"user_id": user_id, "traits": {}}
+
+    async def get_personality_trajectory(self, user_id, limit):
+        self.trajectory_calls += 1
+        return [{"created_at": "2026-01-01"}]
+
+
+@pytest.mark.asyncio
+async def test_reads_run_concurrently():
+    loader = ChatContextLoader(FakeUserDAO(delay=0.05), FakeCoachVectorDAO(delay=0.05))
+
+    start = time.monotonic()
+    parts = await loader.load("42")
+    elapsed = time.monotonic() - start
+
+    assert parts["profile"] == {"user_id": "42"}
+    assert parts["personality_vector"]["user_id"] == 42
+    assert elapsed < 0.2  # одно ожидание, а не шесть подряд
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_load():
+    user_dao = FakeUserDAO(delay=0.02)
+    vector_dao = FakeCoachVectorDAO(delay=0.02)
+    loader = ChatContextLoader(user_dao, vector_dao)
+
+    await asyncio.gather(*[loader.load("42") for _ in range(10)])
+    await asyncio.gather(*[loader.get_trajectory("42") for _ in range(3)])
+
+    assert set(user_dao.calls.values()) == {1}
+    assert vector_dao.calls == 1
+    assert vector_dao.trajectory_calls == 1
+    assert loader.get_stats()["joined"] > 0
+
+
+@pytest.mark.asyncio
+async def test_volatile_parts_expire_stable_parts_stay():
+    user_dao = FakeUserDAO()
+    loader = ChatContextLoader(user_dao, FakeCoachVectorDAO(), ttl_seconds=0)
+
+    await loader.load("42")
+    await loader.load("42")
+
+    assert user_dao.calls["recent_messages"] == 2
+    assert user_dao.calls["onboarding_answers"] == 1
+    assert user_dao.calls["context_stories"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidation_events_refresh_stable_parts():
+    user_dao = FakeUserDAO()
+    loader = ChatContextLoader(user_dao, FakeCoachVectorDAO())
+    await loader.load("42")
+
+    await loader.handle_event("user.answer.submitted", {"user_id": 42, "question_id": "q1"})
+    await loader.handle_event("user.answer.submitted", {"user_id": 7})
+    await loader.load("42")
+
+    assert user_dao.calls["onboarding_answers"] == 2
+    assert user_dao.calls["profile"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_load_is_not_cached():
+    vector_dao = FakeCoachVectorDAO(fail=True)
+    loader = ChatContextLoader(FakeUserDAO(), vector_dao)
+
+    with pytest.raises(RuntimeError):
+        await loader.load("42")
+
+    vector_dao.fail = False
+    parts = await loader.load("42")
+
+    assert parts["personality_vector"]["user_id"] == 42
+    assert vector_dao.calls == 2
@@ -0,0 +1,139 @@
+"""
+Unit Tests: Dossier Single-Flight Regeneration
+
+Тестирует перегенерацию досье:
+- Параллельные запросы без досье - одна генерация
+- Устаревшее досье отдается сразу, генерация идет в фоне
+- Досье старше max_staleness - ждем генерацию
+- Lock у другого воркера - ждем его результат вместо своей генерации
+- ChatMVP.close() отменяет фоновые генерации, новые не запускаются
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from selfology_bot.services.chat.chat_mvp import ChatMVP
+from selfology_bot.services.chat.user_dossier_service import UserDossierService, UserDossier
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+    async def hmget(self, key, *fields):
+        return [None for _ in fields]
+
+
+class SlowService(UserDossierService):
+    def __init__(self, delay=0.05, **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+        self.generated = 0
+
+    async def _generate_dossier(self, user_id, version=None):
+        self.generated += 1
+        await asyncio.sleep(self.delay)
+        return UserDossier(user_id=user_id, who=f"v{self.generated}", generated_at=datetime.now())
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_generation():
+    service = SlowService(redis_client=FakeRedis())
+
+    results = await asyncio.gather(*[service.get_dossier(1) for _ in range(10)])
+
+    assert service.generated == 1
+    assert {dossier.who for dossier in results} == {"v1"}
+    assert "dossier_lock:1" not in service.redis_client.data
+
+
+@pytest.mark.asyncio
+async def test_stale_dossier_served_while_refreshing():
+    service = SlowService()
+    await service.get_dossier(1)
+    await service.invalidate_dossier(1)
+
+    stale = await service.get_dossier(1)
+    again = await service.get_dossier(1)
+
+    assert stale.who == "v1" and stale.stale
+    assert again.who == "v1"
+    assert service.generated == 2  # Одна фоновая генерация на оба запроса
+
+    await asyncio.sleep(0.1)
+    fresh = await service.get_dossier(1)
+    assert fresh.who == "v2" and not fresh.stale
+    assert service.get_stats()["stale_served"] == 2
+
+
+@pytest.mark.asyncio
+async def test_too_old_dossier_waits_for_generation():
+    service = SlowService(max_staleness=60)
+    old = UserDossier(user_id=1, who="old", generated_at=datetime.now() - timedelta(hours=1), stale=True)
+    await service._cache_dossier(1, old)
+
+    dossier = await service.get_dossier(1)
+
+    assert dossier.who == "v1"
+
+
+@pytest.mark.asyncio
+async def test_busy_lock_waits_for_other_worker():
+    redis = FakeRedis()
+    service = SlowService(redis_client=redis)
+    service.lock_poll_interval = 0.01
+    redis.data["dossier_lock:1"] = "other-worker"
+
+    async def other_worker():
+        await asyncio.sleep(0.05)
+        dossier = UserDossier(user_id=1, who="from-other", generated_at=datetime.now())
+        await redis.setex("dossier:1", 3600, service._serialize_dossier(dossier))
+        del redis.data["dossier_lock:1"]
+
+    dossier, _ = await asyncio.gather(service.get_dossier(1), other_worker())
+
+    assert dossier.who == "from-other"
+    assert service.generated == 0
+    assert service.get_stats()["lock_busy"] == 1
+
+
+@pytest.mark.asyncio
+async def test_chat_close_cancels_background_refresh():
+    chat = ChatMVP(cluster_router=None)
+    service = chat.dossier_service = SlowService(delay=10)
+    old = UserDossier(user_id=1, who="old", generated_at=datetime.now(), stale=True)
+    await service._cache_dossier(1, old)
+
+    assert (await service.get_dossier(1)).who == "old"
+    refresh = service._refreshing[1]
+
+    await chat.close()
+
+    assert refresh.cancelled()
+    assert service.get_stats()["refreshing"] == 0
+
+    # После close устаревшее досье отдается без новой генерации
+    assert (await service.get_dossier(1)).who == "old"
+    assert service.get_stats()["refreshing"] == 0
+    with pytest.raises(RuntimeError):
+        await service.get_dossier(2)
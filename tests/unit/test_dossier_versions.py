@@ -0,0 +1,218 @@
+"""
+Unit Tests: Dossier Data Versions
+
+Тестирует инвалидацию досье по версиям данных:
+- Кэшированное досье отдается без запросов в БД
+- Изменение личности инвалидирует досье сразу
+- Новые ответы инвалидируют досье только после update_threshold
+- NOTIFY от триггера обновляет версию, некорректный payload игнорируется
+- Засев из БД, прочитанный до NOTIFY, не откатывает версию назад
+- Версии в памяти истекают по TTL, LISTEN переоткрывается после обрыва
+- ChatMVP.close() возвращает LISTEN соединение в пул
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from selfology_bot.services.chat.chat_mvp import ChatMVP
+from selfology_bot.services.chat.data_version import DataVersion, DataVersionStore
+from selfology_bot.services.chat.user_dossier_service import UserDossierService, UserDossier
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+        self.closed = False
+        self.termination_listeners = []
+
+    async def fetchrow(self, query, *args):
+        self.pool.queries.append(query)
+        if "user_data_versions" in query:
+            return self.pool.version_row
+        return None
+
+    async def fetch(self, query, *args):
+        self.pool.queries.append(query)
+        return []
+
+    async def add_listener(self, channel, callback):
+        self.pool.listeners.append(channel)
+
+    async def remove_listener(self, channel, callback):
+        pass
+
+    def add_termination_listener(self, callback):
+        self.termination_listeners.append(callback)
+
+    def is_closed(self):
+        return self.closed
+
+    def terminate(self):
+        self.closed = True
+        for callback in self.termination_listeners:
+            callback(self)
+
+
+class FakePool:
+    def __init__(self, version_row=None):
+        self.version_row = version_row
+        self.queries = []
+        self.listeners = []
+        self.released = []
+
+    def acquire(self):
+        pool = self
+
+        class _Acquire:
+            def __await__(self):
+                async def conn():
+                    return FakeConnection(pool)
+                return conn().__await__()
+
+            async def __aenter__(self):
+                return FakeConnection(pool)
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Acquire()
+
+    async def release(self, conn):
+        self.released.append(conn)
+
+
+def make_service(version_row):
+    pool = FakePool(version_row)
+    service = UserDossierService(db_pool=pool)
+    return service, pool
+
+
+async def cache(service, user_id, answers, personality):
+    dossier = UserDossier(user_id=user_id, who="cached")
+    service._stamp_version(dossier, DataVersion(answers=answers, personality=personality))
+    await service._cache_dossier(user_id, dossier)
+
+
+@pytest.mark.asyncio
+async def test_cached_dossier_needs_no_db_queries():
+    service, pool = make_service({"answers_count": 10, "personality_version": 2})
+    await cache(service, 1, answers=10, personality=2)
+
+    for _ in range(5):
+        dossier = await service.get_dossier(1)
+
+    assert dossier.who == "cached"
+    # Один PK-lookup для засева версии, дальше только сравнение в памяти
+    assert len(pool.queries) == 1
+    assert pool.listeners == ["user_data_version"]
+
+
+@pytest.mark.asyncio
+async def test_personality_change_invalidates():
+    service, pool = make_service({"answers_count": 10, "personality_version": 2})
+    await cache(service, 1, answers=10, personality=2)
+    await service.versions.set(1, DataVersion(answers=10, personality=3))
+
+    dossier = await service.get_dossier(1)
+
+    assert dossier.who != "cached"
+    assert dossier.personality_version == 3
+
+
+@pytest.mark.asyncio
+async def test_answers_invalidate_after_threshold():
+    service, pool = make_service(None)
+    await cache(service, 1, answers=10, personality=2)
+
+    await service.versions.set(1, DataVersion(answers=14, personality=2))
+    assert (await service.get_dossier(1)).who == "cached"
+
+    await service.versions.set(1, DataVersion(answers=15, personality=2))
+    assert (await service.get_dossier(1)).who != "cached"
+
+
+@pytest.mark.asyncio
+async def test_notify_updates_version():
+    store = DataVersionStore()
+
+    store._on_notify(None, 1, "user_data_version", json.dumps({"user_id": 7, "answers": 3, "personality": 1}))
+    store._on_notify(None, 1, "user_data_version", "not json")
+    await asyncio.sleep(0)
+
+    assert await store.get(7) == DataVersion(answers=3, personality=1)
+    assert store.get_stats()["notifications"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_seed_does_not_roll_version_back():
+    pool = FakePool({"answers_count": 10, "personality_version": 2})
+    store = DataVersionStore(db_pool=pool)
+
+    # NOTIFY закоммиченного изменения записан раньше, чем засев из старого чтения
+    await store.set(1, DataVersion(answers=10, personality=3))
+    await store.set(1, DataVersion(answers=11, personality=2))
+
+    assert await store.get(1) == DataVersion(answers=11, personality=3)
+
+
+@pytest.mark.asyncio
+async def test_without_db_dossier_stays_valid():
+    service = UserDossierService()
+    await cache(service, 1, answers=0, personality=-1)
+
+    assert (await service.get_dossier(1)).who == "cached"
+
+
+@pytest.mark.asyncio
+async def test_memory_versions_expire_after_ttl(monkeypatch):
+    pool = FakePool({"answers_count": 10, "personality_version": 2})
+    store = DataVersionStore(db_pool=pool, ttl=60)
+
+    assert await store.get(1) == DataVersion(answers=10, personality=2)
+    pool.version_row = {"answers_count": 11, "personality_version": 2}
+    assert await store.get(1) == DataVersion(answers=10, personality=2)
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+
+    assert await store.get(1) == DataVersion(answers=11, personality=2)
+    assert store.get_stats()["seeds"] == 2
+
+
+@pytest.mark.asyncio
+async def test_listener_reconnects_after_connection_loss():
+    pool = FakePool({"answers_count": 10, "personality_version": 2})
+    store = DataVersionStore(db_pool=pool)
+
+    await store.get(1)
+    lost = store._listen_conn
+    lost.terminate()
+
+    # Уведомления за время обрыва потеряны - версия перечитывается из БД
+    assert store.get_stats()["listening"] is False
+    assert store._versions == {}
+
+    await store.get(1)
+
+    assert pool.released == [lost]
+    assert store._listen_conn is not lost
+    assert store.get_stats()["listening"] is True
+    assert store.get_stats()["listener_lost"] == 1
+    assert pool.listeners == ["user_data_version", "user_data_version"]
+
+
+@pytest.mark.asyncio
+async def test_chat_close_releases_listen_connection():
+    pool = FakePool({"answers_count": 10, "personality_version": 2})
+    chat = ChatMVP(cluster_router=None, db_pool=pool)
+
+    await chat.dossier_service.versions.get(1)
+    listen_conn = chat.dossier_service.versions._listen_conn
+
+    await chat.close()
+
+    assert pool.released == [listen_conn]
+    assert chat.dossier_service.get_stats()["versions"]["listening"] is False
@@ -0,0 +1,128 @@
+"""
+Unit Tests: Embedding Batcher
+
+Тестирует склейку embedding запросов:
+- Параллельные запросы уходят одним вызовом
+- Группировка по (model, dimensions)
+- Дедупликация одинаковых текстов
+- Лимит размера батча
+- Ошибка API доходит до всех ожидающих
+"""
+
+import asyncio
+
+import pytest
+
+from selfology_bot.analysis.embedding_batcher import EmbeddingBatcher
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+class FakeEmbeddingsAPI:
+    """Записывает вызовы, возвращает [len(text), dimensions]"""
+
+    def __init__(self, error: Exception = None):
+        self.calls = []
+        self.error = error
+
+    async def __call__(self, texts, model, dimensions):
+        self.calls.append((list(texts), model, dimensions))
+        await asyncio.sleep(0)
+        if self.error:
+            raise self.error
+        return [[float(len(text)), float(dimensions)] for text in texts]
+
+
+@pytest.fixture
+def api():
+    return FakeEmbeddingsAPI()
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_call(api):
+    batcher = EmbeddingBatcher(api, window_ms=5)
+
+    results = await asyncio.gather(*[
+        batcher.embed("x" * n, "text-embedding-3-small", 1536) for n in range(1, 6)
+    ])
+
+    assert len(api.calls) == 1
+    assert api.calls[0][0] == ["x", "xx", "xxx", "xxxx", "xxxxx"]
+    assert [r[0] for r in results] == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+@pytest.mark.asyncio
+async def test_groups_by_model_and_dimensions(api):
+    batcher = EmbeddingBatcher(api, window_ms=5)
+
+    await asyncio.gather(
+        batcher.embed("a", "text-embedding-3-small", 1536),
+        batcher.embed("b", "text-embedding-3-small", 512),
+        batcher.embed("c", "text-embedding-3-large", 3072),
+        batcher.embed("d", "text-embedding-3-small", 1536),
+    )
+
+    groups = {(model, dims): texts for texts, model, dims in api.calls}
+    assert groups == {
+        ("text-embedding-3-small", 1536): ["a", "d"],
+        ("text-embedding-3-small", 512): ["b"],
+        ("text-embedding-3-large", 3072): ["c"],
+    }
+
+
+@pytest.mark.asyncio
+async def test_identical_texts_are_sent_once(api):
+    batcher = EmbeddingBatcher(api, window_ms=5)
+
+    first, second = await asyncio.gather(
+        batcher.embed("same", "m", 8),
+        batcher.embed("same", "m", 8),
+    )
+
+    assert api.calls[0][0] == ["same"]
+    assert first == second
+    assert batcher.get_stats()["deduplicated"] == 1
+
+
+@pytest.mark.asyncio
+async def test_max_batch_size_flushes_early(api):
+    batcher = EmbeddingBatcher(api, window_ms=10_000, max_batch_size=2)
+
+    await asyncio.wait_for(asyncio.gather(
+        batcher.embed("a", "m", 8),
+        batcher.embed("b", "m", 8),
+    ), timeout=1)
+
+    assert len(api.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_api_error_reaches_every_waiter():
+    api = FakeEmbeddingsAPI(error=RuntimeError("rate limited"))
+    batcher = EmbeddingBatcher(api, window_ms=5)
+
+    results = await asyncio.gather(
+        batcher.embed("a", "m", 8),
+        batcher.embed("b", "m", 8),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert batcher.get_stats()["batches_failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_flush_sends_pending_immediately(api):
+    batcher = EmbeddingBatcher(api, window_ms=10_000)
+
+    task = asyncio.ensure_future(batcher.embed("a", "m", 8))
+    await asyncio.sleep(0)
+    await batcher.flush()
+
+    assert (await task) == [1.0, 8.0]
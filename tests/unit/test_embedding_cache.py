@@ -0,0 +1,130 @@
+"""
+Unit Tests: Embedding Cache
+
+Тестирует двухуровневый кэш embeddings:
+- LRU вытеснение по количеству и байтам
+- Ключ учитывает model и dimensions
+- Персистентность между экземплярами (общий SQLite)
+- Прогрев памяти при попадании с диска
+- Чистка дискового уровня по TTL и max_rows
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from selfology_bot.analysis.embedding_cache import (
+    LRUEmbeddingCache,
+    SQLiteEmbeddingStore,
+    TieredEmbeddingCache,
+    embedding_cache_key,
+)
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+@pytest.fixture
+def store_path(tmp_path):
+    return tmp_path / "embeddings.sqlite"
+
+
+def _cache(store_path=None, **memory_kwargs):
+    persistent = SQLiteEmbeddingStore(store_path) if store_path else None
+    return TieredEmbeddingCache(LRUEmbeddingCache(**memory_kwargs), persistent)
+
+
+# ============================================================================
+# LRU TESTS
+# ============================================================================
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUEmbeddingCache(max_entries=2)
+    a, b, c = (embedding_cache_key(t, "m", 4) for t in "abc")
+
+    cache.put(a, np.zeros(4, dtype=np.float32))
+    cache.put(b, np.zeros(4, dtype=np.float32))
+    cache.get(a)
+    cache.put(c, np.zeros(4, dtype=np.float32))
+
+    assert cache.get(b) is None
+    assert cache.get(a) is not None
+    assert cache.evictions == 1
+
+
+def test_lru_is_bounded_by_bytes():
+    cache = LRUEmbeddingCache(max_entries=100, max_bytes=3 * 16)
+    for i in range(5):
+        cache.put(embedding_cache_key(str(i), "m", 4), np.zeros(4, dtype=np.float32))
+
+    assert len(cache) == 3
+    assert cache.bytes_used == 48
+
+
+def test_lru_respects_ttl():
+    cache = LRUEmbeddingCache(ttl_seconds=10)
+    key = embedding_cache_key("a", "m", 4)
+    cache.put(key, np.zeros(4, dtype=np.float32), created_at=0)
+
+    assert cache.get(key) is None
+    assert len(cache) == 0
+
+
+# ============================================================================
+# TIERED TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_key_includes_model_and_dimensions():
+    cache = _cache()
+    await cache.put("text", "text-embedding-3-small", 2, [0.5, 0.25])
+
+    assert await cache.get("text", "text-embedding-3-small", 2) == [0.5, 0.25]
+    assert await cache.get("text", "text-embedding-3-large", 2) is None
+    assert await cache.get("text", "text-embedding-3-small", 3) is None
+
+
+@pytest.mark.asyncio
+async def test_persistent_tier_is_shared_between_instances(store_path):
+    writer = _cache(store_path)
+    await writer.put("narrative", "m", 3, [0.1, 0.2, 0.3])
+
+    reader = _cache(store_path)
+    vector = await reader.get("narrative", "m", 3)
+
+    assert vector == pytest.approx([0.1, 0.2, 0.3])
+    assert reader.stats["disk_hits"] == 1
+
+    # Второе чтение - уже из памяти
+    await reader.get("narrative", "m", 3)
+    assert reader.stats["memory_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_vectors_stored_as_float32(store_path):
+    cache = _cache(store_path)
+    await cache.put("a", "m", 1536, [0.0] * 1536)
+
+    assert cache.memory.bytes_used == 1536 * 4
+    assert cache.persistent.count() == 1
+
+
+def test_persistent_tier_prunes_expired_and_excess_rows(store_path):
+    store = SQLiteEmbeddingStore(store_path, ttl_seconds=100, max_rows=3, prune_every=1000)
+    now = time.time()
+    store.put(embedding_cache_key("expired", "m", 2), np.zeros(2, dtype=np.float32), now - 1000)
+    for i in range(4):
+        store.put(embedding_cache_key(str(i), "m", 2), np.zeros(2, dtype=np.float32), now + i)
+
+    assert store.prune() == 2
+    assert store.count() == 3
+    assert store.get(embedding_cache_key("0", "m", 2)) is None
+    assert store.get(embedding_cache_key("3", "m", 2)) is not None
+
+    # Чистка при открытии
+    store.put(embedding_cache_key("old", "m", 2), np.zeros(2, dtype=np.float32), now - 1000)
+    reopened = SQLiteEmbeddingStore(store_path, ttl_seconds=100, max_rows=3)
+    assert reopened.evictions == 1
+    assert TieredEmbeddingCache(LRUEmbeddingCache(), reopened).get_stats()["persistent_evictions"] == 1
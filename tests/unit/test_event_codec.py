@@ -0,0 +1,150 @@
+"""
+Unit Tests: Event Payload Codecs
+
+Тестирует кодеки payload Event Bus:
+- Round trip всех кодеков и записи старого формата (без поля codec)
+- zstd словарь: тег с dict_id, выигрыш в размере, ошибка без словаря
+- Согласование кодека с consumer groups (fallback на json)
+- Producer со словарем → consumer подгружает словарь из Redis
+"""
+
+import asyncio
+import json
+import random
+import zlib
+
+import pytest
+
+from core.event_codec import (
+    CODEC_JSON, CODEC_JSON_ZLIB, CODEC_MSGPACK, CODEC_MSGPACK_ZSTD,
+    CodecError, EventCodecs, MissingDictionaryError, negotiate_codec
+)
+
+
+TRAITS = ["openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism",
+          "resilience", "self_awareness", "empathy", "curiosity", "perfectionism"]
+
+
+def analysis_completed(rng):
+    return {
+        "event_type": "analysis.completed",
+        "user_id": rng.randint(1, 10 ** 8),
+        "answer_id": rng.randint(1, 10 ** 6),
+        "analysis_id": rng.randint(1, 10 ** 6),
+        "extracted_traits": {trait: round(rng.random(), 3) for trait in TRAITS},
+        "confidence_scores": {trait: round(rng.random(), 3) for trait in TRAITS},
+        "analysis_duration_seconds": round(rng.uniform(0.5, 20), 2),
+        "ai_model_used": rng.choice(["gpt-4o", "gpt-4o-mini", "claude-3-5-sonnet"]),
+        "trace_id": f"req_{rng.getrandbits(48):x}",
+    }
+
+
+def samples(count, seed=1):
+    rng = random.Random(seed)
+    return [analysis_completed(rng) for _ in range(count)]
+
+
+@pytest.mark.parametrize("codec", [CODEC_JSON, CODEC_MSGPACK, CODEC_MSGPACK_ZSTD])
+def test_round_trip(codec):
+    if codec != CODEC_JSON:
+        pytest.importorskip("msgpack")
+    if codec == CODEC_MSGPACK_ZSTD:
+        pytest.importorskip("zstandard")
+
+    codecs = EventCodecs(compression_threshold=100)
+    payload = samples(1)[0]
+
+    data, tag, size = codecs.encode(payload, codec)
+
+    assert codecs.decode(data, tag) == payload
+    assert size >= len(data) or tag == CODEC_MSGPACK
+
+
+def test_legacy_json_entries_and_errors():
+    codecs = EventCodecs()
+    payload = {"user_id": 1, "text": "x" * 2000}
+
+    data, tag, _ = codecs.encode(payload)
+    assert tag == CODEC_JSON_ZLIB
+    assert codecs.decode(zlib.compress(json.dumps(payload).encode()), CODEC_JSON_ZLIB) == payload
+    assert codecs.decode(b'{"a": 1}', CODEC_JSON) == {"a": 1}
+
+    with pytest.raises(CodecError):
+        codecs.decode(b"{broken", CODEC_JSON)
+    with pytest.raises(CodecError):
+        codecs.decode(b"", "avro")
+
+
+def test_dictionary_compression():
+    pytest.importorskip("msgpack")
+    pytest.importorskip("zstandard")
+
+    producer = EventCodecs()
+    dict_id = producer.add_dictionary(producer.train_dictionary(samples(500), dict_size=8192), activate=True)
+    payload = samples(1, seed=99)[0]
+
+    data, tag, size = producer.encode(payload, CODEC_MSGPACK_ZSTD)
+    plain, plain_tag, _ = EventCodecs().encode(payload, CODEC_MSGPACK_ZSTD)
+
+    assert tag == f"{CODEC_MSGPACK_ZSTD}:{dict_id}"
+    assert plain_tag == CODEC_MSGPACK  # Без словаря маленький payload не сжимается
+    assert len(data) < len(plain) * 0.8
+
+    consumer = EventCodecs()
+    with pytest.raises(MissingDictionaryError) as error:
+        consumer.decode(data, tag)
+    assert error.value.dict_id == dict_id
+
+    consumer.add_dictionary(producer.dictionaries[dict_id].as_bytes())
+    assert consumer.decode(data, tag) == payload
+
+
+def test_negotiation_falls_back_to_json():
+    local = [CODEC_MSGPACK_ZSTD, CODEC_MSGPACK, CODEC_JSON_ZLIB, CODEC_JSON]
+    legacy = [CODEC_JSON_ZLIB, CODEC_JSON]
+
+    assert negotiate_codec(CODEC_MSGPACK_ZSTD, local, [local, local]) == CODEC_MSGPACK_ZSTD
+    assert negotiate_codec(CODEC_MSGPACK_ZSTD, local, [local, [CODEC_MSGPACK, CODEC_JSON]]) == CODEC_MSGPACK
+    assert negotiate_codec(CODEC_MSGPACK_ZSTD, local, [local, legacy]) == CODEC_JSON
+    assert negotiate_codec(CODEC_MSGPACK, local, [local]) == CODEC_MSGPACK
+    assert negotiate_codec(CODEC_JSON, local, [local]) == CODEC_JSON
+
+
+@pytest.mark.asyncio
+async def test_bus_negotiates_codec_and_consumer_loads_dictionary(fake_redis):
+    pytest.importorskip("msgpack")
+    pytest.importorskip("zstandard")
+    from core.event_bus import EventBus, EventBusConfig, EventConsumer
+
+    config = EventBusConfig(codec=CODEC_MSGPACK_ZSTD)
+    producer = EventBus(redis_client=fake_redis, config=config)
+    consumer_bus = EventBus(redis_client=fake_redis, config=config)
+    consumer = EventConsumer(consumer_bus, "analysis_system", "worker_1", ordering_key=None)
+
+    await consumer_bus.register_codecs("analysis_system")
+    dict_id = await producer.store_dictionary(producer.codecs.train_dictionary(samples(500), dict_size=8192))
+
+    payload = samples(1, seed=7)[0]
+    await producer.publish("analysis.completed", payload)
+    [(stream_name, entries)] = fake_redis.streams.items()
+    message_id, fields = entries[-1]
+
+    assert fields[b"codec"] == f"{CODEC_MSGPACK_ZSTD}:{dict_id}".encode()
+    assert producer.stats["encoded_payload_bytes"] < producer.stats["total_payload_bytes"]
+
+    received = []
+
+    async def handler(event_type, data):
+        received.append(data)
+
+    consumer.handler = handler
+    consumer._dispatch(stream_name, message_id, fields)
+    while consumer._tasks:
+        await asyncio.gather(*list(consumer._tasks))
+
+    assert received == [payload]
+    assert dict_id in consumer_bus.codecs.dictionaries
+
+    # Группа без msgpack → producer возвращается к json
+    await fake_redis.hset(producer.codecs_key, "legacy_group", "json+zlib,json")
+    assert await producer.negotiate_codec() == CODEC_JSON
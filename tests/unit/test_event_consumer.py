@@ -0,0 +1,189 @@
+"""
+Unit Tests: Event Consumer
+
+Тестирует конкурентную обработку событий:
+- Медленный handler не блокирует события других ключей
+- Порядок внутри ключа (user_id) сохраняется
+- Число одновременных handler ограничено max_in_flight
+- ACK одним pipelined XACK с пачкой ID, упавшие события не подтверждаются
+- Чтение priority streams: strict, weighted, защита от голодания
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from core.domain_events import EventPriority
+from core.event_bus import EventBus, EventBusConfig, EventConsumer, PriorityReadScheduler
+
+
+NORMAL = "selfology:events:normal"
+
+
+def message(index, event_type="user.answer.submitted", **payload):
+    return (
+        f"{index}-0".encode(),
+        {b"event_type": event_type.encode(), b"payload": json.dumps(payload).encode(), b"compressed": b"0"}
+    )
+
+
+async def run_consumer(redis, streams, handler, batch_size=100, **kwargs):
+    if not isinstance(streams, dict):
+        streams = {NORMAL: streams}
+    redis.seed(streams)
+    config = EventBusConfig(consumer_block_ms=20, ack_flush_ms=10, batch_size=batch_size)
+    bus = EventBus(redis_client=redis, config=config)
+    consumer = EventConsumer(bus, "group", "worker_1", handler=handler, **kwargs)
+    consumer._running = True
+    consumer._task = asyncio.create_task(consumer._consume_loop())
+    return consumer
+
+
+async def wait_processed(consumer, count, timeout=2.0):
+    async def poll():
+        while consumer.stats["events_processed"] + consumer.stats["events_failed"] < count:
+            await asyncio.sleep(0.005)
+    await asyncio.wait_for(poll(), timeout)
+
+
+@pytest.mark.asyncio
+async def test_slow_handler_does_not_block_other_keys(fake_redis):
+    done = []
+
+    async def handler(event_type, payload):
+        if payload["user_id"] == 1:
+            await asyncio.sleep(0.3)
+        done.append(payload["user_id"])
+
+    consumer = await run_consumer(
+        fake_redis, [message(1, user_id=1)] + [message(i, user_id=i) for i in range(2, 6)],
+        handler, max_in_flight=4
+    )
+
+    await wait_processed(consumer, 4)
+    assert done == [2, 3, 4, 5]
+    assert consumer.get_stats()["in_flight"] == 1
+
+    await consumer.stop()
+    assert done[-1] == 1
+
+
+@pytest.mark.asyncio
+async def test_order_kept_within_key_and_concurrency_bounded(fake_redis):
+    seen = []
+    running = {"now": 0, "max": 0}
+
+    async def handler(event_type, payload):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.01 * (payload["seq"] % 3))
+        seen.append((payload["user_id"], payload["seq"]))
+        running["now"] -= 1
+
+    messages = [message(seq * 10 + i, user_id=i, seq=seq) for seq in range(4) for i in range(5)]
+    consumer = await run_consumer(fake_redis, messages, handler, batch_size=5, max_in_flight=3)
+
+    await wait_processed(consumer, 20)
+    await consumer.stop()
+
+    for user_id in range(5):
+        assert [seq for uid, seq in seen if uid == user_id] == [0, 1, 2, 3]
+    assert 1 < running["max"] <= 3
+
+
+@pytest.mark.asyncio
+async def test_batch_acked_in_one_round_trip(fake_redis):
+    async def handler(event_type, payload):
+        if payload.get("fail"):
+            raise RuntimeError("boom")
+
+    batch = [message(i, user_id=i) for i in range(10)]
+    batch.append(message(10, user_id=99, fail=True))
+    batch.append(message(11, event_type="other.event", user_id=5))
+    consumer = await run_consumer(fake_redis, batch, handler, max_in_flight=8, event_types=["user.answer.submitted"])
+
+    await wait_processed(consumer, 11)
+    await consumer.stop()
+
+    acked = fake_redis.acked()
+    assert sorted(acked) == sorted(f"{i}-0" for i in list(range(10)) + [11])
+    assert "10-0" not in acked
+    assert len(fake_redis.ack_calls) <= 2
+    stats = consumer.get_stats()
+    assert stats["events_acked"] == 11
+    assert stats["pending_acks"] == 0
+    assert stats["events_failed"] == 1
+    assert stats["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_strict_mode_reads_critical_before_low_flood(fake_redis):
+    seen = []
+
+    async def handler(event_type, payload):
+        seen.append(payload["priority"])
+
+    streams = {
+        "selfology:events:low": [message(i, priority="low") for i in range(200)],
+        "selfology:events:critical": [message(1000 + i, priority="critical") for i in range(5)],
+    }
+    consumer = await run_consumer(fake_redis, streams, handler, batch_size=10, ordering_key=None, priority_mode="strict")
+
+    await wait_processed(consumer, 205)
+    await consumer.stop()
+
+    assert seen[:5] == ["critical"] * 5
+    assert consumer.get_stats()["priority_mode"] == "strict"
+
+
+def make_scheduler(mode, **kwargs):
+    return PriorityReadScheduler(
+        [(priority, priority.value) for priority in EventPriority],
+        mode=mode, weights={"critical": 8, "high": 4, "normal": 2, "low": 1}, **kwargs
+    )
+
+
+def run_cycle(scheduler, budget, available):
+    """Один цикл планировщика против бесконечных (или заданных) очередей"""
+    read = {}
+    for stream_name, quota in scheduler.plan(budget):
+        count = min(quota, budget - sum(read.values()))
+        if count <= 0:
+            break
+        got = min(count, available.get(stream_name, 0))
+        available[stream_name] = available.get(stream_name, 0) - got
+        scheduler.record(stream_name, count, got)
+        read[stream_name] = read.get(stream_name, 0) + got
+    return read
+
+
+def test_weighted_mode_shares_budget_by_weight():
+    scheduler = make_scheduler("weighted")
+    available = {name: 10 ** 6 for name in scheduler.streams}
+
+    totals = {}
+    for _ in range(100):
+        for name, count in run_cycle(scheduler, 30, available).items():
+            totals[name] = totals.get(name, 0) + count
+
+    assert sum(totals.values()) == 3000
+    assert totals["low"] == pytest.approx(3000 / 15, rel=0.1)
+    assert totals["critical"] == pytest.approx(3000 * 8 / 15, rel=0.1)
+
+    # Пустые streams отдают свою долю остальным
+    read = run_cycle(scheduler, 30, {"low": 10 ** 6})
+    assert read["low"] == 30 and sum(read.values()) == 30
+
+
+def test_strict_mode_protects_low_from_starvation():
+    scheduler = make_scheduler("strict", starvation_ms=0, min_share=2)
+    available = {name: 10 ** 6 for name in scheduler.streams}
+
+    read = run_cycle(scheduler, 10, available)
+
+    assert read["low"] == 2
+    assert sum(read.values()) == 10
+
+    strict = make_scheduler("strict", starvation_ms=60_000)
+    assert run_cycle(strict, 10, dict(available)) == {"critical": 10}
@@ -0,0 +1,151 @@
+"""
+Unit Tests: Event Reclaim and Dead Letter Queue
+
+Тестирует восстановление зависших событий:
+- Упавшее событие остается в PEL и повторяется через XAUTOCLAIM
+- После max_deliveries событие уходит в DLQ с ошибкой и снимается с PEL
+- Счетчик доставок берется по каждому забранному ID, а не по диапазону PEL
+- Нераскодируемое событие уходит в DLQ сразу
+- Replay возвращает событие из DLQ в исходный stream
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from core.event_bus import EventBus, EventBusConfig, EventConsumer
+
+
+STREAM = "selfology:events:normal"
+DLQ = "selfology:events:dlq"
+
+
+def event(user_id=1):
+    return {
+        b"event_type": b"user.answer.submitted",
+        b"payload": json.dumps({"user_id": user_id}).encode(),
+        b"compressed": b"0",
+    }
+
+
+def make_consumer(redis, handler, max_deliveries=3):
+    config = EventBusConfig(claim_idle_ms=0, max_deliveries=max_deliveries)
+    bus = EventBus(redis_client=redis, config=config)
+    consumer = EventConsumer(bus, "group", "worker_1", handler=handler, priority_mode="fifo")
+    consumer._running = True
+    return consumer, bus
+
+
+async def deliver(consumer):
+    results = await consumer.event_bus.redis.xreadgroup("group", "worker_1", {STREAM: ">"}, count=100)
+    for stream_name, messages in results:
+        for message_id, data in messages:
+            consumer._dispatch(stream_name.decode(), message_id.decode(), data)
+    await settle(consumer)
+
+
+async def settle(consumer):
+    while consumer._tasks:
+        await asyncio.gather(*list(consumer._tasks), return_exceptions=True)
+    await consumer._flush_acks()
+
+
+@pytest.mark.asyncio
+async def test_failed_event_reclaimed_and_retried(fake_redis):
+    calls = []
+
+    async def handler(event_type, payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise RuntimeError("temporary")
+
+    consumer, bus = make_consumer(fake_redis, handler)
+    await fake_redis.xadd(STREAM, event())
+
+    await deliver(consumer)
+    assert len(fake_redis.pel[STREAM]) == 1
+
+    assert await consumer._reclaim_stream(STREAM) == 1
+    await settle(consumer)
+
+    assert len(calls) == 2
+    assert fake_redis.pel[STREAM] == {}
+    assert consumer.get_stats()["events_reclaimed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_poison_event_moved_to_dlq_after_max_deliveries(fake_redis):
+    async def handler(event_type, payload):
+        raise ValueError("bad payload")
+
+    consumer, bus = make_consumer(fake_redis, handler, max_deliveries=2)
+    await fake_redis.xadd(STREAM, event())
+
+    await deliver(consumer)
+    for _ in range(3):
+        await consumer._reclaim_stream(STREAM)
+        await settle(consumer)
+
+    assert fake_redis.pel[STREAM] == {}
+    [(_, dead)] = fake_redis.streams[DLQ]
+    assert dead[b"dlq_original_stream"] == STREAM.encode()
+    assert b"ValueError: bad payload" in dead[b"dlq_error"]
+    assert dead[b"dlq_deliveries"] == b"3"
+    stats = consumer.get_stats()
+    assert stats["events_dead_lettered"] == 1
+    assert stats["pending_entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_claimed_delivery_counts_ignore_other_pending(fake_redis):
+    consumer, bus = make_consumer(fake_redis, handler=None, max_deliveries=2)
+    bus.config.claim_idle_ms = 60_000
+    for user_id in (1, 2, 3):
+        await fake_redis.xadd(STREAM, event(user_id))
+    await fake_redis.xreadgroup("group", "worker_1", {STREAM: ">"}, count=10)
+
+    # 2-0 только что доставлен и не забирается, но лежит в PEL между забранными
+    pel = fake_redis.pel[STREAM]
+    for message_id in ("1-0", "3-0"):
+        pel[message_id]["delivered_at"] -= 120
+        pel[message_id]["deliveries"] = 2
+
+    assert await consumer._reclaim_stream(STREAM) == 2
+
+    dead = [fields[b"dlq_original_id"] for _, fields in fake_redis.streams[DLQ]]
+    assert sorted(dead) == [b"1-0", b"3-0"]
+    assert consumer.get_stats()["events_reclaimed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_undecodable_event_goes_to_dlq_immediately(fake_redis):
+    consumer, bus = make_consumer(fake_redis, handler=None)
+    await fake_redis.xadd(STREAM, {b"event_type": b"x", b"payload": b"{not json", b"compressed": b"0"})
+
+    await deliver(consumer)
+
+    assert fake_redis.pel[STREAM] == {}
+    assert b"decode error" in fake_redis.streams[DLQ][0][1][b"dlq_error"]
+
+
+@pytest.mark.asyncio
+async def test_replay_returns_event_to_original_stream(fake_redis):
+    async def handler(event_type, payload):
+        raise ValueError("bad payload")
+
+    consumer, bus = make_consumer(fake_redis, handler, max_deliveries=0)
+    await fake_redis.xadd(STREAM, event(user_id=7))
+    await deliver(consumer)
+    await consumer._reclaim_stream(STREAM)
+
+    assert (await bus.replay_dlq(event_type="other.event"))["replayed"] == 0
+    assert (await bus.replay_dlq(dry_run=True))["replayed"] == 1
+    assert len(fake_redis.streams[DLQ]) == 1
+
+    result = await bus.replay_dlq()
+
+    assert result == {"replayed": 1, "skipped": 0}
+    assert fake_redis.streams[DLQ] == []
+    _, replayed = fake_redis.streams[STREAM][-1]
+    assert replayed == event(user_id=7)
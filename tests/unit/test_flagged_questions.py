@@ -0,0 +1,150 @@
+"""
+Unit Tests: Flagged Questions Cache
+
+Тестирует кэш flagged вопросов:
+- Одна загрузка из БД на много запросов
+- Инкрементальное обновление по NOTIFY
+- TTL перезагрузка и invalidate
+- Ошибка загрузки не ломает выдачу вопросов
+- DAO отправляет NOTIFY в транзакции изменения флага
+"""
+
+import asyncio
+
+import pytest
+
+from selfology_bot.database.flagged_questions import FlaggedQuestionCache, flag_notification
+from selfology_bot.database.onboarding_dao import OnboardingDAO
+
+
+class FakeLoader:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        result = self.results[min(self.calls, len(self.results)) - 1]
+        if isinstance(result, Exception):
+            raise result
+        return set(result)
+
+
+def make_cache(loader, ttl_seconds=60):
+    # db_service без pool - LISTEN не открывается, работает только кэш
+    return FlaggedQuestionCache(db_service=None, loader=loader, ttl_seconds=ttl_seconds)
+
+
+@pytest.mark.asyncio
+async def test_loads_once_for_many_reads():
+    loader = FakeLoader({"q_1", "q_2"})
+    cache = make_cache(loader)
+
+    results = await asyncio.gather(*[cache.get() for _ in range(20)])
+
+    assert loader.calls == 1
+    assert all(result == {"q_1", "q_2"} for result in results)
+
+
+@pytest.mark.asyncio
+async def test_notification_updates_set_incrementally():
+    loader = FakeLoader({"q_1"})
+    cache = make_cache(loader)
+    await cache.get()
+
+    cache._on_notification(None, 1, "question_flags", flag_notification("q_7", True))
+    cache._on_notification(None, 1, "question_flags", flag_notification("q_1", False))
+
+    assert await cache.get() == {"q_7"}
+    assert loader.calls == 1
+    assert cache.get_stats()["notifications"] == 2
+
+
+@pytest.mark.asyncio
+async def test_bad_payload_forces_reload():
+    loader = FakeLoader({"q_1"}, {"q_1", "q_9"})
+    cache = make_cache(loader)
+    await cache.get()
+
+    cache._on_notification(None, 1, "question_flags", "not json")
+
+    assert await cache.get() == {"q_1", "q_9"}
+    assert loader.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_ttl_expiry_reloads():
+    loader = FakeLoader({"q_1"}, {"q_2"})
+    cache = make_cache(loader, ttl_seconds=0)
+
+    assert await cache.get() == {"q_1"}
+    assert await cache.get() == {"q_2"}
+
+
+@pytest.mark.asyncio
+async def test_load_error_keeps_previous_set():
+    loader = FakeLoader({"q_1"}, RuntimeError("db down"))
+    cache = make_cache(loader)
+    await cache.get()
+
+    cache.invalidate()
+
+    assert await cache.get() == {"q_1"}
+    assert cache.get_stats()["reload_errors"] == 1
+
+
+class RecordingConnection:
+    """Пишет каждый execute с пометкой, был ли он внутри transaction()"""
+
+    def __init__(self):
+        self.in_transaction = False
+        self.calls = []
+
+    def transaction(self):
+        conn = self
+
+        class Transaction:
+            async def __aenter__(self):
+                conn.in_transaction = True
+
+            async def __aexit__(self, *exc):
+                conn.in_transaction = False
+                return False
+
+        return Transaction()
+
+    async def execute(self, query, *args):
+        self.calls.append((query.split()[0] if "pg_notify" not in query else "NOTIFY", self.in_transaction))
+
+
+class FakeDatabase:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def get_connection(self):
+        conn = self.conn
+
+        class Acquire:
+            async def __aenter__(self):
+                return conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Acquire()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("change", [
+    lambda dao: dao.flag_question_for_admin("q_1", "42", "typo"),
+    lambda dao: dao.flag_question("q_1", "typo", 42),
+    lambda dao: dao.unflag_question("q_1"),
+])
+async def test_dao_notifies_inside_update_transaction(change):
+    conn = RecordingConnection()
+    dao = OnboardingDAO(FakeDatabase(conn))
+
+    await change(dao)
+
+    assert [name for name, _ in conn.calls][-1] == "NOTIFY"
+    assert all(in_transaction for _, in_transaction in conn.calls)
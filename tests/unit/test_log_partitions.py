@@ -0,0 +1,133 @@
+"""
+Unit Tests: Log Partitions and Rollups
+
+Тестирует партиционированное хранилище логов:
+- Записи раскладываются по дневным партициям, retention удаляет партицию целиком
+- Rollup-ы обновляются при записи, анализ и агрегация совпадают с сырыми данными
+- Старая таблица log_entries переносится в партиции
+- Потоковое чтение логов
+"""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("psutil")  # core.log_aggregation → monitoring_api (requirements-monitoring.txt)
+
+from core.log_aggregation import (
+    AggregationPeriod, LogAggregator, LogAnalyzer, LogEntry, LogStorage
+)
+
+
+NOW = datetime.now(timezone.utc).replace(minute=30, second=0, microsecond=0)
+
+
+def make_entry(minutes_ago, level="INFO", **kwargs):
+    return LogEntry(
+        timestamp=NOW - timedelta(minutes=minutes_ago),
+        level=level,
+        logger=kwargs.pop("logger", "app"),
+        message=kwargs.pop("message", f"event {minutes_ago}"),
+        **kwargs
+    )
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = LogStorage(str(tmp_path / "aggregation.db"))
+    yield storage
+    storage.close()
+
+
+def test_entries_partitioned_by_day(storage):
+    storage.store_log_entries([make_entry(0), make_entry(60 * 24 * 3), make_entry(60 * 24 * 40)])
+
+    days = [day for day, _ in storage.list_partitions()]
+    assert len(days) == 3
+
+    storage.cleanup_old_logs(retention_days=30)
+
+    assert len(storage.list_partitions()) == 2
+    # Новая запись в удаленный день пересоздает партицию
+    assert storage.store_log_entries([make_entry(60 * 24 * 40)]) == 1
+    assert len(storage.list_partitions()) == 3
+
+
+def test_analysis_answered_from_rollups(storage):
+    storage.store_log_entries([
+        make_entry(5, service="bot", user_id=1, trace_id="t1"),
+        make_entry(4, service="bot", user_id=1, trace_id="t1"),
+        make_entry(90, level="ERROR", service="api", error_code="DB_1", message="db failed 42"),
+        make_entry(95, level="ERROR", service="api", error_code="DB_1", message="db failed 43"),
+        make_entry(60 * 30, level="ERROR"),  # Вне окна 24 часов
+    ])
+
+    analysis = LogAnalyzer(storage).analyze_logs(NOW - timedelta(hours=24), NOW)
+
+    assert analysis["total_entries"] == 4
+    assert analysis["level_distribution"]["total_errors"] == 2
+    assert analysis["service_distribution"]["distribution"] == {"bot": 2, "api": 2}
+    assert analysis["error_analysis"]["error_codes"] == {"DB_1": 2}
+    assert analysis["error_analysis"]["top_patterns"] == [{"pattern": "db failed N", "count": 2}]
+    assert analysis["user_activity"]["top_active_users"] == {1: 2}
+    assert analysis["trace_analysis"]["avg_trace_duration"] == 60.0
+    assert sum(analysis["time_patterns"]["hourly_distribution"].values()) == 4
+    assert {a["name"] for a in analysis["anomalies"]} == {"high_error_rate"}
+
+
+def test_aggregation_matches_raw_entries(storage):
+    storage.store_log_entries([
+        make_entry(1, service="bot", metrics={"response_time": 0.2}, user_id=1),
+        make_entry(2, service="bot", metrics={"response_time": 0.4}, user_id=2),
+        make_entry(70, level="ERROR", error_code="E1", user_id=1),
+    ])
+    storage.store_log_entries([make_entry(3, service="bot", user_id=1)])
+
+    hourly = LogAggregator(storage).aggregate_logs(NOW - timedelta(hours=3), NOW, AggregationPeriod.HOUR)
+    daily = LogAggregator(storage).aggregate_logs(NOW - timedelta(hours=3), NOW, AggregationPeriod.DAY)
+
+    current = hourly[-1]
+    assert current.total_events == 3
+    assert current.count_by_service == {"bot": 3}
+    assert current.unique_users == 2
+    assert current.avg_response_time == pytest.approx(0.3)
+    assert sum(a.total_events for a in daily) == 4
+    assert sum(a.error_patterns.get("E1", 0) for a in daily) == 1
+
+
+def test_legacy_table_migrated(tmp_path):
+    db_path = tmp_path / "aggregation.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE log_entries (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, level TEXT, "
+            "logger TEXT, message TEXT, service TEXT, user_id INTEGER, trace_id TEXT, span_id TEXT, "
+            "error_code TEXT, event_type TEXT, context TEXT, tags TEXT, metrics TEXT, raw_line TEXT, "
+            "created_at TEXT DEFAULT CURRENT_TIMESTAMP)"
+        )
+        conn.executemany(
+            "INSERT INTO log_entries (timestamp, level, logger, message, context, tags, metrics, raw_line) "
+            "VALUES (?, 'INFO', 'app', 'old', '{}', '{}', '{}', '')",
+            [((NOW - timedelta(minutes=i)).isoformat(),) for i in range(5)]
+        )
+
+    storage = LogStorage(str(db_path))
+    try:
+        logs = storage.query_logs(NOW - timedelta(hours=1), NOW)
+        assert len(logs) == 5
+        assert [log.timestamp for log in logs] == sorted((log.timestamp for log in logs), reverse=True)
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'log_entries'").fetchone() is None
+    finally:
+        storage.close()
+
+
+def test_iter_logs_streams_across_partitions(storage):
+    storage.store_log_entries([make_entry(m) for m in (0, 60 * 24, 60 * 48)])
+
+    stream = storage.iter_logs(NOW - timedelta(days=3), NOW, newest_first=False)
+
+    first = next(stream)
+    assert first.timestamp == NOW - timedelta(days=2)
+    assert len(list(stream)) == 2
+    assert len(storage.query_logs(NOW - timedelta(days=3), NOW, limit=2)) == 2
@@ -0,0 +1,83 @@
+"""
+Unit Tests: Log Storage Writer
+
+Тестирует запись логов единственным writer-потоком:
+- WAL режим и одна транзакция на батч
+- Все строки из очереди записаны, метрики лага и батчей
+- Полная очередь не теряет строки (tailer ждет)
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+pytest.importorskip("psutil")  # core.log_aggregation → monitoring_api (requirements-monitoring.txt)
+
+from core.log_aggregation import LogCollector, LogParser, LogStorage
+
+
+LINE = "2026-10-16 12:00:00,000 - app.module - INFO - message {}"
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = LogStorage(str(tmp_path / "aggregation.db"))
+    yield storage
+    storage.close()
+
+
+def count_rows(storage):
+    with sqlite3.connect(storage.db_path) as conn:
+        return sum(
+            conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for _, table in storage.list_partitions()
+        )
+
+
+def test_batch_written_in_wal_mode(storage):
+    parser = LogParser()
+    entries = [parser.parse_log_line(LINE.format(i)) for i in range(500)]
+
+    assert storage.store_log_entries(entries) == 500
+
+    with sqlite3.connect(storage.db_path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert count_rows(storage) == 500
+    assert storage.stats["batches_written"] == 1
+
+
+def test_writer_drains_queue_in_batches(storage):
+    collector = LogCollector(LogParser(), storage, batch_size=100, max_batch_delay=0.05)
+    collector.start_collection()
+
+    for i in range(1000):
+        assert collector.enqueue_line(LINE.format(i))
+    collector.processing_queue.join()
+    collector.stop_collection()
+
+    stats = collector.get_stats()
+    assert count_rows(storage) == 1000
+    assert stats["lines_processed"] == 1000
+    assert stats["batches"] >= 10
+    assert stats["max_queue_lag"] >= stats["last_queue_lag"] >= 0
+    assert stats["queue_depth"] == 0
+
+
+def test_full_queue_does_not_drop_lines(storage):
+    collector = LogCollector(LogParser(), storage, batch_size=10, max_batch_delay=0.01, queue_size=5)
+    collector.running = True  # Очередь без writer - producer упрется в maxsize
+
+    producer = threading.Thread(target=lambda: [collector.enqueue_line(LINE.format(i)) for i in range(50)])
+    producer.start()
+    producer.join(timeout=1.5)
+    assert producer.is_alive()
+    assert collector.stats["queue_full_waits"] >= 1
+
+    collector.writer_thread = threading.Thread(target=collector._writer_loop, daemon=True)
+    collector.writer_thread.start()
+    producer.join(timeout=10)
+    collector.processing_queue.join()
+    collector.stop_collection()
+
+    assert count_rows(storage) == 50
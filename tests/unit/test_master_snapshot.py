@@ -0,0 +1,106 @@
+"""
+Unit Tests: Master Snapshot
+
+Тестирует бинарный снимок master базы:
+- Снимок дает те же результаты поиска, что и JSON
+- Ленивое декодирование строк
+- Инвалидация по хэшу содержимого
+- Переводы накладываются на структуру основной базы
+"""
+
+import json
+import shutil
+
+import pytest
+
+from intelligent_question_core.api.master_api import SelfologyMasterAPI
+from intelligent_question_core.api.snapshot import (
+    compile_snapshot,
+    load_snapshot,
+    snapshot_path,
+    DATA_DIR,
+)
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Копия master баз во временной директории"""
+    for name in ("selfology_master.json", "selfology_master_en.json"):
+        shutil.copy(f"{DATA_DIR}/{name}", tmp_path / name)
+    return tmp_path
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_snapshot_matches_json(data_dir):
+    master_file = str(data_dir / "selfology_master.json")
+    json_api = SelfologyMasterAPI(master_file, use_snapshot=False)
+
+    compile_snapshot(master_file)
+    snap_api = SelfologyMasterAPI(master_file)
+
+    assert isinstance(json_api.questions_by_id, dict)
+    assert not isinstance(snap_api.questions_by_id, dict)
+    assert snap_api.stats == json_api.stats
+    assert snap_api.get_programs() == json_api.get_programs()
+    assert snap_api.search_questions(domain="IDENTITY", min_safety=4) == \
+        json_api.search_questions(domain="IDENTITY", min_safety=4)
+    assert snap_api.get_deep_questions() == json_api.get_deep_questions()
+
+
+def test_rows_are_decoded_lazily(data_dir):
+    master_file = str(data_dir / "selfology_master.json")
+    compile_snapshot(master_file)
+    snapshot = load_snapshot(master_file)
+
+    assert snapshot.questions.decoded_count == 0
+    first_id = snapshot.ids[0]
+    question = snapshot.questions_by_id[first_id]
+
+    assert question["id"] == first_id
+    assert question["program"] in snapshot.programs_list
+    assert snapshot.questions.decoded_count == 1
+    assert snapshot.questions_by_id[first_id] is question
+
+
+def test_missing_snapshot_is_built_on_first_load(data_dir):
+    master_file = str(data_dir / "selfology_master.json")
+    assert load_snapshot(master_file) is None
+
+    SelfologyMasterAPI(master_file)
+
+    assert load_snapshot(master_file) is not None
+
+
+def test_content_change_invalidates_snapshot(data_dir):
+    master_file = data_dir / "selfology_master.json"
+    compile_snapshot(str(master_file))
+
+    data = json.loads(master_file.read_text(encoding="utf-8"))
+    data["version"] = "changed"
+    master_file.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    assert load_snapshot(str(master_file)) is None
+    api = SelfologyMasterAPI(str(master_file))
+    assert api.get_statistics()["version"] == "changed"
+    assert load_snapshot(str(master_file)).data["version"] == "changed"
+
+
+def test_translation_uses_base_ids_and_metadata(data_dir):
+    ru = SelfologyMasterAPI(str(data_dir / "selfology_master.json"), use_snapshot=False)
+    en_file = str(data_dir / "selfology_master_en.json")
+    compile_snapshot(en_file)
+    en = SelfologyMasterAPI(en_file)
+
+    assert snapshot_path(en_file).endswith("selfology_master_en.snap")
+    assert en.stats["questions"] == ru.stats["questions"]
+
+    q_id = next(iter(ru.questions_by_id))
+    assert en.get_question(q_id)["metadata"] == ru.get_question(q_id)["metadata"]
+    assert en.get_question(q_id)["text"] != ru.get_question(q_id)["text"]
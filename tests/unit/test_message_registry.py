@@ -0,0 +1,79 @@
+"""
+Unit Tests: Template Registry
+
+Тестирует скомпилированные шаблоны MessageService:
+- Шаблон компилируется один раз при загрузке, не при каждом рендере
+- Рендер работает с нехэшируемыми переменными
+- Клавиатура собирается один раз, перезагрузка подменяет набор целиком
+- Ошибки синтаксиса и отсутствующие ключи
+"""
+
+import json
+
+import pytest
+
+from selfology_bot.messages.service import MessageService
+
+
+def write_templates(root, greeting="Привет, {{ name }}!"):
+    locale_dir = root / "ru"
+    locale_dir.mkdir(exist_ok=True)
+    (locale_dir / "general.json").write_text(json.dumps({
+        "greeting": {"template": greeting, "variables": ["name"]},
+        "items": {"template": "{% for i in items %}{{ i }};{% endfor %}"},
+        "broken": {"template": "{% if %}"},
+        "keyboards": {
+            "main": {"buttons": [[{"text": "Старт", "callback_data": "start"}]]}
+        }
+    }), encoding="utf-8")
+
+
+@pytest.fixture
+def service(tmp_path):
+    write_templates(tmp_path)
+    return MessageService(templates_dir=str(tmp_path))
+
+
+def test_templates_compiled_once(service, monkeypatch):
+    calls = []
+    original = service.jinja_env.from_string
+    monkeypatch.setattr(service.jinja_env, "from_string", lambda *a, **kw: calls.append(a) or original(*a, **kw))
+
+    for name in ("Аня", "Борис", "Вера"):
+        assert service.get_message("greeting", name=name) == f"Привет, {name}!"
+
+    assert calls == []
+
+
+def test_unhashable_kwargs_render(service):
+    assert service.get_message("items", items=["a", "b"]) == "a;b;"
+
+
+def test_reload_swaps_templates_and_keyboards(service, tmp_path):
+    keyboard = service.get_keyboard("main")
+    assert service.get_keyboard("main") is keyboard
+    assert keyboard.inline_keyboard[0][0].callback_data == "start"
+
+    write_templates(tmp_path, greeting="Здравствуйте, {{ name }}")
+    assert service.get_message("greeting", name="Аня") == "Привет, Аня!"
+
+    service.reload_templates()
+
+    assert service.get_message("greeting", name="Аня") == "Здравствуйте, Аня"
+    assert service.get_keyboard("main") is not keyboard
+
+
+def test_errors_and_fallbacks(service):
+    assert service.get_message("broken").startswith("[TEMPLATE_ERROR:")
+    assert service.get_message("missing") == "[MISSING: ru.general.missing]"
+    # Fallback: en → ru, другая категория той же локали
+    assert service.get_message("greeting", locale="en", name="Ann") == "Привет, Ann!"
+    assert service.get_message("greeting", category="chat", name="Ann") == "Привет, Ann!"
+    assert service.get_keyboard("nope") is None
+
+
+def test_import_templates_replaces_locale(service):
+    service.import_templates({"messages": {"general": {"greeting": {"template": "Hi {{ name }}"}}}}, locale="ru")
+
+    assert service.get_message("greeting", name="Ann") == "Hi Ann"
+    assert service.get_keyboard("main") is not None
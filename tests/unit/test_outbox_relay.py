@@ -0,0 +1,267 @@
+"""
+Unit Tests: Outbox Relay
+
+Тестирует batch обработку outbox:
+- Весь batch публикуется одним publish_many
+- Статусы обновляются bulk запросами по группам
+- DLQ после max_retries
+- Fallback на publish для event bus без batch API
+- Пробуждение по NOTIFY
+- LISTEN переоткрывается после обрыва соединения
+- OutboxPublisher.publish_batch одним INSERT
+"""
+
+import asyncio
+
+import pytest
+
+from core.outbox_pattern import OutboxPublisher, OutboxRelay, OutboxStatus
+
+
+class FakeTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+        self.listeners = {}
+        self.termination_listeners = []
+        self.closed = False
+
+    def transaction(self):
+        return FakeTransaction()
+
+    async def fetch(self, query, *args):
+        assert "FOR UPDATE SKIP LOCKED" in query
+        rows, self.rows = self.rows, []
+        return rows
+
+    async def execute(self, query, *args):
+        self.executed.append((" ".join(query.split()), args))
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    async def remove_listener(self, channel, callback):
+        self.listeners.pop(channel, None)
+
+    def add_termination_listener(self, callback):
+        self.termination_listeners.append(callback)
+
+    def is_closed(self):
+        return self.closed
+
+    def terminate(self):
+        self.closed = True
+        for callback in self.termination_listeners:
+            callback(self)
+
+
+class FakeAcquire:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __await__(self):
+        async def get():
+            return self.conn
+        return get().__await__()
+
+    async def __aenter__(self):
+        return self.conn
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+        self.released = 0
+
+    def acquire(self):
+        return FakeAcquire(self.conn)
+
+    async def release(self, conn):
+        self.released += 1
+
+
+class BatchEventBus:
+    def __init__(self, fail_types=()):
+        self.fail_types = set(fail_types)
+        self.batches = []
+
+    async def publish_many(self, events):
+        self.batches.append(events)
+        return [
+            RuntimeError("redis down") if event["event_type"] in self.fail_types else f"{n}-0"
+            for n, event in enumerate(events)
+        ]
+
+
+class SingleEventBus:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, event_type, payload, trace_id=None):
+        self.published.append(event_type)
+        return "1-0"
+
+
+def row(event_id, event_type, retry_count=0):
+    return {
+        "id": event_id,
+        "event_type": event_type,
+        "payload": '{"user_id": 1}',
+        "retry_count": retry_count,
+        "created_at": None,
+        "trace_id": None,
+    }
+
+
+def updates(conn):
+    return {query.split()[0] + ":" + ("failed" if OutboxStatus.FAILED.value in args else
+                                      "published" if OutboxStatus.PUBLISHED.value in args else "retry"): args
+            for query, args in conn.executed}
+
+
+@pytest.mark.asyncio
+async def test_batch_published_in_one_call_with_bulk_updates():
+    conn = FakeConnection([row(1, "user.created"), row(2, "profile.updated"), row(3, "bad.event")])
+    bus = BatchEventBus(fail_types={"bad.event"})
+    relay = OutboxRelay(FakePool(conn), bus, max_retries=5, listen=False)
+
+    processed = await relay._relay_batch()
+
+    assert processed == 3
+    assert len(bus.batches) == 1
+    assert bus.batches[0][0]["payload"] == {"user_id": 1}
+    assert len(conn.executed) == 2
+    result = updates(conn)
+    assert result["UPDATE:published"][1] == [1, 2]
+    assert result["UPDATE:retry"][0] == [3]
+    assert relay.stats["events_processed"] == 2
+    assert relay.stats["total_retries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_last_retry_moves_to_dlq():
+    conn = FakeConnection([row(7, "bad.event", retry_count=2)])
+    relay = OutboxRelay(FakePool(conn), BatchEventBus(fail_types={"bad.event"}), max_retries=3, listen=False)
+
+    await relay._relay_batch()
+
+    result = updates(conn)
+    assert result["UPDATE:failed"][1] == [7]
+    assert "redis down" in result["UPDATE:failed"][2][0]
+    assert relay.stats["events_failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fallback_to_single_publish():
+    conn = FakeConnection([row(1, "user.created"), row(2, "profile.updated")])
+    bus = SingleEventBus()
+    relay = OutboxRelay(FakePool(conn), bus, listen=False)
+
+    await relay._relay_batch()
+
+    assert sorted(bus.published) == ["profile.updated", "user.created"]
+    assert updates(conn)["UPDATE:published"][1] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_empty_outbox_does_nothing():
+    conn = FakeConnection([])
+    relay = OutboxRelay(FakePool(conn), BatchEventBus(), listen=False)
+
+    assert await relay._relay_batch() == 0
+    assert conn.executed == []
+
+
+@pytest.mark.asyncio
+async def test_notify_wakes_relay_before_polling_interval():
+    conn = FakeConnection([])
+    pool = FakePool(conn)
+    bus = BatchEventBus()
+    relay = OutboxRelay(pool, bus, polling_interval=30, workers=2)
+
+    await relay.start()
+    await asyncio.sleep(0.01)
+    assert relay.get_stats()["listening"]
+
+    conn.rows = [row(1, "user.created")]
+    conn.listeners["event_outbox"](conn, 1, "event_outbox", "")
+    await asyncio.sleep(0.05)
+
+    assert relay.stats["events_processed"] == 1
+    assert relay.stats["notifications"] == 1
+
+    await relay.stop()
+    assert pool.released == 1
+    assert conn.listeners == {}
+
+
+@pytest.mark.asyncio
+async def test_listener_reconnects_after_connection_loss():
+    lost = FakeConnection([])
+    pool = FakePool(lost)
+    relay = OutboxRelay(pool, BatchEventBus(), polling_interval=30)
+
+    await relay.start()
+    await asyncio.sleep(0.01)
+
+    fresh = FakeConnection([row(1, "user.created")])
+    pool.conn = fresh
+    lost.terminate()
+    assert not relay.get_stats()["listening"]
+
+    # Обрыв будит worker: он выбирает outbox и переоткрывает LISTEN
+    await asyncio.sleep(0.05)
+
+    assert relay.stats["events_processed"] == 1
+    assert relay.get_stats()["listening"]
+    assert relay.get_stats()["listener_lost"] == 1
+    assert pool.released == 1
+    assert "event_outbox" in fresh.listeners
+
+    await relay.stop()
+    assert pool.released == 2
+
+
+class InsertConnection:
+    def __init__(self):
+        self.queries = []
+
+    async def fetch(self, query, *args):
+        self.queries.append((" ".join(query.split()), args))
+        # RETURNING не обязан сохранять порядок строк
+        return [{"id": 100 + n} for n in reversed(range(len(args[0])))]
+
+
+@pytest.mark.asyncio
+async def test_publish_batch_single_insert():
+    conn = InsertConnection()
+    publisher = OutboxPublisher()
+
+    ids = await publisher.publish_batch(conn, [
+        ("user.created", {"user_id": 1}),
+        ("profile.updated", {"user_id": 1, "traits": ["openness"]}, "req_1"),
+    ])
+
+    assert ids == [100, 101]
+    [(query, args)] = conn.queries
+    assert query.startswith("INSERT INTO selfology.event_outbox")
+    assert "unnest($1::text[], $2::text[], $3::text[])" in query
+    assert args == (
+        ["user.created", "profile.updated"],
+        ['{"user_id": 1}', '{"user_id": 1, "traits": ["openness"]}'],
+        [None, "req_1"],
+        OutboxStatus.PENDING.value,
+    )
+    assert await publisher.publish_batch(conn, []) == []
+    assert len(conn.queries) == 1
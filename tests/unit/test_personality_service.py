@@ -0,0 +1,122 @@
+"""
+Unit Tests: PersonalityService
+
+Тестирует загрузку личности из Qdrant:
+- Все коллекции читаются одновременно
+- Векторы не запрашиваются, если не нужны
+- Таймаут на всю загрузку: медленная коллекция не держит ответ
+- Кэш объединенного результата: LRU лимит и invalidate (в т.ч. после записи векторов)
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from selfology_bot.services.personality_service import PersonalityService, invalidate_personality_cache
+
+
+class FakeAsyncQdrant:
+    def __init__(self, delay=0.05, slow_collections=()):
+        self.delay = delay
+        self.slow_collections = set(slow_collections)
+        self.retrieve_calls = []
+        self.scroll_calls = 0
+
+    async def retrieve(self, collection_name, ids, with_vectors, with_payload):
+        self.retrieve_calls.append((collection_name, with_vectors))
+        await asyncio.sleep(10 if collection_name in self.slow_collections else self.delay)
+        payload = {
+            "personality_profiles": {"traits": {"big_five": {"openness": 0.8}}, "completeness_score": 0.6},
+            "digital_personality_structured": {"interests": ["music"]},
+        }.get(collection_name, {})
+        return [SimpleNamespace(payload=payload, vector=[0.1] if with_vectors else None)]
+
+    async def scroll(self, **kwargs):
+        self.scroll_calls += 1
+        await asyncio.sleep(self.delay)
+        point = SimpleNamespace(payload={"created_at": "2026-01-01", "breakthrough_info": {"kind": "insight"}})
+        return [point], None
+
+
+@pytest.mark.asyncio
+async def test_collections_are_read_concurrently_without_vectors():
+    client = FakeAsyncQdrant(delay=0.05)
+    service = PersonalityService(client=client)
+
+    start = time.monotonic()
+    personality = await service.get_personality_for_chat(42)
+    elapsed = time.monotonic() - start
+
+    assert personality["big_five"] == {"openness": 0.8}
+    assert personality["interests"] == ["music"]
+    assert len(personality["breakthrough_moments"]) == 1
+    assert len(client.retrieve_calls) == 4
+    assert all(with_vectors is False for _, with_vectors in client.retrieve_calls)
+    assert elapsed < 0.2  # одно ожидание, а не пять подряд
+
+
+@pytest.mark.asyncio
+async def test_slow_collection_is_bounded_by_timeout():
+    client = FakeAsyncQdrant(delay=0, slow_collections={"digital_personality_narrative"})
+    service = PersonalityService(client=client, timeout_seconds=0.1)
+
+    start = time.monotonic()
+    personality = await service.get_full_personality(42)
+    elapsed = time.monotonic() - start
+
+    assert personality.big_five == {"openness": 0.8}
+    assert personality.narrative_text is None
+    assert elapsed < 0.5
+    assert service.stats["timeouts"] == 1
+
+    # Неполный результат не кэшируется
+    await service.get_full_personality(42)
+    assert service.stats["cache_hits"] == 0
+
+
+@pytest.mark.asyncio
+async def test_merged_result_cached_until_invalidated():
+    client = FakeAsyncQdrant(delay=0)
+    service = PersonalityService(client=client)
+
+    first = await service.get_full_personality(42)
+    second = await service.get_full_personality(42)
+    assert first is second
+    assert len(client.retrieve_calls) == 4
+
+    service.invalidate(42)
+    await service.get_full_personality(42)
+    assert len(client.retrieve_calls) == 8
+
+    service.invalidate()
+    await service.get_full_personality(42)
+    assert len(client.retrieve_calls) == 12
+
+
+@pytest.mark.asyncio
+async def test_vectors_requested_only_when_needed():
+    client = FakeAsyncQdrant(delay=0)
+    service = PersonalityService(client=client)
+
+    personality = await service.get_full_personality(42, include_vectors=True, include_evolution=False)
+
+    assert set(personality.vectors) == {"structured", "narrative", "profile", "quick"}
+    assert client.scroll_calls == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_is_lru_bounded_and_invalidated_by_writers():
+    client = FakeAsyncQdrant(delay=0)
+    service = PersonalityService(client=client, max_cache_entries=2)
+
+    for user_id in (1, 2, 1, 3):
+        await service.get_full_personality(user_id)
+
+    # 2 вытеснен как давно не использованный, 1 остался
+    assert service.stats["cache_evictions"] == 1
+    assert [key[0] for key in service._cache] == [1, 3]
+
+    invalidate_personality_cache(3)
+    assert [key[0] for key in service._cache] == [1]
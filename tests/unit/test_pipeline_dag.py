@@ -0,0 +1,102 @@
+"""
+Unit Tests: Pipeline DAG
+
+Тестирует исполнитель стадий deep analysis:
+- Независимые стадии выполняются параллельно
+- Зависимые стадии получают результаты предыдущих
+- Упавшая стадия пропускает только свои зависимости
+- Тайминги стадий
+- Валидация графа
+"""
+
+import asyncio
+
+import pytest
+
+from selfology_bot.services.onboarding.pipeline_dag import PipelineDAG, StageSkipped
+
+
+def sleeper(value, delay):
+    async def stage(results):
+        await asyncio.sleep(delay)
+        return value
+    return stage
+
+
+@pytest.mark.asyncio
+async def test_independent_stages_run_concurrently():
+    dag = PipelineDAG()
+    dag.add("analyze", sleeper("analysis", 0.05))
+    dag.add("extract", sleeper("traits", 0.05))
+    dag.add("vectorize", sleeper(True, 0.05), depends_on=["analyze"])
+
+    run = await dag.run()
+
+    assert run.results == {"analyze": "analysis", "extract": "traits", "vectorize": True}
+    # Самая длинная цепочка (analyze → vectorize), а не сумма трех стадий
+    assert run.total_ms < 140
+    assert set(run.timings_ms) == {"analyze", "extract", "vectorize"}
+
+
+@pytest.mark.asyncio
+async def test_dependencies_see_previous_results():
+    dag = PipelineDAG()
+    dag.add("analyze", sleeper({"traits": 5}, 0))
+
+    async def save(results):
+        return results["analyze"]["traits"] * 2
+
+    dag.add("save", save, depends_on=["analyze"])
+
+    run = await dag.run()
+
+    assert run.results["save"] == 10
+
+
+@pytest.mark.asyncio
+async def test_failure_skips_only_dependents():
+    dag = PipelineDAG()
+
+    async def broken(results):
+        raise RuntimeError("llm timeout")
+
+    dag.add("extract", broken)
+    dag.add("analyze", sleeper("analysis", 0))
+    dag.add("update", sleeper(True, 0), depends_on=["analyze", "extract"])
+    dag.add("vectorize", sleeper(True, 0), depends_on=["analyze"])
+
+    run = await dag.run()
+
+    assert isinstance(run.error("extract"), RuntimeError)
+    assert isinstance(run.error("update"), StageSkipped)
+    assert run.error("update").dependency == "extract"
+    assert run.ok("vectorize")
+    assert "update" not in run.timings_ms
+
+
+@pytest.mark.asyncio
+async def test_cancellation_cancels_all_stages():
+    dag = PipelineDAG()
+    started = asyncio.Event()
+
+    async def slow(results):
+        started.set()
+        await asyncio.sleep(10)
+
+    dag.add("slow", slow)
+    task = asyncio.ensure_future(dag.run())
+    await started.wait()
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+def test_graph_validation():
+    dag = PipelineDAG()
+    dag.add("analyze", sleeper(1, 0))
+
+    with pytest.raises(ValueError):
+        dag.add("analyze", sleeper(2, 0))
+    with pytest.raises(ValueError):
+        dag.add("vectorize", sleeper(3, 0), depends_on=["missing"])
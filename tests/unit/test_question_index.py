@@ -0,0 +1,139 @@
+"""
+Unit Tests: Question Bitmap Index
+
+Тестирует битовые индексы SelfologyMasterAPI:
+- Совпадение результатов с линейной фильтрацией
+- Порядок результатов = порядок master базы
+- Фильтр energy и пороги безопасности
+- Подсчет без материализации
+"""
+
+import pytest
+
+from intelligent_question_core.api.master_api import SelfologyMasterAPI
+from intelligent_question_core.api.question_index import QuestionBitmapIndex, iter_bits
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+@pytest.fixture(scope="module")
+def api():
+    """Master API на реальной базе"""
+    return SelfologyMasterAPI()
+
+
+@pytest.fixture
+def questions():
+    """Маленький набор вопросов с метаданными"""
+    def q(qid, program, domain=None, depth=None, energy=None, safety=None):
+        question = {"id": qid, "program": program, "cluster_type": "Foundation"}
+        if domain:
+            question["metadata"] = {
+                "classification": {"domain": domain, "depth_level": depth, "energy_dynamic": energy},
+                "psychology": {"safety_level": safety},
+            }
+        return question
+
+    return [
+        q("q1", "A", "IDENTITY", "SURFACE", "OPENING", "5"),
+        q("q2", "A", "WORK", "CONSCIOUS", "NEUTRAL", 4),
+        q("q3", "B"),
+        q("q4", "B", "IDENTITY", "EDGE", "HEAVY", "2"),
+    ]
+
+
+def _linear(api, domain=None, depth_level=None, energy=None, min_safety=None):
+    """Эталонная линейная фильтрация"""
+    result = []
+    for q in api.questions_by_id.values():
+        meta = q.get("metadata") or {}
+        cls = meta.get("classification", {})
+        if domain and cls.get("domain") != domain:
+            continue
+        if depth_level and cls.get("depth_level") != depth_level:
+            continue
+        if energy and cls.get("energy_dynamic") != energy:
+            continue
+        if min_safety and int(meta.get("psychology", {}).get("safety_level", 0)) < min_safety:
+            continue
+        result.append(q)
+    return result
+
+
+# ============================================================================
+# INDEX TESTS
+# ============================================================================
+
+def test_iter_bits_ascending():
+    assert list(iter_bits(0b101001)) == [0, 3, 5]
+    assert list(iter_bits(0)) == []
+
+
+def test_query_intersects_filters(questions):
+    index = QuestionBitmapIndex(questions)
+
+    bits = index.query(domain="IDENTITY")
+    assert [q["id"] for q in index.materialize(bits)] == ["q1", "q4"]
+
+    bits = index.query(domain="IDENTITY", min_safety=4)
+    assert [q["id"] for q in index.materialize(bits)] == ["q1"]
+
+    bits = index.query(program="A", energy="NEUTRAL")
+    assert [q["id"] for q in index.materialize(bits)] == ["q2"]
+
+
+def test_query_unknown_value_is_empty(questions):
+    index = QuestionBitmapIndex(questions)
+    assert index.query(domain="UNKNOWN") == 0
+    assert index.materialize(index.query(program="A", depth_level="CORE")) == []
+
+
+def test_has_metadata_filter(questions):
+    index = QuestionBitmapIndex(questions)
+    assert [q["id"] for q in index.materialize(index.query(has_metadata=False))] == ["q3"]
+    assert index.count(index.query(has_metadata=True)) == 3
+
+
+def test_safety_thresholds(questions):
+    index = QuestionBitmapIndex(questions)
+    assert index.count(index.min_safety(0)) == 4
+    assert index.count(index.min_safety(2)) == 3
+    assert index.count(index.min_safety(5)) == 1
+    assert index.min_safety(6) == 0
+
+
+# ============================================================================
+# MASTER API TESTS
+# ============================================================================
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"domain": "IDENTITY"},
+    {"depth_level": "CONSCIOUS"},
+    {"energy": "NEUTRAL", "depth_level": "SURFACE"},
+    {"energy": "HEAVY"},
+    {"min_safety": 4},
+    {"domain": "RELATIONSHIPS", "depth_level": "EDGE", "min_safety": 2},
+])
+def test_search_matches_linear_scan(api, filters):
+    assert api.search_questions(**filters) == _linear(api, **filters)
+
+
+def test_search_by_program_and_type(api):
+    program = api.get_programs()[0]
+    expected = [q for q in api.get_program_questions(program) if q["cluster_type"] == "Foundation"]
+
+    assert api.search_questions(program=program, cluster_type="Foundation") == expected
+    assert api.count_questions(program=program, cluster_type="Foundation") == len(expected)
+
+
+def test_deep_questions_have_no_duplicates(api):
+    deep = api.get_deep_questions()
+    ids = [q["id"] for q in deep]
+
+    assert len(ids) == len(set(ids))
+    for q in deep:
+        depth = (q.get("metadata") or {}).get("classification", {}).get("depth_level")
+        assert q["cluster_type"] == "Integration" or depth in ("SHADOW", "CORE")
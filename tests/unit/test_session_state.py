@@ -0,0 +1,124 @@
+"""
+Unit Tests: Session State
+
+Тестирует снимки сессии онбординга:
+- Снимок не видит ответов, добавленных после него
+- Элементы истории и вопросы read-only
+- Срезы и отрицательные индексы как у list
+- Снимок не зависит от последующих изменений сессии
+- Замороженная история совместима с QuestionRouter и json
+"""
+
+import json
+import pickle
+
+import pytest
+
+from selfology_bot.services.onboarding.question_router import QuestionRouter
+
+from selfology_bot.services.onboarding.session_state import (
+    AppendOnlyHistory,
+    ensure_history,
+    freeze_question,
+    snapshot_session,
+)
+
+
+@pytest.fixture
+def session():
+    return {
+        "user_id": 1,
+        "session_id": 10,
+        "question_history": AppendOnlyHistory(),
+        "answer_history": AppendOnlyHistory(),
+        "current_question": freeze_question({"id": "q1", "classification": {"domain": "IDENTITY"}}),
+        "router_events": [],
+    }
+
+
+def test_snapshot_is_isolated_from_later_answers(session):
+    session["answer_history"].append({"answer": "first", "question_id": "q1"})
+    snapshot = snapshot_session(session)
+
+    session["answer_history"].append({"answer": "second", "question_id": "q2"})
+    session["current_question"] = freeze_question({"id": "q3"})
+
+    assert len(snapshot["answer_history"]) == 1
+    assert [item["answer"] for item in snapshot["answer_history"]] == ["first"]
+    assert snapshot["current_question"]["id"] == "q1"
+    assert len(session["answer_history"]) == 2
+
+
+def test_snapshot_is_read_only(session):
+    session["answer_history"].append({"answer": "first"})
+    snapshot = snapshot_session(session)
+
+    with pytest.raises(TypeError):
+        snapshot["session_id"] = 11
+    with pytest.raises(TypeError):
+        snapshot["answer_history"][0]["answer"] = "changed"
+    with pytest.raises(TypeError):
+        snapshot["current_question"]["id"] = "other"
+    assert not hasattr(snapshot["answer_history"], "append")
+
+
+def test_snapshot_skips_router_events(session):
+    session["router_events"].append({"event": "selected"})
+
+    assert "router_events" not in snapshot_session(session)
+
+
+def test_history_behaves_like_list_for_readers():
+    history = AppendOnlyHistory([{"answer": str(n)} for n in range(5)])
+    view = history.snapshot()
+    history.append({"answer": "5"})
+
+    assert [item["answer"] for item in view[-3:]] == ["2", "3", "4"]
+    assert view[-1]["answer"] == "4"
+    assert len(history) == 6
+    with pytest.raises(IndexError):
+        view[5]
+    assert not AppendOnlyHistory()
+
+
+def test_ensure_history_converts_plain_lists():
+    session = {"answer_history": [{"answer": "restored"}], "question_history": None}
+
+    answers = ensure_history(session, "answer_history")
+    questions = ensure_history(session, "question_history")
+
+    assert isinstance(session["answer_history"], AppendOnlyHistory)
+    assert answers[0]["answer"] == "restored"
+    assert len(questions) == 0
+
+
+def test_freeze_question_keeps_core_reference():
+    core_question = {"id": "q1", "text": "Кто вы?"}
+    frozen = freeze_question(core_question)
+
+    assert frozen["text"] == "Кто вы?"
+    assert freeze_question(None) is None
+    with pytest.raises(TypeError):
+        frozen["text"] = "changed"
+
+
+def test_frozen_history_is_still_a_dict_for_router():
+    answers = [{"answer": "a" * 120, "question_id": "q1"}, {"answer": "b" * 80, "question_id": "q2"}]
+    questions = [{"id": "q1"}, {"id": "q2"}]
+    answer_history = AppendOnlyHistory(answers)
+    question_history = AppendOnlyHistory(questions)
+
+    # Как orchestrator собирает history для select_next_question
+    frozen = [{"question": question_history[i], "answer": answer_history[i]} for i in range(2)]
+    plain = [{"question": questions[i], "answer": answers[i]} for i in range(2)]
+
+    router = QuestionRouter(question_core=None)
+    assert router._calculate_engagement(frozen) == router._calculate_engagement(plain)
+
+    record = answer_history[0]
+    assert isinstance(record, dict)
+    assert json.loads(json.dumps(record)) == answers[0]
+    assert pickle.loads(pickle.dumps(record)) == answers[0]
+    for mutate in (lambda: record.update(answer="x"), lambda: record.pop("answer"), record.clear):
+        with pytest.raises(TypeError):
+            mutate()
@@ -0,0 +1,138 @@
+"""
+Unit Tests: Trajectory Store
+
+Тестирует упорядоченную траекторию personality_evolution:
+- Последние N снимков по времени, а не первые N из scroll
+- Инкрементальное дочитывание только новых точек
+- Тренды по окну из numpy серии
+- Снимки без Big Five не участвуют в трендах
+"""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from data_access.trajectory_store import ORDER_KEY, TrajectorySeries, TrajectoryStore
+
+
+class FakeQdrant:
+    """personality_evolution в памяти: scroll в произвольном порядке, как у Qdrant без order_by"""
+
+    def __init__(self):
+        self.points = []
+        self.scrolled = 0
+        self.indexes = []
+
+    def add(self, user_id, snapshot_id, openness):
+        self.points.append(SimpleNamespace(payload={
+            "user_id": user_id,
+            ORDER_KEY: snapshot_id,
+            "created_at": f"2026-01-{snapshot_id:02d}T00:00:00",
+            "personality_snapshot": {"big_five": {"openness": openness, "neuroticism": {"score": 0.4}}},
+        }))
+
+    async def create_payload_index(self, collection_name, field_name, field_schema):
+        self.indexes.append(field_name)
+
+    async def scroll(self, collection_name, scroll_filter, limit, with_payload, with_vectors, offset=None, order_by=None):
+        matched = []
+        for point in self.points:
+            ok = True
+            for condition in scroll_filter.must:
+                value = point.payload.get(condition.key)
+                if condition.match is not None and value != condition.match.value:
+                    ok = False
+                if condition.range is not None and not value > condition.range.gt:
+                    ok = False
+            if ok:
+                matched.append(point)
+
+        if order_by is not None:
+            matched.sort(key=lambda p: p.payload[ORDER_KEY])
+            if order_by.start_from is not None:
+                matched = [p for p in matched if p.payload[ORDER_KEY] >= order_by.start_from]
+            page = matched[:limit]
+            self.scrolled += len(page)
+            return page, None
+
+        random.Random(len(matched)).shuffle(matched)
+        start = offset or 0
+        page = matched[start:start + limit]
+        self.scrolled += len(page)
+        return page, (start + limit if start + limit < len(matched) else None)
+
+
+@pytest.fixture
+def client():
+    client = FakeQdrant()
+    for snapshot_id in range(1, 31):
+        client.add(user_id=1, snapshot_id=snapshot_id, openness=snapshot_id / 100)
+    client.add(user_id=2, snapshot_id=5, openness=0.9)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_latest_points_in_time_order(client):
+    store = TrajectoryStore(client, page_size=8)
+
+    series = await store.get_series(1)
+    points = series.to_points(limit=20)
+
+    assert [p["snapshot_id"] for p in points] == list(range(11, 31))
+    assert points[-1]["big_five"]["openness"] == pytest.approx(0.30)
+    assert points[-1]["big_five"]["neuroticism"] == pytest.approx(0.4)
+    assert set(client.indexes) == {"user_id", ORDER_KEY}
+
+
+@pytest.mark.asyncio
+async def test_only_new_points_are_fetched(client):
+    store = TrajectoryStore(client, page_size=8)
+    await store.get_series(1)
+    client.scrolled = 0
+
+    client.add(user_id=1, snapshot_id=31, openness=0.5)
+    series = await store.get_series(1)
+
+    assert client.scrolled == 1
+    assert len(series) == 31
+    assert series.last_snapshot_id == 31
+
+
+@pytest.mark.asyncio
+async def test_trends_over_window(client):
+    series = await TrajectoryStore(client).get_series(1)
+
+    trends = series.trends(window=10)
+
+    assert trends["openness"]["change"] == pytest.approx(0.09)
+    assert trends["openness"]["current_value"] == pytest.approx(0.30)
+    assert trends["neuroticism"]["change"] == pytest.approx(0.0)
+    assert series.deltas(window=3)[:, 0] == pytest.approx([0.01, 0.01, 0.01])
+
+
+def test_points_without_traits_skip_trends():
+    series = TrajectorySeries.from_points([
+        {"snapshot_id": 1, "created_at": "2026-01-01", "big_five": {"openness": 0.2}},
+        {"snapshot_id": 2, "created_at": "2026-01-02", "big_five": {}},
+        {"snapshot_id": 3, "created_at": "2026-01-03", "big_five": {"openness": 0.6}},
+    ])
+
+    assert len(series) == 3
+    assert series.trends(window=3)["openness"]["change"] == pytest.approx(0.4)
+    assert series.to_points()[1]["big_five"] == {}
+    assert series.time_span(window=3) == "2026-01-01 → 2026-01-03"
+    assert series.trends(window=1) == {}
+
+
+@pytest.mark.asyncio
+async def test_server_side_order_by_paging(client, monkeypatch):
+    import data_access.trajectory_store as trajectory_store
+
+    monkeypatch.setattr(trajectory_store, "ORDER_BY_AVAILABLE", True)
+    monkeypatch.setattr(trajectory_store, "OrderBy", lambda **kwargs: SimpleNamespace(**kwargs), raising=False)
+    monkeypatch.setattr(trajectory_store, "Direction", SimpleNamespace(ASC="asc"), raising=False)
+
+    series = await TrajectoryStore(client, page_size=8).get_series(1)
+
+    assert [p["snapshot_id"] for p in series.to_points()] == list(range(1, 31))
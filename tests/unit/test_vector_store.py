@@ -0,0 +1,153 @@
+"""
+Unit Tests: Vector Store Gateway
+
+Тестирует батчевую запись в Qdrant:
+- Параллельные upsert в одну коллекцию уходят одним вызовом
+- Группировка по коллекциям
+- Повторный ID в батче - побеждает последняя точка
+- Ошибка записи возвращается всем ожидающим
+- Backpressure при заполненной очереди
+- flush()/close() дописывают очередь
+- close() после timeout flush завершает ожидающих upsert с False
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from selfology_bot.database.vector_store import VectorStoreGateway
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+class FakeAsyncQdrant:
+    """Записывает upsert вызовы вместо HTTP"""
+
+    def __init__(self, error: Exception = None, delay: float = 0):
+        self.upserts = []
+        self.error = error
+        self.delay = delay
+        self.closed = False
+
+    async def upsert(self, collection_name, points):
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        self.upserts.append((collection_name, [p.id for p in points]))
+
+    async def close(self):
+        self.closed = True
+
+
+def point(point_id, **payload):
+    return SimpleNamespace(id=point_id, vector=[0.0], payload=payload)
+
+
+@pytest.fixture
+def client():
+    return FakeAsyncQdrant()
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_concurrent_upserts_share_one_call(client):
+    store = VectorStoreGateway(client=client, flush_interval_ms=5)
+
+    results = await asyncio.gather(*[
+        store.upsert("personality_profiles", [point(i)]) for i in range(5)
+    ])
+
+    assert all(results)
+    assert client.upserts == [("personality_profiles", [0, 1, 2, 3, 4])]
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_one_upsert_per_collection(client):
+    store = VectorStoreGateway(client=client, flush_interval_ms=5)
+
+    await asyncio.gather(
+        store.upsert("personality_profiles", [point(1)]),
+        store.upsert("quick_match", [point(1)]),
+        store.upsert("personality_profiles", [point(2)]),
+    )
+
+    assert dict(client.upserts) == {"personality_profiles": [1, 2], "quick_match": [1]}
+    assert store.get_stats()["batches_written"] == 2
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_duplicate_ids_keep_last_point(client):
+    store = VectorStoreGateway(client=client, flush_interval_ms=5)
+
+    await store.upsert("personality_profiles", [point(7, version=1), point(7, version=2)])
+
+    assert client.upserts == [("personality_profiles", [7])]
+    assert store.get_stats()["points_written"] == 1
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_write_error_returns_false_to_waiters():
+    store = VectorStoreGateway(client=FakeAsyncQdrant(error=RuntimeError("qdrant down")), flush_interval_ms=5)
+
+    results = await asyncio.gather(
+        store.upsert("personality_profiles", [point(1)]),
+        store.upsert("personality_profiles", [point(2)]),
+    )
+
+    assert results == [False, False]
+    assert store.get_stats()["points_failed"] == 2
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_bounded_queue_applies_backpressure():
+    client = FakeAsyncQdrant(delay=0.05)
+    store = VectorStoreGateway(client=client, max_batch_size=2, flush_interval_ms=1, max_queue_size=2)
+
+    task = asyncio.ensure_future(store.upsert("quick_match", [point(i) for i in range(6)], wait=False))
+    await asyncio.sleep(0.01)
+
+    assert not task.done()
+    assert store.get_stats()["queue_depth"] <= 2
+
+    assert await asyncio.wait_for(task, timeout=1)
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_close_flushes_fire_and_forget_writes(client):
+    store = VectorStoreGateway(client=client, flush_interval_ms=10_000, max_batch_size=100)
+
+    await store.upsert("personality_evolution", [point(1), point(2)], wait=False)
+    assert await store.close(timeout=1)
+
+    assert client.upserts == [("personality_evolution", [1, 2])]
+    assert client.closed
+
+    with pytest.raises(RuntimeError):
+        await store.upsert("personality_evolution", [point(3)])
+
+
+@pytest.mark.asyncio
+async def test_close_timeout_resolves_waiters():
+    client = FakeAsyncQdrant(delay=1)
+    store = VectorStoreGateway(client=client, max_batch_size=1, flush_interval_ms=1)
+
+    waiters = [asyncio.ensure_future(store.upsert("quick_match", [point(i)])) for i in range(3)]
+    await asyncio.sleep(0.01)
+
+    # Первая точка в записи, остальные в очереди
+    assert not await store.close(timeout=0.05)
+
+    assert await asyncio.wait_for(asyncio.gather(*waiters), timeout=1) == [False, False, False]
+    assert store.get_stats()["points_failed"] == 3
+    assert store.get_stats()["queue_depth"] == 0